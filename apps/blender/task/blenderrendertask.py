@@ -22,6 +22,7 @@ from apps.core.task.coretask import CoreTaskTypeInfo
 from apps.rendering.resources.imgrepr import load_as_pil
 from apps.rendering.resources.renderingtaskcollector import RenderingTaskCollector
 from apps.rendering.resources.utils import handle_image_error, handle_none
+from apps.rendering.task.previewcompositor import PreviewCanvas
 from apps.rendering.task.framerenderingtask import FrameRenderingTask, FrameRenderingTaskBuilder, FrameRendererOptions
 from apps.rendering.task.renderingtask import PREVIEW_EXT, PREVIEW_X, PREVIEW_Y
 from apps.rendering.task.renderingtaskstate import RenderingTaskDefinition, RendererDefaults
@@ -46,7 +47,7 @@ class BlenderDefaults(RendererDefaults):
 
 class PreviewUpdater(object):
     def __init__(self, preview_file_path, preview_res_x, preview_res_y,
-                 expected_offsets):
+                 expected_offsets, canvas=None):
         # pairs of (subtask_number, its_image_filepath)
         # careful: chunks' numbers start from 1
         self.chunks = {}
@@ -54,6 +55,13 @@ class PreviewUpdater(object):
         self.preview_res_y = preview_res_y
         self.preview_file_path = preview_file_path
         self.expected_offsets = expected_offsets
+        # chunks are pasted into the canvas kept in memory, the preview
+        # file is only written when the canvas is flushed
+        if canvas is None:
+            canvas = PreviewCanvas(preview_file_path,
+                                   (preview_res_x, preview_res_y),
+                                   ext=PREVIEW_EXT)
+        self.canvas = canvas
 
         # where the match ends - since the chunks have unexpectable sizes, we 
         # don't know where to paste new chunk unless all of the above are in 
@@ -92,16 +100,10 @@ class PreviewUpdater(object):
             with subtask_img.resize((self.preview_res_x, height),
                                     resample=Image.BILINEAR) \
                     as subtask_img_resized:
-                def open_or_create_image():
-                    if not os.path.exists(self.preview_file_path) \
-                            or len(self.chunks) == 1:
-                        return Image.new("RGB", (self.preview_res_x,
-                                                 self.preview_res_y))
-                    return Image.open(self.preview_file_path)
-
-                with open_or_create_image() as preview_img:
-                    preview_img.paste(subtask_img_resized, (0, offset))
-                    preview_img.save(self.preview_file_path, PREVIEW_EXT)
+                if len(self.chunks) == 1:
+                    self.canvas.clear()
+                self.canvas.paste(subtask_img_resized, (0, offset))
+                self.canvas.flush()
 
         if not handler_result.success:
             return
@@ -115,11 +117,9 @@ class PreviewUpdater(object):
         self.chunks = {}
         self.perfect_match_area_y = 0
         self.perfectly_placed_subtasks = 0
-        if os.path.exists(self.preview_file_path):
-            with handle_image_error(logger), \
-                    Image.new("RGB", (self.preview_res_x, self.preview_res_y)) \
-                    as img:
-                img.save(self.preview_file_path, PREVIEW_EXT)
+        self.canvas.clear()
+        with handle_image_error(logger):
+            self.canvas.flush()
 
 
 class BlenderTaskTypeInfo(CoreTaskTypeInfo):
@@ -138,6 +138,10 @@ class BlenderTaskTypeInfo(CoreTaskTypeInfo):
 
     @classmethod
     def get_preview(cls, task, single=False):
+        if task:
+            # Write previews that are only kept in memory so far
+            task.flush_previews(force=True)
+
         result = None
         if not task:
             pass
@@ -364,18 +368,16 @@ class BlenderRenderTask(FrameRenderingTask):
                                                                   PREVIEW_EXT)
                 preview_path = os.path.join(self.tmp_dir, preview_name)
                 self.preview_file_path.append(preview_path)
-                self.preview_updaters.append(PreviewUpdater(preview_path, 
-                                                            preview_x,
-                                                            preview_y, 
-                                                            expected_offsets))
+                self.preview_updaters.append(PreviewUpdater(
+                    preview_path, preview_x, preview_y, expected_offsets,
+                    canvas=self._get_preview_canvas(preview_path)))
         else:
             preview_name = "current_preview.{}".format(PREVIEW_EXT)
             self.preview_file_path = "{}".format(os.path.join(self.tmp_dir,
                                                               preview_name))
-            self.preview_updater = PreviewUpdater(self.preview_file_path, 
-                                                  preview_x,
-                                                  preview_y, 
-                                                  expected_offsets)
+            self.preview_updater = PreviewUpdater(
+                self.preview_file_path, preview_x, preview_y, expected_offsets,
+                canvas=self._get_preview_canvas(self.preview_file_path))
 
     @coretask.accepting
     def query_extra_data(self, perf_index, num_cores=0, node_id=None, node_name=None):
@@ -546,8 +548,11 @@ class BlenderRenderTask(FrameRenderingTask):
                 preview_task_file_path = self._get_preview_task_file_path(num)
                 self.last_preview_path = preview_task_file_path
 
-                scaled.save(preview_task_file_path, PREVIEW_EXT)
-                scaled.save(self._get_preview_file_path(num), PREVIEW_EXT)
+                for path in (preview_task_file_path,
+                             self._get_preview_file_path(num)):
+                    preview = self._get_preview_canvas(path)
+                    preview.replace(scaled)
+                    preview.flush()
         else:
             self.preview_updaters[num].update_preview(new_chunk_file_path, part)
             self._update_frame_task_preview()
@@ -571,17 +576,15 @@ class BlenderRenderTask(FrameRenderingTask):
         lower = preview_updater.get_offset(part)
         upper = preview_updater.get_offset(part + 1)
         res_x = preview_updater.preview_res_x
-        for i in range(0, res_x):
-                for j in range(lower, upper):
-                    img_task.putpixel((i, j), color)
+        img_task.paste(color, (0, lower, res_x, upper))
 
     def _mark_task_area(self, subtask, img_task, color, frame_index=0):
         if not self.use_frames:
             self.mark_part_on_preview(subtask['start_task'], img_task, color, self.preview_updater)
         elif self.total_tasks <= len(self.frames):
-            for i in range(0, int(math.floor(self.res_x * self.scale_factor))):
-                for j in range(0, int(math.floor(self.res_y * self.scale_factor))):
-                    img_task.putpixel((i, j), color)
+            preview_x = int(math.floor(self.res_x * self.scale_factor))
+            preview_y = int(math.floor(self.res_y * self.scale_factor))
+            img_task.paste(color, (0, 0, preview_x, preview_y))
         else:
             parts = int(self.total_tasks / len(self.frames))
             pu = self.preview_updaters[frame_index]
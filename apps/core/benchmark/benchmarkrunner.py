@@ -9,6 +9,11 @@ logger = logging.getLogger("apps.core")
 
 
 class CoreBenchmark(metaclass=abc.ABCMeta):
+    # Number of CPU cores kept busy while the benchmark runs; None means all
+    # cores assigned to Docker. Benchmarks are run concurrently only if their
+    # costs fit in that number.
+    cpu_cost = None
+
     @property
     @abc.abstractmethod
     def normalization_constant(self) -> float:
@@ -215,6 +215,8 @@ class CoreTask(Task):
             self.VERIFIER_CLASS,
             subtask_id,
             verification_finished,
+            task_id=self.header.task_id,
+            priority=self.get_verification_priority(),
             subtask_info=self.subtasks_given[subtask_id],
             results=result_files,
             resources=self.task_resources,
@@ -224,6 +226,14 @@ class CoreTask(Task):
     def get_reference_data(self):
         return []
 
+    def get_verification_priority(self):
+        """ Verifications of tasks with an earlier deadline and then of tasks
+        closer to completion are run first
+        :return tuple:
+        """
+        return (self.header.deadline,
+                self.total_tasks - self.num_tasks_received)
+
     def verification_finished(self, subtask_id, verdict, result):
         if verdict == SubtaskVerificationState.VERIFIED:
             self.accept_results(subtask_id, result['extra_data']['results'])
@@ -1,12 +1,18 @@
+import heapq
+import itertools
 import logging
-import queue
 import threading
-from collections import namedtuple
+import time
+from collections import deque, namedtuple
 from datetime import datetime
 import os
 from types import FunctionType
-from typing import Optional, Type
+from typing import Any, Dict, Optional, Type
 
+import psutil
+
+from golem.core.common import get_cpu_count
+from golem.diag.service import DiagnosticsProvider
 from golem.task.localcomputer import ComputerAdapter
 
 from golem.verification.verifier import (StateVerifier,
@@ -14,6 +20,10 @@ from golem.verification.verifier import (StateVerifier,
 
 logger = logging.getLogger("apps.core")
 
+# Memory a single verification is expected to use; limits the default
+# number of verifications run in parallel
+VERIFICATION_MEMORY_SIZE = 1024 * 1024 * 1024
+
 
 class CoreVerifier(StateVerifier):
 
@@ -52,27 +62,101 @@ class CoreVerifier(StateVerifier):
         return True
 
 
-class VerificationQueue:
+class VerificationStats:
+    """ Verification metrics of a single task """
+
+    def __init__(self) -> None:
+        self.running = 0
+        self.finished = 0
+        self.total_wait = 0.0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def started(self, wait: float) -> None:
+        self.running += 1
+        self.total_wait += wait
+
+    def completed(self, latency: float) -> None:
+        self.running -= 1
+        self.finished += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def to_dict(self, queued: int) -> dict:
+        started = self.running + self.finished
+        return {
+            'queued': queued,
+            'running': self.running,
+            'finished': self.finished,
+            'mean_wait': self.total_wait / started if started else 0.0,
+            'mean_latency': (self.total_latency / self.finished
+                             if self.finished else 0.0),
+            'max_latency': self.max_latency,
+        }
+
+
+def default_concurrency() -> int:
+    """ Number of verifications that can be run in parallel, limited by the
+    number of CPU cores and the available memory
+    :return int:
+    """
+    by_memory = psutil.virtual_memory().total // VERIFICATION_MEMORY_SIZE
+    return max(min(get_cpu_count(), by_memory), 1)
+
+
+class VerificationQueue(DiagnosticsProvider):
+    """ Runs subtask verifications in parallel, up to a concurrency limit.
+    Waiting verifications are grouped by task and tasks are served in
+    rounds, one verification per task in each round, so a task with a long
+    backlog does not starve the others. Within a round tasks are ordered by
+    the priority of their most urgent verification; lower values first.
+
+    Stats of a task are kept while it has verifications queued or running.
+    """
 
     Entry = namedtuple('Entry', ['verifier_class', 'subtask_id',
-                                 'kwargs', 'cb'])
+                                 'kwargs', 'cb', 'task_id', 'submitted'])
 
-    def __init__(self, concurrency: int = 1) -> None:
+    def __init__(self, concurrency: Optional[int] = None) -> None:
 
-        self._concurrency = concurrency
-        self._queue: queue.Queue = queue.Queue()
+        self._concurrency = concurrency or default_concurrency()
 
         self._lock = threading.Lock()
+        # Verifications run in parallel, but their results are handled one
+        # at a time, as tasks do not expect concurrent result callbacks
+        self._callback_lock = threading.RLock()
+        self._seq = itertools.count()
         self._running = 0
+        # task id -> heap of (priority, sequence number, entry)
+        self._queues: Dict[Any, list] = {}
+        # tasks left to be served in the current round
+        self._round: deque = deque()
+        self._stats: Dict[Any, VerificationStats] = {}
 
-    def submit(self,
+    def submit(self,  # pylint: disable=too-many-arguments
                verifier_class: Type[Verifier],
                subtask_id: str,
                cb: FunctionType,
+               task_id: Optional[str] = None,
+               priority: tuple = (),
                **kwargs) -> None:
 
-        entry = self.Entry(verifier_class, subtask_id, kwargs, cb)
-        self._queue.put(entry)
+        entry = self.Entry(verifier_class, subtask_id, kwargs, cb, task_id,
+                           time.time())
+        with self._lock:
+            heapq.heappush(self._queues.setdefault(task_id, []),
+                           (priority, next(self._seq), entry))
+            self._stats.setdefault(task_id, VerificationStats())
+        self._process_queue()
+
+    def set_concurrency(self, concurrency: Optional[int]) -> None:
+        """ Change the number of verifications run in parallel
+        :param concurrency: limit, the default one when None or not positive
+        """
+        if not isinstance(concurrency, int) or concurrency <= 0:
+            concurrency = default_concurrency()
+        with self._lock:
+            self._concurrency = concurrency
         self._process_queue()
 
     @property
@@ -80,32 +164,77 @@ class VerificationQueue:
         with self._lock:
             return self._running < self._concurrency
 
+    def get_stats(self, task_id: Optional[str] = None) -> dict:
+        """ Queue depth and verification latency (in seconds) of a task
+        :param task_id: task id
+        :return dict:
+        """
+        with self._lock:
+            stats = self._stats.get(task_id) or VerificationStats()
+            return stats.to_dict(queued=len(self._queues.get(task_id, ())))
+
+    def get_all_stats(self) -> Dict[Any, dict]:
+        with self._lock:
+            return {
+                task_id: stats.to_dict(
+                    queued=len(self._queues.get(task_id, ())))
+                for task_id, stats in self._stats.items()
+            }
+
+    def get_diagnostics(self, output_format):
+        return self._format_diagnostics(self.get_all_stats(), output_format)
+
     def _process_queue(self) -> None:
-        if self.can_run:
-            entry = self._next()
-            if entry:
-                self._run(entry)
+        while True:
+            with self._lock:
+                if self._running >= self._concurrency:
+                    return
+                entry = self._next()
+                if not entry:
+                    return
+                self._running += 1
+                self._stats[entry.task_id].started(
+                    time.time() - entry.submitted)
+            self._run(entry)
 
     def _next(self) -> Optional['Entry']:
-        try:
-            return self._queue.get(block=False)
-        except queue.Empty:
+        """ Must be called with the lock held """
+        if not self._round:
+            self._round = deque(sorted(
+                self._queues, key=lambda task_id: self._queues[task_id][0][:2]
+            ))
+        if not self._round:
             return None
 
-    def _run(self, entry: Entry) -> None:
+        task_id = self._round.popleft()
+        task_queue = self._queues[task_id]
+        _, _, entry = heapq.heappop(task_queue)
+        if not task_queue:
+            del self._queues[task_id]
+        return entry
+
+    def _finished(self, entry: Entry) -> None:
         with self._lock:
-            self._running += 1
+            self._running -= 1
+            stats = self._stats[entry.task_id]
+            stats.completed(time.time() - entry.submitted)
 
+            if not stats.running and entry.task_id not in self._queues:
+                del self._stats[entry.task_id]
+                logger.debug("Verification stats of task %r: %r",
+                             entry.task_id, stats.to_dict(queued=0))
+
+    def _run(self, entry: Entry) -> None:
         subtask_id = entry.subtask_id
         logger.info("Running verification of subtask %r", subtask_id)
 
         def callback(*args, **kwargs):
-            with self._lock:
-                self._running -= 1
+            self._finished(entry)
 
             logger.info("Finished verification of subtask %r", subtask_id)
             try:
-                entry.cb(*args, **kwargs)
+                with self._callback_lock:
+                    entry.cb(*args, **kwargs)
             finally:
                 self._process_queue()
 
@@ -114,13 +243,15 @@ class VerificationQueue:
             verifier.computer = ComputerAdapter()
             verifier.start_verification(**entry.kwargs)
         except Exception as exc:  # pylint: disable=broad-except
-            with self._lock:
-                self._running -= 1
+            self._finished(entry)
 
             logger.error("Failed to start verification of subtask %r: %r",
                          subtask_id, exc)
             self._process_queue()
 
     def _reset(self) -> None:
-        self._queue = queue.Queue()
-        self._running = 0
+        with self._lock:
+            self._queues = {}
+            self._round = deque()
+            self._stats = {}
+            self._running = 0
@@ -1,9 +1,21 @@
 """Functions used in the computation of subtasks of the dummy task"""
 
 import hashlib
+import multiprocessing
+import os
 import random
+import struct
 import time
 
+try:
+    import queue
+except ImportError:  # Python 2
+    import Queue as queue
+
+# Number of trailing hex digits iterated over for a single hashed prefix
+SUFFIX_DIGITS = 4
+WORKER_JOIN_TIMEOUT = 5
+
 
 def check_pow(proof, input_data, difficulty):
     """
@@ -19,21 +31,134 @@ def check_pow(proof, input_data, difficulty):
     return h >= difficulty
 
 
-def find_pow(input_data, difficulty, result_size):
+def _available_cpus():
+    """Number of CPUs this process may run on (respects container cpusets)
+    :rtype int:
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # Python 2
+        pass
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('Cpus_allowed_list:'):
+                    count = 0
+                    for part in line.split(':', 1)[1].strip().split(','):
+                        bounds = part.split('-')
+                        count += int(bounds[-1]) - int(bounds[0]) + 1
+                    return count
+    except (IOError, OSError, ValueError):
+        pass
+    return multiprocessing.cpu_count()
+
+
+def _suffixes(suffix_digits):
+    """Hex encoded suffixes of all candidates within a single block
+    :param int suffix_digits:
+    :rtype list:
+    """
+    if suffix_digits == 0:
+        return [b'']
+    return [('%0*x' % (suffix_digits, i)).encode()
+            for i in range(16 ** suffix_digits)]
+
+
+def _find_pow_strided(input_data, difficulty, result_size, start, step,
+                      stop_event=None):
+    """Search for a proof in blocks of candidates sharing the same leading
+    hex digits. Input and leading digits are hashed once per block, then
+    the hash state is copied for each candidate. Blocks are visited starting
+    from `start`, every `step`-th one, wrapping around the range of numbers
+    of `result_size` hex digits.
+    :param str input_data:
+    :param int difficulty:
+    :param int result_size:
+    :param int start: index of the first block
+    :param int step: block stride
+    :param stop_event: optional event that aborts the search
+    :rtype long|None: None if aborted
+    """
+    suffix_digits = min(SUFFIX_DIGITS, result_size - 1)
+    suffix_bits = suffix_digits * 4
+    suffixes = _suffixes(suffix_digits)
+    # Comparing big endian bytes is equivalent to comparing integers
+    target = struct.pack('>I', difficulty)
+
+    # Leading digits never start with 0, so they always have
+    # result_size - suffix_digits digits
+    first_high = 1 << ((result_size - suffix_digits) * 4 - 1)
+    num_highs = first_high
+
+    input_sha = hashlib.sha256(input_data.encode())
+    offset = start
+    while stop_event is None or not stop_event.is_set():
+        high = first_high + offset % num_highs
+        block_sha = input_sha.copy()
+        block_sha.update(('%x' % high).encode())
+        for i, suffix in enumerate(suffixes):
+            sha = block_sha.copy()
+            sha.update(suffix)
+            if sha.digest()[:4] >= target:
+                return (high << suffix_bits) | i
+        offset += step
+    return None
+
+
+def _pow_worker(input_data, difficulty, result_size, start, step,
+                stop_event, results):
+    solution = _find_pow_strided(input_data, difficulty, result_size,
+                                 start, step, stop_event)
+    if solution is not None:
+        results.put(solution)
+
+
+def find_pow(input_data, difficulty, result_size, processes=None):
     """
     :param str input_data:
     :param int difficulty:
     :param int result_size:
+    :param int processes: number of worker processes, defaults to the number
+                          of available CPUs
     :rtype long:
     """
-    num_bits = result_size * 4
-    # This ensures that the generated number will not start with 0's as hex
-
-    solution = (1 << (num_bits - 1)) | random.getrandbits(num_bits - 1)
-    while True:
-        if check_pow(solution, input_data, difficulty):
-            return solution
-        solution += 1
+    if processes is None:
+        processes = _available_cpus()
+
+    # Random first block; leading digits will not start with 0's as hex
+    start = random.getrandbits(
+        max((result_size - SUFFIX_DIGITS) * 4 - 1, 1))
+
+    if processes <= 1:
+        return _find_pow_strided(input_data, difficulty, result_size,
+                                 start, 1)
+
+    stop_event = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(
+            target=_pow_worker,
+            args=(input_data, difficulty, result_size, start + i, processes,
+                  stop_event, results))
+        for i in range(processes)
+    ]
+    for worker in workers:
+        worker.daemon = True
+        worker.start()
+
+    try:
+        while True:
+            try:
+                return results.get(timeout=1)
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in workers):
+                    raise RuntimeError("All proof-of-work workers failed")
+    finally:
+        stop_event.set()
+        for worker in workers:
+            worker.join(WORKER_JOIN_TIMEOUT)
+            if worker.is_alive():
+                worker.terminate()
 
 
 def run_dummy_task(data_file, subtask_string, difficulty, result_size):
@@ -0,0 +1,259 @@
+""" Reading, writing and merging of LuxRender film (.flm) files.
+
+A film file is a gzip compressed little-endian stream of a header followed
+by pixel data. Each buffer group stores the number of samples taken (double)
+and then, for every buffer and every pixel, five floats: the XYZ colour,
+alpha and the sum of sample weights. Merging films sums all these values,
+which is what luxmerger does.
+
+Films of the same scene have similar radiance per sample, which is used to
+spot results that do not belong to the running sum.
+"""
+from collections import namedtuple
+import gzip
+import os
+import struct
+from threading import Lock
+import zlib
+
+import numpy
+
+FLM_MAGIC_NUMBER = 0xCEBCD0F0
+PIXEL_CHANNELS = 5
+
+_GZIP_MAGIC = b'\x1f\x8b'
+_COMPRESS_LEVEL = 4
+
+# params is a tuple of (type, id, index, value) where value is raw bytes
+FlmHeader = namedtuple('FlmHeader', ['version', 'x_resolution',
+                                     'y_resolution', 'num_groups',
+                                     'buffer_types', 'params'])
+
+
+class FlmError(Exception):
+    pass
+
+
+class Flm(object):
+    """ Film read from a file.
+    :param FlmHeader header:
+    :param numpy.ndarray samples: number of samples of each buffer group
+    :param numpy.ndarray pixels: float32 array of shape
+        (groups, buffers, y_resolution, x_resolution, PIXEL_CHANNELS)
+    :param bytes trailer: data following the pixels, kept as is
+    """
+
+    def __init__(self, header, samples, pixels, trailer=b''):
+        self.header = header
+        self.samples = samples
+        self.pixels = pixels
+        self.trailer = trailer
+
+    @property
+    def layout(self):
+        """ Everything that has to be equal for two films to be merged """
+        header = self.header
+        return (header.version, header.x_resolution, header.y_resolution,
+                header.num_groups, header.buffer_types)
+
+
+class _Reader(object):
+    def __init__(self, data):
+        self.data = data
+        self.offset = 0
+
+    def unpack(self, fmt):
+        try:
+            values = struct.unpack_from(fmt, self.data, self.offset)
+        except struct.error:
+            raise FlmError("Unexpected end of film data")
+        self.offset += struct.calcsize(fmt)
+        return values
+
+    def read(self, size):
+        if self.offset + size > len(self.data):
+            raise FlmError("Unexpected end of film data")
+        value = self.data[self.offset:self.offset + size]
+        self.offset += size
+        return value
+
+
+def parse_flm(data):
+    """ Parse uncompressed film data
+    :param bytes data:
+    :return Flm:
+    """
+    reader = _Reader(data)
+    magic, version, x_res, y_res, num_groups, num_buffers = \
+        reader.unpack('<IIIIII')
+    if magic != FLM_MAGIC_NUMBER:
+        raise FlmError("Not a film file")
+    buffer_types = reader.unpack('<{}I'.format(num_buffers))
+    num_params, = reader.unpack('<I')
+    params = []
+    for _ in range(num_params):
+        param_type, size, param_id, index = reader.unpack('<IIII')
+        params.append((param_type, param_id, index, reader.read(size)))
+
+    header = FlmHeader(version, x_res, y_res, num_groups, buffer_types,
+                       tuple(params))
+    shape = (num_buffers, y_res, x_res, PIXEL_CHANNELS)
+    count = num_buffers * y_res * x_res * PIXEL_CHANNELS
+    if len(data) - reader.offset < num_groups * (8 + 4 * count):
+        raise FlmError("Unexpected end of film data")
+
+    samples = numpy.empty(num_groups, dtype=numpy.float64)
+    pixels = numpy.empty((num_groups,) + shape, dtype=numpy.float32)
+    for group in range(num_groups):
+        samples[group], = reader.unpack('<d')
+        pixels[group] = numpy.frombuffer(
+            data, dtype='<f4', count=count, offset=reader.offset
+        ).reshape(shape)
+        reader.offset += 4 * count
+
+    return Flm(header, samples, pixels, bytes(data[reader.offset:]))
+
+
+def read_flm(path):
+    """ Read a film file, compressed or not
+    :param str path:
+    :return Flm:
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:2] == _GZIP_MAGIC:
+        try:
+            data = gzip.decompress(data)
+        except (OSError, EOFError, zlib.error) as err:
+            raise FlmError("Cannot decompress film: {}".format(err))
+    return parse_flm(data)
+
+
+def serialize_flm(flm):
+    """ Uncompressed film data
+    :param Flm flm:
+    :return bytes:
+    """
+    header = flm.header
+    chunks = [
+        struct.pack('<IIIIII', FLM_MAGIC_NUMBER, header.version,
+                    header.x_resolution, header.y_resolution,
+                    header.num_groups, len(header.buffer_types)),
+        struct.pack('<{}I'.format(len(header.buffer_types)),
+                    *header.buffer_types),
+        struct.pack('<I', len(header.params)),
+    ]
+    for param_type, param_id, index, value in header.params:
+        chunks.append(struct.pack('<IIII', param_type, len(value), param_id,
+                                  index))
+        chunks.append(value)
+    for group in range(header.num_groups):
+        chunks.append(struct.pack('<d', flm.samples[group]))
+        chunks.append(flm.pixels[group].astype('<f4', copy=False).tobytes())
+    chunks.append(flm.trailer)
+    return b''.join(chunks)
+
+
+def write_flm(flm, path):
+    """ Write a gzip compressed film file
+    :param Flm flm:
+    :param str path:
+    """
+    tmp_path = path + '.tmp'
+    with gzip.open(tmp_path, 'wb', compresslevel=_COMPRESS_LEVEL) as f:
+        f.write(serialize_flm(flm))
+    os.replace(tmp_path, path)
+
+
+def radiance_per_sample(flm):
+    """ Mean luminance (Y) of the film per sample taken, for every buffer
+    group. Groups without samples are NaN.
+    :param Flm flm:
+    :return numpy.ndarray:
+    """
+    luminance = flm.pixels[..., 1].reshape(flm.header.num_groups, -1) \
+        .sum(axis=1, dtype=numpy.float64)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        return numpy.where(flm.samples > 0, luminance / flm.samples,
+                           numpy.nan)
+
+
+class FlmMerger(object):
+    """ Running sum of films. Films are added one by one as they arrive, so
+    the merged film is ready as soon as the last one is received. Methods
+    may be called from different threads.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._flm = None
+        self.count = 0
+
+    @property
+    def empty(self):
+        return self._flm is None
+
+    def check(self, flm, tolerance=None):
+        """ Check if a film can be merged with the films added so far
+        :param Flm flm:
+        :param float tolerance: maximum relative difference between
+            the radiance per sample of the film and of the running sum;
+            radiance is not compared when None
+        :raises FlmError: film is incompatible or holds invalid values
+        """
+        expected = None
+        with self._lock:
+            self._check_layout(flm)
+            if tolerance is not None and self._flm is not None:
+                expected = radiance_per_sample(self._flm)
+        self._check_values(flm)
+        if expected is not None:
+            self._check_radiance(flm, expected, tolerance)
+
+    def add(self, flm):
+        """ Add a film to the running sum
+        :param Flm flm:
+        :raises FlmError: film is incompatible or holds invalid values
+        """
+        self._check_values(flm)
+        with self._lock:
+            self._check_layout(flm)
+            if self._flm is None:
+                self._flm = Flm(flm.header, flm.samples.copy(),
+                                flm.pixels.copy(), flm.trailer)
+            else:
+                self._flm.samples += flm.samples
+                self._flm.pixels += flm.pixels
+            self.count += 1
+
+    def write(self, path):
+        """ Write the merged film
+        :param str path:
+        :raises FlmError: no films have been added
+        """
+        with self._lock:
+            if self._flm is None:
+                raise FlmError("No films to write")
+            write_flm(self._flm, path)
+
+    def _check_layout(self, flm):
+        if self._flm is not None and self._flm.layout != flm.layout:
+            raise FlmError("Incompatible film: {} != {}".format(
+                flm.layout, self._flm.layout))
+
+    @staticmethod
+    def _check_radiance(flm, expected, tolerance):
+        actual = radiance_per_sample(flm)
+        compared = numpy.isfinite(actual) & numpy.isfinite(expected)
+        difference = numpy.abs(actual - expected)[compared]
+        if (difference > tolerance * numpy.abs(expected[compared])).any():
+            raise FlmError("Film radiance per sample {} differs from {}"
+                           .format(actual, expected))
+
+    @staticmethod
+    def _check_values(flm):
+        if not numpy.isfinite(flm.samples).all() \
+                or (flm.samples < 0).any():
+            raise FlmError("Invalid number of samples")
+        if not numpy.isfinite(flm.pixels).all():
+            raise FlmError("Invalid pixel values")
@@ -11,6 +11,7 @@ from copy import copy
 from PIL import Image, ImageChops, ImageOps
 
 import apps.lux.resources.scenefilereader as sfr
+from apps.lux.resources.flm import FlmError, FlmMerger, read_flm
 from apps.core.task import coretask
 from apps.core.task.coretask import CoreTaskTypeInfo
 from apps.lux.luxenvironment import LuxRenderEnvironment
@@ -163,10 +164,14 @@ class LuxTask(renderingtask.RenderingTask):
 
         self.preview_exr = None
         self.reference_runs = 2
+        # Running sum of received films, rebuilt from collected files
+        # after the task is restored
+        self.film_merger = FlmMerger()
 
     def __getstate__(self):
         state = super(LuxTask, self).__getstate__()
         state['preview_exr'] = None
+        state['film_merger'] = None
         return state
 
     def initialize(self, dir_manager):
@@ -229,43 +234,10 @@ class LuxTask(renderingtask.RenderingTask):
         self.subtasks_given[hash]['subtask_id'] = hash
         self.subtasks_given[hash]['root_path'] = self.root_path
         self.subtasks_given[hash]['tmp_dir'] = self.tmp_dir
-        self.subtasks_given[hash]['merge_ctd'] = self.__get_merge_ctd([])
 
         ctd = self._new_compute_task_def(hash, extra_data, None, perf_index)
         return self.ExtraData(ctd=ctd)
 
-    # GG propably same as query_extra_data_for_merge
-    def query_extra_data_for_flm_merging_test(self):
-        scene_src = regenerate_lux_file(
-            scene_file_src=self.scene_file_src,
-            xres=self.res_x,
-            yres=self.res_y,
-            halttime=4,
-            haltspp=1,
-            writeinterval=0.5,
-            crop=[0, 1, 0, 1],
-            output_format=self.output_format)
-
-        scene_dir = os.path.dirname(self._get_scene_file_rel_path())
-
-        extra_data = {
-            "path_root": self.main_scene_dir,
-            "start_task": 1,
-            "end_task": 1,
-            "total_tasks": 1,
-            "outfilebasename": "reference_merging_task",
-            "output_format": self.output_format,
-            "scene_file_src": scene_src,
-            "scene_dir": scene_dir,
-        }
-
-        ctd = self._new_compute_task_def(
-            "ReferenceMergingTask",
-            extra_data,
-            scene_dir,
-            0)
-        return ctd
-
     def query_extra_data_for_reference_task(self, counter):
         write_interval = \
             self._write_interval_wrapper(self.halttime)
@@ -301,10 +273,8 @@ class LuxTask(renderingtask.RenderingTask):
 
         return ctd
 
-    # FIXME check if just get_test_flm is not enough
     def get_reference_data(self):
-        get_test_flm = self.get_test_flm_for_verifier()
-        return [get_test_flm] + self.get_reference_imgs()
+        return [self.get_film_merger()] + self.get_reference_imgs()
 
     def get_reference_imgs(self):
         ref_imgs = []
@@ -323,18 +293,22 @@ class LuxTask(renderingtask.RenderingTask):
 
         return ref_imgs
 
-    def get_test_flm_for_verifier(self):
-        dm = self.dirManager
-        dir = os.path.join(
-            dm.get_ref_data_dir(
-                self.header.task_id,
-                counter='flmMergingTest'),
-            dm.tmp,
-            dm.output
-        )
-
-        test_flm = glob.glob(os.path.join(dir, '*.flm'))
-        return test_flm.pop()
+    def get_film_merger(self):
+        """ Running sum of the films collected so far
+        :return FlmMerger:
+        """
+        if self.film_merger is None:
+            self.film_merger = FlmMerger()
+            for flm_file in OrderedDict(
+                    sorted(self.collected_file_names.items())).values():
+                self._merge_film(flm_file)
+        return self.film_merger
+
+    def _merge_film(self, flm_file):
+        try:
+            self.film_merger.add(read_flm(flm_file))
+        except (FlmError, IOError, OSError) as err:
+            logger.error("Cannot merge film %r: %s", flm_file, err)
 
     ###################
     # CoreTask methods #
@@ -425,7 +399,12 @@ class LuxTask(renderingtask.RenderingTask):
         num_start = self.subtasks_given[subtask_id]['start_task']
         for tr_file in result_files:
             if has_ext(tr_file, ".flm"):
+                if num_start in self.collected_file_names:
+                    # The film is replaced, sum all the films again
+                    self.film_merger = None
                 self.collected_file_names[num_start] = tr_file
+                if self.film_merger is not None:
+                    self._merge_film(tr_file)
                 self.counting_nodes[
                     self.subtasks_given[subtask_id]['node_id']
                 ].accept()
@@ -554,21 +533,6 @@ class LuxTask(renderingtask.RenderingTask):
             computer.run()
             computer.tt.join()
 
-        path = self.dirManager.get_ref_data_dir(
-            self.header.task_id,
-            counter='flmMergingTest'
-        )
-
-        computer = LocalComputer(
-            root_path=path,
-            success_callback=self.__final_img_ready,
-            error_callback=self.__final_img_error,
-            get_compute_task_def=self.query_extra_data_for_flm_merging_test,
-            resources=self.task_resources
-        )
-        computer.run()
-        computer.tt.join()
-
     def __generate_final_file(self, flm):
         computer = LocalComputer(
             root_path=self.root_path,
@@ -603,6 +567,19 @@ class LuxTask(renderingtask.RenderingTask):
         self.collected_file_names = OrderedDict(
             sorted(self.collected_file_names.items())
         )
+        film_merger = self.get_film_merger()
+        if film_merger.count == len(self.collected_file_names):
+            new_flm = self.output_file + ".flm"
+            try:
+                film_merger.write(new_flm)
+            except (FlmError, IOError, OSError) as err:
+                self.__final_flm_failure(err)
+                return
+            self.__generate_final_file(new_flm)
+            return
+
+        # Some of the films could not be read, let luxmerger try
+        logger.warning("Merging films with luxmerger")
         computer = LocalComputer(
             root_path=self.root_path,
             success_callback=self.__final_flm_ready,
@@ -631,19 +608,6 @@ class LuxTask(renderingtask.RenderingTask):
         logger.error("Cannot generate final flm: {}".format(error))
         # TODO What should we do in this sitution?
 
-    # TODO Implement with proper verifier
-    def __generate_final_flm_advanced_verification(self):
-        # the file containing result of task test
-        test_result_flm = self.__get_test_flm()
-
-        new_flm = self.output_file + ".flm"
-        shutil.copy(test_result_flm, new_flm)
-        logger.debug("Copying " + test_result_flm + " to " + new_flm)
-        self.__generate_final_file(new_flm)
-
-    def __get_test_flm(self):
-        return os.path.join(self.tmp_dir, "test_result.flm")
-
 
 class LuxRenderTaskBuilder(renderingtask.RenderingTaskBuilder):
     TASK_CLASS = LuxTask
@@ -1,13 +1,11 @@
-from copy import deepcopy
 import logging
 import os
-import shutil
 
+from apps.lux.resources.flm import FlmError, read_flm
 from apps.rendering.resources.imgrepr import load_as_PILImgRepr
 from apps.rendering.resources.imgverifier import ImgVerifier, ImgStatistics
 from apps.rendering.task.verifier import RenderingVerifier
 
-from golem.core.fileshelper import common_dir, find_file_with_ext
 from golem.verification.verifier import SubtaskVerificationState
 
 
@@ -15,6 +13,9 @@ logger = logging.getLogger("apps.lux")
 
 
 class LuxRenderVerifier(RenderingVerifier):
+    # Maximum relative difference between the radiance per sample of
+    # a result film and of the films received so far
+    RADIANCE_TOLERANCE = 0.25
 
     def _check_files(self, subtask_info, results, reference_data, resources):
         # First, assume it is wrong ;p
@@ -35,7 +36,7 @@ class LuxRenderVerifier(RenderingVerifier):
                               resources):
         tr_flm_files, tr_preview_files = \
             self._extract_tr_files(subtask_info, results)
-        test_flm = self.reference_data[0]
+        film_merger = self.reference_data[0]
         ref_imgs = self.reference_data[1:]
         img_verifier = ImgVerifier()
 
@@ -48,10 +49,10 @@ class LuxRenderVerifier(RenderingVerifier):
         for img, flm_file in zip(tr_preview_files, tr_flm_files):
             self.__compare_img_with_flm(img, flm_file, subtask_info,
                                         img_verifier, cropped_ref_imgs,
-                                        reference_stats, test_flm)
+                                        reference_stats, film_merger)
 
     def __compare_img_with_flm(self, img, flm_file, subtask_info, img_verifier,
-                               cropped_ref_imgs, reference_stats, test_flm):
+                               cropped_ref_imgs, reference_stats, film_merger):
         crop_window = subtask_info['verification_crop_window']
         cropped_img = img_verifier.crop_img_relative(img, crop_window)
         imgstat = ImgStatistics(cropped_ref_imgs[0], cropped_img)
@@ -61,7 +62,7 @@ class LuxRenderVerifier(RenderingVerifier):
                                                     reference_stats)
 
         is_flm_merging_validation_passed = \
-            self.merge_flm_files(flm_file, subtask_info, test_flm)
+            self.verify_flm(flm_file, subtask_info, film_merger)
 
         if is_valid_against_reference == \
                 SubtaskVerificationState.VERIFIED and \
@@ -110,66 +111,21 @@ class LuxRenderVerifier(RenderingVerifier):
     def _has_ext(self, filename, ext):
         return filename.lower().endswith(ext.lower())
 
-    def merge_flm_files(self, new_flm, subtask_info, output):
-        if not self._check_computer():
-            return False
-
-        ctd = self.query_extra_data_for_advanced_verification(new_flm,
-                                                              subtask_info,
-                                                              output)
-
-        self.computer.start_computation(
-            root_path=subtask_info["root_path"],
-            success_callback=self._verify_flm_ready,
-            error_callback=self._verify_flm_failure,
-            compute_task_def=ctd,
-            resources=self.resources,
-            additional_resources=[output, new_flm]
-        )
-
-        if not self._wait_for_computer():
-            return False
-        if self.verification_error:
-            self.state = SubtaskVerificationState.NOT_SURE
-            self.message = "There was an verification error: {}".format(
-                self.verification_error)
-            return False
-        result = self.computer.get_result()
-        commonprefix = common_dir(result['data'])
-        flm = find_file_with_ext(commonprefix, [".flm"])
-        stderr = [x for x in result['data']
-                  if os.path.basename(x) == "stderr.log"]
-
-        if flm is None or not stderr:
-            self.message = "No produre output produce in verification " \
-                           "merging phase"
+    def verify_flm(self, flm_file, subtask_info, film_merger):
+        """ Check if a result film can be merged with the films received
+        so far and if its radiance per sample is close to theirs
+        :param str flm_file: result film path
+        :param dict subtask_info:
+        :param FlmMerger film_merger: running sum of received films
+        :return bool:
+        """
+        try:
+            flm = read_flm(flm_file)
+            resolution = (flm.header.x_resolution, flm.header.y_resolution)
+            if resolution != (subtask_info['res_x'], subtask_info['res_y']):
+                raise FlmError("Wrong film resolution {}".format(resolution))
+            film_merger.check(flm, tolerance=self.RADIANCE_TOLERANCE)
+        except (FlmError, IOError, OSError) as err:
+            self.message = "Cannot merge results: {}".format(err)
             return False
-        else:
-            try:
-                with open(stderr[0]) as f:
-                    stderr_in = f.read()
-                if "ERROR" in stderr_in:
-                    self.message = "Error while merging results"
-                    return False
-            except (IOError, OSError) as ex:
-                self.message = "Cannot merge results {}".format(ex)
-                return False
-
-            shutil.copy(flm, os.path.join(subtask_info["tmp_dir"],
-                                          "test_result.flm"))
-            return True
-
-    def query_extra_data_for_advanced_verification(self, new_flm,
-                                                   subtask_info, test_flm):
-        files = [os.path.basename(new_flm), os.path.basename(test_flm)]
-        merge_ctd = deepcopy(subtask_info["merge_ctd"])
-        merge_ctd['extra_data']['flm_files'] = files
-        return merge_ctd
-
-    def _verify_flm_ready(self, results, time_spend):
-        logger.info("Advance verification finished")
-        self.verification_error = False
-
-    def _verify_flm_failure(self, error):
-        logger.info("Advance verification failure {}".format(error))
-        self.verification_error = True
+        return True
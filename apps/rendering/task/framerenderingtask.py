@@ -186,8 +186,8 @@ class FrameRenderingTask(RenderingTask):
         empty_color = (0, 0, 0)
         sub = self.subtasks_given[subtask_id]
         for frame in sub['frames']:
-            # __mark_sub_frame() also saves preview_file_path(num)
             self.__mark_sub_frame(sub, frame, empty_color)
+        self.flush_previews()
 
     def _update_frame_preview(self, new_chunk_file_path, frame_num, part=1, final=False):
         num = self.frames.index(frame_num)
@@ -202,11 +202,16 @@ class FrameRenderingTask(RenderingTask):
                 with img.resize((int(round(self.scale_factor * img_x)),
                                  int(round(self.scale_factor * img_y))),
                                 resample=Image.BILINEAR) as img_resized:
-                    img_resized.save(self._get_preview_file_path(num),
-                                     PREVIEW_EXT)
-                    img_resized.save(preview_task_file_path, PREVIEW_EXT)
+                    for path in (self._get_preview_file_path(num),
+                                 preview_task_file_path):
+                        preview = self._get_preview_canvas(path)
+                        preview.replace(img_resized)
+                        preview.flush()
 
             if not final:
+                # _paste_new_chunk() reads the current preview from disk
+                self._get_preview_canvas(
+                    self._get_preview_file_path(num)).flush(force=True)
                 with self._paste_new_chunk(
                     img, self._get_preview_file_path(num), part,
                     int(self.total_tasks / len(self.frames))
@@ -289,17 +294,7 @@ class FrameRenderingTask(RenderingTask):
                 for frame in sub['frames']:
                     self.__mark_sub_frame(sub, frame, failed_color)
 
-    def _open_frame_preview(self, preview_file_path):
-
-        if not os.path.exists(preview_file_path):
-            with handle_image_error(logger), \
-                    Image.new("RGB",
-                              (int(round(self.res_x * self.scale_factor)),
-                               int(round(self.res_y * self.scale_factor)))) \
-                    as img:
-                img.save(preview_file_path, PREVIEW_EXT)
-
-        return Image.open(preview_file_path)
+        self.flush_previews()
 
     def _mark_task_area(self, subtask, img_task, color, frame_index=0):
         if not self.use_frames:
@@ -317,9 +312,7 @@ class FrameRenderingTask(RenderingTask):
             upper_y = int(math.ceil(part_height) * ((subtask['start_task'] - 1) % parts))
             lower_y = int(math.floor(part_height) * ((subtask['start_task'] - 1) % parts + 1))
 
-        for i in range(lower_x, upper_x):
-            for j in range(upper_y, lower_y):
-                img_task.putpixel((i, j), color)
+        img_task.paste(color, (lower_x, upper_y, upper_x, lower_y))
 
     def _choose_frames(self, frames, start_task, total_tasks):
         if total_tasks <= len(frames):
@@ -396,10 +389,10 @@ class FrameRenderingTask(RenderingTask):
 
     def __mark_sub_frame(self, sub, frame, color):
         idx = self.frames.index(frame)
-        preview_task_file_path = self._get_preview_task_file_path(idx)
-        with self._open_frame_preview(preview_task_file_path) as img_task:
-            self._mark_task_area(sub, img_task, color, idx)
-            img_task.save(preview_task_file_path, PREVIEW_EXT)
+        preview = self._get_preview_canvas(
+            self._get_preview_task_file_path(idx))
+        self._mark_task_area(sub, preview.image, color, idx)
+        preview.mark_changed()
 
     def _get_subtask_file_path(self, subtask_dir_list, name_dir, num):
         if subtask_dir_list[num] is None:
@@ -0,0 +1,129 @@
+import logging
+import os
+import time
+
+from PIL import Image, ImageChops
+
+logger = logging.getLogger("apps.rendering")
+
+# Minimal number of seconds between two writes of the same preview file
+FLUSH_INTERVAL = 2.0
+
+
+class PreviewCanvas(object):
+    """ Downscaled preview image kept in memory. Results are pasted into the
+    canvas and the image is encoded to its file at most once per
+    flush_interval seconds, unless the flush is forced.
+    """
+
+    def __init__(self, file_path, size, mode="RGB", ext="PNG",
+                 flush_interval=FLUSH_INTERVAL):
+        self.file_path = file_path
+        self.size = size
+        self.mode = mode
+        self.ext = ext
+        self.flush_interval = flush_interval
+        self._image = None
+        self._dirty = False
+        self._flushed_at = 0.0
+
+    def __getstate__(self):
+        # Tasks are pickled when saved, store the image in its file instead
+        try:
+            self.flush(force=True)
+        except (IOError, OSError, ValueError) as err:
+            logger.warning("Cannot save preview %r: %r", self.file_path, err)
+        state = self.__dict__.copy()
+        state['_image'] = None
+        state['_dirty'] = False
+        return state
+
+    @property
+    def image(self):
+        if self._image is None:
+            self._image = self._load()
+        return self._image
+
+    @property
+    def dirty(self):
+        return self._dirty
+
+    def mark_changed(self):
+        """ Call after the image has been modified in place """
+        self._dirty = True
+
+    def paste(self, img, offset=(0, 0)):
+        self.image.paste(img, offset)
+        self._dirty = True
+
+    def add(self, img):
+        """ Add pixel values of img to the canvas """
+        self._image = ImageChops.add(self.image, img)
+        self._dirty = True
+
+    def replace(self, img):
+        """ Set the canvas to a copy of img """
+        if img.mode != self.mode:
+            self._image = img.convert(self.mode)
+        else:
+            self._image = img.copy()
+        self.size = self._image.size
+        self._dirty = True
+
+    def clear(self):
+        self._image = Image.new(self.mode, self.size)
+        self._dirty = True
+
+    def flush(self, force=False):
+        """ Save the canvas if it has changed since the last save and the
+        flush interval has passed
+        :param bool force: ignore the flush interval
+        :return bool: True if the file was written
+        """
+        if not self._dirty or self.file_path is None:
+            return False
+        now = time.time()
+        if not force and now - self._flushed_at < self.flush_interval:
+            return False
+        self.image.save(self.file_path, self.ext)
+        self._dirty = False
+        self._flushed_at = now
+        return True
+
+    def _load(self):
+        if self.file_path and os.path.exists(self.file_path):
+            try:
+                with Image.open(self.file_path) as img:
+                    if img.size == self.size:
+                        return img.convert(self.mode)
+            except (IOError, OSError) as err:
+                logger.debug("Cannot load preview %r: %r",
+                             self.file_path, err)
+        # A new canvas is not on disk yet
+        self._dirty = True
+        return Image.new(self.mode, self.size)
+
+
+class PreviewCompositor(object):
+    """ Preview canvases of a single task, one per preview file """
+
+    def __init__(self, flush_interval=FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self._canvases = {}
+
+    def canvas(self, file_path, size, mode="RGB", ext="PNG"):
+        """ Return the canvas of a preview file, creating it if needed
+        :param str file_path: preview file path
+        :param tuple size: preview size used for a new canvas
+        :return PreviewCanvas:
+        """
+        canvas = self._canvases.get(file_path)
+        if canvas is None:
+            canvas = PreviewCanvas(file_path, size, mode, ext,
+                                   self.flush_interval)
+            self._canvases[file_path] = canvas
+        return canvas
+
+    def flush(self, force=False):
+        for canvas in self._canvases.values():
+            canvas.flush(force=force)
@@ -3,12 +3,13 @@ import math
 import os
 from typing import Type
 
-from PIL import Image, ImageChops
+from PIL import Image
 from pathlib import Path
 
 from apps.core.task.coretask import CoreTask, CoreTaskBuilder
 from apps.rendering.resources.imgrepr import load_as_pil
 from apps.rendering.resources.utils import handle_image_error, handle_none
+from apps.rendering.task.previewcompositor import PreviewCompositor
 from apps.rendering.task.renderingtaskstate import RendererDefaults
 from apps.rendering.task.verifier import RenderingVerifier
 from golem.core.common import get_golem_path
@@ -72,6 +73,7 @@ class RenderingTask(CoreTask):
 
         self.preview_file_path = None
         self.preview_task_file_path = None
+        self.preview_compositor = PreviewCompositor()
 
         self.collected_file_names = {}
 
@@ -104,6 +106,7 @@ class RenderingTask(CoreTask):
         super().restart_subtask(subtask_id)
 
     def update_task_state(self, task_state):
+        self.flush_previews()
         if not self.finished_computation() and self.preview_task_file_path:
             task_state.extra_data['result_preview'] = self.preview_task_file_path
         elif self.preview_file_path:
@@ -123,22 +126,46 @@ class RenderingTask(CoreTask):
     def get_preview_file_path(self):
         return self.preview_file_path
 
+    @handle_image_error(logger)
+    def flush_previews(self, force=False):
+        """ Write changed previews to their files. Unless forced, a preview
+        file is written at most once per flush interval.
+        :param bool force: write changed previews right away
+        """
+        self.preview_compositor.flush(force=force)
+
+    def _get_preview_size(self):
+        return (int(round(self.res_x * self.scale_factor)),
+                int(round(self.res_y * self.scale_factor)))
+
+    def _get_preview_canvas(self, preview_file_path):
+        return self.preview_compositor.canvas(preview_file_path,
+                                              self._get_preview_size(),
+                                              ext=PREVIEW_EXT)
+
+    def _get_result_preview_canvas(self):
+        if self.preview_file_path is None:
+            preview_name = "current_preview.{}".format(PREVIEW_EXT)
+            self.preview_file_path = os.path.join(self.tmp_dir, preview_name)
+        return self._get_preview_canvas(self.preview_file_path)
+
     @handle_image_error(logger)
     def _update_preview(self, new_chunk_file_path, num_start):
         with handle_none(load_as_pil(new_chunk_file_path),
-                         raise_if_none=IOError("load_as_pil failed")) as img, \
-                self._open_preview() as img_current, \
-                ImageChops.add(img_current, img) as img_added:
-            img_added.save(self.preview_file_path, PREVIEW_EXT)
+                         raise_if_none=IOError("load_as_pil failed")) as img:
+            preview = self._get_result_preview_canvas()
+            preview.add(img)
+            preview.flush()
 
     @CoreTask.handle_key_error
     def _remove_from_preview(self, subtask_id):
         subtask = self.subtasks_given[subtask_id]
         empty_color = (0, 0, 0)
-        with handle_image_error(logger), \
-                self._open_preview() as img:
-            self._mark_task_area(subtask, img, empty_color)
-            img.save(self.preview_file_path, PREVIEW_EXT)
+        with handle_image_error(logger):
+            preview = self._get_result_preview_canvas()
+            self._mark_task_area(subtask, preview.image, empty_color)
+            preview.mark_changed()
+            preview.flush()
 
     def _update_task_preview(self):
         sent_color = (0, 255, 0)
@@ -148,17 +175,20 @@ class RenderingTask(CoreTask):
         preview_task_file_path = "{}".format(os.path.join(self.tmp_dir,
                                                           preview_name))
 
-        with handle_image_error(logger), \
-                self._open_preview() as img_task:
+        with handle_image_error(logger):
+            preview = self._get_result_preview_canvas()
+            task_preview = self._get_preview_canvas(preview_task_file_path)
+            task_preview.replace(preview.image)
 
             for sub in self.subtasks_given.values():
                 if SubtaskStatus.is_active(sub['status']):
-                    self._mark_task_area(sub, img_task, sent_color)
+                    self._mark_task_area(sub, task_preview.image, sent_color)
                 if sub['status'] in [SubtaskStatus.failure,
                                      SubtaskStatus.restarted]:
-                    self._mark_task_area(sub, img_task, failed_color)
+                    self._mark_task_area(sub, task_preview.image,
+                                         failed_color)
 
-            img_task.save(preview_task_file_path, PREVIEW_EXT)
+            task_preview.flush()
 
         self._update_preview_task_file_path(preview_task_file_path)
 
@@ -170,9 +200,7 @@ class RenderingTask(CoreTask):
         y = int(round(self.res_y * self.scale_factor))
         upper = max(0, int(math.floor(y / self.total_tasks * (subtask['start_task'] - 1))))
         lower = min(int(math.floor(y / self.total_tasks * (subtask['end_task']))), y)
-        for i in range(0, x):
-            for j in range(upper, lower):
-                img_task.putpixel((i, j), color)
+        img_task.paste(color, (0, upper, x, lower))
 
     def _put_collected_files_together(self, output_file_name, files, arg):
         task_collector_path = self._get_task_collector_path()
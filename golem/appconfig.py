@@ -44,6 +44,14 @@ PUBLISH_TASKS_INTERVAL = 1.0
 NODE_SNAPSHOT_INTERVAL = 10.0
 NETWORK_CHECK_INTERVAL = 10.0
 PAYMENT_CHECK_INTERVAL = 10.0
+# How frequently aggregated local rank changes are written to the database
+TRUST_LEDGER_FLUSH_INTERVAL = 10
+# How frequently tracked resource directory sizes are reconciled with the disk
+DISK_USAGE_SCAN_INTERVAL = 15 * 60
+# How frequently cached resource file hashes are written to disk
+RESOURCE_HASHES_SAVE_INTERVAL = 60
+# Number of verifications run in parallel, 0 - limited by cores and memory
+VERIFICATION_CONCURRENCY = 0
 MAX_SENDING_DELAY = 360
 # How frequently task archive should be saved to disk (in seconds)
 TASKARCHIVE_MAINTENANCE_INTERVAL = 30
@@ -122,6 +130,7 @@ class AppConfig:
             send_pings=SEND_PINGS,
             # hardware
             hardware_preset_name=CUSTOM_HARDWARE_PRESET_NAME,
+            verification_concurrency=VERIFICATION_CONCURRENCY,
             # price and trust
             min_price=MIN_PRICE,
             max_price=MAX_PRICE,
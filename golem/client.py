@@ -17,13 +17,17 @@ from twisted.internet.defer import (
     Deferred)
 
 import golem
+from apps.core.task.coretask import CoreTask
 from golem.appconfig import (TASKARCHIVE_MAINTENANCE_INTERVAL,
-                             PAYMENT_CHECK_INTERVAL)
+                             PAYMENT_CHECK_INTERVAL,
+                             TRUST_LEDGER_FLUSH_INTERVAL,
+                             DISK_USAGE_SCAN_INTERVAL,
+                             RESOURCE_HASHES_SAVE_INTERVAL)
 from golem.clientconfigdescriptor import ConfigApprover, ClientConfigDescriptor
 from golem.config.presets import HardwarePresetsMixin
 from golem.core.async import AsyncRequest, async_run
 from golem.core.common import to_unicode, string_to_timeout
-from golem.core.fileshelper import du
+from golem.core.fileshelper import format_size
 from golem.core.hardware import HardwarePresets
 from golem.core.keysauth import KeysAuth
 from golem.core.service import LoopingCallService
@@ -44,14 +48,18 @@ from golem.network.hyperdrive.daemon_manager import HyperdriveDaemonManager
 from golem.network.p2p.node import Node
 from golem.network.p2p.p2pservice import P2PService
 from golem.network.p2p.peersession import PeerSessionInfo
+from golem.network.transport.flowcontrol import receive_scheduler
 from golem.network.transport.tcpnetwork import SocketAddress
 from golem.network.upnp.mapper import PortMapperManager
 from golem.ranking.helper.trust import Trust
+from golem.ranking.manager import database_manager as dm
 from golem.ranking.ranking import Ranking
 from golem.report import Component, Stage, StatusPublisher, report_calls
 from golem.resource.base.resourceserver import BaseResourceServer
 from golem.resource.dirmanager import DirManager, DirectoryType
+from golem.resource.diskusage import disk_usage
 from golem.resource.hyperdrive.resourcesmanager import HyperdriveResourceManager
+from golem.resource.indexer import resource_indexer
 from golem.resource.resource import get_resources_for_task, ResourceType
 from golem.rpc.mapping.rpceventnames import Task, Network, Environment, UI
 from golem.rpc.session import Publisher
@@ -100,11 +108,11 @@ class Client(HardwarePresetsMixin):
         self.lock = Lock()
         self.task_tester = None
 
-        self.task_archiver = TaskArchiver(datadir)
-
         # Read and validate configuration
         self.config_desc = config_desc
         self.config_approver = ConfigApprover(self.config_desc)
+        CoreTask.VERIFICATION_QUEUE.set_concurrency(
+            self.config_desc.verification_concurrency)
 
         log.info(
             'Client "%s", datadir: %s',
@@ -116,6 +124,10 @@ class Client(HardwarePresetsMixin):
         self.db = Database(db, fields=DB_FIELDS, models=DB_MODELS,
                            db_dir=datadir)
 
+        self.task_archiver = TaskArchiver(datadir)
+        resource_indexer.set_cache_file(
+            path.join(datadir, 'resource_hashes.json'))
+
         # Hardware configuration
         HardwarePresets.initialize(self.datadir)
         HardwarePresets.update_config(self.config_desc.hardware_preset_name,
@@ -137,6 +149,7 @@ class Client(HardwarePresetsMixin):
 
         self.task_server = None
         self.port_mapper = None
+        self._network_info_collected = False
 
         self.nodes_manager_client = None
 
@@ -147,6 +160,9 @@ class Client(HardwarePresetsMixin):
             TaskArchiverService(self.task_archiver),
             MessageHistoryService(),
             DoWorkService(self),
+            TrustLedgerService(),
+            DiskUsageService(self),
+            ResourceIndexerService(),
         ]
 
         clean_resources_older_than = \
@@ -180,6 +196,8 @@ class Client(HardwarePresetsMixin):
         self.connect_to_known_hosts = connect_to_known_hosts
         self.environments_manager = EnvironmentsManager()
         self.daemon_manager = None
+        # Set by the node, holds timings of start-up stages
+        self.startup_graph = None
 
         self.rpc_publisher = None
         self.task_test_result = None
@@ -236,7 +254,9 @@ class Client(HardwarePresetsMixin):
 
     @report_calls(Component.client, 'start', stage=Stage.pre)
     def start(self):
-        self.environments_manager.load_config(self.datadir)
+        # Already loaded when environments are set up by the node start-up
+        if not self.environments_manager.env_config:
+            self.environments_manager.load_config(self.datadir)
         self.concent_service.start()
 
         if self.use_monitor and not self.monitor:
@@ -265,13 +285,27 @@ class Client(HardwarePresetsMixin):
             self.stop_monitor()
             self.monitor = None
 
-    def start_network(self):
-        log.info("Starting network ...")
+    def collect_network_info(self):
+        """ Find host addresses and the external address of this node.
+        Slow when STUN servers do not respond, the node start-up calls it
+        concurrently with other stages. """
         self.node.collect_network_info(self.config_desc.seed_host,
                                        use_ipv6=self.config_desc.use_ipv6)
-
+        self._network_info_collected = True
         log.debug("Is super node? %s", self.node.is_super_node())
 
+    def discover_upnp(self):
+        """ Find a UPnP device to map ports on. Done once, mappings are
+        created when the servers are listening. """
+        if not self.port_mapper:
+            self.port_mapper = PortMapperManager()
+            self.port_mapper.discover()
+
+    def start_network(self):
+        log.info("Starting network ...")
+        if not self._network_info_collected:
+            self.collect_network_info()
+
         if not self.p2pservice:
             self.p2pservice = P2PService(
                 self.node,
@@ -389,8 +423,7 @@ class Client(HardwarePresetsMixin):
                                          listening_failure=task.errback)
 
     def start_upnp(self, ports):
-        self.port_mapper = PortMapperManager()
-        self.port_mapper.discover()
+        self.discover_upnp()
 
         if self.port_mapper.available:
             for port in ports:
@@ -433,13 +466,25 @@ class Client(HardwarePresetsMixin):
 
     def init_monitor(self):
         metadata = self.__get_nodemetadatamodel()
-        self.monitor = SystemMonitor(metadata, MONITOR_CONFIG)
+        self.monitor = SystemMonitor(
+            metadata,
+            MONITOR_CONFIG,
+            spill_dir=path.join(self.datadir, 'monitor'),
+        )
         self.monitor.start()
         self.diag_service = DiagnosticsService(DiagnosticsOutputFormat.data)
         self.diag_service.register(
             VMDiagnosticsProvider(),
             self.monitor.on_vm_snapshot
         )
+        self.diag_service.register(
+            receive_scheduler,
+            output_format=DiagnosticsOutputFormat.string
+        )
+        self.diag_service.register(
+            CoreTask.VERIFICATION_QUEUE,
+            output_format=DiagnosticsOutputFormat.string
+        )
         self.diag_service.start()
 
     def stop_monitor(self):
@@ -853,6 +898,8 @@ class Client(HardwarePresetsMixin):
     def change_config(self, new_config_desc, run_benchmarks=False):
         self.config_desc = self.config_approver.change_config(new_config_desc)
         self.upsert_hw_preset(HardwarePresets.from_config(self.config_desc))
+        CoreTask.VERIFICATION_QUEUE.set_concurrency(
+            self.config_desc.verification_concurrency)
 
         if self.p2pservice:
             self.p2pservice.change_config(self.config_desc)
@@ -895,7 +942,7 @@ class Client(HardwarePresetsMixin):
                 "distributed": self.get_distributed_files_dir()}
 
     def get_res_dirs_sizes(self):
-        return {str(name): str(du(d))
+        return {str(name): format_size(disk_usage.size(d))
                 for name, d in list(self.get_res_dirs().items())}
 
     def get_res_dir(self, dir_type):
@@ -1105,6 +1152,11 @@ class Client(HardwarePresetsMixin):
     def get_golem_status():
         return StatusPublisher.last_status()
 
+    def get_startup_timings(self):
+        if not self.startup_graph:
+            return []
+        return self.startup_graph.get_timings()
+
     def activate_hw_preset(self, name, run_benchmarks=False):
         HardwarePresets.update_config(name, self.config_desc)
         if hasattr(self, 'task_server') and self.task_server:
@@ -1242,6 +1294,50 @@ class TaskArchiverService(LoopingCallService):
         self._task_archiver.do_maintenance()
 
 
+class TrustLedgerService(LoopingCallService):
+    def __init__(self,
+                 interval_seconds: int = TRUST_LEDGER_FLUSH_INTERVAL) -> None:
+        super().__init__(interval_seconds)
+
+    def stop(self):
+        super().stop()
+        # Do not lose changes aggregated since the last flush
+        dm.flush_local_ranks()
+
+    def _run(self):
+        dm.flush_local_ranks()
+
+
+class DiskUsageService(LoopingCallService):
+    _client = None  # type: Client
+
+    def __init__(self,
+                 client: Client,
+                 interval_seconds: int = DISK_USAGE_SCAN_INTERVAL) -> None:
+        super().__init__(interval_seconds)
+        self._client = client
+
+    def _run(self):
+        # Resource directories are known once the network is started
+        if not (self._client.task_server and self._client.resource_server):
+            return
+        for res_dir in set(self._client.get_res_dirs().values()):
+            disk_usage.scan(res_dir)
+
+
+class ResourceIndexerService(LoopingCallService):
+    def __init__(self,
+                 interval_seconds: int = RESOURCE_HASHES_SAVE_INTERVAL) -> None:
+        super().__init__(interval_seconds)
+
+    def stop(self):
+        super().stop()
+        resource_indexer.save()
+
+    def _run(self):
+        resource_indexer.save()
+
+
 class ResourceCleanerService(LoopingCallService):
     _client = None  # type: Client
     older_than_seconds = 0  # type: int
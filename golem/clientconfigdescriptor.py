@@ -46,6 +46,7 @@ class ClientConfigDescriptor(object):
         self.max_resource_size = 0
         self.max_memory_size = 0
         self.hardware_preset_name = ""
+        self.verification_concurrency = 0
 
         self.use_distributed_resource_management = 1
 
@@ -81,7 +82,7 @@ class ConfigApprover(object):
     to_int_opt = {
         'seed_port', 'num_cores', 'opt_peer_num', 'p2p_session_timeout',
         'task_session_timeout', 'pings_interval', 'max_results_sending_delay',
-        'min_price', 'max_price', 'key_difficulty'
+        'min_price', 'max_price', 'key_difficulty', 'verification_concurrency'
     }
     to_float_opt = {
         'getting_peers_interval', 'getting_tasks_interval', 'computing_trust',
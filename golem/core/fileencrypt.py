@@ -1,4 +1,6 @@
 import abc
+import io
+import os
 from hashlib import sha256
 from Crypto.Cipher import AES
 from Crypto import Random
@@ -131,3 +133,112 @@ class AESFileEncryptor(FileEncryptor):
                     working = False
 
                 dst.write(chunk)
+
+    @classmethod
+    def open_decrypted(cls, file_in, secret, key_len=32):
+        """ Open an encrypted file for reading decrypted contents, without
+        writing them to disk
+        :param str file_in: encrypted file path
+        :param bytes secret: secret the file was encrypted with
+        :param int key_len: key length
+        :return: seekable, buffered binary file object
+        """
+        reader = AESDecryptingReader(file_in, secret, key_len=key_len,
+                                     encryptor_class=cls)
+        return io.BufferedReader(reader, cls.chunk_size * cls.block_size)
+
+
+class AESDecryptingReader(io.RawIOBase):
+    """ Seekable reader of a file encrypted by AESFileEncryptor. A CBC
+    block can be decrypted given the preceding cipher text block, so any
+    range of the file is decrypted on demand. This lets e.g. a zip archive
+    be read in place. """
+
+    def __init__(self, file_in, secret, key_len=32,
+                 encryptor_class=AESFileEncryptor):
+        super().__init__()
+
+        self._aes_mode = encryptor_class.aes_mode
+        self._block_size = block_size = encryptor_class.block_size
+        self._src = open(file_in, 'rb')
+        self._pos = 0
+        # plain text offset the current cipher continues at
+        self._cipher = None
+        self._cipher_pos = None
+
+        try:
+            block = self._src.read(block_size)
+            salt = block[encryptor_class.salt_prefix_len:]
+            self._key, self._iv = encryptor_class.get_key_and_iv(
+                secret, salt, key_len, block_size)
+
+            encrypted_size = os.fstat(self._src.fileno()).st_size - block_size
+            if encrypted_size <= 0 or encrypted_size % block_size:
+                raise ValueError("Invalid encrypted file size")
+
+            last_block = self._decrypt(encrypted_size - block_size,
+                                       block_size)
+            pad_len = last_block[-1]
+            if not 0 < pad_len <= block_size:
+                raise ValueError("Invalid encrypted file padding")
+            self._size = encrypted_size - pad_len
+        except Exception:
+            self._src.close()
+            raise
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self._size
+        elif whence != io.SEEK_SET:
+            raise ValueError("Invalid whence: {}".format(whence))
+        if offset < 0:
+            raise ValueError("Negative seek position {}".format(offset))
+        self._pos = offset
+        return offset
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._size - self._pos)
+        if size <= 0:
+            return 0
+
+        block_size = self._block_size
+        start = self._pos - self._pos % block_size
+        end = self._pos + size
+        end += -end % block_size
+
+        data = self._decrypt(start, end - start)
+        skip = self._pos - start
+        buffer[:size] = data[skip:skip + size]
+        self._pos += size
+        return size
+
+    def close(self):
+        self._src.close()
+        super().close()
+
+    def _decrypt(self, offset, length):
+        block_size = self._block_size
+
+        if offset != self._cipher_pos:
+            if offset:
+                self._src.seek(offset)
+                iv = self._src.read(block_size)
+            else:
+                self._src.seek(block_size)
+                iv = self._iv
+            self._cipher = AES.new(self._key, self._aes_mode, iv)
+
+        data = self._cipher.decrypt(self._src.read(length))
+        self._cipher_pos = offset + len(data)
+        return data
@@ -198,6 +198,14 @@ def du(path):
             logging.getLogger('golem.core')\
                 .info("Can't open dir {}: {}".format(path, str(err)))
             return "-1"
+    return format_size(size)
+
+
+def format_size(size):
+    """Formats a size in bytes the way du does for its fallback
+    :param int size: size in bytes
+    :return str: size in human readable format (eg. 1.5 MB)
+    """
     human_readable_size, idx = memoryhelper.dir_size_to_display(size)
     return "{} {}".format(
         human_readable_size,
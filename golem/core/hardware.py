@@ -1,5 +1,7 @@
 import logging
+from functools import lru_cache
 
+import cpuinfo
 import humanize
 import psutil
 from psutil import virtual_memory
@@ -43,6 +45,18 @@ def memory_available():
     return max(int(virtual_memory().total * 0.75) / 1024, MIN_MEMORY_SIZE)
 
 
+@lru_cache()
+def cpu_model():
+    """
+    :return str: CPU brand string, empty if it cannot be read
+    """
+    try:
+        return cpuinfo.get_cpu_info().get('brand', '')
+    except Exception as e:  # pylint: disable=broad-except
+        logger.debug("Couldn't read CPU model: {}".format(e))
+        return ''
+
+
 class HardwarePresets(object):
 
     DEFAULT_NAME = DEFAULT_HARDWARE_PRESET_NAME
@@ -1,8 +1,11 @@
+import functools
 import logging
 import netifaces
 
 import os
 import socket
+import time
+from threading import Lock
 
 import ipaddress
 from golem.network.stun import pystun as stun
@@ -11,6 +14,14 @@ from .variables import DEFAULT_CONNECT_TO, DEFAULT_CONNECT_TO_PORT
 
 logger = logging.getLogger(__name__)
 
+# Discovered addresses are reused for that many seconds, unless the host
+# addresses change in the meantime
+EXTERNAL_ADDRESS_TTL = 10 * 60
+HOST_ADDRESS_TTL = 60
+# Host addresses are listed to detect network changes at most once in that
+# many seconds
+NETWORK_STATE_INTERVAL = 5
+
 # Old method that works on Windows, but not on Linux (usually returns only 127.0.0.1)
 # def ip4_addresses():
 #   return [i[4][0] for i in socket.getaddrinfo(socket.gethostname(), 0, socket.AF_INET)]
@@ -68,6 +79,80 @@ ip4Addresses = ip_addresses
 get_host_addresses = ip_addresses
 
 
+_network_state_lock = Lock()
+_network_state_cache = dict(timestamp=None, state=None)
+
+
+def _list_network_state():
+    """ IPv4 and IPv6 addresses of all interfaces, listed in one pass """
+    families = (netifaces.AF_INET, netifaces.AF_INET6)
+    addresses = {family: [] for family in families}
+    for inter in netifaces.interfaces():
+        inter_addresses = netifaces.ifaddresses(inter)
+        for family in families:
+            for addr_info in inter_addresses.get(family) or ():
+                addr = addr_info.get('addr')
+                if addr is not None:
+                    addresses[family].append(addr.split("%")[0])
+    return tuple(tuple(addresses[family]) for family in families)
+
+
+def _network_state():
+    now = time.time()
+    with _network_state_lock:
+        timestamp = _network_state_cache['timestamp']
+        if timestamp is not None and \
+                0 <= now - timestamp < NETWORK_STATE_INTERVAL:
+            return _network_state_cache['state']
+
+    try:
+        state = _list_network_state()
+    except Exception as exc:  # pylint: disable=broad-except
+        logger.debug("Cannot list host addresses: %r", exc)
+        state = None
+
+    with _network_state_lock:
+        _network_state_cache.update(timestamp=now, state=state)
+    return state
+
+
+def cached_discovery(ttl, is_valid=lambda result: True):
+    """ Cache results of an address discovery function for <ttl> seconds.
+    Results are discovered again when host addresses change, e.g. after
+    switching networks. Call <function>.cache_clear() to drop the results.
+    :param float ttl: time to live of a result in seconds
+    :param is_valid: results for which it returns False are not cached
+    """
+    def decorator(fn):
+        cache = dict()
+        lock = Lock()
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = args + tuple(sorted(kwargs.items()))
+            network = _network_state()
+            with lock:
+                entry = cache.get(key)
+            if entry:
+                timestamp, entry_network, result = entry
+                if entry_network == network and time.time() - timestamp < ttl:
+                    return result
+
+            result = fn(*args, **kwargs)
+            if is_valid(result):
+                with lock:
+                    cache[key] = time.time(), network, result
+            return result
+
+        def cache_clear():
+            with lock:
+                cache.clear()
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
+
+
 def ip_address_private(address):
     if address.find(':') != -1:
         try:
@@ -105,6 +190,7 @@ def get_host_address_from_connection(connect_to=DEFAULT_CONNECT_TO, connect_to_p
             for s in [socket.socket(addr_family, socket.SOCK_DGRAM)]][0][1]
 
 
+@cached_discovery(EXTERNAL_ADDRESS_TTL, lambda result: result[0] is not None)
 def get_external_address(source_port=0):
     """This method tries to get host public address with STUN protocol
     :param int source_port: port that should be used for connection.
@@ -117,6 +203,8 @@ def get_external_address(source_port=0):
                  nat_type, external_ip, external_port)
     return external_ip, external_port, nat_type
 
+
+@cached_discovery(HOST_ADDRESS_TTL)
 def get_host_address(seed_addr=None, use_ipv6=False):
     """
     Return this host most useful internet address. Host will try to connect with outer service to determine the address.
@@ -0,0 +1,129 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List
+
+from twisted.internet.defer import Deferred, maybeDeferred
+from twisted.python.failure import Failure
+
+logger = logging.getLogger(__name__)
+
+
+class StartupError(Exception):
+
+    def __init__(self, stage: str, failure: Failure) -> None:
+        super().__init__(stage, failure)
+        self.stage = stage
+        self.failure = failure
+
+    def __str__(self):
+        return "{} stage failed: {}".format(self.stage,
+                                            self.failure.getErrorMessage())
+
+
+class StartupGraph(object):
+    """ Start-up expressed as a dependency graph of stages. A stage is
+    a function returning a value or a Deferred. It is called with the
+    results of the stages it requires, as soon as all of them are done, so
+    independent stages run concurrently. Stages that block should run in a
+    thread, e.g. with threads.deferToThread.
+
+    If a stage fails, stages that have not started yet are not started and
+    the Deferred returned by run fails with a StartupError.
+    """
+
+    def __init__(self) -> None:
+        self._stages = OrderedDict()  # type: OrderedDict
+        self._timings = OrderedDict()  # type: OrderedDict
+        self._results = dict()  # type: Dict[str, Any]
+        self._pending = OrderedDict()  # type: OrderedDict
+        self._running = set()  # type: set
+        self._deferred = None  # type: Deferred
+
+    def add(self, name: str, fn: Callable,
+            requires: Iterable[str] = ()) -> None:
+        """ Add a stage. Stages it requires need to be added first.
+        :param name: stage name
+        :param fn: called with results of the required stages, in order
+        :param requires: names of the required stages
+        """
+        requires = tuple(requires)
+        if name in self._stages:
+            raise ValueError("Stage {} already exists".format(name))
+        unknown = [r for r in requires if r not in self._stages]
+        if unknown:
+            raise ValueError("Stage {} requires unknown stages: {}"
+                             .format(name, unknown))
+        self._stages[name] = (fn, requires)
+
+    def run(self) -> Deferred:
+        """ Start all stages
+        :return: Deferred fired with a dict of stage results
+        """
+        if self._deferred:
+            raise RuntimeError("Start-up has already been run")
+
+        self._deferred = Deferred()
+        self._pending = OrderedDict(self._stages)
+        self._start_ready()
+        return self._deferred
+
+    def get_timings(self) -> List[Dict[str, Any]]:
+        """ Timings of stages in the order they were started
+        :return: list of dicts with stage name, status, start and end
+        timestamps and duration in seconds
+        """
+        return [dict(name=name, **timing)
+                for name, timing in self._timings.items()]
+
+    def _start_ready(self) -> None:
+        ready = [name for name, (_, requires) in self._pending.items()
+                 if all(r in self._results for r in requires)]
+
+        for name in ready:
+            if self._deferred.called:
+                return
+            # Already started by a stage that finished synchronously
+            if name not in self._pending:
+                continue
+            fn, requires = self._pending.pop(name)
+            self._start_stage(name, fn, requires)
+
+        if not self._pending and not self._running \
+                and not self._deferred.called:
+            logger.info("Start-up finished: %s", ', '.join(
+                '{} {:.2f}s'.format(name, timing['duration'])
+                for name, timing in self._timings.items()))
+            self._deferred.callback(dict(self._results))
+
+    def _start_stage(self, name: str, fn: Callable, requires: tuple) -> None:
+        logger.debug("Start-up stage %s started", name)
+        self._timings[name] = dict(status='running', started=time.time(),
+                                   finished=None, duration=None)
+        self._running.add(name)
+
+        args = [self._results[r] for r in requires]
+        deferred = maybeDeferred(fn, *args)
+        deferred.addCallbacks(self._stage_done, self._stage_failed,
+                              callbackArgs=(name,), errbackArgs=(name,))
+
+    def _finish_stage(self, name: str, status: str) -> float:
+        timing = self._timings[name]
+        timing['status'] = status
+        timing['finished'] = time.time()
+        timing['duration'] = timing['finished'] - timing['started']
+        self._running.discard(name)
+        return timing['duration']
+
+    def _stage_done(self, result: Any, name: str) -> None:
+        duration = self._finish_stage(name, 'done')
+        logger.info("Start-up stage %s done in %.2fs", name, duration)
+        self._results[name] = result
+        self._start_ready()
+
+    def _stage_failed(self, failure: Failure, name: str) -> None:
+        duration = self._finish_stage(name, 'failed')
+        logger.error("Start-up stage %s failed after %.2fs: %s",
+                     name, duration, failure.getErrorMessage())
+        if not self._deferred.called:
+            self._deferred.errback(StartupError(name, failure))
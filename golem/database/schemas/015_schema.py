@@ -0,0 +1,15 @@
+# pylint: disable=no-member
+# pylint: disable=too-few-public-methods
+import peewee as pw
+
+SCHEMA_VERSION = 15
+
+
+def migrate(migrator, *_, **__):
+    migrator.add_fields(
+        'performance',
+        fingerprint=pw.CharField(null=True))
+
+
+def rollback(migrator, *_, **__):
+    migrator.remove_fields('performance', 'fingerprint')
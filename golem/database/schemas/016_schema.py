@@ -0,0 +1,70 @@
+# pylint: disable=no-member
+# pylint: disable=too-few-public-methods
+# pylint: disable=unused-variable
+import datetime as dt
+import peewee as pw
+
+
+SCHEMA_VERSION = 16
+
+
+def migrate(migrator, *_, **__):
+
+    @migrator.create_model
+    class ArchivedTask(pw.Model):
+        created_date = pw.DateTimeField(default=dt.datetime.now)
+        modified_date = pw.DateTimeField(default=dt.datetime.now)
+        task_id = pw.CharField(max_length=255, primary_key=True)
+        day = pw.DateField(index=True)
+        deadline = pw.FloatField(index=True)
+        min_version = pw.CharField(max_length=255)
+        max_price = pw.FloatField()
+        requesting_trust = pw.FloatField(null=True)
+
+        class Meta:
+            db_table = "archivedtask"
+
+    @migrator.create_model
+    class ArchivedTaskReason(pw.Model):
+        created_date = pw.DateTimeField(default=dt.datetime.now)
+        modified_date = pw.DateTimeField(default=dt.datetime.now)
+        task_id = pw.CharField(max_length=255)
+        reason = pw.CharField(max_length=255)
+        day = pw.DateField(index=True)
+
+        class Meta:
+            db_table = "archivedtaskreason"
+            primary_key = pw.CompositeKey('task_id', 'reason')
+
+    @migrator.create_model
+    class ArchiveDay(pw.Model):
+        created_date = pw.DateTimeField(default=dt.datetime.now)
+        modified_date = pw.DateTimeField(default=dt.datetime.now)
+        day = pw.DateField(primary_key=True)
+        num_tasks = pw.IntegerField(default=0)
+        sum_max_price = pw.FloatField(default=0.0)
+        sum_requesting_trust = pw.FloatField(default=0.0)
+        num_requesting_trust = pw.IntegerField(default=0)
+
+        class Meta:
+            db_table = "archiveday"
+
+    @migrator.create_model
+    class ArchiveDayCount(pw.Model):
+        created_date = pw.DateTimeField(default=dt.datetime.now)
+        modified_date = pw.DateTimeField(default=dt.datetime.now)
+        kind = pw.CharField(max_length=255)
+        day = pw.DateField()
+        value = pw.CharField(max_length=255)
+        count = pw.IntegerField(default=0)
+
+        class Meta:
+            db_table = "archivedaycount"
+            primary_key = pw.CompositeKey('kind', 'day', 'value')
+
+
+def rollback(migrator, *_, **__):
+    migrator.remove_model('archivedaycount')
+    migrator.remove_model('archiveday')
+    migrator.remove_model('archivedtaskreason')
+    migrator.remove_model('archivedtask')
@@ -0,0 +1,35 @@
+# pylint: disable=no-member
+import logging
+
+import peewee as pw
+
+from golem.utils import pubkeytoaddr
+
+SCHEMA_VERSION = 17
+
+logger = logging.getLogger('golem.database')
+
+
+def fill_payer_addresses(database):
+    cursor = database.execute_sql('SELECT DISTINCT sender_node FROM income')
+    for sender_node, in cursor.fetchall():
+        try:
+            payer_address = pubkeytoaddr(sender_node)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning('Invalid income sender %r: %r', sender_node, e)
+            continue
+        database.execute_sql(
+            'UPDATE income SET payer_address = ? WHERE sender_node = ?',
+            (payer_address, sender_node))
+
+
+def migrate(migrator, database, *_, **__):
+    migrator.add_fields(
+        'income',
+        payer_address=pw.CharField(max_length=255, null=True, index=True))
+    migrator.python(fill_payer_addresses, database)
+
+
+def rollback(migrator, *_, **__):
+    migrator.drop_index('income', 'payer_address')
+    migrator.remove_fields('income', 'payer_address')
@@ -0,0 +1,47 @@
+# pylint: disable=no-member
+import logging
+import pickle
+
+import golem_messages
+
+SCHEMA_VERSION = 18
+
+logger = logging.getLogger('golem.database')
+
+
+def _convert_messages(database, convert):
+    cursor = database.execute_sql('SELECT id, msg_data FROM networkmessage')
+    for msg_id, msg_data in cursor.fetchall():
+        try:
+            msg_data = convert(bytes(msg_data))
+        except Exception as e:  # pylint: disable=broad-except
+            # History is kept for a day only, unreadable entries are dropped
+            logger.warning('Removing invalid network message %r: %r',
+                           msg_id, e)
+            database.execute_sql('DELETE FROM networkmessage WHERE id = ?',
+                                 (msg_id,))
+            continue
+        database.execute_sql(
+            'UPDATE networkmessage SET msg_data = ? WHERE id = ?',
+            (msg_data, msg_id))
+
+
+def pickled_to_serialized(database):
+    _convert_messages(
+        database,
+        lambda data: golem_messages.dump(pickle.loads(data), None, None))
+
+
+def serialized_to_pickled(database):
+    _convert_messages(
+        database,
+        lambda data: pickle.dumps(
+            golem_messages.load(data, None, None, check_time=False)))
+
+
+def migrate(migrator, database, *_, **__):
+    migrator.python(pickled_to_serialized, database)
+
+
+def rollback(migrator, database, *_, **__):
+    migrator.python(serialized_to_pickled, database)
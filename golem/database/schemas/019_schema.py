@@ -0,0 +1,26 @@
+# pylint: disable=no-member
+# pylint: disable=too-few-public-methods
+# pylint: disable=unused-variable
+import datetime as dt
+import peewee as pw
+
+
+SCHEMA_VERSION = 19
+
+
+def migrate(migrator, *_, **__):
+
+    @migrator.create_model
+    class ResourceHandshakeResult(pw.Model):
+        created_date = pw.DateTimeField(default=dt.datetime.now)
+        modified_date = pw.DateTimeField(default=dt.datetime.now)
+        node = pw.CharField(max_length=255, primary_key=True)
+        expires = pw.DateTimeField(index=True)
+        exchanges = pw.IntegerField(default=0)
+
+        class Meta:
+            db_table = "resourcehandshakeresult"
+
+
+def rollback(migrator, *_, **__):
+    migrator.remove_model('resourcehandshakeresult')
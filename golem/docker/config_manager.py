@@ -29,6 +29,7 @@ class DockerConfigManager(object):
 
     def __init__(self):
         self.container_host_config = dict(DEFAULT_HOST_CONFIG)
+        self.container_pool = None
 
     def build_config(self, config_desc):
         host_config = dict()
@@ -29,6 +29,18 @@ class DockerImage(object):
             'tag': self.tag,
         }
 
+    def get_local_id(self):
+        """ Id (content digest) of the image in the local Docker daemon
+        :return str|None: image id, None if it cannot be inspected
+        """
+        if self.id:
+            return self.id
+        try:
+            return local_client().inspect_image(self.name)["Id"]
+        except Exception:  # pylint: disable=broad-except
+            log.debug('Cannot inspect image %s', self.name, exc_info=True)
+            return None
+
     def is_available(self):
         client = local_client()
         try:
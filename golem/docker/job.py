@@ -8,6 +8,7 @@ import docker.errors
 
 from golem.core.common import is_windows, nt_path_to_posix_path, is_osx
 from .client import local_client
+from .pool import filter_log, parse_timestamp
 
 __all__ = ['DockerJob']
 
@@ -49,7 +50,8 @@ class DockerJob(object):
 
     def __init__(self, image, script_src, parameters,
                  resources_dir, work_dir, output_dir,
-                 host_config=None, container_log_level=None):
+                 host_config=None, container_log_level=None,
+                 container_pool=None):
         """
         :param DockerImage image: Docker image to use
         :param str script_src: source of the task script file
@@ -57,6 +59,8 @@ class DockerJob(object):
         :param str resources_dir: directory with task resources
         :param str work_dir: directory for temporary work files
         :param str output_dir: directory for output files
+        :param ContainerPool container_pool: take the container from the pool
+        instead of creating a new one
         """
         from golem.docker.image import DockerImage
         if not isinstance(image, DockerImage):
@@ -79,6 +83,11 @@ class DockerJob(object):
         self.container_log = None
         self.state = self.STATE_NEW
 
+        self.container_pool = container_pool
+        self.pooled_container = None
+        # Start time of the current run of a pooled container
+        self.started_at = None
+
         if container_log_level is None:
             container_log_level = container_logger.getEffectiveLevel()
         self.log_std_streams = 0 < container_log_level <= logging.DEBUG
@@ -101,9 +110,41 @@ class DockerJob(object):
         with open(task_script_path, "wb") as script_file:
             script_file.write(bytearray(self.script_src, "utf-8"))
 
-        # Setup volumes for the container
-        client = local_client()
+        if self.container_pool:
+            self.pooled_container = self.container_pool.acquire(
+                self.image, self.host_config)
+            try:
+                self.pooled_container.stage(
+                    self.work_dir, self.resources_dir, self.output_dir)
+            except OSError:
+                self.container_pool.release(self.pooled_container)
+                self.pooled_container = None
+                raise
+            self.container = {"Id": self.pooled_container.container_id}
+        else:
+            self.container = self.create_container(
+                local_client(), self.image, self.work_dir, self.resources_dir,
+                self.output_dir, self.host_config)
+        self.container_id = self.container["Id"]
+        if self.container_id is None:
+            raise KeyError("container does not have key: Id")
 
+        logger.debug("Container {} prepared, image: {}, dirs: {}; {}; {}"
+                     .format(self.container_id, self.image.name,
+                             self.work_dir, self.resources_dir, self.output_dir)
+                     )
+
+    @classmethod
+    def create_container(cls, client, image, work_dir, resources_dir,
+                         output_dir, host_config=None, labels=None):
+        """ Create a container with the given directories mounted as the
+        work, resources and output directories
+        :param docker.Client client:
+        :param DockerImage image:
+        :param dict host_config: container host config
+        :param dict labels: container labels
+        :return dict: created container
+        """
         # Docker config requires binds to be specified using posix paths,
         # even on Windows. Hence this function:
         def posix_path(path):
@@ -111,7 +152,7 @@ class DockerJob(object):
                 return nt_path_to_posix_path(path)
             return path
 
-        container_config = dict(self.host_config)
+        container_config = dict(host_config or {})
         cpuset = container_config.pop('cpuset', None)
 
         if is_windows():
@@ -123,16 +164,16 @@ class DockerJob(object):
 
         host_cfg = client.create_host_config(
             binds={
-                posix_path(self.work_dir): {
-                    "bind": self.WORK_DIR,
+                posix_path(work_dir): {
+                    "bind": cls.WORK_DIR,
                     "mode": "rw"
                 },
-                posix_path(self.resources_dir): {
-                    "bind": self.RESOURCES_DIR,
+                posix_path(resources_dir): {
+                    "bind": cls.RESOURCES_DIR,
                     "mode": "ro"
                 },
-                posix_path(self.output_dir): {
-                    "bind": self.OUTPUT_DIR,
+                posix_path(output_dir): {
+                    "bind": cls.OUTPUT_DIR,
                     "mode": "rw"
                 }
             },
@@ -140,24 +181,17 @@ class DockerJob(object):
         )
 
         # The location of the task script when mounted in the container
-        container_script_path = self._get_container_script_path()
-        self.container = client.create_container(
-            image=self.image.name,
-            volumes=[self.WORK_DIR, self.RESOURCES_DIR, self.OUTPUT_DIR],
+        container_script_path = cls._get_container_script_path()
+        return client.create_container(
+            image=image.name,
+            volumes=[cls.WORK_DIR, cls.RESOURCES_DIR, cls.OUTPUT_DIR],
             host_config=host_cfg,
             command=[container_script_path],
-            working_dir=self.WORK_DIR,
+            working_dir=cls.WORK_DIR,
             cpuset=cpuset,
-            environment=environment
+            environment=environment,
+            labels=labels
         )
-        self.container_id = self.container["Id"]
-        if self.container_id is None:
-            raise KeyError("container does not have key: Id")
-
-        logger.debug("Container {} prepared, image: {}, dirs: {}; {}; {}"
-                     .format(self.container_id, self.image.name,
-                             self.work_dir, self.resources_dir, self.output_dir)
-                     )
 
     def _cleanup(self):
         if self.container:
@@ -165,11 +199,11 @@ class DockerJob(object):
             self._host_dir_chmod(self.work_dir, self.work_dir_mod)
             self._host_dir_chmod(self.resources_dir, self.resources_dir_mod)
             self._host_dir_chmod(self.output_dir, self.output_dir_mod)
-            try:
-                client.remove_container(self.container_id, force=True)
-                logger.debug("Container {} removed".format(self.container_id))
-            except docker.errors.APIError:
-                pass  # Already removed? Sometimes happens in CircleCI.
+            if self.pooled_container:
+                self.container_pool.release(self.pooled_container)
+                self.pooled_container = None
+            else:
+                self._remove_container(client)
             self.container = None
             self.container_id = None
             self.state = self.STATE_REMOVED
@@ -177,6 +211,13 @@ class DockerJob(object):
             self.logging_thread.join()
             self.logging_thread = None
 
+    def _remove_container(self, client):
+        try:
+            client.remove_container(self.container_id, force=True)
+            logger.debug("Container {} removed".format(self.container_id))
+        except docker.errors.APIError:
+            pass  # Already removed? Sometimes happens in CircleCI.
+
     def __enter__(self):
         self._prepare()
         return self
@@ -226,18 +267,24 @@ class DockerJob(object):
             for chunk in s:
                 container_logger.debug(chunk)
 
+        # A pooled container's log holds the output of its previous runs
         stream = client.attach(self.container_id, stdout=True, stderr=True,
-                               stream=True, logs=True)
+                               stream=True, logs=not self.pooled_container)
         self.logging_thread = threading.Thread(
             target=log_stream, args=(stream,), name="ContainerLoggingThread")
         self.logging_thread.start()
 
     def start(self):
-        if self.get_status() == self.STATE_CREATED:
+        status = self.get_status()
+        if status == self.STATE_CREATED or \
+                (self.pooled_container and status == self.STATE_EXITED):
             client = local_client()
             client.start(self.container_id)
             result = client.inspect_container(self.container_id)
             self.state = result["State"]["Status"]
+            if self.pooled_container:
+                self.started_at = parse_timestamp(
+                    result["State"]["StartedAt"])
             logger.debug("Container {} started".format(self.container_id))
             if self.log_std_streams:
                 self._start_logging_thread(client)
@@ -253,7 +300,10 @@ class DockerJob(object):
         """
         if self.get_status() in [self.STATE_RUNNING, self.STATE_EXITED]:
             client = local_client()
-            return client.wait(self.container_id, timeout)
+            exit_code = client.wait(self.container_id, timeout)
+            if self.pooled_container:
+                self.pooled_container.collect()
+            return exit_code
         logger.debug("Cannot wait for container {}, status = {}"
                      .format(self.container_id, self.get_status()))
         return -1
@@ -288,14 +338,19 @@ class DockerJob(object):
                     f.write(line)
                 f.flush()
 
+        def get_logs(stdout, stderr):
+            if not self.started_at:
+                return client.logs(self.container_id, stream=True,
+                                   stdout=stdout, stderr=stderr)
+            stream = client.logs(self.container_id, stream=True,
+                                 stdout=stdout, stderr=stderr,
+                                 timestamps=True)
+            return filter_log(stream, self.started_at)
+
         if stdout_file:
-            stdout = client.logs(self.container_id,
-                                 stream=True, stdout=True, stderr=False)
-            dump_stream(stdout, stdout_file)
+            dump_stream(get_logs(True, False), stdout_file)
         if stderr_file:
-            stderr = client.logs(self.container_id,
-                                 stream=True, stdout=False, stderr=True)
-            dump_stream(stderr, stderr_file)
+            dump_stream(get_logs(False, True), stderr_file)
 
     def get_status(self):
         if self.container:
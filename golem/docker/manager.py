@@ -10,6 +10,8 @@ from golem.core.common import is_linux, is_windows, is_osx, get_golem_path, \
     DEVNULL, to_unicode, SUBPROCESS_STARTUP_INFO
 from golem.core.threads import ThreadQueueExecutor
 from golem.docker.config_manager import DockerConfigManager
+from golem.docker.image import DockerImage
+from golem.docker.pool import ContainerPool
 from golem.report import report_calls, Component
 
 logger = logging.getLogger(__name__)
@@ -160,6 +162,32 @@ class DockerManager(DockerConfigManager):
         else:
             self._wait_for_tasks(status_callback, done_callback)
 
+    def enable_container_pool(self, root_dir):
+        """ Run jobs in pooled containers
+        :param str root_dir: directory for the pool's files
+        """
+        if not self.container_pool:
+            self.container_pool = ContainerPool(root_dir)
+
+    def prestage_containers(self, in_background=True):
+        """ Create pooled containers for the images of all apps with the
+        current host config, so that the first jobs do not wait for them
+        """
+        if not self.container_pool:
+            return
+
+        images = [DockerImage(image, tag=tag)
+                  for image, _, tag, _ in self._collect_images()]
+        args = (images, dict(self.container_host_config))
+
+        if in_background:
+            thread = Thread(target=self.container_pool.prestage, args=args,
+                            name="ContainerPoolThread")
+            thread.daemon = True
+            thread.start()
+        else:
+            self.container_pool.prestage(*args)
+
     def build_config(self, config_desc):
         super(DockerManager, self).build_config(config_desc)
 
@@ -0,0 +1,385 @@
+import logging
+import os
+import shutil
+import tempfile
+import time
+from calendar import timegm
+from threading import Lock, Thread
+
+import docker.errors
+
+from .client import local_client
+
+__all__ = ['ContainerPool', 'PooledContainer']
+
+logger = logging.getLogger(__name__)
+
+# Number of idle containers kept per image and host config
+POOL_SIZE = 2
+# Number of containers created for each image when the pool is pre-staged
+PRESTAGE_COUNT = 1
+# A container is removed after that many jobs. Its log grows with every run.
+MAX_USES = 50
+# Seconds to wait for the warm-up run of a new container
+WARM_UP_TIMEOUT = 60
+
+# Marks containers created by a pool, the value is the pool root directory
+POOL_LABEL = 'golem.container_pool'
+
+
+def parse_timestamp(value):
+    """ Parse a Docker RFC 3339 timestamp with nanosecond precision
+    :param str value: e.g. '2018-01-18T12:30:00.123456789Z'
+    :return tuple: (seconds since epoch, nanoseconds)
+    """
+    value = value.rstrip('Z')
+    seconds, _, fraction = value.partition('.')
+    epoch = timegm(time.strptime(seconds, '%Y-%m-%dT%H:%M:%S'))
+    return epoch, int(fraction.ljust(9, '0')[:9] or 0)
+
+
+def filter_log(stream, since):
+    """ Skip log lines of the previous runs of a container. The log has
+    to be read with timestamps=True.
+    :param stream: log lines prefixed with a timestamp
+    :param tuple since: parsed start time of the current run
+    :return generator: log lines of the current run, without timestamps
+    """
+    for line in stream:
+        timestamp, _, data = line.partition(b' ')
+        try:
+            if parse_timestamp(timestamp.decode('ascii')) < since:
+                continue
+        except (UnicodeDecodeError, ValueError):
+            data = line
+        yield data
+
+
+def _clear_dir(path):
+    for name in os.listdir(path):
+        entry = os.path.join(path, name)
+        if os.path.isdir(entry) and not os.path.islink(entry):
+            shutil.rmtree(entry)
+        else:
+            os.remove(entry)
+
+
+def _move_contents(src, dst):
+    for name in os.listdir(src):
+        shutil.move(os.path.join(src, name), os.path.join(dst, name))
+
+
+def _link_tree(src, dst):
+    """ Hard link files of src into dst, copy them if links are not
+    supported. Resources are mounted read-only, so they cannot be
+    modified through the links.
+    """
+    for root, dirs, files in os.walk(src):
+        target = os.path.join(dst, os.path.relpath(root, src))
+        for name in dirs:
+            if os.path.islink(os.path.join(root, name)):
+                os.symlink(os.readlink(os.path.join(root, name)),
+                           os.path.join(target, name))
+            else:
+                os.mkdir(os.path.join(target, name))
+        for name in files:
+            src_file = os.path.join(root, name)
+            dst_file = os.path.join(target, name)
+            if os.path.islink(src_file):
+                os.symlink(os.readlink(src_file), dst_file)
+                continue
+            try:
+                os.link(src_file, dst_file)
+            except OSError:
+                shutil.copy2(src_file, dst_file)
+
+
+class PooledContainer(object):
+    """ Container created by a ContainerPool. Its work, resources and
+    output directories are mounted from a slot directory owned by the pool.
+    Job directories are staged into the slot before each run and collected
+    afterwards.
+    """
+
+    def __init__(self, key, image, host_config, container_id, slot_dir):
+        self.key = key
+        self.image = image
+        self.host_config = host_config
+        self.container_id = container_id
+        self.slot_dir = slot_dir
+        self.work_dir = os.path.join(slot_dir, 'work')
+        self.resources_dir = os.path.join(slot_dir, 'resources')
+        self.output_dir = os.path.join(slot_dir, 'output')
+        # Container filesystem changes made by the warm-up run, None if the
+        # container was not warmed up
+        self.baseline = None
+        self.uses = 0
+        self._job_dirs = None
+
+    def stage(self, work_dir, resources_dir, output_dir):
+        """ Move the job's work files into the slot and link its resources
+        :param str work_dir: job work directory
+        :param str resources_dir: job resources directory
+        :param str output_dir: job output directory
+        """
+        self._job_dirs = work_dir, output_dir
+        _move_contents(work_dir, self.work_dir)
+        _link_tree(resources_dir, self.resources_dir)
+        self.uses += 1
+
+    def collect(self):
+        """ Move work and output files back to the job directories """
+        if not self._job_dirs:
+            return
+        work_dir, output_dir = self._job_dirs
+        self._job_dirs = None
+        _move_contents(self.work_dir, work_dir)
+        _move_contents(self.output_dir, output_dir)
+
+    def clear(self):
+        self._job_dirs = None
+        for path in (self.work_dir, self.resources_dir, self.output_dir):
+            _clear_dir(path)
+
+    def get_changes(self, client):
+        """ Changes made to the container filesystem, outside of the mounted
+        directories
+        :return set: (path, kind) pairs
+        """
+        changes = client.diff(self.container_id) or []
+        return {(change['Path'], change['Kind']) for change in changes}
+
+
+class ContainerPool(object):
+    """ Keeps created containers per image and host config, so that a job
+    does not have to wait for a container to be created and for the image
+    layers to be checked.
+
+    New containers are warmed up with an empty job, which runs the image's
+    entrypoint and records the filesystem changes it makes. After a job a
+    container is recycled only if its filesystem shows no other changes;
+    otherwise it is removed and a replacement is created in the background.
+    Idle containers are stopped, they use no CPU or memory.
+    """
+
+    def __init__(self, root_dir, size=POOL_SIZE):
+        """
+        :param str root_dir: directory for container slot directories
+        :param int size: number of idle containers kept per image and host
+        config
+        """
+        self.root_dir = root_dir
+        self.size = size
+        self._idle = dict()
+        self._busy = dict()
+        self._lock = Lock()
+        self._stale_removed = False
+
+    @staticmethod
+    def get_key(image, host_config):
+        host_config = host_config or {}
+        return image.name, tuple(sorted((key, repr(value))
+                                        for key, value in host_config.items()))
+
+    def acquire(self, image, host_config=None):
+        """ Take an idle container or create a new one
+        :param DockerImage image:
+        :param dict host_config:
+        :return PooledContainer:
+        """
+        key = self.get_key(image, host_config)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                container = idle.pop(0)
+                self._busy[container.container_id] = container
+                logger.debug("Container %s taken from the pool",
+                             container.container_id)
+                return container
+        container = self._create(image, host_config)
+        with self._lock:
+            self._busy[container.container_id] = container
+        return container
+
+    def release(self, container):
+        """ Return a container after its job has finished. It is recycled if
+        its filesystem is clean, removed otherwise.
+        :param PooledContainer container:
+        """
+        with self._lock:
+            self._busy.pop(container.container_id, None)
+        try:
+            container.collect()
+            recycle = self._is_reusable(container)
+            container.clear()
+        except (docker.errors.APIError, OSError) as exc:
+            logger.debug("Cannot recycle container %s: %r",
+                         container.container_id, exc)
+            recycle = False
+
+        if recycle:
+            with self._lock:
+                idle = self._idle.setdefault(container.key, [])
+                if len(idle) < self.size:
+                    idle.append(container)
+                    logger.debug("Container %s returned to the pool",
+                                 container.container_id)
+                    return
+        self._remove(container)
+        if not recycle:
+            self._replenish(container.image, container.host_config)
+
+    def prepare(self, image, host_config=None, count=PRESTAGE_COUNT):
+        """ Create and warm up containers until there are count idle ones
+        :param DockerImage image:
+        :param dict host_config:
+        :param int count:
+        """
+        key = self.get_key(image, host_config)
+        count = min(count, self.size)
+        while True:
+            with self._lock:
+                if len(self._idle.get(key, [])) >= count:
+                    return
+            container = self._create(image, host_config)
+            try:
+                self._warm_up(container)
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.warning("Cannot warm container up for %s: %r",
+                               image.name, exc)
+                self._remove(container)
+                return
+            with self._lock:
+                self._idle.setdefault(key, []).append(container)
+
+    def prestage(self, images, host_config=None):
+        """ Prepare containers for images that are available locally and
+        remove idle containers with a different host config
+        :param list images: DockerImage instances
+        :param dict host_config:
+        """
+        if not self._stale_removed:
+            self._stale_removed = True
+            self.remove_stale()
+
+        keys = {self.get_key(image, host_config) for image in images}
+        with self._lock:
+            stale = [container for key, idle in self._idle.items()
+                     if key not in keys for container in idle]
+            self._idle = {key: idle for key, idle in self._idle.items()
+                          if key in keys}
+        for container in stale:
+            self._remove(container)
+
+        for image in images:
+            try:
+                if image.is_available():
+                    self.prepare(image, host_config)
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.warning("Cannot prestage containers for %s: %r",
+                               image.name, exc)
+
+    def drain(self):
+        """ Remove all idle containers """
+        with self._lock:
+            idle = [container for containers in self._idle.values()
+                    for container in containers]
+            self._idle = dict()
+        for container in idle:
+            self._remove(container)
+
+    def remove_stale(self):
+        """ Remove containers and slot directories left by a previous run """
+        with self._lock:
+            known = set(self._busy)
+            for containers in self._idle.values():
+                known.update(c.container_id for c in containers)
+        slots = {c.slot_dir for c in self._containers()}
+
+        client = local_client()
+        label = '{}={}'.format(POOL_LABEL, self.root_dir)
+        for info in client.containers(all=True, filters={'label': label}):
+            if info['Id'] not in known:
+                self._remove_container(client, info['Id'])
+
+        if os.path.isdir(self.root_dir):
+            for name in os.listdir(self.root_dir):
+                path = os.path.join(self.root_dir, name)
+                if path not in slots:
+                    shutil.rmtree(path, ignore_errors=True)
+
+    def _containers(self):
+        with self._lock:
+            containers = list(self._busy.values())
+            for idle in self._idle.values():
+                containers.extend(idle)
+        return containers
+
+    def _create(self, image, host_config):
+        from golem.docker.job import DockerJob
+
+        if not os.path.exists(self.root_dir):
+            os.makedirs(self.root_dir)
+        slot_dir = tempfile.mkdtemp(prefix='slot-', dir=self.root_dir)
+        dirs = [os.path.join(slot_dir, name)
+                for name in ('work', 'resources', 'output')]
+        for path in dirs:
+            os.mkdir(path)
+            os.chmod(path, 0o770)
+
+        client = local_client()
+        try:
+            container = DockerJob.create_container(
+                client, image, *dirs, host_config=host_config,
+                labels={POOL_LABEL: self.root_dir})
+        except Exception:
+            shutil.rmtree(slot_dir, ignore_errors=True)
+            raise
+        logger.debug("Container %s created for the pool, image: %s",
+                     container["Id"], image.name)
+        return PooledContainer(self.get_key(image, host_config), image,
+                               host_config, container["Id"], slot_dir)
+
+    def _warm_up(self, container):
+        from golem.docker.job import DockerJob
+
+        script_path = os.path.join(container.work_dir, DockerJob.TASK_SCRIPT)
+        with open(script_path, 'w'):
+            pass
+
+        client = local_client()
+        client.start(container.container_id)
+        exit_code = client.wait(container.container_id, WARM_UP_TIMEOUT)
+        if exit_code != 0:
+            raise RuntimeError("warm-up exit code {}".format(exit_code))
+        container.baseline = container.get_changes(client)
+        container.clear()
+
+    def _is_reusable(self, container):
+        if container.baseline is None or container.uses >= MAX_USES:
+            return False
+        client = local_client()
+        status = client.inspect_container(container.container_id)
+        if status["State"]["Status"] != "exited":
+            return False
+        # The entrypoint runs again and may update the files it has
+        # created, anything else means the job left its files behind
+        return container.get_changes(client) <= container.baseline
+
+    def _replenish(self, image, host_config):
+        thread = Thread(target=self.prepare, args=(image, host_config),
+                        name="ContainerPoolThread")
+        thread.daemon = True
+        thread.start()
+
+    def _remove(self, container):
+        self._remove_container(local_client(), container.container_id)
+        shutil.rmtree(container.slot_dir, ignore_errors=True)
+
+    @staticmethod
+    def _remove_container(client, container_id):
+        try:
+            client.remove_container(container_id, force=True)
+            logger.debug("Container %s removed", container_id)
+        except docker.errors.APIError:
+            pass  # Already removed
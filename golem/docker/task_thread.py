@@ -70,12 +70,15 @@ class DockerTaskThread(TaskThread):
 
             if self.docker_manager:
                 host_config = self.docker_manager.container_host_config
+                container_pool = self.docker_manager.container_pool
             else:
                 host_config = None
+                container_pool = None
 
             with DockerJob(self.image, self.src_code, self.extra_data,
                            self.res_path, work_dir, output_dir,
-                           host_config=host_config) as job:
+                           host_config=host_config,
+                           container_pool=container_pool) as job:
                 self.job = job
                 if self.check_mem:
                     self.mc = MemoryChecker()
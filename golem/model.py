@@ -1,7 +1,6 @@
 import datetime
 import inspect
 import json
-import pickle
 
 import peewee
 from enum import Enum
@@ -10,10 +9,11 @@ from typing import Optional, Type  # pylint: disable=unused-import
 
 import sys
 from ethereum.utils import denoms
+import golem_messages
 from golem_messages import message
-from peewee import (BooleanField, CharField, CompositeKey, DateTimeField,
-                    FloatField, IntegerField, Model, SmallIntegerField,
-                    TextField, BlobField)
+from peewee import (BooleanField, CharField, CompositeKey, DateField,
+                    DateTimeField, FloatField, IntegerField, Model,
+                    SmallIntegerField, TextField, BlobField)
 
 from golem.core.simpleserializer import DictSerializable
 from golem.database import GolemSqliteDatabase
@@ -237,6 +237,8 @@ class Payment(BaseModel):
 
 class Income(BaseModel):
     sender_node = CharField()
+    # Ethereum address of the sender, batch transfers are matched by it
+    payer_address = CharField(null=True, index=True)
     subtask = CharField()
     value = HexIntegerField()
     accepted_ts = IntegerField(null=True)
@@ -382,21 +384,90 @@ class Performance(BaseModel):
     """ Keeps information about benchmark performance """
     environment_id = CharField(null=False, index=True, unique=True)
     value = FloatField(default=0.0)
+    # Hardware and Docker image fingerprint the value was measured with
+    fingerprint = CharField(null=True)
 
     class Meta:
         database = db
 
     @classmethod
-    def update_or_create(cls, env_id, performance):
+    def update_or_create(cls, env_id, performance, fingerprint=None):
         try:
             perf = Performance.get(Performance.environment_id == env_id)
             perf.value = performance
+            perf.fingerprint = fingerprint
             perf.save()
         except Performance.DoesNotExist:
-            perf = Performance(environment_id=env_id, value=performance)
+            perf = Performance(environment_id=env_id, value=performance,
+                               fingerprint=fingerprint)
             perf.save()
 
 
+################
+# TASK ARCHIVE #
+################
+
+
+class ArchivedTask(BaseModel):
+    """ Task header seen in the network, kept until its deadline passes and
+    then merged into the ArchiveDay aggregate of the day it was seen on """
+    task_id = CharField(primary_key=True)
+    day = DateField(index=True)
+    deadline = FloatField(index=True)
+    min_version = CharField()
+    max_price = FloatField()
+    requesting_trust = FloatField(null=True)
+
+
+class ArchivedTaskReason(BaseModel):
+    """ Reason for not supporting an ArchivedTask, from its latest support
+    status """
+    task_id = CharField()
+    reason = CharField()
+    day = DateField(index=True)
+
+    class Meta:
+        primary_key = CompositeKey('task_id', 'reason')
+
+
+class ArchiveDay(BaseModel):
+    """ Aggregate of archived tasks seen on a single day (UTC) """
+    day = DateField(primary_key=True)
+    num_tasks = IntegerField(default=0)
+    sum_max_price = FloatField(default=0.0)
+    sum_requesting_trust = FloatField(default=0.0)
+    num_requesting_trust = IntegerField(default=0)
+
+
+class ArchiveDayCount(BaseModel):
+    """ Number of archived tasks seen on a single day (UTC) with a given
+    unsupport reason or minimal app version """
+    REASON = 'reason'
+    MIN_VERSION = 'min_version'
+
+    kind = CharField()
+    day = DateField()
+    value = CharField()
+    count = IntegerField(default=0)
+
+    class Meta:
+        primary_key = CompositeKey('kind', 'day', 'value')
+
+
+######################
+# RESOURCE HANDSHAKE #
+######################
+
+
+class ResourceHandshakeResult(BaseModel):
+    """ Successful resource handshake with a peer, not repeated until it
+    expires """
+    node = CharField(primary_key=True)
+    expires = DateTimeField(index=True)
+    # task requests exchanged with the peer while verified
+    exchanges = IntegerField(default=0)
+
+
 ##################
 # MESSAGE MODELS #
 ##################
@@ -426,11 +497,13 @@ class NetworkMessage(BaseModel):
 
     msg_date = DateTimeField(null=False)
     msg_cls = CharField(null=False)
+    # Serialized message, as sent over the wire but neither signed again
+    # nor encrypted. Decoded only when the message is read back.
     msg_data = BlobField(null=False)
 
     def as_message(self) -> message.Message:
-        msg = pickle.loads(self.msg_data)
-        return msg
+        return golem_messages.load(self.msg_data, None, None,
+                                   check_time=False)
 
 
 def collect_db_models(module: str = __name__):
@@ -17,40 +17,184 @@ from .model.nodemetadatamodel import NodeInfoModel
 from .model.paymentmodel import ExpenditureModel, IncomeModel
 from .model.taskcomputersnapshotmodel import TaskComputerSnapshotModel
 from .transport.sender import DefaultJSONSender as Sender
+from .transport.spill import DiskSpill
 
 log = logging.getLogger('golem.monitor')
 
+# Put into the queue to wake up the sender thread when it's stopped
+_WAKE_UP = object()
+
 
 class SenderThread(threading.Thread):
+    """ Buffers monitor messages and sends them in compressed batches.
+    A batch is sent when it reaches BATCH_MAX_EVENTS messages or
+    BATCH_MAX_BYTES of encoded data, or BATCH_MAX_DELAY seconds after its
+    first message was added. Batches that could not be delivered in
+    MAX_ATTEMPTS attempts are spilled to disk (if spill_dir is given) and
+    resent once the monitor accepts a batch again.
+
+    Without batch_proto_ver, or once the monitor rejects a batch with
+    a client error, buffered messages are sent one by one instead.
+    """
+
+    BATCH_MAX_EVENTS = 100
+    BATCH_MAX_BYTES = 256 * 1024
+    BATCH_MAX_DELAY = 10  # s
+    MAX_ATTEMPTS = 3
+    RETRY_DELAY = 1  # s, doubled after each failed attempt
+    SPILL_MAX_SIZE = 10 * 1024 * 1024
+    QUEUE_MAX_SIZE = 10000
+
     def __init__(self, node_info, monitor_host, monitor_request_timeout,
-                 monitor_sender_thread_timeout, proto_ver):
+                 monitor_sender_thread_timeout, proto_ver, spill_dir=None,
+                 batch_proto_ver=None):
         super(SenderThread, self).__init__()
-        self.queue = queue.Queue()
+        self.queue = queue.Queue(maxsize=self.QUEUE_MAX_SIZE)
         self.stop_request = threading.Event()
         self.node_info = node_info
-        self.sender = Sender(monitor_host, monitor_request_timeout, proto_ver)
+        self.sender = Sender(monitor_host, monitor_request_timeout, proto_ver,
+                             batch_proto_ver)
+        self.send_batches = batch_proto_ver is not None
         self.monitor_sender_thread_timeout = monitor_sender_thread_timeout
+        self.spill = DiskSpill(spill_dir, self.SPILL_MAX_SIZE) \
+            if spill_dir else None
+
+        self._batch = []
+        self._batch_bytes = 0
+        self._batch_deadline = None
 
     def send(self, o):
-        self.queue.put(o)
+        try:
+            self.queue.put_nowait(o)
+        except queue.Full:
+            log.debug('Monitor queue full. Dropping %r', o)
 
     def run(self):
         while not self.stop_request.isSet():
             try:
-                msg = self.queue.get(True, self.monitor_sender_thread_timeout)
-                self.sender.send(msg)
+                msg = self.queue.get(True, self._get_timeout())
             except queue.Empty:
-                # send ping message
-                self.sender.send(self.node_info)
+                if not self._batch:
+                    # send ping message
+                    self._add(self.node_info)
+                self._flush()
+                continue
+            if msg is not _WAKE_UP:
+                self._add(msg)
+            if self._batch_ready():
+                self._flush()
+
+        # Deliver what is left, without retrying
+        while True:
+            try:
+                msg = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if msg is not _WAKE_UP:
+                self._add(msg)
+            if self._batch_ready():
+                self._flush(attempts=1)
+        if self._batch:
+            self._flush(attempts=1)
 
     def join(self, timeout=None):
         self.stop_request.set()
+        try:
+            self.queue.put_nowait(_WAKE_UP)
+        except queue.Full:
+            pass
         super(SenderThread, self).join(timeout)
 
+    def _get_timeout(self):
+        if not self._batch:
+            return self.monitor_sender_thread_timeout
+        return max(self._batch_deadline - time.monotonic(), 0)
+
+    def _add(self, o):
+        try:
+            encoded = self.sender.encode(o)
+        except (TypeError, ValueError) as e:
+            log.warning('Cannot encode monitor message %r: %s', o, e)
+            return
+        if not self._batch:
+            self._batch_deadline = time.monotonic() + self.BATCH_MAX_DELAY
+        self._batch.append(encoded)
+        self._batch_bytes += len(encoded)
+
+    def _batch_ready(self):
+        if not self._batch:
+            return False
+        return len(self._batch) >= self.BATCH_MAX_EVENTS \
+            or self._batch_bytes >= self.BATCH_MAX_BYTES \
+            or time.monotonic() >= self._batch_deadline
+
+    def _flush(self, attempts=None):
+        if not self._batch:
+            return
+        batch = self._batch
+        self._batch = []
+        self._batch_bytes = 0
+
+        if not self.send_batches:
+            self._send_singly(batch)
+            return
+
+        payload = self.sender.prepare_batch(batch)
+        status = self._deliver(payload, attempts or self.MAX_ATTEMPTS)
+        if status == 200:
+            self._resend_spilled()
+        elif _rejected(status):
+            log.warning('Monitor rejected a batch (HTTP %r), sending '
+                        'messages one by one', status)
+            self.send_batches = False
+            self._send_singly(batch)
+        elif self.spill is not None:
+            self.spill.put(payload)
+        else:
+            log.debug('Dropping undelivered monitor batch')
+
+    def _deliver(self, payload, attempts):
+        """ :return: HTTP status code of the last attempt """
+        status = None
+        delay = self.RETRY_DELAY
+        for attempt in range(attempts):
+            if attempt:
+                if self.stop_request.wait(delay):
+                    break
+                delay *= 2
+            status = self.sender.send_batch(payload)
+            if status == 200 or _rejected(status):
+                break
+        return status
+
+    def _send_singly(self, batch):
+        for i, encoded in enumerate(batch):
+            if not self.sender.send_encoded(encoded):
+                log.debug('Dropping %r undelivered monitor messages',
+                          len(batch) - i)
+                return
+
+    def _resend_spilled(self):
+        while self.spill:
+            spilled = self.spill.peek()
+            if spilled is None:
+                return
+            path, payload = spilled
+            status = self.sender.send_batch(payload)
+            if status != 200 and not _rejected(status):
+                return
+            self.spill.remove(path)
+
+
+def _rejected(status):
+    """ Whether the monitor refused a request, which is not retried """
+    return status is not None and 400 <= status < 500
+
 
 class SystemMonitor(object):
-    def __init__(self, meta_data, monitor_config):
+    def __init__(self, meta_data, monitor_config, spill_dir=None):
         self.meta_data = meta_data
+        self.spill_dir = spill_dir
         self.node_info = NodeInfoModel(meta_data.cliid, meta_data.sessid)
         self.config = monitor_config
         dispatcher.connect(self.dispatch_listener, signal='golem.monitor')
@@ -63,12 +207,16 @@ class SystemMonitor(object):
             request_timeout = self.config['REQUEST_TIMEOUT']
             sender_thread_timeout = self.config['SENDER_THREAD_TIMEOUT']
             proto_ver = self.config['PROTO_VERSION']
+            batch_proto_ver = self.config['BATCH_PROTO_VERSION'] \
+                if self.config['SEND_BATCHES'] else None
             self._sender_thread = SenderThread(
                 self.node_info,
                 host,
                 request_timeout,
                 sender_thread_timeout,
-                proto_ver
+                proto_ver,
+                spill_dir=self.spill_dir,
+                batch_proto_ver=batch_proto_ver,
             )
         return self._sender_thread
 
@@ -1,3 +1,4 @@
+import gzip
 import logging
 import requests
 import time
@@ -10,20 +11,32 @@ class DefaultHttpSender(object):
         self.url = url
         self.timeout = request_timeout
         self.json_headers = {'content-type': 'application/json'}
+        self.gzip_json_headers = {'content-type': 'application/json',
+                                  'content-encoding': 'gzip'}
         self.last_exception_time = 0
+        # Keeps the connection to the monitor alive between requests
+        self.session = requests.Session()
 
     def _post(self, headers, payload):
         try:
-            r = requests.post(self.url, data=payload, headers=headers,
-                              timeout=self.timeout)
-            return r.status_code == 200
+            r = self.session.post(self.url, data=payload, headers=headers,
+                                  timeout=self.timeout)
+            return r.status_code
         except requests.exceptions.RequestException as e:
             delta = time.time() - self.last_exception_time
             if delta > 60*10:  # seconds
                 log.warning('Problem sending payload to: %r, because %s',
                             self.url, e)
                 self.last_exception_time = time.time()
-            return False
+            return None
 
     def post_json(self, json_payload):
-        return self._post(self.json_headers, json_payload)
+        return self._post(self.json_headers, json_payload) == 200
+
+    def post_gzip_json(self, gzip_payload):
+        """ :return: HTTP status code, None if the request failed """
+        return self._post(self.gzip_json_headers, gzip_payload)
+
+    @staticmethod
+    def compress(json_payload: str) -> bytes:
+        return gzip.compress(json_payload.encode('utf-8'))
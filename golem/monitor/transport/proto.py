@@ -1,3 +1,5 @@
+import json
+
 from golem.monitor.serialization.defaultserializer import dict2json
 
 
@@ -8,3 +10,20 @@ class DefaultProto(object):
     def prepare_json_message(self, d):
         json_dict = {'proto_ver': self.proto_version, 'data': d}
         return dict2json(json_dict)
+
+    @staticmethod
+    def encode_item(d):
+        return json.dumps(d, separators=(',', ':'))
+
+    def prepare_json_item(self, encoded_item):
+        """ Build a message from a single item encoded with encode_item """
+        return '{{"proto_ver":{},"data":{}}}'.format(
+            json.dumps(self.proto_version), encoded_item)
+
+    def prepare_json_batch(self, encoded_items):
+        """ Build a batch message from items encoded with encode_item
+        :param list encoded_items: JSON encoded dictionaries
+        :return str: JSON message with a list of items as data
+        """
+        return '{{"proto_ver":{},"data":[{}]}}'.format(
+            json.dumps(self.proto_version), ','.join(encoded_items))
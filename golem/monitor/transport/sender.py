@@ -3,10 +3,29 @@ from .proto import DefaultProto
 
 
 class DefaultJSONSender(object):
-    def __init__(self, host, timeout, proto_ver):
+    def __init__(self, host, timeout, proto_ver, batch_proto_ver=None):
         self.transport = DefaultHttpSender(host, timeout)
         self.proto = DefaultProto(proto_ver)
+        self.batch_proto = DefaultProto(batch_proto_ver)
 
     def send(self, o):
         msg = self.proto.prepare_json_message(o.dict_repr())
         return self.transport.post_json(msg)
+
+    def encode(self, o):
+        return self.proto.encode_item(o.dict_repr())
+
+    def send_encoded(self, encoded_item):
+        msg = self.proto.prepare_json_item(encoded_item)
+        return self.transport.post_json(msg)
+
+    def prepare_batch(self, encoded_items):
+        msg = self.batch_proto.prepare_json_batch(encoded_items)
+        return self.transport.compress(msg)
+
+    def send_batch(self, payload):
+        """ Send a batch prepared with prepare_batch
+        :param bytes payload: compressed batch message
+        :return: HTTP status code, None if the request failed
+        """
+        return self.transport.post_gzip_json(payload)
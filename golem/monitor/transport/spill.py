@@ -0,0 +1,91 @@
+from collections import deque
+import logging
+import os
+import time
+
+log = logging.getLogger('golem.monitor.transport')
+
+
+class DiskSpill(object):
+    """ Bounded on-disk FIFO of payloads that could not be delivered.
+    Each payload is stored in a separate file; when the total size exceeds
+    max_size the oldest payloads are dropped. Not thread-safe, the spill is
+    owned by the monitor sender thread.
+    """
+
+    SUFFIX = '.batch'
+
+    def __init__(self, directory, max_size):
+        self.directory = directory
+        self.max_size = max_size
+        self._counter = 0
+        os.makedirs(directory, exist_ok=True)
+        self._files = self._list()
+        self._size = sum(size for _, size in self._files)
+
+    def __len__(self):
+        return len(self._files)
+
+    @property
+    def size(self):
+        return self._size
+
+    def put(self, payload: bytes):
+        if len(payload) > self.max_size:
+            log.debug('Monitor payload too large to spill: %d B', len(payload))
+            return
+        self._counter += 1
+        # Names sort in the order payloads were stored
+        name = '{:017d}-{:06d}{}'.format(int(time.time() * 10 ** 6),
+                                         self._counter, self.SUFFIX)
+        path = os.path.join(self.directory, name)
+        tmp_path = path + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log.debug('Cannot spill monitor payload: %r', e)
+            return
+        self._files.append((path, len(payload)))
+        self._size += len(payload)
+        while self._size > self.max_size:
+            self._remove_oldest()
+
+    def peek(self):
+        """ Oldest stored payload
+        :return (str, bytes)|None: file path and payload or None if empty
+        """
+        while self._files:
+            path, _ = self._files[0]
+            try:
+                with open(path, 'rb') as f:
+                    return path, f.read()
+            except OSError as e:
+                log.debug('Cannot read spilled payload %r: %r', path, e)
+                self._remove_oldest()
+        return None
+
+    def remove(self, path):
+        if self._files and self._files[0][0] == path:
+            self._remove_oldest()
+
+    def _remove_oldest(self):
+        path, size = self._files.popleft()
+        self._size -= size
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _list(self):
+        files = deque()
+        for name in sorted(os.listdir(self.directory)):
+            path = os.path.join(self.directory, name)
+            if not name.endswith(self.SUFFIX):
+                continue
+            try:
+                files.append((path, os.path.getsize(path)))
+            except OSError:
+                continue
+        return files
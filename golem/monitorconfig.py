@@ -7,6 +7,11 @@ MONITOR_CONFIG = {
     # Increase this number every time any change is made to the protocol
     # (e.g. message object representation changes)
     'PROTO_VERSION': 1,
+
+    # Send events in gzip-compressed batches of BATCH_PROTO_VERSION, which
+    # the monitor has to accept; events are sent one by one otherwise
+    'SEND_BATCHES': False,
+    'BATCH_PROTO_VERSION': 2,
 }
 
 # so that the queue will not get filled up
@@ -1,6 +1,7 @@
 import base64
 import calendar
 import datetime
+import itertools
 import logging
 import queue
 import threading
@@ -9,6 +10,7 @@ import typing
 from urllib.parse import urljoin
 
 import requests
+from requests.adapters import HTTPAdapter
 import golem_messages
 from golem_messages import message
 from golem_messages import datastructures as msg_datastructures
@@ -24,6 +26,10 @@ from golem.network.concent import exceptions
 
 logger = logging.getLogger(__name__)
 
+# Timeout for a single HTTP request to Concent; a stalled connection must not
+# keep a sender busy while other messages approach their deadlines
+REQUEST_TIMEOUT = 30  # s
+
 
 def verify_response(response: requests.Response) -> None:
     if response is None:
@@ -62,10 +68,13 @@ def verify_response(response: requests.Response) -> None:
         )
 
 
-def send_to_concent(msg: message.Message, signing_key, public_key) \
+def send_to_concent(msg: message.Message, signing_key, public_key,
+                    session: typing.Optional[requests.Session] = None) \
         -> typing.Optional[bytes]:
     """Sends a message to the concent server
 
+    :param session: HTTP session to send the request with; a new connection
+                    is made when not given
     :return: Raw reply message, None or exception
     :rtype: Bytes|None
     """
@@ -103,10 +112,11 @@ def send_to_concent(msg: message.Message, signing_key, public_key) \
             concent_post_url,
             headers,
         )
-        response = requests.post(
+        response = (session or requests).post(
             concent_post_url,
             data=data,
             headers=headers,
+            timeout=REQUEST_TIMEOUT,
         )
     except requests.exceptions.RequestException as e:
         logger.warning('Concent RequestException %r', e)
@@ -116,7 +126,10 @@ def send_to_concent(msg: message.Message, signing_key, public_key) \
     return response.content or None
 
 
-def receive_from_concent(public_key) -> typing.Optional[bytes]:
+def receive_from_concent(
+        public_key,
+        session: typing.Optional[requests.Session] = None) \
+        -> typing.Optional[bytes]:
     concent_receive_url = urljoin(variables.CONCENT_URL, '/api/v1/receive/')
     headers = {
         'Content-Type': 'application/octet-stream',
@@ -129,9 +142,10 @@ def receive_from_concent(public_key) -> typing.Optional[bytes]:
             concent_receive_url,
             headers,
         )
-        response = requests.get(
+        response = (session or requests).get(
             concent_receive_url,
             headers=headers,
+            timeout=REQUEST_TIMEOUT,
         )
     except requests.exceptions.RequestException as e:
         raise exceptions.ConcentUnavailableError(
@@ -161,12 +175,24 @@ class ConcentRequest(msg_datastructures.FrozenDict):
 
 
 class ConcentClientService(threading.Thread):
+    """
+    Sends requests to Concent and receives messages from it.
+
+    Requests are sent by a small pool of sender threads sharing a keep-alive
+    HTTP session, earliest deadline first. Receiving runs on the service
+    thread itself, so it is not held up by slow or failing requests.
+    """
 
     MIN_GRACE_TIME = 5  # s
     MAX_GRACE_TIME = 5 * 60  # s
     GRACE_FACTOR = 2  # n times on each failure
 
-    def __init__(self, keys_auth: keysauth.KeysAuth, enabled=True):
+    NUM_SENDERS = 4
+    RECEIVE_INTERVAL = 1  # s
+    QUEUE_TIMEOUT = 1  # s
+
+    def __init__(self, keys_auth: keysauth.KeysAuth, enabled=True,
+                 num_senders: int = NUM_SENDERS):
         super().__init__(daemon=True)
 
         self.keys_auth = keys_auth
@@ -175,17 +201,47 @@ class ConcentClientService(threading.Thread):
         self._enabled = enabled  # FIXME: remove
         self._stop_event = threading.Event()
 
-        self._queue = queue.Queue()
+        # Entries are (deadline_at, sequence number, request)
+        self._queue = queue.PriorityQueue()
+        self._counter = itertools.count()
         self._grace_time = self.MIN_GRACE_TIME
+        self._grace_lock = threading.Lock()
+
+        self._num_senders = max(num_senders, 1)
+        self._senders = []
+        self._session = self._create_session(self._num_senders)
 
         self._delayed = dict()
         self.received_messages = queue.Queue(maxsize=100)
 
+    @staticmethod
+    def _create_session(num_senders: int) -> requests.Session:
+        session = requests.Session()
+        # One connection per sender and one for the receive path
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=num_senders + 1,
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
     def run(self) -> None:
-        while not self._stop_event.isSet():
-            self._loop()
+        self._senders = [
+            threading.Thread(target=self._send_loop, daemon=True,
+                             name='ConcentSender-{}'.format(i))
+            for i in range(self._num_senders)
+        ]
+        for sender in self._senders:
+            sender.start()
+
+        while not self._stop_event.is_set():
             self.receive()
-            time.sleep(1)
+            self._stop_event.wait(self.RECEIVE_INTERVAL)
+
+        for sender in self._senders:
+            sender.join(timeout=self.QUEUE_TIMEOUT + REQUEST_TIMEOUT)
+        self._session.close()
 
     def stop(self) -> None:
         self._stop_event.set()
@@ -276,13 +332,22 @@ class ConcentClientService(threading.Thread):
             return True
         return False
 
-    def _loop(self) -> None:
+    def _send_loop(self) -> None:
+        while not self._stop_event.is_set():
+            self._loop(block=True)
+
+    def _loop(self, block: bool = False) -> None:
         """
-        Main service loop. Requests from the queue are sent one by one (FIFO).
-        In case of failure, service enters a grace period.
+        Take the request with the earliest deadline from the queue and send
+        it. In case of failure, the sender enters a grace period.
+
+        :param block: wait up to QUEUE_TIMEOUT for a request to arrive
         """
         try:
-            req = self._queue.get_nowait()
+            if block:
+                _, _, req = self._queue.get(timeout=self.QUEUE_TIMEOUT)
+            else:
+                _, _, req = self._queue.get_nowait()
         except queue.Empty:
             return
 
@@ -301,6 +366,7 @@ class ConcentClientService(threading.Thread):
                 req['msg'],
                 self.keys_auth._private_key,  # pylint: disable=protected-access
                 self.keys_auth.public_key,
+                session=self._session,
             )
         except exceptions.ConcentError as e:
             logger.info('send_to_concent error: %s', e)
@@ -309,7 +375,7 @@ class ConcentClientService(threading.Thread):
             logger.exception('send_to_concent(%r) failed', req)
             self._grace_sleep()
         else:
-            self._grace_time = self.MIN_GRACE_TIME
+            self._reset_grace_time()
             self.react_to_concent_message(res)
 
     def receive(self) -> None:
@@ -317,7 +383,10 @@ class ConcentClientService(threading.Thread):
             return
 
         try:
-            res = receive_from_concent(self.keys_auth.public_key)
+            res = receive_from_concent(
+                self.keys_auth.public_key,
+                session=self._session,
+            )
         except exceptions.ConcentError as e:
             logger.warning("Can't receive message from Concent: %s", e)
             self._grace_sleep()
@@ -344,13 +413,19 @@ class ConcentClientService(threading.Thread):
         self.received_messages.put(msg)
 
     def _grace_sleep(self):
-        self._grace_time = min(self._grace_time * self.GRACE_FACTOR,
-                               self.MAX_GRACE_TIME)
+        with self._grace_lock:
+            self._grace_time = min(self._grace_time * self.GRACE_FACTOR,
+                                   self.MAX_GRACE_TIME)
+            grace_time = self._grace_time
 
-        logger.debug('Concent grace time: %r', self._grace_time)
-        time.sleep(self._grace_time)
+        logger.debug('Concent grace time: %r', grace_time)
+        self._stop_event.wait(grace_time)
+
+    def _reset_grace_time(self):
+        with self._grace_lock:
+            self._grace_time = self.MIN_GRACE_TIME
 
     def _enqueue(self, req: ConcentRequest):
         logger.debug("_enqueue(%r)", req)
         self._delayed.pop(req['key'], None)
-        self._queue.put(req)
+        self._queue.put((req['deadline_at'], next(self._counter), req))
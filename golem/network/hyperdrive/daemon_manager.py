@@ -116,7 +116,7 @@ class HyperdriveDaemonManager(object):
 
         if process.poll() is None:
             self._monitor.add_child_processes(process)
-            self._wait()
+            self._wait(process)
         else:
             raise RuntimeError("Cannot start {}".format(self._executable))
 
@@ -137,14 +137,19 @@ class HyperdriveDaemonManager(object):
         except OSError:
             return self._critical_error()
 
-    def _wait(self, timeout: int = 10):
+    def _wait(self, process=None, timeout: int = 10):
+        # The API becomes available within a fraction of a second, poll often
+        # at first and back off
         deadline = time.time() + timeout
+        delay = 0.05
 
         while time.time() < deadline:
-            addresses = self.addresses()
-            if addresses:
+            if self.addresses():
                 return
-            time.sleep(1.)
+            if process and process.poll() is not None:
+                break
+            time.sleep(min(delay, max(deadline - time.time(), 0)))
+            delay = min(delay * 2, 1.)
 
         self._critical_error()
 
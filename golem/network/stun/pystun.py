@@ -22,7 +22,10 @@
 import binascii
 import logging
 import random
+import select
 import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 __version__ = '0.1.0'
 
@@ -39,6 +42,12 @@ STUN_SERVERS = (
 
 stun_servers_list = STUN_SERVERS
 
+# Binding requests are sent to all servers at once, these many servers need
+# to report the same external address for it to be used right away
+STUN_QUORUM = 2
+STUN_TIMEOUT = 4.
+STUN_RETRY_INTERVAL = 0.5
+
 DEFAULTS = {
     'stun_port': 3478,
     'source_ip': '0.0.0.0',
@@ -127,10 +136,7 @@ def stun_test(sock, host, port, source_ip, source_port, send_data=""):
     retVal = {'Resp': False, 'ExternalIP': None, 'ExternalPort': None,
               'SourceIP': None, 'SourcePort': None, 'ChangedIP': None,
               'ChangedPort': None}
-    str_len = "%#04d" % (len(send_data) / 2)
-    tranid = gen_tran_id()
-    str_data = ''.join([BindRequestMsg, str_len, tranid, send_data])
-    data = binascii.a2b_hex(str_data)
+    tranid, data = bind_request(send_data)
     recvCorr = False
     while not recvCorr:
         recieved = False
@@ -153,57 +159,157 @@ def stun_test(sock, host, port, source_ip, source_port, send_data=""):
                 else:
                     retVal['Resp'] = False
                     return retVal
-        msgtype = binascii.b2a_hex(buf[0:2]).decode()
-        msgtranid = binascii.b2a_hex(buf[4:20]).decode()
-        bind_resp_msg = dictValToMsgType[msgtype] == "BindResponseMsg"
-        tranid_match = tranid.upper() == msgtranid.upper()
-        if bind_resp_msg and tranid_match:
+        msgtranid, response = parse_response(buf)
+        if response and tranid.upper() == msgtranid.upper():
             recvCorr = True
-            retVal['Resp'] = True
-            len_message = int(binascii.b2a_hex(buf[2:4]), 16)
-            len_remain = len_message
-            base = 20
-            while len_remain:
-                attr_type = binascii.b2a_hex(buf[base:(base + 2)]).decode()
-                attr_len = int(binascii.b2a_hex(buf[(base + 2):(base + 4)]), 16)
-                if attr_type == MappedAddress:
-                    port = int(binascii.b2a_hex(buf[base + 6:base + 8]), 16)
-                    ip = ".".join([
-                        str(int(binascii.b2a_hex(buf[base + 8:base + 9]), 16)),
-                        str(int(binascii.b2a_hex(buf[base + 9:base + 10]), 16)),
-                        str(int(binascii.b2a_hex(buf[base + 10:base + 11]), 16)),
-                        str(int(binascii.b2a_hex(buf[base + 11:base + 12]), 16))
-                    ])
-                    retVal['ExternalIP'] = ip
-                    retVal['ExternalPort'] = port
-                if attr_type == SourceAddress:
-                    port = int(binascii.b2a_hex(buf[base + 6:base + 8]), 16)
-                    ip = ".".join([
-                        str(int(binascii.b2a_hex(buf[base + 8:base + 9]), 16)),
-                        str(int(binascii.b2a_hex(buf[base + 9:base + 10]), 16)),
-                        str(int(binascii.b2a_hex(buf[base + 10:base + 11]), 16)),
-                        str(int(binascii.b2a_hex(buf[base + 11:base + 12]), 16))
-                    ])
-                    retVal['SourceIP'] = ip
-                    retVal['SourcePort'] = port
-                if attr_type == ChangedAddress:
-                    port = int(binascii.b2a_hex(buf[base + 6:base + 8]), 16)
-                    ip = ".".join([
-                        str(int(binascii.b2a_hex(buf[base + 8:base + 9]), 16)),
-                        str(int(binascii.b2a_hex(buf[base + 9:base + 10]), 16)),
-                        str(int(binascii.b2a_hex(buf[base + 10:base + 11]), 16)),
-                        str(int(binascii.b2a_hex(buf[base + 11:base + 12]), 16))
-                    ])
-                    retVal['ChangedIP'] = ip
-                    retVal['ChangedPort'] = port
-                # if attr_type == ServerName:
-                    # serverName = buf[(base+4):(base+4+attr_len)]
-                base = base + 4 + attr_len
-                len_remain = len_remain - (4 + attr_len)
+            retVal.update(response)
     # s.close()
     return retVal
 
 
+def bind_request(send_data=""):
+    str_len = "%#04d" % (len(send_data) / 2)
+    tranid = gen_tran_id()
+    str_data = ''.join([BindRequestMsg, str_len, tranid, send_data])
+    return tranid, binascii.a2b_hex(str_data)
+
+
+def _parse_address(buf, base):
+    port = int(binascii.b2a_hex(buf[base + 6:base + 8]), 16)
+    ip = ".".join([
+        str(int(binascii.b2a_hex(buf[base + 8:base + 9]), 16)),
+        str(int(binascii.b2a_hex(buf[base + 9:base + 10]), 16)),
+        str(int(binascii.b2a_hex(buf[base + 10:base + 11]), 16)),
+        str(int(binascii.b2a_hex(buf[base + 11:base + 12]), 16))
+    ])
+    return ip, port
+
+
+def parse_response(buf):
+    """ Parse a binding response
+    :return: transaction id and a dict of response attributes, or None if
+    the message is not a binding response
+    """
+    if not dictValToMsgType:
+        _initialize()
+    msgtype = binascii.b2a_hex(buf[0:2]).decode()
+    msgtranid = binascii.b2a_hex(buf[4:20]).decode()
+    if dictValToMsgType.get(msgtype) != "BindResponseMsg":
+        return msgtranid, None
+
+    retVal = {'Resp': True}
+    len_message = int(binascii.b2a_hex(buf[2:4]), 16)
+    len_remain = len_message
+    base = 20
+    while len_remain:
+        attr_type = binascii.b2a_hex(buf[base:(base + 2)]).decode()
+        attr_len = int(binascii.b2a_hex(buf[(base + 2):(base + 4)]), 16)
+        if attr_type == MappedAddress:
+            retVal['ExternalIP'], retVal['ExternalPort'] = \
+                _parse_address(buf, base)
+        if attr_type == SourceAddress:
+            retVal['SourceIP'], retVal['SourcePort'] = \
+                _parse_address(buf, base)
+        if attr_type == ChangedAddress:
+            retVal['ChangedIP'], retVal['ChangedPort'] = \
+                _parse_address(buf, base)
+        # if attr_type == ServerName:
+            # serverName = buf[(base+4):(base+4+attr_len)]
+        base = base + 4 + attr_len
+        len_remain = len_remain - (4 + attr_len)
+    return msgtranid, retVal
+
+
+def _resolve(host, port):
+    return socket.getaddrinfo(host, port, socket.AF_INET,
+                              socket.SOCK_DGRAM)[0][4]
+
+
+def parallel_stun_test(sock, servers, timeout=STUN_TIMEOUT,
+                       quorum=STUN_QUORUM,
+                       retry_interval=STUN_RETRY_INTERVAL):
+    """ Send binding requests to all servers at once, from the same socket.
+    Server names are resolved in parallel and requests are resent to servers
+    that have not responded yet. Returns as soon as <quorum> servers report
+    the same external address, or when no more responses can arrive.
+    :param sock: bound UDP socket
+    :param servers: list of (host, port) tuples
+    :return: ((host, port), response) of the first server that reported the
+    agreed address, ((None, None), failed response) if no server responded
+    """
+    _initialize()
+    failed = {'Resp': False, 'ExternalIP': None, 'ExternalPort': None,
+              'SourceIP': None, 'SourcePort': None, 'ChangedIP': None,
+              'ChangedPort': None}
+    deadline = time.time() + timeout
+
+    executor = ThreadPoolExecutor(max_workers=max(len(servers), 1))
+    resolving = {executor.submit(_resolve, host, port): (host, port)
+                 for host, port in servers}
+    executor.shutdown(wait=False)
+
+    requests = dict()  # transaction id -> [server, address, data, sent at]
+    responses = []
+
+    def result(response):
+        server, ret = response
+        full = dict(failed)
+        full.update(ret)
+        return server, full
+
+    while True:
+        for future in [f for f in resolving if f.done()]:
+            server = resolving.pop(future)
+            try:
+                address = future.result()
+            except OSError as exc:
+                log.debug("Cannot resolve STUN host %s: %s", server[0], exc)
+                continue
+            tranid, data = bind_request()
+            requests[tranid.upper()] = [server, address, data, 0.]
+
+        now = time.time()
+        if now >= deadline or not (resolving or requests):
+            break
+
+        for request in requests.values():
+            if now - request[3] >= retry_interval:
+                log.debug("sendto: %s", request[1])
+                try:
+                    sock.sendto(request[2], request[1])
+                except OSError as exc:
+                    log.debug("Cannot send to %s: %s", request[1], exc)
+                request[3] = now
+
+        wait = min(0.05 if resolving else retry_interval, deadline - now)
+        try:
+            readable, _, _ = select.select([sock], [], [], max(wait, 0))
+            if not readable:
+                continue
+            buf, addr = sock.recvfrom(2048)
+        except OSError:
+            continue
+        log.debug("recvfrom: %s", addr)
+
+        try:
+            msgtranid, ret = parse_response(buf)
+        except (ValueError, IndexError):
+            continue
+        request = requests.pop(msgtranid.upper(), None)
+        if not ret or not request:
+            continue
+
+        responses.append((request[0], ret))
+        agreeing = [r for r in responses
+                    if r[1].get('ExternalIP') == ret.get('ExternalIP')]
+        if len(agreeing) >= quorum:
+            return result(agreeing[0])
+
+    if responses:
+        return result(responses[0])
+    return (None, None), failed
+
+
 def get_nat_type(s, source_ip, source_port, stun_host=None, stun_port=3478):
     _initialize()
     port = stun_port
@@ -213,12 +319,9 @@ def get_nat_type(s, source_ip, source_port, stun_host=None, stun_port=3478):
         ret = stun_test(s, stun_host, port, source_ip, source_port)
         resp = ret['Resp']
     else:
-        for stun_host in stun_servers_list:
-            log.debug('Trying STUN host: %s', stun_host)
-            ret = stun_test(s, stun_host, port, source_ip, source_port)
-            resp = ret['Resp']
-            if resp:
-                break
+        servers = [(host, port) for host in stun_servers_list]
+        (stun_host, port), ret = parallel_stun_test(s, servers)
+        resp = ret['Resp']
     if not resp:
         return Blocked, ret
     log.debug("Result: %s", ret)
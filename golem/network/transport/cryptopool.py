@@ -0,0 +1,178 @@
+import logging
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class CryptoPool(object):
+    """ Worker threads for encrypting, decrypting, signing and verifying
+    messages, so that the reactor thread is free to handle I/O. Operations
+    are submitted to channels; a channel keeps the operations of a single
+    connection and one direction in order.
+
+    Messages smaller than INLINE_SIZE are handled on the reactor thread
+    when nothing else is waiting in their channel, since handing them over
+    to a worker would cost more than it saves.
+    """
+
+    WORKERS = max(1, min(4, (os.cpu_count() or 1) // 2))
+    INLINE_SIZE = 16 * 1024
+    BATCH_SIZE = 32
+
+    def __init__(self, workers=WORKERS, reactor=None):
+        """
+        :param int workers: number of worker threads, handle all operations
+        inline when 0
+        :param reactor: reactor to call back on, twisted's global reactor
+        by default
+        """
+        self.workers = workers
+        self._reactor = reactor
+        self._executor = None
+        # last sealed size of messages by message class
+        self._sizes = dict()
+
+    def channel(self):
+        return CryptoChannel(self)
+
+    def expected_size(self, key):
+        return self._sizes.get(key)
+
+    def record_size(self, key, size):
+        self._sizes[key] = size
+
+    def submit(self, fn, arg, callback):
+        """ Run fn(arg) in a worker thread and pass the result to callback
+        on the reactor thread
+        """
+        reactor = self._get_reactor()
+
+        if not self._executor:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers)
+            reactor.addSystemEventTrigger('before', 'shutdown', self.stop)
+
+        future = self._executor.submit(fn, arg)
+        future.add_done_callback(
+            lambda f: reactor.callFromThread(callback, f.result()))
+
+    def stop(self):
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _get_reactor(self):
+        if not self._reactor:
+            from twisted.internet import reactor
+            self._reactor = reactor
+        return self._reactor
+
+
+class CryptoChannel(object):
+    """ Ordered queue of crypto operations. Operations are run by the pool
+    in batches, one batch of a channel at a time, and their callbacks are
+    called on the reactor thread in the order of submission.
+    """
+
+    def __init__(self, pool):
+        self._pool = pool
+        self._pending = deque()
+        self._running = False
+        self._idle_callbacks = []
+        # incremented on cancel, results of older batches are dropped
+        self._generation = 0
+        self.queued_bytes = 0
+
+    @property
+    def idle(self):
+        return not (self._pending or self._running)
+
+    def runs_inline(self, size):
+        """ Whether an operation on data of a given size should be run on
+        the reactor thread instead of being submitted
+        :param int size: data size in bytes, None if not known
+        """
+        if not self.idle:
+            return False
+        return not self._pool.workers or size is None \
+            or size < self._pool.INLINE_SIZE
+
+    def submit(self, fn, arg, size, callback):
+        """ Queue fn(arg) to be run after all previously submitted
+        operations
+        :param fn: operation, called in a worker thread
+        :param arg: operation argument
+        :param int size: data size in bytes, None if not known
+        :param callback: called with the result and the exception raised
+        by the operation (or None)
+        """
+        self._pending.append((fn, arg, size or 0, callback))
+        self.queued_bytes += size or 0
+        if not self._running:
+            self._run_batch()
+
+    def when_idle(self, fn):
+        """ Call fn once all submitted operations are done """
+        if self.idle:
+            fn()
+        else:
+            self._idle_callbacks.append(fn)
+
+    def cancel(self):
+        """ Drop all operations which results have not been delivered yet
+        """
+        self._generation += 1
+        self._pending.clear()
+        self._idle_callbacks = []
+        self._running = False
+        self.queued_bytes = 0
+
+    def _run_batch(self):
+        count = min(len(self._pending), self._pool.BATCH_SIZE)
+        batch = [self._pending.popleft() for _ in range(count)]
+        operations = [(fn, arg) for fn, arg, _, _ in batch]
+
+        self._running = True
+        self._pool.submit(
+            _run_operations,
+            operations,
+            lambda results, generation=self._generation:
+            self._batch_done(batch, results, generation)
+        )
+
+    def _batch_done(self, batch, results, generation):
+        for (_, _, size, callback), (result, error) in zip(batch, results):
+            # Cancelled, possibly by one of the callbacks
+            if generation != self._generation:
+                return
+            self.queued_bytes -= size
+            try:
+                callback(result, error)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Crypto operation callback failed")
+
+        if generation != self._generation:
+            return
+
+        self._running = False
+        if self._pending:
+            self._run_batch()
+            return
+
+        callbacks, self._idle_callbacks = self._idle_callbacks, []
+        for fn in callbacks:
+            fn()
+
+
+def _run_operations(operations):
+    results = []
+    for fn, arg in operations:
+        try:
+            results.append((fn(arg), None))
+        except Exception as e:  # pylint: disable=broad-except
+            results.append((None, e))
+    return results
+
+
+crypto_pool = CryptoPool()
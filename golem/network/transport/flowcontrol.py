@@ -0,0 +1,92 @@
+import logging
+from collections import OrderedDict
+
+from golem.diag.service import DiagnosticsProvider
+
+logger = logging.getLogger(__name__)
+
+
+class ReceiveScheduler(DiagnosticsProvider):
+    """ Dispatches messages received by all connections in round-robin
+    order. Every connection gets a turn limited by a message and a byte
+    budget, and a single reactor tick is limited by a global budget. Any
+    messages left are dispatched in the next tick, so a connection flooding
+    us with messages cannot starve the others nor the rest of the reactor.
+
+    Protocols need to implement:
+    - dispatch_received(max_messages, max_bytes) -> (messages, bytes)
+    - has_received() -> bool
+    - get_receive_stats() -> dict
+    and provide a transport, which connection is lost when dispatching
+    fails.
+    """
+
+    MESSAGES_PER_TURN = 8
+    BYTES_PER_TURN = 512 * 1024
+    MESSAGES_PER_TICK = 64
+    BYTES_PER_TICK = 4 * 1024 * 1024
+
+    def __init__(self, reactor=None):
+        self._reactor = reactor
+        # protocols with received messages, in dispatch order
+        self._ready = OrderedDict()
+        self._dispatching = False
+        self._call = None
+
+    def schedule(self, protocol):
+        """ Register received messages of a protocol. When no other
+        messages are waiting, they are dispatched right away.
+        """
+        if protocol not in self._ready:
+            self._ready[protocol] = None
+        if not (self._dispatching or self._call):
+            self._tick()
+
+    def discard(self, protocol):
+        self._ready.pop(protocol, None)
+
+    def get_diagnostics(self, output_format):
+        data = [protocol.get_receive_stats() for protocol in self._ready]
+        return self._format_diagnostics(data, output_format)
+
+    def _tick(self):
+        self._call = None
+        self._dispatching = True
+        messages, size = 0, 0
+
+        try:
+            while self._ready and messages < self.MESSAGES_PER_TICK \
+                    and size < self.BYTES_PER_TICK:
+                protocol, _ = self._ready.popitem(last=False)
+                try:
+                    turn_messages, turn_size = protocol.dispatch_received(
+                        self.MESSAGES_PER_TURN, self.BYTES_PER_TURN)
+                except Exception:  # pylint: disable=broad-except
+                    # The connection is dropped, as it would be by twisted
+                    # when a message handler failed in dataReceived
+                    logger.exception("Cannot dispatch received messages")
+                    protocol.transport.loseConnection()
+                    continue
+                messages += turn_messages
+                size += turn_size
+                # Back of the queue if there is more to dispatch
+                if protocol.has_received():
+                    self._ready[protocol] = None
+        finally:
+            self._dispatching = False
+            if self._ready:
+                self._call = self._get_reactor().callLater(0, self._tick)
+
+        if self._ready:
+            logger.debug("Dispatched %r messages (%r B), %r connections "
+                         "have messages waiting", messages, size,
+                         len(self._ready))
+
+    def _get_reactor(self):
+        if not self._reactor:
+            from twisted.internet import reactor
+            self._reactor = reactor
+        return self._reactor
+
+
+receive_scheduler = ReceiveScheduler()
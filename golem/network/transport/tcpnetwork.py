@@ -2,7 +2,9 @@ import logging
 import os
 import struct
 import time
-from copy import copy
+from collections import deque
+from functools import partial
+from copy import copy, deepcopy
 from ipaddress import ip_address
 from threading import Lock
 
@@ -19,6 +21,7 @@ from golem.core.databuffer import DataBuffer
 from golem.core.hostaddress import get_host_addresses
 from golem.core.variables import LONG_STANDARD_SIZE, BUFF_SIZE
 from golem.network.transport.limiter import CallRateLimiter
+from . import cryptopool, flowcontrol
 from .network import Network, SessionProtocol, IncomingProtocolFactoryWrapper, \
     OutgoingProtocolFactoryWrapper
 from .spamprotector import SpamProtector
@@ -31,6 +34,12 @@ logger = logging.getLogger(__name__)
 
 MAX_MESSAGE_SIZE = 2 * 1024 * 1024
 
+LOAD_ERRORS = (
+    golem_messages.exceptions.HeaderError,
+    golem_messages.exceptions.VersionMismatchError,
+    golem_messages.exceptions.MessageError,
+)
+
 
 ###############
 # TCP Network #
@@ -324,11 +333,25 @@ class BasicProtocol(SessionProtocol):
        serialization
     """
 
+    # Reading from the connection is paused when more bytes of received
+    # messages wait to be dispatched, and resumed below the low watermark
+    RECEIVE_HIGH_WATERMARK = 4 * MAX_MESSAGE_SIZE
+    RECEIVE_LOW_WATERMARK = MAX_MESSAGE_SIZE
+    # Most messages dispatched when the connection is lost, the rest of
+    # the received messages is dropped
+    RECEIVE_DRAIN_MESSAGES = 100
+
     def __init__(self):
         super().__init__()
         self.opened = False
         self.db = DataBuffer()
         self.spam_protector = SpamProtector()
+        self.receive_scheduler = flowcontrol.receive_scheduler
+        # complete, not yet dispatched messages
+        self._received = deque()
+        self._received_size = 0
+        self._receiving_paused = False
+        self._disconnecting = False
 
     def send_message(self, msg):
         """
@@ -392,6 +415,7 @@ class BasicProtocol(SessionProtocol):
     def connectionLost(self, reason=connectionDone):
         """Called when connection is lost (for whatever reason)"""
         self.opened = False
+        self._dispatch_remaining()
         if self.session:
             self.session.dropped()
 
@@ -411,9 +435,87 @@ class BasicProtocol(SessionProtocol):
     def _interpret(self, data):
         self.session.last_message_time = time.time()
         self.db.append_bytes(data)
-        mess = self._data_to_messages()
-        for m in mess:
-            self.session.interpret(m)
+
+        for frame in self.db.get_len_prefixed_bytes():
+            self._received.append(frame)
+            self._received_size += len(frame)
+        if self._received:
+            self.receive_scheduler.schedule(self)
+        self._update_receiving()
+
+    # Flow control functions
+    def dispatch_received(self, max_messages, max_bytes):
+        """ Load and interpret received messages, called by the receive
+        scheduler
+        :param int max_messages: maximum number of messages to dispatch
+        :param int max_bytes: stop after dispatching that many bytes
+        :return tuple: number of messages and bytes dispatched
+        """
+        messages, size = 0, 0
+
+        while self._received and messages < max_messages \
+                and size < max_bytes:
+            frame = self._received.popleft()
+            self._received_size -= len(frame)
+            messages += 1
+            size += len(frame)
+
+            self._dispatch_frame(frame)
+            if self._disconnecting:
+                self._clear_received()
+                break
+
+        self._update_receiving()
+        return messages, size
+
+    def has_received(self):
+        return bool(self._received)
+
+    def get_receive_stats(self):
+        return dict(
+            peer=str(self.transport.getPeer()) if self.transport else None,
+            queued_messages=len(self._received),
+            queued_bytes=self._queued_received_size(),
+            paused=self._receiving_paused,
+        )
+
+    def _dispatch_remaining(self):
+        """ Dispatch messages received before the connection was lost """
+        if self.session and not self._disconnecting:
+            try:
+                self.dispatch_received(self.RECEIVE_DRAIN_MESSAGES,
+                                       self.RECEIVE_HIGH_WATERMARK)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Cannot dispatch received messages")
+        self._clear_received()
+
+    def _dispatch_frame(self, data):
+        msg = self._frame_to_message(data)
+        if msg is not None and self.session and not self._disconnecting:
+            self.session.interpret(msg)
+
+    def _queued_received_size(self):
+        return self._received_size
+
+    def _update_receiving(self):
+        queued = self._queued_received_size()
+
+        if not self._receiving_paused \
+                and queued > self.RECEIVE_HIGH_WATERMARK:
+            logger.debug("Pausing receiving from %r, %r B queued",
+                         self.transport.getPeer(), queued)
+            self._receiving_paused = True
+            self.transport.pauseProducing()
+
+        elif self._receiving_paused \
+                and queued < self.RECEIVE_LOW_WATERMARK:
+            self._receiving_paused = False
+            self.transport.resumeProducing()
+
+    def _clear_received(self):
+        self._received.clear()
+        self._received_size = 0
+        self.receive_scheduler.discard(self)
 
     def _load_message(self, data):
         msg = golem_messages.load(data, None, None)
@@ -423,53 +525,55 @@ class BasicProtocol(SessionProtocol):
         )
         return msg
 
-    def _data_to_messages(self):
-        messages = []
-
-        for data in self.db.get_len_prefixed_bytes():
-            if len(data) > MAX_MESSAGE_SIZE:
-                logger.info(
-                    'Ignoring huge message %dB from %r',
-                    len(data),
-                    self.transport.getPeer(),
-                )
-                continue
-
-            try:
-                if not self.spam_protector.check_msg(data):
-                    continue
-                msg = self._load_message(data)
-            except golem_messages.exceptions.HeaderError as e:
-                logger.debug(
-                    "Invalid message header: %s from %s. Ignoring.",
-                    e,
-                    self.transport.getPeer(),
-                )
-                continue
-            except golem_messages.exceptions.VersionMismatchError as e:
-                logger.debug(
-                    "Message version mismatch: %s from %s. Closing.",
-                    e,
-                    self.transport.getPeer(),
-                )
-                msg = message.base.Disconnect(
-                    reason=message.base.Disconnect.REASON.ProtocolVersion,
-                )
-                self.send_message(msg)
-                self.close()
-                return []
-            except golem_messages.exceptions.MessageError as e:
-                logger.info("Failed to deserialize message (%r) %r", e, data)
-                logger.debug(
-                    "BasicProtocol._data_to_messages() failed %r",
-                    data,
-                    exc_info=True,
-                )
-                continue
-
-            messages.append(msg)
-
-        return messages
+    def _frame_to_message(self, data):
+        """ Load a received message
+        :param bytes data: serialized message
+        :return: message or None if it is ignored
+        """
+        try:
+            if not self._accept_frame(data):
+                return None
+            return self._load_message(data)
+        except LOAD_ERRORS as e:
+            self._load_failed(e, data)
+        return None
+
+    def _accept_frame(self, data):
+        if len(data) > MAX_MESSAGE_SIZE:
+            logger.info(
+                'Ignoring huge message %dB from %r',
+                len(data),
+                self.transport.getPeer(),
+            )
+            return False
+        return self.spam_protector.check_msg(data)
+
+    def _load_failed(self, error, data):
+        if isinstance(error, golem_messages.exceptions.HeaderError):
+            logger.debug(
+                "Invalid message header: %s from %s. Ignoring.",
+                error,
+                self.transport.getPeer(),
+            )
+        elif isinstance(error, golem_messages.exceptions.VersionMismatchError):
+            logger.debug(
+                "Message version mismatch: %s from %s. Closing.",
+                error,
+                self.transport.getPeer(),
+            )
+            msg = message.base.Disconnect(
+                reason=message.base.Disconnect.REASON.ProtocolVersion,
+            )
+            self.send_message(msg)
+            self.close()
+            self._disconnecting = True
+        else:
+            logger.info("Failed to deserialize message (%r) %r", error, data)
+            logger.debug(
+                "BasicProtocol._frame_to_message() failed %r",
+                data,
+                exc_info=error,
+            )
 
 
 class ServerProtocol(BasicProtocol):
@@ -506,30 +610,134 @@ class ServerProtocol(BasicProtocol):
 class SafeProtocol(ServerProtocol):
     """More advanced version of server protocol, support for serialization,
        encryption, decryption and signing messages
+
+       Apart from small messages, messages are sealed and opened by
+       the crypto pool, in order of sending and receiving respectively.
     """
 
+    def __init__(self, server):
+        super().__init__(server)
+        self.crypto_pool = cryptopool.crypto_pool
+        self._sealing = self.crypto_pool.channel()
+        self._opening = self.crypto_pool.channel()
+
+    def send_message(self, msg):
+        size = self.crypto_pool.expected_size(msg.__class__)
+        if self._sealing.runs_inline(size):
+            return super().send_message(msg)
+
+        if not self.opened:
+            logger.warning("Send message %s failed - connection closed", msg)
+            return False
+        if self.session is None:
+            logger.error("Wrong session, not sending message")
+            return False
+
+        # The worker seals a copy, with keys of the current session
+        seal = partial(self._seal_copy,
+                       private_key=self.session.my_private_key,
+                       public_key=self.session.theirs_public_key)
+        self._sealing.submit(seal, deepcopy(msg), size,
+                             partial(self._message_sealed, msg))
+        return True
+
+    def close(self):
+        # Sealed messages are written before the connection is closed
+        self._sealing.when_idle(super().close)
+
+    def connectionLost(self, reason=connectionDone):
+        self._sealing.cancel()
+        self.opened = False
+        self._dispatch_remaining()
+        # Messages that are being opened are delivered before the session
+        # is dropped
+        self._opening.when_idle(partial(super().connectionLost, reason))
+
+    def _message_sealed(self, msg, result, error):
+        if error:
+            logger.error('Cannot serialize message: %s (%r)', msg, error)
+            return
+        # The sender's message ends up signed, as when sealed inline
+        msg.sig, data = result
+        if self.opened:
+            self.transport.write(data)
+
+    def _dispatch_frame(self, data):
+        if self._opening.runs_inline(len(data)):
+            super()._dispatch_frame(data)
+            return
+
+        try:
+            if not self._accept_frame(data):
+                return
+        except LOAD_ERRORS as e:
+            self._load_failed(e, data)
+            return
+        if not self.session:
+            return
+
+        open_message = partial(self._open_message,
+                               private_key=self.session.my_private_key,
+                               public_key=self.session.theirs_public_key)
+        self._opening.submit(open_message, data, len(data),
+                             partial(self._message_opened, data))
+
+    def _message_opened(self, data, msg, error):
+        if isinstance(error, LOAD_ERRORS):
+            self._load_failed(error, data)
+        elif error:
+            logger.error("Cannot load message from %r: %r",
+                         self.transport.getPeer(), error)
+        elif self.session and not self._disconnecting:
+            self.session.interpret(msg)
+
+        if self._disconnecting:
+            self._clear_received()
+        self._update_receiving()
+
+    def _queued_received_size(self):
+        return self._received_size + self._opening.queued_bytes
+
     def _prepare_msg_to_send(self, msg):
         logger.debug('SafeProtocol._prepare_msg_to_send(%r)', msg)
         if self.session is None:
             logger.error("Wrong session, not sending message")
             return None
 
-        serialized = golem_messages.dump(
+        return self._seal_message(
             msg,
             self.session.my_private_key,
             self.session.theirs_public_key,
         )
+
+    def _seal_message(self, msg, private_key, public_key):
+        """ Serialize, sign and encrypt a message, may run in a crypto pool
+        worker """
+        serialized = golem_messages.dump(msg, private_key, public_key)
+        self.crypto_pool.record_size(msg.__class__, len(serialized))
         length = struct.pack("!L", len(serialized))
         return length + serialized
 
+    def _seal_copy(self, msg, private_key, public_key):
+        """ Seal a copy of a message in a crypto pool worker, return its
+        signature and sealed data """
+        data = self._seal_message(msg, private_key, public_key)
+        return msg.sig, data
+
     def _load_message(self, data):
-        msg = golem_messages.load(
+        return self._open_message(
             data,
             self.session.my_private_key,
             self.session.theirs_public_key,
         )
+
+    @staticmethod
+    def _open_message(data, private_key, public_key):
+        """ Decrypt, verify and deserialize a message, may run in a crypto
+        pool worker """
+        msg = golem_messages.load(data, private_key, public_key)
         logger.debug(
-            'SafeProtocol._load_message(): received %r',
+            'SafeProtocol._open_message(): received %r',
             msg,
         )
         return msg
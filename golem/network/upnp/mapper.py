@@ -1,5 +1,6 @@
 import logging
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, Optional, Tuple
 
 from copy import deepcopy
@@ -82,23 +83,38 @@ class PortMapperManager(IPortMapper):
         return deepcopy(self._mapping)
 
     def discover(self) -> str:
-        for mapper in self._mappers:
-            logger.info('%s: starting discovery', mapper.name)
-
-            try:
-                device = mapper.discover()
-                net = mapper.network
-            except Exception as exc:  # pylint: disable=broad-except
-                logger.warning('%s: discovery error: %s', mapper.name, exc)
-                continue
-
-            if mapper.available:
+        # Mappers are queried in parallel, the first one to find a device
+        # is used
+        executor = ThreadPoolExecutor(max_workers=max(len(self._mappers), 1))
+        futures = {executor.submit(self._discover, mapper): mapper
+                   for mapper in self._mappers}
+        executor.shutdown(wait=False)
+
+        for future in as_completed(futures):
+            mapper = futures[future]
+            found, device = future.result()
+            if found:
                 self._active_mapper = mapper
-                logger.info('%s: discovery complete: %s', mapper.name, device)
-                logger.info('%s: network configuration: %r', mapper.name, net)
                 return device
 
-            logger.warning('%s-compatible device was not found', mapper.name)
+    @staticmethod
+    def _discover(mapper: IPortMapper) -> Tuple[bool, Optional[str]]:
+        logger.info('%s: starting discovery', mapper.name)
+
+        try:
+            device = mapper.discover()
+            net = mapper.network
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.warning('%s: discovery error: %s', mapper.name, exc)
+            return False, None
+
+        if mapper.available:
+            logger.info('%s: discovery complete: %s', mapper.name, device)
+            logger.info('%s: network configuration: %r', mapper.name, net)
+            return True, device
+
+        logger.warning('%s-compatible device was not found', mapper.name)
+        return False, None
 
     def get_mapping(self,
                     external_port: int,
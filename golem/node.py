@@ -2,7 +2,7 @@ import logging
 from typing import List, Optional, Callable
 
 from twisted.internet import threads
-from twisted.internet.defer import gatherResults, Deferred
+from twisted.internet.defer import Deferred
 
 from apps.appsmanager import AppsManager
 from golem.client import Client
@@ -10,8 +10,10 @@ from golem.clientconfigdescriptor import ClientConfigDescriptor
 from golem.core.deferred import chain_function
 from golem.core.keysauth import KeysAuth
 from golem.core.async import async_run, AsyncRequest
+from golem.core.startup import StartupGraph
 from golem.core.variables import PRIVATE_KEY
 from golem.docker.manager import DockerManager
+from golem.network.hyperdrive.daemon_manager import HyperdriveDaemonManager
 from golem.network.transport.tcpnetwork_helpers import SocketAddress
 from golem.report import StatusPublisher
 from golem.rpc.mapping.rpcmethodnames import CORE_METHOD_MAP
@@ -50,6 +52,8 @@ class Node(object):  # pylint: disable=too-few-public-methods
 
         self.rpc_router: Optional[CrossbarRouter] = None
         self.rpc_session: Optional[Session] = None
+        self._startup: Optional[StartupGraph] = None
+        self._daemon_manager: Optional[HyperdriveDaemonManager] = None
 
         self._peers: List[SocketAddress] = peers or []
 
@@ -67,23 +71,40 @@ class Node(object):  # pylint: disable=too-few-public-methods
         )
 
     def start(self) -> None:
-        def _start(_):
-            publisher = Publisher(self.rpc_session)
-            StatusPublisher.set_publisher(publisher)
-
-            keys = self._start_keys_auth()
-            docker = self._start_docker()
-            gatherResults([keys, docker], consumeErrors=True).addCallbacks(
-                self._setup_client,
-                self._error('keys or docker')
-            )
-
         try:
-            self._start_rpc().addCallbacks(_start, self._error('rpc'))
+            self._startup = self._create_startup_graph()
+            self._startup.run().addErrback(self._startup_error)
             self._reactor.run()
         except Exception as exc:  # pylint: disable=broad-except
             logger.exception("Application error: %r", exc)
 
+    def _create_startup_graph(self) -> StartupGraph:
+        startup = StartupGraph()
+        startup.add('rpc', self._start_rpc)
+        startup.add('keys', self._start_keys_auth)
+        startup.add('docker', self._start_docker)
+        startup.add('hyperdrive', self._start_hyperdrive)
+        startup.add('apps', self._load_apps)
+        startup.add('client', self._setup_client,
+                    requires=('rpc', 'keys', 'docker'))
+        startup.add('network', self._collect_network_info,
+                    requires=('client',))
+        startup.add('upnp', self._discover_upnp, requires=('client',))
+        startup.add('environments', self._setup_environments,
+                    requires=('client', 'apps'))
+        startup.add('run', self._start_client,
+                    requires=('client', 'hyperdrive', 'network', 'upnp',
+                              'environments'))
+        return startup
+
+    def _startup_error(self, failure) -> None:
+        if self._daemon_manager:
+            self._daemon_manager.stop()
+
+        error = failure.value
+        stage = getattr(error, 'stage', 'start-up')
+        self._error(stage)(error)
+
     def _start_rpc(self) -> Deferred:
         self.rpc_router = rpc = CrossbarRouter(
             host=self._config_desc.rpc_address,
@@ -98,7 +119,13 @@ class Node(object):  # pylint: disable=too-few-public-methods
 
     def _start_session(self) -> Deferred:
         self.rpc_session = Session(self.rpc_router.address)  # type: ignore
-        return self.rpc_session.connect()
+        deferred = self.rpc_session.connect()
+        deferred.addCallback(self._set_publisher)
+        return deferred
+
+    def _set_publisher(self, *_) -> None:
+        publisher = Publisher(self.rpc_session)
+        StatusPublisher.set_publisher(publisher)
 
     def _start_keys_auth(self) -> Deferred:
         return threads.deferToThread(
@@ -119,13 +146,32 @@ class Node(object):  # pylint: disable=too-few-public-methods
 
         return threads.deferToThread(start_docker)
 
-    def _setup_client(self, gathered_results: List) -> None:
+    def _start_hyperdrive(self) -> Deferred:
+        # The daemon is stopped on shutdown and on start-up errors, also
+        # when start-up does not reach the client
+        self._daemon_manager = daemon_manager = \
+            HyperdriveDaemonManager(self._datadir)
+        self._reactor.addSystemEventTrigger("before", "shutdown",
+                                            daemon_manager.stop)
+
+        deferred = threads.deferToThread(daemon_manager.start)
+        deferred.addCallback(lambda _: daemon_manager)
+        return deferred
+
+    def _load_apps(self) -> Deferred:
+        def load_apps():
+            apps_manager = AppsManager()
+            apps_manager.load_apps()
+            return apps_manager
+
+        return threads.deferToThread(load_apps)
+
+    def _setup_client(self, _rpc, keys_auth: KeysAuth, _docker) -> None:
         if not self.rpc_session:
-            self._error("RPC session is not available")
-            return
+            raise RuntimeError("RPC session is not available")
 
-        keys_auth = gathered_results[0]
         self.client = self._client_factory(keys_auth)
+        self.client.startup_graph = self._startup
         self._reactor.addSystemEventTrigger("before", "shutdown",
                                             self.client.quit)
 
@@ -134,15 +180,38 @@ class Node(object):  # pylint: disable=too-few-public-methods
         self.rpc_session.register_methods(methods)
         self.client.configure_rpc(self.rpc_session)
 
-        async_run(AsyncRequest(self._run),
-                  error=self._error('Cannot start the client'))
+    def _collect_network_info(self, _client) -> Deferred:
+        if not self.client:
+            raise RuntimeError("Client object is not available")
 
-    def _run(self, *_) -> None:
+        return threads.deferToThread(self.client.collect_network_info)
+
+    def _discover_upnp(self, _client) -> Optional[Deferred]:
+        if not self.client:
+            raise RuntimeError("Client object is not available")
+        if not self._config_desc.use_upnp:
+            return None
+
+        return threads.deferToThread(self.client.discover_upnp)
+
+    def _setup_environments(self, _client,
+                            apps_manager: AppsManager) -> Deferred:
+        return threads.deferToThread(self._setup_apps, apps_manager)
+
+    def _start_client(self, _client,
+                      daemon_manager: HyperdriveDaemonManager,
+                      *_) -> Deferred:
+        if not self.client:
+            raise RuntimeError("Client object is not available")
+
+        self.client.daemon_manager = daemon_manager
+        return async_run(AsyncRequest(self._run))
+
+    def _run(self) -> None:
         if not self.client:
             self._error("Client object is not available")
             return
 
-        self._setup_apps()
         self.client.sync()
 
         try:
@@ -152,17 +221,16 @@ class Node(object):  # pylint: disable=too-few-public-methods
         except SystemExit:
             self._reactor.callFromThread(self._reactor.stop)
 
-    def _setup_apps(self) -> None:
+    def _setup_apps(self, apps_manager: AppsManager) -> None:
         if not self.client:
             self._error("Client object is not available")
             return
 
-        apps_manager = AppsManager()
-        apps_manager.load_apps()
-
+        environments_manager = self.client.environments_manager
         for env in apps_manager.get_env_list():
             env.accept_tasks = True
-            self.client.environments_manager.add_environment(env)
+            environments_manager.add_environment(env)
+        environments_manager.load_config(self._datadir)
 
     def _error(self, msg: str) -> Callable:
         def log_error_and_stop_reactor(err):
@@ -1,5 +1,6 @@
 import datetime
 import logging
+from threading import Lock, RLock
 
 from peewee import IntegrityError
 
@@ -7,95 +8,161 @@ from golem.model import LocalRank, GlobalRank, NeighbourLocRank, db
 
 logger = logging.getLogger(__name__)
 
+# SQLite limits the number of host parameters in a single statement
+BULK_CHUNK_SIZE = 100
+
+
+def _chunks(seq, size=BULK_CHUNK_SIZE):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+class TrustLedger(object):
+    """ Aggregates LocalRank deltas per node in memory and writes them to
+    the database in a single transaction with one upsert per node. Reads
+    through get_local_rank and get_local_rank_for_all see unflushed deltas.
+    """
+
+    FIELDS = (
+        'positive_computed',
+        'negative_computed',
+        'wrong_computed',
+        'positive_requested',
+        'negative_requested',
+        'positive_payment',
+        'negative_payment',
+        'positive_resource',
+        'negative_resource',
+    )
+
+    def __init__(self):
+        self._lock = Lock()
+        # Held while deltas are being written, so that readers do not see
+        # them applied twice or not at all
+        self.flush_lock = RLock()
+        # node_id -> {field name: delta}
+        self._pending = {}
+
+    def add(self, node_id, field, delta):
+        if field not in self.FIELDS:
+            raise KeyError(field)
+        with self._lock:
+            deltas = self._pending.setdefault(node_id, {})
+            deltas[field] = deltas.get(field, 0.0) + delta
+
+    def clear(self):
+        """ Drop all unflushed deltas """
+        with self._lock:
+            self._pending = {}
+
+    def pending_nodes(self):
+        with self._lock:
+            return set(self._pending)
+
+    def apply(self, node_id, local_rank):
+        """ Add unflushed deltas to a LocalRank read from the database.
+        Should be called with flush_lock held.
+        :param str node_id: node id
+        :param LocalRank|None local_rank: database row or None
+        :return LocalRank|None: local rank with unflushed deltas applied;
+                                a new, unsaved instance if there is no
+                                database row yet
+        """
+        with self._lock:
+            deltas = dict(self._pending.get(node_id, {}))
+        if not deltas:
+            return local_rank
+        if local_rank is None:
+            local_rank = LocalRank(node_id=node_id)
+        for field, delta in deltas.items():
+            setattr(local_rank, field, getattr(local_rank, field) + delta)
+        return local_rank
+
+    def flush(self):
+        """ Write all aggregated deltas to the database """
+        with self.flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            try:
+                self._write(pending)
+            except Exception:
+                for node_id, deltas in pending.items():
+                    for field, delta in deltas.items():
+                        self.add(node_id, field, delta)
+                raise
+
+    @classmethod
+    def _write(cls, node_deltas):
+        now = str(datetime.datetime.now())
+        with db.atomic():
+            existing = set()
+            for chunk in _chunks(list(node_deltas)):
+                existing.update(
+                    node_id for (node_id,) in LocalRank
+                    .select(LocalRank.node_id)
+                    .where(LocalRank.node_id << chunk)
+                    .tuples())
+
+            new = []
+            for node_id, deltas in node_deltas.items():
+                if node_id in existing:
+                    update = {field: getattr(LocalRank, field) + delta
+                              for field, delta in deltas.items()}
+                    LocalRank.update(modified_date=now, **update) \
+                        .where(LocalRank.node_id == node_id).execute()
+                else:
+                    row = dict.fromkeys(cls.FIELDS, 0.0)
+                    row.update(deltas)
+                    row['node_id'] = node_id
+                    new.append(row)
+
+            for chunk in _chunks(new):
+                LocalRank.insert_many(chunk).execute()
+
+
+ledger = TrustLedger()
+
+
+def flush_local_ranks():
+    ledger.flush()
+
 
 def increase_positive_computed(node_id, trust_mod):
-    try:
-        with db.transaction():
-            LocalRank.create(node_id=node_id, positive_computed=trust_mod)
-    except IntegrityError:
-        LocalRank.update(positive_computed=LocalRank.positive_computed + trust_mod,
-                         modified_date=str(datetime.datetime.now())) \
-            .where(LocalRank.node_id == node_id).execute()
+    ledger.add(node_id, 'positive_computed', trust_mod)
 
 
 def increase_negative_computed(node_id, trust_mod):
-    try:
-        with db.transaction():
-            LocalRank.create(node_id=node_id, negative_computed=trust_mod)
-    except IntegrityError:
-        LocalRank.update(negative_computed=LocalRank.negative_computed + trust_mod,
-                         modified_date=str(datetime.datetime.now())) \
-            .where(LocalRank.node_id == node_id).execute()
+    ledger.add(node_id, 'negative_computed', trust_mod)
 
 
 def increase_wrong_computed(node_id, trust_mod):
-    try:
-        with db.transaction():
-            LocalRank.create(node_id=node_id, wrong_computed=trust_mod)
-    except IntegrityError:
-        LocalRank.update(wrong_computed=LocalRank.wrong_computed + trust_mod,
-                         modified_date=str(datetime.datetime.now())) \
-            .where(LocalRank.node_id == node_id).execute()
+    ledger.add(node_id, 'wrong_computed', trust_mod)
 
 
 def increase_positive_requested(node_id, trust_mod):
-    try:
-        with db.transaction():
-            LocalRank.create(node_id=node_id, positive_requested=trust_mod)
-    except IntegrityError:
-        LocalRank.update(positive_requested=LocalRank.positive_requested + trust_mod,
-                         modified_date=str(datetime.datetime.now())) \
-            .where(LocalRank.node_id == node_id).execute()
+    ledger.add(node_id, 'positive_requested', trust_mod)
 
 
 def increase_negative_requested(node_id, trust_mod):
-    try:
-        with db.transaction():
-            LocalRank.create(node_id=node_id, negative_requested=trust_mod)
-    except IntegrityError:
-        LocalRank.update(negative_requested=LocalRank.negative_requested + trust_mod,
-                         modified_date=str(datetime.datetime.now())) \
-            .where(LocalRank.node_id == node_id).execute()
+    ledger.add(node_id, 'negative_requested', trust_mod)
 
 
 def increase_positive_payment(node_id, trust_mod):
-    try:
-        with db.transaction():
-            LocalRank.create(node_id=node_id, positive_payment=trust_mod)
-    except IntegrityError:
-        LocalRank.update(positive_payment=LocalRank.positive_payment + trust_mod,
-                         modified_date=str(datetime.datetime.now())) \
-            .where(LocalRank.node_id == node_id).execute()
+    ledger.add(node_id, 'positive_payment', trust_mod)
 
 
 def increase_negative_payment(node_id, trust_mod):
-    try:
-        with db.transaction():
-            LocalRank.create(node_id=node_id, negative_payment=trust_mod)
-    except IntegrityError:
-        LocalRank.update(negative_payment=LocalRank.negative_payment + trust_mod,
-                         modified_date=str(datetime.datetime.now())) \
-            .where(LocalRank.node_id == node_id).execute()
+    ledger.add(node_id, 'negative_payment', trust_mod)
 
 
 def increase_positive_resource(node_id, trust_mod):
-    try:
-        with db.transaction():
-            LocalRank.create(node_id=node_id, positive_resource=trust_mod)
-    except IntegrityError:
-        LocalRank.update(positive_resource=LocalRank.positive_resource + trust_mod,
-                         modified_date=str(datetime.datetime.now())) \
-            .where(LocalRank.node_id == node_id).execute()
+    ledger.add(node_id, 'positive_resource', trust_mod)
 
 
 def increase_negative_resource(node_id, trust_mod):
-    try:
-        with db.transaction():
-            LocalRank.create(node_id=node_id, negative_resource=trust_mod)
-    except IntegrityError:
-        LocalRank.update(negative_resource=LocalRank.negative_resource + trust_mod,
-                         modified_date=str(datetime.datetime.now())) \
-            .where(LocalRank.node_id == node_id).execute()
+    ledger.add(node_id, 'negative_resource', trust_mod)
 
 
 def get_global_rank(node_id):
@@ -115,11 +182,22 @@ def upsert_global_rank(node_id, comp_trust, req_trust, comp_weight, req_weight):
 
 
 def get_local_rank(node_id):
-    return LocalRank.select().where(LocalRank.node_id == node_id).first()
+    with ledger.flush_lock:
+        return ledger.apply(
+            node_id,
+            LocalRank.select().where(LocalRank.node_id == node_id).first())
 
 
 def get_local_rank_for_all():
-    return LocalRank.select()
+    with ledger.flush_lock:
+        pending = ledger.pending_nodes()
+        local_ranks = []
+        for local_rank in LocalRank.select():
+            pending.discard(local_rank.node_id)
+            local_ranks.append(ledger.apply(local_rank.node_id, local_rank))
+        for node_id in pending:
+            local_ranks.append(ledger.apply(node_id, None))
+        return local_ranks
 
 
 def get_neighbour_loc_rank(neighbour_id, about_id):
@@ -139,3 +217,85 @@ def upsert_neighbour_loc_rank(neighbour_id, about_id, loc_rank):
         NeighbourLocRank.update(requesting_trust_value=loc_rank[1], computing_trust_value=loc_rank[0]) \
             .where(
             (NeighbourLocRank.about_node_id == about_id) & (NeighbourLocRank.node_id == neighbour_id)).execute()
+
+
+def upsert_global_ranks(ranks):
+    """ Insert or update many global ranks in a single transaction
+    :param list ranks: list of (node_id, comp_trust, req_trust, comp_weight,
+                       req_weight) tuples
+    """
+    ranks = {rank[0]: rank for rank in ranks}
+    if not ranks:
+        return
+    now = str(datetime.datetime.now())
+    with db.atomic():
+        existing = set()
+        for chunk in _chunks(list(ranks)):
+            existing.update(
+                node_id for (node_id,) in GlobalRank
+                .select(GlobalRank.node_id)
+                .where(GlobalRank.node_id << chunk)
+                .tuples())
+
+        new = []
+        for node_id, comp_trust, req_trust, comp_weight, req_weight \
+                in ranks.values():
+            if node_id in existing:
+                GlobalRank.update(requesting_trust_value=req_trust,
+                                  computing_trust_value=comp_trust,
+                                  gossip_weight_computing=comp_weight,
+                                  gossip_weight_requesting=req_weight,
+                                  modified_date=now) \
+                    .where(GlobalRank.node_id == node_id).execute()
+            else:
+                new.append({'node_id': node_id,
+                            'requesting_trust_value': req_trust,
+                            'computing_trust_value': comp_trust,
+                            'gossip_weight_computing': comp_weight,
+                            'gossip_weight_requesting': req_weight})
+
+        for chunk in _chunks(new):
+            GlobalRank.insert_many(chunk).execute()
+
+
+def upsert_neighbour_loc_ranks(neighbour_loc_ranks):
+    """ Insert or update many neighbour local ranks in a single transaction
+    :param list neighbour_loc_ranks: list of [neighbour_id, about_id,
+                                     loc_rank] entries, where loc_rank is
+                                     a [computing, requesting] trust pair
+    """
+    ranks = {}
+    for neighbour_id, about_id, loc_rank in neighbour_loc_ranks:
+        if neighbour_id == about_id:
+            logger.warning("Removing {} self trust".format(about_id))
+            continue
+        ranks[(neighbour_id, about_id)] = loc_rank
+    if not ranks:
+        return
+    with db.atomic():
+        existing = set()
+        neighbour_ids = list({key[0] for key in ranks})
+        for chunk in _chunks(neighbour_ids):
+            existing.update(
+                NeighbourLocRank
+                .select(NeighbourLocRank.node_id,
+                        NeighbourLocRank.about_node_id)
+                .where(NeighbourLocRank.node_id << chunk)
+                .tuples())
+
+        new = []
+        for (neighbour_id, about_id), loc_rank in ranks.items():
+            if (neighbour_id, about_id) in existing:
+                NeighbourLocRank.update(requesting_trust_value=loc_rank[1],
+                                        computing_trust_value=loc_rank[0]) \
+                    .where((NeighbourLocRank.about_node_id == about_id) &
+                           (NeighbourLocRank.node_id == neighbour_id)) \
+                    .execute()
+            else:
+                new.append({'node_id': neighbour_id,
+                            'about_node_id': about_id,
+                            'requesting_trust_value': loc_rank[1],
+                            'computing_trust_value': loc_rank[0]})
+
+        for chunk in _chunks(new):
+            NeighbourLocRank.insert_many(chunk).execute()
@@ -0,0 +1,209 @@
+import logging
+
+import numpy as np
+
+from golem.ranking.helper.trust_const import MAX_TRUST, MIN_TRUST
+
+logger = logging.getLogger(__name__)
+
+# Column layout of the working vector
+COMP_VAL, COMP_WEIGHT, REQ_VAL, REQ_WEIGHT = range(4)
+
+INITIAL_CAPACITY = 64
+
+
+def vec_to_trust(values, weights):
+    """ Vectorized version of min_max_utility.vec_to_trust
+    :param numpy.ndarray values: gossip values
+    :param numpy.ndarray weights: gossip weights
+    :return numpy.ndarray: trust values clipped to [MIN_TRUST, MAX_TRUST],
+                           0.0 where value or weight equals 0
+    """
+    result = np.zeros(values.shape)
+    mask = (values != 0.0) & (weights != 0.0)
+    result[mask] = np.clip(values[mask] / weights[mask], MIN_TRUST, MAX_TRUST)
+    return result
+
+
+class TrustEngine(object):
+    """ Array-backed gossip state used by Ranking. Node ids are mapped to dense
+    row indices shared by the working vector and the previous rank, so gossip
+    sums, scaling and convergence checks are run as vector operations.
+    """
+
+    def __init__(self):
+        self.index = {}
+        self.node_ids = []
+        self._working = np.zeros((INITIAL_CAPACITY, 4))
+        self._in_working = np.zeros(INITIAL_CAPACITY, dtype=bool)
+        self._prev = np.zeros((INITIAL_CAPACITY, 2))
+        self._in_prev = np.zeros(INITIAL_CAPACITY, dtype=bool)
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    def reset(self):
+        """ Forget all nodes, working vector and previous rank """
+        self.__init__()
+
+    def load_local(self, node_ids, comp_trusts, req_trusts):
+        """ Start a new gossip stage from local trust values. Each node
+        starts with weight 1.0 and its local trust as a previous rank.
+        :param list node_ids: ids of nodes
+        :param list comp_trusts: local computing trust for each node
+        :param list req_trusts: local requesting trust for each node
+        """
+        self.reset()
+        if not node_ids:
+            return
+        rows = self._rows(node_ids)
+        comp = np.asarray(comp_trusts, dtype=float)
+        req = np.asarray(req_trusts, dtype=float)
+        self._working[rows, COMP_VAL] = comp
+        self._working[rows, COMP_WEIGHT] = 1.0
+        self._working[rows, REQ_VAL] = req
+        self._working[rows, REQ_WEIGHT] = 1.0
+        self._in_working[rows] = True
+        self._prev[rows, 0] = comp
+        self._prev[rows, 1] = req
+        self._in_prev[rows] = True
+
+    def clear_working(self):
+        """ Drop working vector values, keep node indices and previous rank """
+        self._working[:] = 0.0
+        self._in_working[:] = False
+
+    def add_gossip(self, gossip_groups):
+        """ Sum received gossip into the working vector. Malformed entries
+        are logged and skipped.
+        :param list gossip_groups: list of gossip lists, each in format
+                                   [node_id, [[comp_val, comp_weight],
+                                              [req_val, req_weight]]]
+        """
+        node_ids = []
+        values = []
+        for gossip_group in gossip_groups:
+            for gossip in gossip_group:
+                try:
+                    node_id, [comp, req] = gossip
+                    (comp_val, comp_weight), (req_val, req_weight) = comp, req
+                    value = (float(comp_val), float(comp_weight),
+                             float(req_val), float(req_weight))
+                    hash(node_id)
+                except Exception as err:  # pylint: disable=broad-except
+                    logger.error("Wrong gossip {}, {}".format(gossip, err))
+                    continue
+                node_ids.append(node_id)
+                values.append(value)
+
+        if not node_ids:
+            return
+        rows = self._rows(node_ids)
+        np.add.at(self._working, rows, np.array(values))
+        self._in_working[rows] = True
+
+    def gossip(self, k):
+        """ Prepare gossip from the working vector, scaled by 1 / (k + 1)
+        :param int k: number of neighbours that gossip will be sent to
+        :return list: list of [node_id, [[comp_val, comp_weight],
+                                         [req_val, req_weight]]]
+        """
+        rows = self._working_rows()
+        scaled = (self._working[rows] / float(k + 1)).tolist()
+        return [[self.node_ids[row], [value[:2], value[2:]]]
+                for row, value in zip(rows.tolist(), scaled)]
+
+    def commit_prev_rank(self):
+        """ Store trust computed from the working vector as a previous rank """
+        rows = self._working_rows()
+        comp, req = self._working_trust(rows)
+        self._prev[rows, 0] = comp
+        self._prev[rows, 1] = req
+        self._in_prev[rows] = True
+
+    def difference(self):
+        """ Aggregated absolute difference between trust computed from the
+        working vector and the previous rank (0 for nodes without one)
+        :return float:
+        """
+        rows = self._working_rows()
+        comp, req = self._working_trust(rows)
+        prev = self._prev[rows]
+        return float(np.abs(comp - prev[:, 0]).sum() +
+                     np.abs(req - prev[:, 1]).sum())
+
+    def global_ranks(self):
+        """ Global rank estimations for all nodes in the working vector
+        :return list: list of (node_id, comp_trust, req_trust, comp_weight,
+                      req_weight) tuples
+        """
+        rows = self._working_rows()
+        comp, req = self._working_trust(rows)
+        working = self._working[rows]
+        return list(zip(
+            [self.node_ids[row] for row in rows.tolist()],
+            comp.tolist(),
+            req.tolist(),
+            working[:, COMP_WEIGHT].tolist(),
+            working[:, REQ_WEIGHT].tolist()))
+
+    def working_count(self):
+        return int(np.count_nonzero(self._in_working))
+
+    def working_vec(self):
+        """ Working vector as a dictionary
+        :return dict: {node_id: [[comp_val, comp_weight],
+                                 [req_val, req_weight]]}
+        """
+        rows = self._working_rows()
+        values = self._working[rows].tolist()
+        return {self.node_ids[row]: [value[:2], value[2:]]
+                for row, value in zip(rows.tolist(), values)}
+
+    def prev_rank(self):
+        """ Previous rank as a dictionary
+        :return dict: {node_id: [comp_trust, req_trust]}
+        """
+        rows = np.flatnonzero(self._in_prev[:len(self)])
+        values = self._prev[rows].tolist()
+        return {self.node_ids[row]: value
+                for row, value in zip(rows.tolist(), values)}
+
+    def _working_rows(self):
+        return np.flatnonzero(self._in_working[:len(self)])
+
+    def _working_trust(self, rows):
+        working = self._working[rows]
+        comp = vec_to_trust(working[:, COMP_VAL], working[:, COMP_WEIGHT])
+        req = vec_to_trust(working[:, REQ_VAL], working[:, REQ_WEIGHT])
+        return comp, req
+
+    def _rows(self, node_ids):
+        rows = np.empty(len(node_ids), dtype=np.intp)
+        for i, node_id in enumerate(node_ids):
+            row = self.index.get(node_id)
+            if row is None:
+                row = self._add_node(node_id)
+            rows[i] = row
+        return rows
+
+    def _add_node(self, node_id):
+        row = len(self.node_ids)
+        if row >= len(self._in_working):
+            self._grow()
+        self.index[node_id] = row
+        self.node_ids.append(node_id)
+        return row
+
+    def _grow(self):
+        capacity = 2 * len(self._in_working)
+
+        def resized(array):
+            new = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            new[:len(array)] = array
+            return new
+
+        self._working = resized(self._working)
+        self._in_working = resized(self._in_working)
+        self._prev = resized(self._prev)
+        self._in_prev = resized(self._in_prev)
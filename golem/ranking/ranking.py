@@ -6,11 +6,11 @@ from threading import Lock
 
 from twisted.internet.task import deferLater
 
-from golem.ranking.helper import min_max_utility as util
 from golem.ranking.helper.trust_const import UNKNOWN_TRUST
 from golem.ranking.manager import database_manager as dm
 from golem.ranking.manager import trust_manager as tm
 from golem.ranking.manager.time_manager import TimeManager
+from golem.ranking.manager.trust_engine import TrustEngine
 from golem.ranking.manager.database_manager import get_local_rank
 
 logger = logging.getLogger(__name__)
@@ -31,8 +31,7 @@ class Ranking(object):
         self.neighbours = []
         self.step = 0
         self.max_steps = max_steps
-        self.working_vec = {}
-        self.prevRank = {}
+        self.trust_engine = TrustEngine()
         self.globRank = {}
         self.received_gossip = []
         self.finished = False
@@ -44,6 +43,14 @@ class Ranking(object):
         self.loc_rank_push_delta = loc_rank_push_delta
         self.lock = Lock()
 
+    @property
+    def working_vec(self):
+        return self.trust_engine.working_vec()
+
+    @property
+    def prevRank(self):  # pylint: disable=invalid-name
+        return self.trust_engine.prev_rank()
+
     def run(self, reactor):
         self.reactor = reactor
         deferLater(self.reactor,
@@ -53,27 +60,30 @@ class Ranking(object):
     def __init_stage(self):
         try:
             logger.debug("New gossip stage")
-            self.__push_local_ranks()
+            local_trusts = self.__get_local_trusts()
+            self.__push_local_ranks(*local_trusts)
             self.finished = False
             self.global_finished = False
             self.step = 0
             self.finished_neighbours = set()
-            self.__init_working_vec()
+            self.__init_working_vec(*local_trusts)
         finally:
             deferLater(self.reactor,
                        self.round_oracle.sec_to_round(),
                        self.__new_round)
 
-    def __init_working_vec(self):
+    @staticmethod
+    def __get_local_trusts():
+        node_ids, comp_trusts, req_trusts = [], [], []
+        for loc_rank in dm.get_local_rank_for_all():
+            node_ids.append(loc_rank.node_id)
+            comp_trusts.append(tm.computed_trust_local(loc_rank))
+            req_trusts.append(tm.requested_trust_local(loc_rank))
+        return node_ids, comp_trusts, req_trusts
+
+    def __init_working_vec(self, node_ids, comp_trusts, req_trusts):
         with self.lock:
-            self.working_vec = {}
-            self.prevRank = {}
-            for loc_rank in dm.get_local_rank_for_all():
-                comp_trust = tm.computed_trust_local(loc_rank)
-                req_trust = tm.requested_trust_local(loc_rank)
-                self.working_vec[loc_rank.node_id] = \
-                    [[comp_trust, 1.0], [req_trust, 1.0]]
-                self.prevRank[loc_rank.node_id] = [comp_trust, req_trust]
+            self.trust_engine.load_local(node_ids, comp_trusts, req_trusts)
 
     def __new_round(self):
         logger.debug("New gossip round")
@@ -98,7 +108,7 @@ class Ranking(object):
             self.received_gossip = \
                 self.client.collect_gossip() + self.received_gossip
             self.__make_prev_rank()
-            self.working_vec = {}
+            self.trust_engine.clear_working()
             self.__add_gossip()
             self.__check_finished()
         finally:
@@ -182,23 +192,21 @@ class Ranking(object):
 
     def sync_network(self):
         neighbours_loc_ranks = self.client.collect_neighbours_loc_ranks()
-        for [neighbour_id, about_id, loc_rank] in neighbours_loc_ranks:
-            with self.lock:
-                dm.upsert_neighbour_loc_rank(neighbour_id, about_id, loc_rank)
+        with self.lock:
+            dm.upsert_neighbour_loc_ranks(neighbours_loc_ranks)
 
-    def __push_local_ranks(self):
-        for loc_rank in dm.get_local_rank_for_all():
-            comp_trust = tm.computed_trust_local(loc_rank)
-            req_trust = tm.requested_trust_local(loc_rank)
+    def __push_local_ranks(self, node_ids, comp_trusts, req_trusts):
+        for node_id, comp_trust, req_trust in \
+                zip(node_ids, comp_trusts, req_trusts):
             trust = [comp_trust, req_trust]
-            if loc_rank.node_id in self.prev_loc_rank:
-                prev_trust = self.prev_loc_rank[loc_rank.node_id]
+            if node_id in self.prev_loc_rank:
+                prev_trust = self.prev_loc_rank[node_id]
             else:
                 prev_trust = [float("inf")] * 2
             if max(map(abs, map(operator.sub, prev_trust, trust))) \
                     > self.loc_rank_push_delta:
-                self.client.push_local_rank(loc_rank.node_id, trust)
-                self.prev_loc_rank[loc_rank.node_id] = trust
+                self.client.push_local_rank(node_id, trust)
+                self.prev_loc_rank[node_id] = trust
 
     def __check_finished(self):
         if self.global_finished:
@@ -209,7 +217,8 @@ class Ranking(object):
                 self.__send_finished()
             else:
                 val = self.__compare_working_vec_and_prev_rank()
-                if val <= len(self.working_vec) * self.epsilon * 2:
+                if val <= self.trust_engine.working_count() \
+                        * self.epsilon * 2:
                     self.finished = True
                     self.__send_finished()
 
@@ -220,23 +229,7 @@ class Ranking(object):
                 set(self.neighbours) <= self.finished_neighbours
 
     def __compare_working_vec_and_prev_rank(self):
-        aggregated_trust = 0.0
-        for node_id, val in list(self.working_vec.items()):
-            try:
-                computing, requesting = val
-            except (TypeError, ValueError):
-                logger.warning("Wrong trust vector element {}".format(val))
-                break
-            comp_trust = util.vec_to_trust(computing)
-            req_trust = util.vec_to_trust(requesting)
-            if node_id in self.prevRank:
-                comp_trust_old = self.prevRank[node_id][0]
-                req_trust_old = self.prevRank[node_id][1]
-            else:
-                comp_trust_old, req_trust_old = 0, 0
-            aggregated_trust += abs(comp_trust - comp_trust_old)
-            aggregated_trust += abs(req_trust - req_trust_old)
-        return aggregated_trust
+        return self.trust_engine.difference()
 
     def __set_k(self):
         degrees = self.__get_neighbours_degree()
@@ -254,63 +247,18 @@ class Ranking(object):
         return degrees
 
     def __make_prev_rank(self):
-        for node_id, val in list(self.working_vec.items()):
-            try:
-                computing, requesting = val
-            except (TypeError, ValueError):
-                logger.warning("Wrong trust vector element {}".format(val))
-                break
-            comp_trust = util.vec_to_trust(computing)
-            req_trust = util.vec_to_trust(requesting)
-            self.prevRank[node_id] = [comp_trust, req_trust]
+        self.trust_engine.commit_prev_rank()
 
     def __save_working_vec(self):
-        for node_id, val in list(self.working_vec.items()):
-            try:
-                computing, requesting = val
-            except (TypeError, ValueError):
-                logger.warning("Wrong trust vector element {}".format(val))
-                break
-            comp_trust = util.vec_to_trust(computing)
-            req_trust = util.vec_to_trust(requesting)
-            dm.upsert_global_rank(node_id,
-                                  comp_trust,
-                                  req_trust,
-                                  computing[1],
-                                  requesting[1])
+        dm.upsert_global_ranks(self.trust_engine.global_ranks())
 
     def __prepare_gossip(self):
-        gossip_vec = []
-        for node_id, val in list(self.working_vec.items()):
-            comp_trust = list(map(self.__scale_gossip, val[0]))
-            req_trust = list(map(self.__scale_gossip, val[1]))
-            gossip_vec.append([node_id, [comp_trust, req_trust]])
-        return gossip_vec
-
-    def __scale_gossip(self, val):
-        return val / float(self.k + 1)
+        return self.trust_engine.gossip(self.k)
 
     def __add_gossip(self):
-        for gossip_group in self.received_gossip:
-            for gossip in gossip_group:
-                try:
-                    node_id, [comp, req] = gossip
-                    if node_id in self.working_vec:
-                        [prev_comp, prev_req] = self.working_vec[node_id]
-                        self.working_vec[node_id] = [
-                            self.__sum_gossip(comp, prev_comp),
-                            self.__sum_gossip(req, prev_req)]
-                    else:
-                        self.working_vec[node_id] = [comp, req]
-                except Exception as err:
-                    logger.error("Wrong gossip {}, {}".format(gossip, err))
-
+        self.trust_engine.add_gossip(self.received_gossip)
         self.received_gossip = []
 
-    @staticmethod
-    def __sum_gossip(a, b):
-        return list(map(sum, zip(a, b)))
-
     def __send_finished(self):
         self.client.send_stop_gossip()
 
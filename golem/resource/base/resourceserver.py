@@ -6,6 +6,8 @@ import os
 from twisted.internet.defer import Deferred
 
 from golem.core.async import AsyncRequest, async_run
+from golem.resource.diskusage import disk_usage
+from golem.resource.extractioncache import ExtractionCache
 from golem.task.result.resultpackage import ZipPackager
 
 logger = logging.getLogger(__name__)
@@ -42,6 +44,7 @@ class BaseResourceServer(object):
         self.packager = ZipPackager()
         self.resource_dir = self.dir_manager.res
         self.pending_resources = {}
+        self.extraction_cache = self._create_extraction_cache()
 
     def change_resource_dir(self, config_desc):
         if self.dir_manager.root_path == config_desc.root_path:
@@ -53,6 +56,12 @@ class BaseResourceServer(object):
         self.dir_manager.node_name = config_desc.node_name
 
         self.resource_manager.storage.copy_dir(old_resource_dir)
+        self.extraction_cache = self._create_extraction_cache()
+
+    def _create_extraction_cache(self):
+        cache_dir = os.path.join(self.dir_manager.get_resource_dir(),
+                                 'extracted')
+        return ExtractionCache(cache_dir)
 
     def get_distributed_resource_root(self):
         return self.resource_manager.storage.get_root()
@@ -126,6 +135,14 @@ class BaseResourceServer(object):
                     continue
                 entry.status = TransferStatus.transferring
 
+                # Files of the package are already extracted for another task
+                if self.extraction_cache.has_package(entry.resource[0]):
+                    logger.debug("Resource server: using cached package %r",
+                                 entry.resource[0])
+                    self._download_success(entry.resource, entry.resource[1],
+                                           entry.task_id)
+                    continue
+
                 self.resource_manager.pull_resource(
                     entry.resource, entry.task_id,
                     client_options=entry.client_options,
@@ -153,13 +170,16 @@ class BaseResourceServer(object):
     def _extract_task_resources(self, resource, task_id):
         resource_dir = self.resource_manager.storage.get_dir(task_id)
 
-        def extract_packages(package_files):
-            for package_file in package_files:
-                package_path = os.path.join(resource_dir, package_file)
-                logger.debug('Extracting task resource: %r', package_path)
-                self.packager.extract(package_path, resource_dir)
+        def extract_packages(package_hash, package_files):
+            cache = self.extraction_cache
+            if not cache.assemble(package_hash, resource_dir):
+                package_paths = [os.path.join(resource_dir, package_file)
+                                 for package_file in package_files]
+                cache.add(package_hash, package_paths, self.packager)
+                cache.assemble(package_hash, resource_dir)
+            disk_usage.path_added(resource_dir)
 
-        async_req = AsyncRequest(extract_packages, resource[1])
+        async_req = AsyncRequest(extract_packages, resource[0], resource[1])
         async_run(async_req).addCallbacks(
             lambda _: self.client.task_resource_collected(task_id,
                                                           unpack_delta=False),
@@ -3,6 +3,8 @@ import os
 import shutil
 import time
 
+from golem.resource.diskusage import disk_usage
+
 logger = logging.getLogger(__name__)
 
 
@@ -99,6 +101,7 @@ class DirManager(object):
 
             if os.path.isfile(path):
                 os.remove(path)
+                disk_usage.path_removed(path)
             if os.path.isdir(path):
                 self.clear_dir(path)
                 if not os.listdir(path):
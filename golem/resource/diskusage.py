@@ -0,0 +1,193 @@
+import logging
+import os
+from threading import RLock
+
+logger = logging.getLogger(__name__)
+
+
+def norm_path(path):
+    return os.path.normpath(os.path.abspath(path))
+
+
+def _is_within(path, directory):
+    return path == directory or path.startswith(directory + os.path.sep)
+
+
+class DiskUsageTracker(object):
+    """ Keeps track of sizes of files stored in tracked root directories.
+    Components that write or remove files report the changes, so the size
+    of a root directory can be read without walking the directory tree.
+    Changes made behind the tracker's back (e.g. by Docker containers) are
+    picked up by an occasional scan of the whole root.
+    """
+
+    def __init__(self):
+        self._lock = RLock()
+        # root directory -> total size of files attributed to that root
+        self._totals = {}
+        # file path -> (root directory, file size)
+        self._files = {}
+        # directory -> paths of tracked files placed directly in it
+        self._dirs = {}
+        # directory -> its subdirectories containing tracked files
+        self._children = {}
+        self._scanned = set()
+
+    def track(self, root):
+        """ Start tracking a root directory. Each file is attributed to the
+        innermost tracked root it is placed in.
+        :param str root: root directory path
+        :return str: normalized root directory path
+        """
+        root = norm_path(root)
+        with self._lock:
+            if root in self._totals:
+                return root
+            self._totals[root] = 0
+            # Move files that now belong to a more specific root
+            for path in list(self._subtree_files(root)):
+                file_root, size = self._files[path]
+                if len(root) > len(file_root):
+                    self._files[path] = (root, size)
+                    self._totals[file_root] -= size
+                    self._totals[root] += size
+        return root
+
+    def size(self, root):
+        """ Total size of files stored in a root directory, including nested
+        tracked roots. Roots that have not been scanned yet are scanned
+        first.
+        :param str root: root directory path
+        :return int: size in bytes
+        """
+        root = self.track(root)
+        if root not in self._scanned:
+            self.scan(root)
+        with self._lock:
+            return sum(total for file_root, total in self._totals.items()
+                       if _is_within(file_root, root))
+
+    def path_added(self, path):
+        """ Report a created or modified file or directory tree
+        :param str path: path to a file or directory
+        """
+        path = norm_path(path)
+        with self._lock:
+            if self._root_of(path) is None:
+                return
+        if os.path.isdir(path):
+            sizes = self._walk(path)
+        else:
+            sizes = {path: self._file_size(path)}
+        with self._lock:
+            for file_path, size in sizes.items():
+                self._set(file_path, size)
+
+    def path_removed(self, path):
+        """ Report a removed file or directory tree
+        :param str path: path to a file or directory
+        """
+        path = norm_path(path)
+        with self._lock:
+            if path in self._files:
+                self._set(path, None)
+                return
+            # Neither a tracked file nor a directory containing one
+            if path not in self._dirs and path not in self._children:
+                return
+            for file_path in list(self._subtree_files(path)):
+                self._set(file_path, None)
+
+    def scan(self, root):
+        """ Reconcile tracked sizes with the actual contents of a root
+        directory
+        :param str root: root directory path
+        """
+        root = self.track(root)
+        sizes = self._walk(root)
+        with self._lock:
+            for path in list(self._subtree_files(root)):
+                if path not in sizes:
+                    self._set(path, None)
+            for path, size in sizes.items():
+                self._set(path, size)
+            self._scanned.add(root)
+
+    def _set(self, path, size):
+        """ Set or remove (size=None) a file entry. Must be called with
+        the lock held. """
+        old_root, old_size = self._files.pop(path, (None, 0))
+        if old_root is not None:
+            self._totals[old_root] -= old_size
+            self._unindex(path)
+        if size is None:
+            return
+        root = self._root_of(path)
+        if root is not None:
+            self._files[path] = (root, size)
+            self._totals[root] += size
+            self._index(path)
+
+    def _index(self, path):
+        directory = os.path.dirname(path)
+        self._dirs.setdefault(directory, set()).add(path)
+
+        parent = os.path.dirname(directory)
+        while parent != directory:
+            children = self._children.setdefault(parent, set())
+            if directory in children:
+                break
+            children.add(directory)
+            directory, parent = parent, os.path.dirname(parent)
+
+    def _unindex(self, path):
+        directory = os.path.dirname(path)
+        self._dirs[directory].discard(path)
+
+        # Drop directories left without tracked files
+        while not (self._dirs.get(directory) or
+                   self._children.get(directory)):
+            self._dirs.pop(directory, None)
+            self._children.pop(directory, None)
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                break
+            self._children.get(parent, set()).discard(directory)
+            directory = parent
+
+    def _subtree_files(self, directory):
+        directories = [directory]
+        while directories:
+            current = directories.pop()
+            yield from self._dirs.get(current, ())
+            directories.extend(self._children.get(current, ()))
+
+    def _root_of(self, path):
+        roots = [root for root in self._totals if _is_within(path, root)]
+        return max(roots, key=len) if roots else None
+
+    @staticmethod
+    def _file_size(path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _walk(directory):
+        sizes = {}
+
+        def on_error(err):
+            logger.debug("Disk usage: cannot list %r: %r", directory, err)
+
+        for dir_path, _, file_names in os.walk(directory, onerror=on_error):
+            for file_name in file_names:
+                path = os.path.join(dir_path, file_name)
+                try:
+                    sizes[path] = os.path.getsize(path)
+                except OSError:
+                    continue
+        return sizes
+
+
+disk_usage = DiskUsageTracker()
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import stat
+import tempfile
+import time
+from threading import RLock
+
+from golem.core.common import is_windows
+
+logger = logging.getLogger(__name__)
+
+# Disk budget of the cache, least recently used packages are evicted first
+MAX_SIZE = 10 * 2 ** 30
+
+INDEX_FILE = 'index.json'
+FILES_DIR = 'files'
+
+
+def _file_digest(path, block_size=2 ** 20):
+    sha = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for data in iter(lambda: f.read(block_size), b''):
+            sha.update(data)
+    return sha.hexdigest()
+
+
+class ExtractionCache(object):
+    """ Provider side cache of extracted resource packages, shared by all
+    tasks. Extracted files are stored once, by the sha1 of their content,
+    and each package keeps a manifest of the files it consists of. Task
+    resource directories are assembled from hard links to the stored files,
+    so a package that has been extracted for one task is neither downloaded
+    nor extracted again for another one. Files are copied if hard links are
+    not supported.
+
+    Stored files are read-only. Resources are mounted read-only in task
+    containers, so the links cannot be used to modify them.
+    """
+
+    def __init__(self, root_dir, max_size=MAX_SIZE):
+        """
+        :param str root_dir: cache directory
+        :param int max_size: disk budget in bytes
+        """
+        self.root_dir = root_dir
+        self.max_size = max_size
+        self._files_dir = os.path.join(root_dir, FILES_DIR)
+        self._index_path = os.path.join(root_dir, INDEX_FILE)
+        self._lock = RLock()
+        # package hash -> {'files': [[path, digest, size]], 'dirs': [path],
+        #                  'used': timestamp}
+        self._packages = self._load_index()
+
+    @property
+    def size(self):
+        with self._lock:
+            return sum(self._file_sizes().values())
+
+    def has_package(self, package_hash):
+        """ Check whether all files of a package are in the cache
+        :param str package_hash: resource package hash
+        :return bool:
+        """
+        with self._lock:
+            package = self._packages.get(package_hash)
+            if package is None:
+                return False
+            for _, digest, size in package['files']:
+                try:
+                    if os.path.getsize(self._file_path(digest)) != size:
+                        raise OSError("Size mismatch")
+                except OSError:
+                    logger.debug("Extraction cache: package %r is incomplete",
+                                 package_hash)
+                    del self._packages[package_hash]
+                    return False
+            return True
+
+    def add(self, package_hash, package_paths, packager):
+        """ Extract packages and store their files
+        :param str package_hash: resource package hash
+        :param list package_paths: package files
+        :param Packager packager: packager used to extract the packages
+        """
+        os.makedirs(self._files_dir, exist_ok=True)
+        extract_dir = tempfile.mkdtemp(prefix='extract-', dir=self.root_dir)
+        try:
+            for package_path in package_paths:
+                logger.debug('Extracting task resource: %r', package_path)
+                packager.extract(package_path, extract_dir)
+            package = self._store(extract_dir)
+        finally:
+            shutil.rmtree(extract_dir, ignore_errors=True)
+
+        with self._lock:
+            self._packages[package_hash] = package
+            self._evict(keep=package_hash)
+            self._save_index()
+
+    def assemble(self, package_hash, target_dir):
+        """ Place files of a cached package in a directory
+        :param str package_hash: resource package hash
+        :param str target_dir: task resource directory
+        :return bool: False if the package is not cached
+        """
+        if not self.has_package(package_hash):
+            return False
+        with self._lock:
+            package = self._packages[package_hash]
+            package['used'] = time.time()
+            files = list(package['files'])
+            dirs = list(package['dirs'])
+            self._save_index()
+
+        for path in dirs:
+            os.makedirs(os.path.join(target_dir, path), exist_ok=True)
+        for path, digest, _ in files:
+            target = os.path.join(target_dir, path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if os.path.lexists(target):
+                os.remove(target)
+            try:
+                os.link(self._file_path(digest), target)
+            except OSError:
+                shutil.copyfile(self._file_path(digest), target)
+        return True
+
+    def _store(self, extract_dir):
+        files = []
+        dirs = []
+        for root, dir_names, file_names in os.walk(extract_dir):
+            for name in dir_names:
+                dirs.append(os.path.relpath(os.path.join(root, name),
+                                            extract_dir))
+            for name in file_names:
+                path = os.path.join(root, name)
+                digest = _file_digest(path)
+                size = os.path.getsize(path)
+                file_path = self._file_path(digest)
+                if not os.path.exists(file_path):
+                    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                    if not is_windows():
+                        os.chmod(path, stat.S_IRUSR | stat.S_IRGRP)
+                    os.replace(path, file_path)
+                files.append([os.path.relpath(path, extract_dir), digest,
+                              size])
+        return {'files': files, 'dirs': dirs, 'used': time.time()}
+
+    def _evict(self, keep):
+        file_sizes = self._file_sizes()
+        total = sum(file_sizes.values())
+        by_use = sorted(self._packages, key=lambda h: self._packages[h]['used'])
+
+        for package_hash in by_use:
+            if total <= self.max_size:
+                break
+            if package_hash == keep:
+                continue
+            package = self._packages.pop(package_hash)
+            remaining = self._file_sizes()
+            for _, digest, size in package['files']:
+                if digest in remaining or digest not in file_sizes:
+                    continue
+                del file_sizes[digest]
+                total -= size
+                try:
+                    os.remove(self._file_path(digest))
+                except OSError:
+                    pass
+            logger.debug("Extraction cache: package %r evicted", package_hash)
+
+    def _file_sizes(self):
+        return {digest: size for package in self._packages.values()
+                for _, digest, size in package['files']}
+
+    def _file_path(self, digest):
+        return os.path.join(self._files_dir, digest[:2], digest)
+
+    def _load_index(self):
+        try:
+            with open(self._index_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return dict()
+        except (OSError, ValueError) as exc:
+            logger.warning("Extraction cache: cannot load index: %r", exc)
+            return dict()
+
+    def _save_index(self):
+        os.makedirs(self.root_dir, exist_ok=True)
+        tmp_path = self._index_path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self._packages, f)
+            os.replace(tmp_path, self._index_path)
+        except OSError as exc:
+            logger.warning("Extraction cache: cannot save index: %r", exc)
@@ -5,6 +5,7 @@ from threading import Lock
 from typing import List
 
 from golem.core.fileshelper import copy_file_tree, relative_path
+from golem.resource.diskusage import disk_usage
 
 
 def split_path(path):
@@ -65,30 +66,54 @@ class Resource:
             return s_hash, files
 
 
+class _TaskShard(object):
+    """ Resources and the common prefix of a single task. Only writers take
+    the lock. Readers copy the resource list, which does not block. """
+
+    __slots__ = ('lock', 'resources', 'prefix', 'removed')
+
+    def __init__(self):
+        self.lock = Lock()
+        self.resources = list()
+        self.prefix = None
+        # Set when the shard is dropped from the cache, so that writers
+        # holding a stale reference start over with a new shard
+        self.removed = False
+
+
 class ResourceCache(object):
+    """ Resource index sharded by task. Writers lock only the shard of the
+    task they modify, so tasks are added and removed independently.
+    Lookups by hash, path and task are single dict reads and never wait
+    for a lock; single dict operations are atomic in CPython.
+    """
+
+    INDEX_LOCKS = 16
 
     def __init__(self):
-        self._lock = Lock()
+        # task to _TaskShard
+        self._shards = dict()
         # hash to resource
         self._hash_to_res = dict()
         # path to resource
         self._path_to_res = dict()
-        # task to resources
-        self._task_to_res = dict()
-        # task to resource common prefix
-        self._task_to_prefix = dict()
-
-    def add_resource(self, resource):
-        task_id = resource.task_id
+        # striped locks making replacement and removal of index entries
+        # atomic, for writers only
+        self._index_locks = [Lock() for _ in range(self.INDEX_LOCKS)]
 
-        with self._lock:
-            resource_list = self._task_to_res.get(task_id)
-            if not resource_list:
-                self._task_to_res[task_id] = resource_list = list()
-            resource_list.append(resource)
+    def _get_shard(self, task_id):
+        return self._shards.setdefault(task_id, _TaskShard())
 
-            self._hash_to_res[resource.hash] = resource
-            self._path_to_res[resource.path] = resource
+    def add_resource(self, resource):
+        while True:
+            shard = self._get_shard(resource.task_id)
+            with shard.lock:
+                if shard.removed:
+                    continue
+                shard.resources.append(resource)
+                self._index_set(self._hash_to_res, resource.hash, resource)
+                self._index_set(self._path_to_res, resource.path, resource)
+                return
 
     def get_by_hash(self, resource_hash, default=None):
         return self._hash_to_res.get(resource_hash, default)
@@ -97,34 +122,61 @@ class ResourceCache(object):
         return self._path_to_res.get(resource_path, default)
 
     def has_resource(self, resource):
-        if resource.task_id and resource.task_id not in self._task_to_res:
-            return False
+        if resource.task_id:
+            shard = self._shards.get(resource.task_id)
+            if not (shard and shard.resources):
+                return False
         if resource.hash and resource.hash not in self._hash_to_res:
             return False
         return resource.path in self._path_to_res
 
     def get_resources(self, task_id, default=None):
-        return self._task_to_res.get(task_id, default or [])
+        shard = self._shards.get(task_id)
+        resources = list(shard.resources) if shard else None
+        return resources or default or []
 
     def set_prefix(self, task_id, prefix):
-        self._task_to_prefix[task_id] = norm_path(prefix)
+        prefix = norm_path(prefix)
+        while True:
+            shard = self._get_shard(task_id)
+            with shard.lock:
+                if not shard.removed:
+                    shard.prefix = prefix
+                    return
 
     def get_prefix(self, task_id, default=''):
-        return self._task_to_prefix.get(task_id, default)
+        shard = self._shards.get(task_id)
+        prefix = shard.prefix if shard else None
+        return default if prefix is None else prefix
 
     def remove(self, task_id):
-        resources = self._task_to_res.pop(task_id, [])
-        for r in resources:
-            self._hash_to_res.pop(r.hash, None)
-            self._path_to_res.pop(r.path, None)
-        self._task_to_prefix.pop(task_id, None)
-        return resources
+        shard = self._shards.pop(task_id, None)
+        if not shard:
+            return []
+
+        with shard.lock:
+            shard.removed = True
+            for r in shard.resources:
+                # Keep entries replaced by a resource of another task
+                self._index_discard(self._hash_to_res, r.hash, r)
+                self._index_discard(self._path_to_res, r.path, r)
+            return shard.resources
 
     def clear(self):
-        self._hash_to_res = dict()
-        self._path_to_res = dict()
-        self._task_to_res = dict()
-        self._task_to_prefix = dict()
+        for task_id in list(self._shards):
+            self.remove(task_id)
+
+    def _index_lock(self, key):
+        return self._index_locks[hash(key) % self.INDEX_LOCKS]
+
+    def _index_set(self, index, key, resource):
+        with self._index_lock(key):
+            index[key] = resource
+
+    def _index_discard(self, index, key, resource):
+        with self._index_lock(key):
+            if index.get(key) is resource:
+                del index[key]
 
 
 class ResourceStorage(object):
@@ -162,6 +214,7 @@ class ResourceStorage(object):
 
         if root_dir != src_dir:
             copy_file_tree(src_dir, root_dir)
+            disk_usage.path_added(root_dir)
             return True
 
     def copy(self, src_path, dst_relative_path, task_id):
@@ -174,6 +227,7 @@ class ResourceStorage(object):
             os.remove(dst_path)
         elif os.path.isdir(dst_path):
             shutil.rmtree(dst_path)
+        disk_usage.path_removed(dst_path)
 
         os.makedirs(dst_path, exist_ok=True)
 
@@ -184,3 +238,5 @@ class ResourceStorage(object):
         else:
             raise ResourceError("Error reading source path: '{}'"
                                 .format(src_path))
+
+        disk_usage.path_added(dst_path)
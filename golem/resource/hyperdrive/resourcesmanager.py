@@ -8,6 +8,7 @@ from twisted.internet.defer import Deferred
 from golem.core.fileshelper import common_dir
 from golem.network.hyperdrive.client import HyperdriveAsyncClient
 from golem.resource.client import ClientHandler, DummyClient
+from golem.resource.diskusage import disk_usage
 from golem.resource.hyperdrive.peermanager import HyperdrivePeerManager
 from golem.resource.hyperdrive.resource import Resource, ResourceStorage, \
     ResourceError
@@ -274,6 +275,7 @@ class HyperdriveResourceManager(ClientHandler):
                          resource.path, resource.hash)
 
             self._cache_resource(resource)
+            disk_usage.path_added(path)
             files = self._parse_pull_response(response, task_id)
             success(entry, files, task_id)
 
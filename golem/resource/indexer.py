@@ -0,0 +1,140 @@
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import RLock
+
+from golem.core.simplehash import SimpleHash
+
+logger = logging.getLogger(__name__)
+
+# Number of threads hashing files. hashlib releases the GIL while hashing
+# large blocks, so the threads run in parallel.
+MAX_WORKERS = min(8, os.cpu_count() or 1)
+# Number of cached hashes, the least recently used ones are dropped
+MAX_ENTRIES = 100000
+# Files modified within that many seconds are not cached. The file could
+# change again without changing its size and modification time.
+RACY_INTERVAL = 2.0
+
+
+def _file_key(path):
+    stat = os.stat(path)
+    key = '{}:{}:{}:{}'.format(stat.st_dev, stat.st_ino, stat.st_size,
+                               stat.st_mtime_ns)
+    return key, stat.st_mtime
+
+
+class ResourceIndexer(object):
+    """ Computes SimpleHash.hash_file_base64 hashes of resource files.
+    Files are hashed in a thread pool and the hashes are cached by file
+    identity: device, inode, size and modification time. A file that has
+    not changed is not read again, also after a restart if a cache file is
+    set and saved.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, max_entries=MAX_ENTRIES):
+        self.max_workers = max_workers
+        self.max_entries = max_entries
+        self.cache_file = None
+        self._cache = OrderedDict()
+        self._changed = False
+        self._lock = RLock()
+
+    def set_cache_file(self, cache_file):
+        """ Store the hashes in a file and load the ones stored before
+        :param str cache_file: cache file path
+        """
+        with self._lock:
+            self.cache_file = cache_file
+            try:
+                with open(cache_file, 'r') as f:
+                    entries = json.load(f)
+            except FileNotFoundError:
+                return
+            except (OSError, ValueError) as exc:
+                logger.warning("Cannot load resource hashes from %r: %r",
+                               cache_file, exc)
+                return
+            for key, file_hash in entries:
+                self._cache[key] = file_hash.encode('ascii')
+            self._trim()
+
+    def hash_file(self, path):
+        """ Hash of a single file
+        :param str path: file path
+        :return bytes: base64 encoded sha1 of the file
+        """
+        return self.hash_files([path])[path]
+
+    def hash_files(self, paths):
+        """ Hash files, reading only the ones that are not cached
+        :param paths: file paths
+        :return dict: path -> base64 encoded sha1 of the file
+        """
+        hashes = dict()
+        missing = []
+        with self._lock:
+            for path in paths:
+                key, _ = _file_key(path)
+                file_hash = self._cache.get(key)
+                if file_hash is None:
+                    missing.append((path, key))
+                else:
+                    self._cache.move_to_end(key)
+                    hashes[path] = file_hash
+
+        if not missing:
+            return hashes
+
+        if len(missing) > 1 and self.max_workers > 1:
+            with ThreadPoolExecutor(self.max_workers) as executor:
+                computed = list(executor.map(
+                    SimpleHash.hash_file_base64,
+                    [path for path, _ in missing]))
+        else:
+            computed = [SimpleHash.hash_file_base64(path)
+                        for path, _ in missing]
+
+        now = time.time()
+        with self._lock:
+            for (path, key), file_hash in zip(missing, computed):
+                # A file modified while it was read gets a new key
+                current_key, mtime = _file_key(path)
+                if current_key == key and now - mtime > RACY_INTERVAL:
+                    self._cache[key] = file_hash
+                    self._changed = True
+                hashes[path] = file_hash
+            self._trim()
+        return hashes
+
+    def save(self):
+        """ Write the hashes to the cache file if they have changed """
+        with self._lock:
+            if not self.cache_file or not self._changed:
+                return
+            entries = [(key, file_hash.decode('ascii'))
+                       for key, file_hash in self._cache.items()]
+            self._changed = False
+            tmp_file = self.cache_file + '.tmp'
+            try:
+                with open(tmp_file, 'w') as f:
+                    json.dump(entries, f)
+                os.replace(tmp_file, self.cache_file)
+            except OSError as exc:
+                logger.warning("Cannot save resource hashes to %r: %r",
+                               self.cache_file, exc)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._changed = True
+
+    def _trim(self):
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+
+resource_indexer = ResourceIndexer()
@@ -7,6 +7,7 @@ import zipfile
 
 from golem.core.simplehash import SimpleHash
 from golem.resource.dirmanager import split_path
+from golem.resource.indexer import resource_indexer
 
 
 logger = logging.getLogger(__name__)
@@ -41,6 +42,7 @@ class TaskResourceHeader():
         cur_th = TaskResourceHeader(dir_name)
 
         abs_dirs = split_path(absolute_root)
+        hashes = resource_indexer.hash_files(chosen_files)
 
         for f in chosen_files:
 
@@ -58,13 +60,31 @@ class TaskResourceHeader():
                     last_header.sub_dir_headers.append(child_sub_dir_header)
                     last_header = child_sub_dir_header
 
-            hsh = SimpleHash.hash_file_base64(f)
+            hsh = hashes[f]
             last_header.files_data.append((file_name, hsh))
 
         return cur_th
 
     @classmethod
-    def __build(cls, dir_name, absolute_root, chosen_files=None):
+    def __list_files(cls, absolute_root, chosen_files=None):
+        """ Paths of the files __build hashes, in a whole directory tree """
+        if chosen_files:
+            chosen_files = set(chosen_files)
+        files = []
+        for name in os.listdir(absolute_root):
+            path = os.path.join(absolute_root, name)
+            if os.path.isdir(path):
+                files += cls.__list_files(path, chosen_files)
+            elif os.path.isfile(path):
+                if not chosen_files or path in chosen_files:
+                    files.append(path)
+        return files
+
+    @classmethod
+    def __build(cls, dir_name, absolute_root, chosen_files=None, hashes=None):
+        if hashes is None:
+            hashes = resource_indexer.hash_files(
+                cls.__list_files(absolute_root, chosen_files))
         cur_th = TaskResourceHeader(dir_name)
 
         dirs = [name for name in os.listdir(absolute_root) if os.path.isdir(os.path.join(absolute_root, name))]
@@ -72,9 +92,9 @@ class TaskResourceHeader():
 
         files_data = []
         for f in files:
-            if chosen_files and os.path.join(absolute_root, f) not in chosen_files:
+            if os.path.join(absolute_root, f) not in hashes:
                 continue
-            hsh = SimpleHash.hash_file_base64(os.path.join(absolute_root, f))
+            hsh = hashes[os.path.join(absolute_root, f)]
 
             files_data.append((f, hsh))
 
@@ -84,7 +104,8 @@ class TaskResourceHeader():
 
         sub_dir_headers = []
         for d in dirs:
-            child_sub_dir_header = cls.__build(d, os.path.join(absolute_root, d), chosen_files)
+            child_sub_dir_header = cls.__build(
+                d, os.path.join(absolute_root, d), chosen_files, hashes)
             sub_dir_headers.append(child_sub_dir_header)
 
         cur_th.sub_dir_headers = sub_dir_headers
@@ -99,6 +120,7 @@ class TaskResourceHeader():
         cur_th = TaskResourceHeader(header.dir_name)
 
         abs_dirs = split_path(absolute_root)
+        hashes = resource_indexer.hash_files(chosen_files)
 
         for file_ in chosen_files:
 
@@ -110,7 +132,7 @@ class TaskResourceHeader():
 
             last_header, last_ref_header, ref_header_found = cls.__resolve_dirs(dirs, last_header, last_ref_header)
 
-            hsh = SimpleHash.hash_file_base64(file_)
+            hsh = hashes[file_]
             if ref_header_found:
                 if last_ref_header.__has_file(file_name):
                     if hsh == last_ref_header.__get_file_hash(file_name):
@@ -126,6 +148,7 @@ class TaskResourceHeader():
         cur_th = TaskResourceHeader(header.dir_name)
         abs_dirs = split_path(absolute_root)
         delta_parts = []
+        hashes = resource_indexer.hash_files(list(res_parts))
 
         for file_, parts in res_parts.items():
             dir_, file_name = os.path.split(file_)
@@ -136,7 +159,7 @@ class TaskResourceHeader():
 
             last_header, last_ref_header, ref_header_found = cls.__resolve_dirs(dirs, last_header, last_ref_header)
 
-            hsh = SimpleHash.hash_file_base64(file_)
+            hsh = hashes[file_]
             if ref_header_found:
                 if last_ref_header.__has_file(file_name):
                     if hsh == last_ref_header.__get_file_hash(file_name):
@@ -148,9 +171,13 @@ class TaskResourceHeader():
 
     # Add only the fields that are not in header (or which hashes are different)
     @classmethod
-    def build_header_delta_from_header(cls, header, absolute_root, chosen_files):
+    def build_header_delta_from_header(cls, header, absolute_root,
+                                       chosen_files, hashes=None):
         if not isinstance(header, TaskResourceHeader):
             raise TypeError("Incorrect header type: {}. Should be TaskResourceHeader".format(type(header)))
+        if hashes is None:
+            hashes = resource_indexer.hash_files(
+                cls.__list_files(absolute_root, chosen_files))
 
         cur_tr = TaskResourceHeader(header.dir_name)
 
@@ -161,24 +188,20 @@ class TaskResourceHeader():
             if header.__has_sub_header(d):
                 cur_tr.sub_dir_headers.append(
                     cls.build_header_delta_from_header(header.__get_sub_header(d), os.path.join(absolute_root, d),
-                                                       chosen_files))
+                                                       chosen_files, hashes))
             else:
-                cur_tr.sub_dir_headers.append(cls.__build(d, os.path.join(absolute_root, d), chosen_files))
+                cur_tr.sub_dir_headers.append(cls.__build(
+                    d, os.path.join(absolute_root, d), chosen_files, hashes))
 
         for f in files:
-            if chosen_files and os.path.join(absolute_root, f) not in chosen_files:
+            if os.path.join(absolute_root, f) not in hashes:
                 continue
 
-            file_hash = 0
+            file_hash = hashes[os.path.join(absolute_root, f)]
             if header.__has_file(f):
-                file_hash = SimpleHash.hash_file_base64(os.path.join(absolute_root, f))
-
                 if file_hash == header.__get_file_hash(f):
                     continue
 
-            if not file_hash:
-                file_hash = SimpleHash.hash_file_base64(os.path.join(absolute_root, f))
-
             cur_tr.files_data.append((f, file_hash))
 
         return cur_tr
@@ -368,7 +391,9 @@ class TaskResource(object):
         for f in files:
             if f in [file_[0] for file_ in header.files_data]:
                 idx = [file_[0] for file_ in header.files_data].index(f)
-                if SimpleHash.hash_file_base64(os.path.join(absolute_root, f)) == header.files_data[idx][1]:
+                file_hash = resource_indexer.hash_file(
+                    os.path.join(absolute_root, f))
+                if file_hash == header.files_data[idx][1]:
                     continue
 
             fdata = cls.read_file(os.path.join(absolute_root, f))
@@ -388,8 +413,9 @@ class TaskResource(object):
             dir_.extract(os.path.join(to_path, dir_.dir_name))
 
         for f in self.files_data:
-            if not os.path.exists(os.path.join(to_path, f[0])) or SimpleHash.hash_file_base64(
-                    os.path.join(to_path, f[0])) != f[1]:
+            path = os.path.join(to_path, f[0])
+            if not os.path.exists(path) or \
+                    resource_indexer.hash_file(path) != f[1]:
                 self.write_file(os.path.join(to_path, f[0]), f[2])
 
     def __init__(self, dir_name):
@@ -1,22 +1,29 @@
+import datetime
 import logging
 import os
 import uuid
 
 from golem_messages import message
 
+from golem.core.async import AsyncRequest, async_run
+from golem.model import ResourceHandshakeResult
+
 logger = logging.getLogger('golem.resources')
 
 
 class ResourceHandshake:
 
-    __slots__ = ('nonce', 'file', 'hash', 'message',
+    __slots__ = ('nonce', 'file', 'hash', 'message', 'refresh',
                  'started', 'local_result', 'remote_result')
 
-    def __init__(self, message_=None):
+    def __init__(self, message_=None, refresh=False):
         self.nonce = str(uuid.uuid4())
         self.file = None
         self.hash = None
         self.message = message_
+        # Refreshes a handshake that has not expired yet. Task requests are
+        # not held back while it is in progress.
+        self.refresh = refresh
 
         self.started = False
         self.local_result = None
@@ -51,9 +58,99 @@ class ResourceHandshake:
         return all([self.local_result, self.remote_result])
 
 
+class ResourceHandshakeResults:
+    """ Persisted results of successful resource handshakes. Results are
+    loaded from the database once and kept in memory. Changes are written
+    through to the database in a thread.
+    """
+
+    def __init__(self):
+        self._results = None
+
+    def load(self):
+        now = datetime.datetime.now()
+        self._results = {
+            result.node: result
+            for result in ResourceHandshakeResult.select().where(
+                ResourceHandshakeResult.expires > now)
+        }
+
+    def get(self, key_id):
+        """ Result of a handshake with a peer that has not expired """
+        result = self._get_results().get(key_id)
+        if result and result.expires > datetime.datetime.now():
+            return result
+        return None
+
+    def save(self, key_id, expires):
+        now = datetime.datetime.now()
+        results = self._get_results()
+        result = results.get(key_id)
+
+        if result:
+            result.expires = expires
+        else:
+            results[key_id] = ResourceHandshakeResult(node=key_id,
+                                                      expires=expires)
+
+        for node in [node for node, result in results.items()
+                     if result.expires < now]:
+            del results[node]
+
+        async_run(AsyncRequest(self._save_result, key_id, expires, now))
+
+    def count_exchange(self, key_id):
+        """ Count a task request exchanged with a peer
+        :return: peer's result, None if there is no valid one
+        """
+        result = self.get(key_id)
+        if result:
+            result.exchanges += 1
+            async_run(AsyncRequest(self._count_exchange, key_id))
+        return result
+
+    def remove(self, key_id):
+        if self._get_results().pop(key_id, None):
+            async_run(AsyncRequest(self._remove_result, key_id))
+
+    def _get_results(self):
+        if self._results is None:
+            self.load()
+        return self._results
+
+    @staticmethod
+    def _save_result(key_id, expires, now):
+        updated = ResourceHandshakeResult.update(
+            expires=expires,
+            modified_date=now,
+        ).where(ResourceHandshakeResult.node == key_id).execute()
+        if not updated:
+            ResourceHandshakeResult.create(node=key_id, expires=expires)
+
+        ResourceHandshakeResult.delete().where(
+            ResourceHandshakeResult.expires < now).execute()
+
+    @staticmethod
+    def _count_exchange(key_id):
+        ResourceHandshakeResult.update(
+            exchanges=ResourceHandshakeResult.exchanges + 1
+        ).where(ResourceHandshakeResult.node == key_id).execute()
+
+    @staticmethod
+    def _remove_result(key_id):
+        ResourceHandshakeResult.delete().where(
+            ResourceHandshakeResult.node == key_id).execute()
+
+
 class ResourceHandshakeSessionMixin:
 
     HANDSHAKE_TIMEOUT = 20  # s
+    # Successful handshakes are persisted and not repeated until they expire
+    HANDSHAKE_LIFETIME = datetime.timedelta(days=1)
+    # Handshakes with peers we exchange tasks with often are refreshed in
+    # the background when they are about to expire
+    HANDSHAKE_REFRESH = datetime.timedelta(hours=6)
+    HANDSHAKE_REFRESH_EXCHANGES = 3
     NONCE_TASK = 'nonce'
 
     def __init__(self):
@@ -63,6 +160,7 @@ class ResourceHandshakeSessionMixin:
 
         self._task_request_message = None
         self._handshake_timer = None
+        self._handshake_queue = []
 
     def request_task(self, node_name, task_id, perf_index, price,
                      max_resource_size, max_memory_size, num_cores):
@@ -97,6 +195,7 @@ class ResourceHandshakeSessionMixin:
             self._start_handshake(key_id)
 
         else:
+            self._count_exchange(key_id)
             self.send(message.WantToComputeTask(**msg_d))
 
     # ########################
@@ -112,7 +211,8 @@ class ResourceHandshakeSessionMixin:
             return
 
         if not handshake:
-            self._start_handshake(key_id)
+            refresh = self._get_handshake_result(key_id) is not None
+            self._start_handshake(key_id, refresh=refresh)
         elif handshake.success():  # handle inconsistent state between peers
             self.send(message.ResourceHandshakeStart(resource=handshake.hash))
 
@@ -158,7 +258,9 @@ class ResourceHandshakeSessionMixin:
         handshake = self._get_handshake(key_id)
         blocked = self._is_peer_blocked(key_id)
 
-        return not (blocked or handshake)
+        if blocked or handshake:
+            return False
+        return self._get_handshake_result(key_id) is None
 
     def _handshake_in_progress(self, key_id):
         if not key_id:
@@ -166,12 +268,44 @@ class ResourceHandshakeSessionMixin:
             return False
 
         handshake = self._get_handshake(key_id)
-        return handshake and not handshake.finished()
+        return handshake and not handshake.finished() \
+            and not handshake.refresh
+
+    def _queue_until_handshake(self, reaction, msg):
+        """ Handle a message once the resource handshake in progress
+        succeeds, instead of dropping it
+        :param reaction: message handler
+        :param msg: message to handle
+        """
+        self._handshake_queue.append((reaction, msg))
+
+    def _count_exchange(self, key_id):
+        """ Count a task request exchanged with a peer verified by
+        a persisted handshake. Start refreshing the handshake if the peer is
+        a frequent one and the handshake is about to expire.
+        """
+        if not key_id:
+            return
+
+        result = self.task_server.resource_handshake_results.count_exchange(
+            key_id)
+        if not result or result.exchanges < self.HANDSHAKE_REFRESH_EXCHANGES:
+            return
+        if result.expires - datetime.datetime.now() > self.HANDSHAKE_REFRESH:
+            return
+
+        handshake = self._get_handshake(key_id)
+        if handshake and not handshake.finished():
+            return
 
-    def _start_handshake(self, key_id):
+        logger.info('Refreshing resource handshake with %r', key_id)
+        self._start_handshake(key_id, refresh=True)
+
+    def _start_handshake(self, key_id, refresh=False):
         logger.info('Starting resource handshake with %r', key_id)
 
-        handshake = ResourceHandshake(self._task_request_message)
+        task_request = None if refresh else self._task_request_message
+        handshake = ResourceHandshake(task_request, refresh=refresh)
         directory = self.resource_manager.storage.get_dir(self.NONCE_TASK)
 
         try:
@@ -206,9 +340,21 @@ class ResourceHandshakeSessionMixin:
 
         if handshake.finished():
             logger.info('Finished resource handshake with %r', key_id)
-        if handshake.success() and handshake.message:
+        if not handshake.success():
+            # A failed refresh is dropped, the result is valid until it
+            # expires
+            if handshake.finished() and handshake.refresh:
+                self._remove_handshake(key_id)
+            return
+
+        self._save_handshake_result(key_id)
+        if handshake.message:
             self.send(message.WantToComputeTask(**handshake.message))
 
+        queued, self._handshake_queue = self._handshake_queue, []
+        for reaction, msg in queued:
+            reaction(msg)
+
     def _stop_handshake_timer(self):
         if self._handshake_timer:
             self._handshake_timer.cancel()
@@ -270,7 +416,16 @@ class ResourceHandshakeSessionMixin:
     # ########################
 
     def _handshake_error(self, key_id, error):
+        handshake = self._get_handshake(key_id)
+        if handshake and handshake.refresh:
+            # The peer stays verified until the persisted result expires
+            logger.info("Resource handshake refresh error (%r): %r",
+                        key_id, error)
+            self._remove_handshake(key_id)
+            return
+
         logger.info("Resource handshake error (%r): %r", key_id, error)
+        self._handshake_queue = []
         self._block_peer(key_id)
         self._finalize_handshake(key_id)
         self.task_server.task_computer.session_closed()
@@ -299,9 +454,20 @@ class ResourceHandshakeSessionMixin:
     def _remove_handshake(self, key_id):
         self.task_server.resource_handshakes.pop(key_id, None)
 
+    def _get_handshake_result(self, key_id):
+        return self.task_server.resource_handshake_results.get(key_id)
+
+    def _save_handshake_result(self, key_id):
+        expires = datetime.datetime.now() + self.HANDSHAKE_LIFETIME
+        self.task_server.resource_handshake_results.save(key_id, expires)
+
+    def _remove_handshake_result(self, key_id):
+        self.task_server.resource_handshake_results.remove(key_id)
+
     def _block_peer(self, key_id):
         self.task_server.acl.disallow(key_id)
         self._remove_handshake(key_id)
+        self._remove_handshake_result(key_id)
 
     def _is_peer_blocked(self, key_id):
         return not self.task_server.acl.is_allowed(key_id)
@@ -4,6 +4,7 @@ import os
 import logging
 
 from golem.core.fileshelper import copy_file_tree
+from golem.resource.diskusage import disk_usage
 from golem.resource.resourcehash import ResourceHash
 
 logger = logging.getLogger(__name__)
@@ -88,6 +89,7 @@ class ResourcesManager:
         dir_name = self.get_resource_dir(task_id)
 
         resource.extract(dir_name)
+        disk_usage.path_added(dir_name)
 
     def get_resource_dir(self, task_id):
         return self.dir_manager.get_task_resource_dir(task_id)
@@ -0,0 +1,95 @@
+import logging
+import os
+import shutil
+
+from golem.resource.resource import get_resources_root_dir
+
+logger = logging.getLogger(__name__)
+
+
+def link_file(src, dst):
+    """ Hard link a file, copy it if a link cannot be created, e.g. across
+    file systems
+    :param str src: source file
+    :param str dst: destination path, replaced if it exists
+    """
+    if os.path.lexists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def is_staged(src, dst):
+    """ Check whether dst is a link to src or an unchanged copy of it
+    :param str src: source file
+    :param str dst: staged file
+    :return bool:
+    """
+    try:
+        src_stat = os.stat(src)
+        dst_stat = os.lstat(dst)
+    except OSError:
+        return False
+    if (src_stat.st_dev, src_stat.st_ino) == \
+            (dst_stat.st_dev, dst_stat.st_ino):
+        return True
+    # Copies made by shutil.copy2 keep the modification time
+    return src_stat.st_size == dst_stat.st_size \
+        and src_stat.st_mtime_ns == dst_stat.st_mtime_ns
+
+
+def stage_resources(target_dir, resources, additional_resources=None):
+    """ Materialize task resources in a directory without compressing them.
+    Resources keep their paths relative to the common root directory,
+    additional resources are placed directly in the target directory.
+    Files are hard linked, so staging a tree again, e.g. for the next test
+    of the same task, only replaces files that have changed and removes
+    the ones that are no longer task resources.
+
+    Staged files share their contents with the originals and must not be
+    modified. Docker mounts the resource directory read-only.
+    :param str target_dir: directory to stage the resources in
+    :param list resources: resource file paths
+    :param list additional_resources: files to place in the target directory
+    :return dict: staged path -> source path
+    """
+    staged = dict()
+    if resources:
+        root_dir = get_resources_root_dir(resources)
+        for path in resources:
+            if os.path.isfile(path):
+                rel_path = os.path.relpath(path, root_dir)
+                staged[os.path.join(target_dir, rel_path)] = path
+    for path in additional_resources or []:
+        staged[os.path.join(target_dir, os.path.basename(path))] = path
+
+    os.makedirs(target_dir, exist_ok=True)
+    _remove_unknown(target_dir, staged)
+
+    linked = 0
+    for dst, src in staged.items():
+        if is_staged(src, dst):
+            continue
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        link_file(src, dst)
+        linked += 1
+
+    logger.debug("Staged %r resource files in %r (%r already up to date)",
+                 len(staged), target_dir, len(staged) - linked)
+    return staged
+
+
+def _remove_unknown(target_dir, staged):
+    for root, dir_names, file_names in os.walk(target_dir, topdown=False):
+        for name in file_names:
+            path = os.path.join(root, name)
+            if path not in staged:
+                os.remove(path)
+        for name in dir_names:
+            path = os.path.join(root, name)
+            if os.path.islink(path):
+                os.remove(path)
+            elif not os.listdir(path):
+                os.rmdir(path)
@@ -1,6 +1,7 @@
 CORE_METHOD_MAP = dict(
     get_golem_version=      'golem.version',
     get_golem_status=       'golem.status',
+    get_startup_timings=    'golem.startup.timings',
 
     get_settings=           'env.opts',
     update_settings=        'env.opts.update',
@@ -1,11 +1,15 @@
-from copy import copy
+from collections import deque, namedtuple
+import hashlib
+import json
 import logging
 import os
+from threading import Lock
 from typing import Union
 
 from apps.core.benchmark.benchmarkrunner import BenchmarkRunner
 from apps.core.task.coretaskstate import TaskDesc
 
+from golem.core.hardware import cpu_model
 from golem.model import Performance
 from golem.resource.dirmanager import DirManager
 from golem.task.taskbase import Task
@@ -13,6 +17,29 @@ from golem.task.taskstate import TaskStatus
 
 logger = logging.getLogger(__name__)
 
+BenchmarkJob = namedtuple('BenchmarkJob', ['env_id', 'benchmark',
+                                           'builder_class', 'success',
+                                           'error'])
+
+
+def hardware_fingerprint(config_desc, docker_images):
+    """ Fingerprint of everything a benchmark result depends on: CPU model,
+    number of cores and memory assigned to Docker and the Docker images
+    used by the environment
+    :param ClientConfigDescriptor config_desc: client configuration
+    :param list docker_images: list of DockerImage
+    :return str: hex digest
+    """
+    data = {
+        'cpu': cpu_model(),
+        'cores': int(config_desc.num_cores),
+        'memory': int(config_desc.max_memory_size),
+        'images': sorted(image.get_local_id() or image.name
+                         for image in docker_images),
+    }
+    encoded = json.dumps(data, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
 
 class BenchmarkManager(object):
     def __init__(self, node_name, task_server, root_path, benchmarks=None):
@@ -21,18 +48,42 @@ class BenchmarkManager(object):
         self.task_server = task_server
         self.dir_manager = DirManager(root_path)
 
+        self._lock = Lock()
+        self._pending = deque()
+        self._cpu_used = 0
+        self._running = 0
+
+    @property
+    def cpu_budget(self):
+        return max(int(self.task_server.config_desc.num_cores), 1)
+
+    def fingerprint(self, env_id):
+        env = self.task_server.get_environment_by_id(env_id)
+        docker_images = getattr(env, 'docker_images', None) or []
+        return hardware_fingerprint(self.task_server.config_desc,
+                                    docker_images)
+
+    def outdated_benchmarks(self):
+        """ Environments that have no stored performance or whose stored
+        performance was measured with a different fingerprint
+        :return set: environment ids
+        """
+        if not self.benchmarks:
+            return set()
+        stored = dict(Performance.select(Performance.environment_id,
+                                         Performance.fingerprint).tuples())
+        return set(env_id for env_id in self.benchmarks
+                   if stored.get(env_id) != self.fingerprint(env_id))
+
     def benchmarks_needed(self):
-        if self.benchmarks:
-            query = Performance.select(Performance.environment_id)
-            data = set(benchmark.environment_id for benchmark in query)
-            return not set(self.benchmarks.keys()).issubset(data)
-        return False
+        return bool(self.outdated_benchmarks())
 
     def run_benchmark(self, benchmark, task_builder, env_id, success=None,
                       error=None):
+        fingerprint = self.fingerprint(env_id)
 
         def success_callback(performance):
-            Performance.update_or_create(env_id, performance)
+            Performance.update_or_create(env_id, performance, fingerprint)
             if success:
                 success(performance)
 
@@ -56,17 +107,81 @@ class BenchmarkManager(object):
                              benchmark)
         br.run()
 
-    def run_all_benchmarks(self):
-        benchmarks_copy = copy(self.benchmarks)
-        self.run_benchmarks(benchmarks_copy)
-
-    def run_benchmarks(self, benchmarks):
-        # Next benchmark ran only if previous completed successfully
-        if not benchmarks:
+    def run_all_benchmarks(self, force=False):
+        """ Run benchmarks for all environments. Unless forced, environments
+        with a stored performance measured with the current fingerprint
+        are skipped.
+        :param bool force: run benchmarks even if stored results are valid
+        """
+        if not self.benchmarks:
             return
-        env_id, (benchmark, builder_class) = benchmarks.popitem()
-        self.run_benchmark(benchmark, builder_class, env_id,
-                           lambda _: self.run_benchmarks(benchmarks))
+        outdated = set(self.benchmarks) if force \
+            else self.outdated_benchmarks()
+
+        for env_id in self.benchmarks:
+            if env_id in outdated:
+                self._schedule(env_id)
+            else:
+                logger.info("Reusing stored %s benchmark result", env_id)
+
+    def _schedule(self, env_id, success=None, error=None):
+        benchmark, builder_class = self.benchmarks[env_id]
+        with self._lock:
+            self._pending.append(BenchmarkJob(env_id, benchmark,
+                                              builder_class, success, error))
+        self._run_pending()
+
+    def _run_pending(self):
+        """ Start queued benchmarks as long as their CPU costs fit in
+        the budget. A single benchmark is always allowed to run. """
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+                cost = self._cpu_cost(self._pending[0].benchmark)
+                if self._running and \
+                        self._cpu_used + cost > self.cpu_budget:
+                    return
+                job = self._pending.popleft()
+                self._cpu_used += cost
+                self._running += 1
+            self._start(job, cost)
+
+    def _start(self, job, cost):
+        finished = []
+
+        def release():
+            with self._lock:
+                if finished:
+                    return False
+                finished.append(True)
+                self._cpu_used -= cost
+                self._running -= 1
+            return True
+
+        def success(performance):
+            if release():
+                self._run_pending()
+            if job.success:
+                job.success(performance)
+
+        def error(err):
+            if release():
+                self._run_pending()
+            if job.error:
+                job.error(err)
+
+        try:
+            self.run_benchmark(job.benchmark, job.builder_class, job.env_id,
+                               success, error)
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.error("Unable to start %s benchmark: %r", job.env_id, exc)
+            error(exc)
+
+    def _cpu_cost(self, benchmark):
+        if benchmark.cpu_cost is None:
+            return self.cpu_budget
+        return min(benchmark.cpu_cost, self.cpu_budget)
 
     def _validate_task_state(self, task_state):
         td = task_state.definition
@@ -77,9 +192,7 @@ class BenchmarkManager(object):
         return True
 
     def run_benchmark_for_env_id(self, env_id, callback, errback):
-        benchmark_data = self.benchmarks.get(env_id)
-        if benchmark_data:
-            self.run_benchmark(benchmark_data[0], benchmark_data[1],
-                               env_id, callback, errback)
+        if env_id in (self.benchmarks or {}):
+            self._schedule(env_id, callback, errback)
         else:
             raise Exception("Unkown environment: {}".format(env_id))
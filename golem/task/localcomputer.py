@@ -11,8 +11,7 @@ from golem.core.common import to_unicode
 from golem.docker.image import DockerImage
 from golem.docker.task_thread import DockerTaskThread
 from golem.resource.dirmanager import DirManager
-from golem.resource.resource import (TaskResourceHeader, decompress_dir,
-                                     get_resources_for_task, ResourceType)
+from golem.resource.staging import stage_resources
 
 logger = logging.getLogger("golem.task")
 
@@ -59,7 +58,7 @@ class LocalComputer:
         try:
             self.start_time = time.time()
             self.__prepare_tmp_dir()
-            self.__prepare_resources(self.resources)  # makes a copy
+            self.__prepare_resources(self.resources)  # links the files
 
             if not self.compute_task_def:
                 ctd = self.get_compute_task_def()
@@ -118,26 +117,10 @@ class LocalComputer:
             logger.error("Cannot measure execution time")
 
     def __prepare_resources(self, resources):
-
+        # A tree staged by a previous run is updated in place
         self.test_task_res_path = self.dir_manager.get_task_test_dir("")
-        if not os.path.exists(self.test_task_res_path):
-            os.makedirs(self.test_task_res_path)
-        else:
-            shutil.rmtree(self.test_task_res_path, True)
-            os.makedirs(self.test_task_res_path)
-
-        if resources:
-            rh = TaskResourceHeader(self.test_task_res_path)
-            res_file = get_resources_for_task(resource_header=rh,
-                                              resource_type=ResourceType.ZIP,
-                                              tmp_dir=self.tmp_dir,
-                                              resources=resources)
-
-            if res_file:
-                decompress_dir(self.test_task_res_path, res_file)
-        for res in self.additional_resources:
-            shutil.copy(res, self.test_task_res_path)
-
+        stage_resources(self.test_task_res_path, resources,
+                        self.additional_resources)
         return True
 
     def __prepare_tmp_dir(self):
@@ -114,6 +114,10 @@ class ZipPackager(Packager):
     ZIP_MODE = zipfile.ZIP_STORED  # no compression
 
     def extract(self, input_path, output_dir=None, **kwargs):
+        """ Unpack an archive
+        :param input_path: archive path or a seekable binary file object
+        :param output_dir: required if input_path is a file object
+        """
 
         if not output_dir:
             output_dir = os.path.dirname(input_path)
@@ -168,14 +172,17 @@ class EncryptingPackager(Packager):
         return output_path, pkg_sha1
 
     def extract(self, input_path, output_dir=None, **kwargs):
-        tmp_file_path = self.package_name(input_path)
-        backup_rename(tmp_file_path)
+        if not output_dir:
+            output_dir = os.path.dirname(input_path)
 
-        self.encryptor_class.decrypt(input_path, tmp_file_path,
-                                     secret=self._secret)
+        # Files are unpacked straight from the encrypted package, which is
+        # decrypted while being read. The decrypted archive is not written.
+        with self.encryptor_class.open_decrypted(input_path,
+                                                 secret=self._secret) as src:
+            extracted = self._packager.extract(src, output_dir=output_dir)
         os.remove(input_path)
 
-        return self._packager.extract(tmp_file_path, output_dir=output_dir)
+        return extracted
 
     def generator(self, output_path):
         return self._packager.generator(output_path)
@@ -5,19 +5,33 @@ import os
 from collections import Counter
 from golem.core.common import get_timestamp_utc, timestamp_to_datetime
 from golem.environments.environment import UnsupportReason
-from golem.core.async import AsyncRequest, async_run
 from golem.appconfig import TASKARCHIVE_FILENAME, TASKARCHIVE_NUM_INTERVALS, \
     TASKARCHIVE_MAX_TASKS
+from golem.model import db, ArchivedTask, ArchivedTaskReason, ArchiveDay, \
+    ArchiveDayCount
 from datetime import datetime, timedelta
+from peewee import fn
 import pytz
 
 log = logging.getLogger('golem.task.taskarchiver')
 
+# SQLite limits the number of host parameters in a single query
+BULK_CHUNK_SIZE = 100
+
+
+def _chunks(items, size=BULK_CHUNK_SIZE):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
 
 class TaskArchiver(object):
     """Utility that archives information on unsupported task reasons and
     other related task statistics. See get_unsupport_reasons() function.
-    :param datadir: Directory to save the archive to
+    Tasks are stored in the database until their deadline passes and are then
+    merged into per-day aggregates, so the size of the archive depends on
+    the number of current tasks and archived days only.
+    :param datadir: Directory to migrate a pickled archive from
     :param max_tasks: Maximum number of non-expired tasks stored in task
                       archive at any moment
     """
@@ -26,22 +40,9 @@ class TaskArchiver(object):
         self._input_tasks = []
         self._input_statuses = []
         self._archive_lock = threading.Lock()
-        self._file_lock = threading.Lock()
-        self._archive = Archive()
-        self._dump_file = None
         self._max_tasks = max_tasks
         if datadir:
-            try:
-                self._dump_file = os.path.join(datadir, TASKARCHIVE_FILENAME)
-                with open(self._dump_file, 'rb') as f:
-                    archive = pickle.load(f)
-                if archive.class_version == Archive.CLASS_VERSION:
-                    self._archive = archive
-                else:
-                    log.info("Task archive not loaded: unsupported version: "
-                             "%s", archive.class_version)
-            except (EOFError, IOError, pickle.UnpicklingError) as e:
-                log.info("Task archive not loaded: %s", str(e))
+            self._migrate_dump(os.path.join(datadir, TASKARCHIVE_FILENAME))
 
     def add_task(self, task_header):
         """Schedule a task to be archived.
@@ -60,57 +61,208 @@ class TaskArchiver(object):
         """Updates information on unsupported task reasons and
         other related task statistics by consuming tasks and support statuses
         scheduled for processing by add_task() and add_support_status()
-        functions. Optimizes internal structures and, if needed, writes the
-        entire structure to a file.
+        functions. Tasks past their deadline are merged into per-day
+        aggregates, which are updated in place.
         """
         input_tasks, self._input_tasks = self._input_tasks, []
         input_statuses, self._input_statuses = self._input_statuses, []
-        with self._archive_lock:
-            ntasks_to_take = self._max_tasks - len(self._archive.tasks)
+        with self._archive_lock, db.atomic():
+            ntasks_to_take = self._max_tasks - ArchivedTask.select().count()
             if ntasks_to_take < len(input_tasks):
                 log.warning("Maximum number of current tasks exceeded.")
-            input_tasks = input_tasks[:ntasks_to_take]
-            for tsk in input_tasks:
-                self._archive.tasks[tsk.uuid] = tsk
-            for (uuid, status) in input_statuses:
-                if uuid in self._archive.tasks:
-                    if UnsupportReason.REQUESTOR_TRUST in status.desc:
-                        self._archive.tasks[uuid].requesting_trust = \
-                            status.desc[UnsupportReason.REQUESTOR_TRUST]
-                    self._archive.tasks[uuid].unsupport_reasons = \
-                        list(status.desc.keys())
-            cur_time = get_timestamp_utc()
-            for tsk in list(self._archive.tasks.values()):
-                if cur_time > tsk.deadline:
-                    self._merge_to_interval(tsk)
-                    del self._archive.tasks[tsk.uuid]
+            self._store_tasks(input_tasks[:max(ntasks_to_take, 0)])
+            self._store_statuses(input_statuses)
+            self._merge_expired_tasks(get_timestamp_utc())
             self._purge_old_intervals()
-            if self._dump_file:
-                request = AsyncRequest(self._dump_archive)
-                async_run(request, None,
-                          lambda e: log.info("Dumping archive failed: %s", e))
 
-    def _dump_archive(self):
-        with self._archive_lock:
-            data = pickle.dumps(self._archive)
-        with self._file_lock:
-            with open(self._dump_file, 'wb') as f:
-                f.write(data)
-
-    def _merge_to_interval(self, tsk):
-        day = tsk.interval_start_date
-        if day not in self._archive.intervals:
-            self._archive.intervals[day] = TimeInterval(day)
-        interval = self._archive.intervals[day]
-        interval.merge_task(tsk)
-
-    def _purge_old_intervals(self):
+    @staticmethod
+    def _store_tasks(tasks):
+        # Latest header of a task replaces the stored one, together with
+        # the support status
+        tasks = list({tsk.uuid: tsk for tsk in tasks}.values())
+        for chunk in _chunks(tsk.uuid for tsk in tasks):
+            ArchivedTask.delete().where(
+                ArchivedTask.task_id << chunk).execute()
+            ArchivedTaskReason.delete().where(
+                ArchivedTaskReason.task_id << chunk).execute()
+        for chunk in _chunks(tasks):
+            ArchivedTask.insert_many([{
+                'task_id': tsk.uuid,
+                'day': tsk.interval_start_date.date(),
+                'deadline': tsk.deadline,
+                'min_version': tsk.min_version,
+                'max_price': tsk.max_price,
+                'requesting_trust': None,
+            } for tsk in chunk]).execute()
+
+    @classmethod
+    def _store_statuses(cls, statuses):
+        trusts = {}
+        reasons = {}
+        for (uuid, status) in statuses:
+            if UnsupportReason.REQUESTOR_TRUST in status.desc:
+                trusts[uuid] = status.desc[UnsupportReason.REQUESTOR_TRUST]
+            reasons[uuid] = list(status.desc.keys())
+        cls._write_statuses(trusts, reasons)
+
+    @staticmethod
+    def _write_statuses(trusts, reasons):
+        """ Store requesting trusts and unsupport reasons of current tasks
+        :param dict trusts: {task_id: requesting trust}
+        :param dict reasons: {task_id: list of UnsupportReason}
+        """
+        # Statuses of tasks that are not archived are dropped
+        days = {}
+        for chunk in _chunks(set(trusts) | set(reasons)):
+            query = ArchivedTask.select(ArchivedTask.task_id,
+                                        ArchivedTask.day) \
+                .where(ArchivedTask.task_id << chunk)
+            days.update(query.tuples())
+
+        for uuid, trust in trusts.items():
+            if uuid in days:
+                ArchivedTask.update(requesting_trust=trust) \
+                    .where(ArchivedTask.task_id == uuid).execute()
+        with_reasons = [uuid for uuid in reasons if uuid in days]
+        for chunk in _chunks(with_reasons):
+            ArchivedTaskReason.delete().where(
+                ArchivedTaskReason.task_id << chunk).execute()
+        rows = [{'task_id': uuid, 'reason': reason.value, 'day': days[uuid]}
+                for uuid in with_reasons for reason in reasons[uuid]]
+        for chunk in _chunks(rows):
+            ArchivedTaskReason.insert_many(chunk).execute()
+
+    @classmethod
+    def _merge_expired_tasks(cls, cur_time):
+        expired = ArchivedTask.deadline < cur_time
+        expired_ids = ArchivedTask.select(ArchivedTask.task_id).where(expired)
+
+        days = ArchivedTask.select(
+            ArchivedTask.day,
+            fn.COUNT(ArchivedTask.task_id),
+            fn.SUM(ArchivedTask.max_price)) \
+            .where(expired).group_by(ArchivedTask.day).tuples()
+        for day, num_tasks, sum_max_price in list(days):
+            cls._add_to_day(day, num_tasks=num_tasks,
+                            sum_max_price=sum_max_price)
+
+        trusts = ArchivedTask.select(
+            ArchivedTask.day,
+            fn.COUNT(ArchivedTask.task_id),
+            fn.SUM(ArchivedTask.requesting_trust)) \
+            .where(expired & cls._has_requesting_trust()) \
+            .group_by(ArchivedTask.day).tuples()
+        for day, num_trust, sum_trust in list(trusts):
+            cls._add_to_day(day, num_requesting_trust=num_trust,
+                            sum_requesting_trust=sum_trust)
+
+        versions = ArchivedTask.select(
+            ArchivedTask.day,
+            ArchivedTask.min_version,
+            fn.COUNT(ArchivedTask.task_id)) \
+            .where(expired) \
+            .group_by(ArchivedTask.day, ArchivedTask.min_version).tuples()
+        for day, min_version, count in list(versions):
+            cls._add_to_count(ArchiveDayCount.MIN_VERSION, day, min_version,
+                              count)
+
+        reasons = ArchivedTaskReason.select(
+            ArchivedTaskReason.day,
+            ArchivedTaskReason.reason,
+            fn.COUNT(ArchivedTaskReason.task_id)) \
+            .where(ArchivedTaskReason.task_id << expired_ids) \
+            .group_by(ArchivedTaskReason.day, ArchivedTaskReason.reason) \
+            .tuples()
+        for day, reason, count in list(reasons):
+            cls._add_to_count(ArchiveDayCount.REASON, day, reason, count)
+
+        ArchivedTaskReason.delete() \
+            .where(ArchivedTaskReason.task_id << expired_ids).execute()
+        ArchivedTask.delete().where(expired).execute()
+
+    @staticmethod
+    def _add_to_day(day, **values):
+        updated = ArchiveDay.update(**{
+            name: getattr(ArchiveDay, name) + value
+            for name, value in values.items()
+        }).where(ArchiveDay.day == day).execute()
+        if not updated:
+            ArchiveDay.create(day=day, **values)
+
+    @staticmethod
+    def _add_to_count(kind, day, value, count):
+        updated = ArchiveDayCount.update(
+            count=ArchiveDayCount.count + count
+        ).where((ArchiveDayCount.kind == kind) &
+                (ArchiveDayCount.day == day) &
+                (ArchiveDayCount.value == value)).execute()
+        if not updated:
+            ArchiveDayCount.create(kind=kind, day=day, value=value,
+                                   count=count)
+
+    @staticmethod
+    def _has_requesting_trust():
+        return ArchivedTask.requesting_trust.is_null(False) & \
+            (ArchivedTask.requesting_trust != 0)
+
+    @staticmethod
+    def _purge_old_intervals():
         today = datetime.now(pytz.utc) \
             .replace(hour=0, minute=0, second=0, microsecond=0)
-        old = today - timedelta(days=TASKARCHIVE_NUM_INTERVALS)
-        for interval in list(self._archive.intervals.values()):
-            if interval.start_date <= old:
-                del self._archive.intervals[interval.start_date]
+        old = (today - timedelta(days=TASKARCHIVE_NUM_INTERVALS)).date()
+        ArchiveDay.delete().where(ArchiveDay.day <= old).execute()
+        ArchiveDayCount.delete().where(ArchiveDayCount.day <= old).execute()
+
+    def _migrate_dump(self, dump_file):
+        """ Import an archive pickled by previous versions and remove the
+        file afterwards """
+        if not os.path.exists(dump_file):
+            return
+        try:
+            with open(dump_file, 'rb') as f:
+                archive = pickle.load(f)
+        except (EOFError, IOError, pickle.UnpicklingError, AttributeError,
+                ImportError) as e:
+            log.info("Task archive not migrated: %s", str(e))
+            return
+
+        if getattr(archive, 'class_version', None) != Archive.CLASS_VERSION:
+            log.info("Task archive not migrated: unsupported version: %s",
+                     getattr(archive, 'class_version', None))
+        else:
+            log.info("Migrating task archive: %d tasks, %d intervals",
+                     len(archive.tasks), len(archive.intervals))
+            tasks = archive.tasks.values()
+            with self._archive_lock, db.atomic():
+                self._store_tasks(tasks)
+                self._write_statuses(
+                    {tsk.uuid: tsk.requesting_trust for tsk in tasks
+                     if tsk.requesting_trust is not None},
+                    {tsk.uuid: tsk.unsupport_reasons for tsk in tasks
+                     if tsk.unsupport_reasons is not None})
+                for interval in archive.intervals.values():
+                    self._import_interval(interval)
+                self._purge_old_intervals()
+
+        try:
+            os.remove(dump_file)
+        except OSError as e:
+            log.warning("Cannot remove task archive %r: %s", dump_file, e)
+
+    @classmethod
+    def _import_interval(cls, interval):
+        day = interval.start_date.date()
+        cls._add_to_day(day,
+                        num_tasks=interval.num_tasks,
+                        sum_max_price=interval.sum_max_price,
+                        sum_requesting_trust=interval.sum_requesting_trust,
+                        num_requesting_trust=interval.num_requesting_trust)
+        for min_version, count in interval.cnt_min_version.items():
+            cls._add_to_count(ArchiveDayCount.MIN_VERSION, day, min_version,
+                              count)
+        for reason, count in interval.cnt_unsupport_reasons.items():
+            cls._add_to_count(ArchiveDayCount.REASON, day, reason.value,
+                              count)
 
     def get_unsupport_reasons(self, last_n_days, today=None):
         """
@@ -137,14 +289,8 @@ class TaskArchiver(object):
             today = datetime.now(pytz.utc)
         today = today.replace(hour=0, minute=0, second=0, microsecond=0)
         start_date = today - timedelta(days=last_n_days-1)
-        result = TimeInterval(start_date)
-        result.cnt_unsupport_reasons = Counter({r: 0 for r in UnsupportReason})
-        for interval in self._archive.intervals.values():
-            if interval.start_date >= start_date:
-                result.merge_interval(interval)
-        for tsk in self._archive.tasks.values():
-            if tsk.interval_start_date >= start_date:
-                result.merge_task(tsk)
+        with self._archive_lock:
+            result = self._aggregate(start_date)
         ret = []
         for (reason, count) in result.cnt_unsupport_reasons.most_common():
             if reason == UnsupportReason.MAX_PRICE and result.num_tasks:
@@ -160,6 +306,69 @@ class TaskArchiver(object):
             ret.append({'reason': reason.value, 'ntasks': count, 'avg': avg})
         return ret
 
+    @classmethod
+    def _aggregate(cls, start_date):
+        """ Sum up archived days and current tasks since start_date
+        :return TimeInterval:
+        """
+        day = start_date.date()
+        result = TimeInterval(start_date)
+        result.cnt_unsupport_reasons = Counter({r: 0 for r in UnsupportReason})
+
+        days = ArchiveDay.select(
+            fn.SUM(ArchiveDay.num_tasks),
+            fn.SUM(ArchiveDay.sum_max_price),
+            fn.SUM(ArchiveDay.num_requesting_trust),
+            fn.SUM(ArchiveDay.sum_requesting_trust)) \
+            .where(ArchiveDay.day >= day).tuples()
+        tasks = ArchivedTask.select(
+            fn.COUNT(ArchivedTask.task_id),
+            fn.SUM(ArchivedTask.max_price)) \
+            .where(ArchivedTask.day >= day).tuples()
+        trusts = ArchivedTask.select(
+            fn.COUNT(ArchivedTask.task_id),
+            fn.SUM(ArchivedTask.requesting_trust)) \
+            .where((ArchivedTask.day >= day) &
+                   cls._has_requesting_trust()).tuples()
+
+        num_tasks, sum_max_price, num_trust, sum_trust = days.get()
+        current_tasks, current_max_price = tasks.get()
+        current_trust_num, current_trust_sum = trusts.get()
+        result.num_tasks = (num_tasks or 0) + current_tasks
+        result.sum_max_price = (sum_max_price or 0) + (current_max_price or 0)
+        result.num_requesting_trust = (num_trust or 0) + current_trust_num
+        result.sum_requesting_trust = \
+            (sum_trust or 0.0) + (current_trust_sum or 0.0)
+
+        counts = ArchiveDayCount.select(
+            ArchiveDayCount.kind,
+            ArchiveDayCount.value,
+            fn.SUM(ArchiveDayCount.count)) \
+            .where(ArchiveDayCount.day >= day) \
+            .group_by(ArchiveDayCount.kind, ArchiveDayCount.value).tuples()
+        for kind, value, count in counts:
+            if kind == ArchiveDayCount.REASON:
+                result.cnt_unsupport_reasons[UnsupportReason(value)] += count
+            else:
+                result.cnt_min_version[value] += count
+
+        versions = ArchivedTask.select(
+            ArchivedTask.min_version,
+            fn.COUNT(ArchivedTask.task_id)) \
+            .where(ArchivedTask.day >= day) \
+            .group_by(ArchivedTask.min_version).tuples()
+        for min_version, count in versions:
+            result.cnt_min_version[min_version] += count
+
+        reasons = ArchivedTaskReason.select(
+            ArchivedTaskReason.reason,
+            fn.COUNT(ArchivedTaskReason.task_id)) \
+            .where(ArchivedTaskReason.day >= day) \
+            .group_by(ArchivedTaskReason.reason).tuples()
+        for reason, count in reasons:
+            result.cnt_unsupport_reasons[UnsupportReason(reason)] += count
+        return result
+
 
 class Archive(object):
     CLASS_VERSION = 1
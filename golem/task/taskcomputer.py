@@ -74,11 +74,14 @@ class TaskComputer(object):
         self.docker_manager = DockerManager.install()
         if use_docker_manager:
             self.docker_manager.check_environment()
+            self.docker_manager.enable_container_pool(
+                os.path.join(task_server.client.datadir, "ContainerPool"))
 
         self.use_docker_manager = use_docker_manager
         run_benchmarks = self.task_server.benchmark_manager.benchmarks_needed()
         self.change_config(task_server.config_desc, in_background=False,
-                           run_benchmarks=run_benchmarks)
+                           run_benchmarks=run_benchmarks,
+                           reuse_benchmarks=True)
         self.stats = IntStatsKeeper(CompStats)
 
         self.assigned_subtasks = {}
@@ -255,25 +258,37 @@ class TaskComputer(object):
 
         return ret
 
-    def change_config(self, config_desc, in_background=True, run_benchmarks=False):
+    def change_config(self, config_desc, in_background=True,
+                      run_benchmarks=False, reuse_benchmarks=False):
+        """
+        :param bool run_benchmarks: run benchmarks after the docker
+        configuration is updated
+        :param bool reuse_benchmarks: skip benchmarks with stored results
+        measured with the current fingerprint
+        """
         self.dir_manager = DirManager(self.task_server.get_task_computer_root())
         self.resource_manager = ResourcesManager(self.dir_manager, self)
         self.task_request_frequency = config_desc.task_request_interval
         self.waiting_for_task_session_timeout = config_desc.waiting_for_task_session_timeout
         self.compute_tasks = config_desc.accept_tasks
-        self.change_docker_config(config_desc, run_benchmarks, in_background)
+        self.change_docker_config(config_desc, run_benchmarks, in_background,
+                                  reuse_benchmarks)
 
     def config_changed(self):
         for l in self.listeners:
             l.config_changed()
 
     def change_docker_config(self, config_desc, run_benchmarks,
-                             in_background=True):
+                             in_background=True, reuse_benchmarks=False):
         dm = self.docker_manager
+        benchmark_manager = self.task_server.benchmark_manager
         dm.build_config(config_desc)
 
+        if not dm.docker_machine and self.use_docker_manager:
+            dm.prestage_containers()
+
         if not dm.docker_machine and run_benchmarks:
-            self.task_server.benchmark_manager.run_all_benchmarks()
+            benchmark_manager.run_all_benchmarks(force=not reuse_benchmarks)
             return
 
         if dm.docker_machine and self.use_docker_manager:  # noqa pylint: disable=no-member
@@ -284,8 +299,10 @@ class TaskComputer(object):
                 return self.counting_task
 
             def done_callback():
+                dm.prestage_containers()
                 if run_benchmarks:
-                    self.task_server.benchmark_manager.run_all_benchmarks()
+                    benchmark_manager.run_all_benchmarks(
+                        force=not reuse_benchmarks)
                 logger.debug("Resuming new task computation")
                 self.lock_config(False)
                 self.runnable = True
@@ -397,6 +414,8 @@ class TaskComputer(object):
     def quit(self):
         if self.counting_thread is not None:
             self.counting_thread.end_comp()
+        if self.docker_manager.container_pool:
+            self.docker_manager.container_pool.drain()
 
 
 class AssignedSubTask(object):
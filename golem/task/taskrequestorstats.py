@@ -18,7 +18,30 @@ TaskMsg = NamedTuple("TaskMsg", [("ts", float), ("op", Operation)])
 class SubtaskInfo:  # pylint: disable=too-few-public-methods
     def __init__(self):
         self.latest_status = SubtaskStatus.starting
-        self.messages = []
+        # RESULT_DOWNLOADING not followed by FINISHED nor NOT_ACCEPTED
+        self.download_in_progress = False
+        # ASSIGNED not followed by TIMEOUT, FINISHED, FAILED nor NOT_ACCEPTED
+        self.assigned = False
+
+    def is_verified(self) -> bool:
+        return self.latest_status == SubtaskStatus.finished
+
+    def is_in_progress(self) -> bool:
+        return self.assigned and self.latest_status not in [
+            SubtaskStatus.finished, SubtaskStatus.failure]
+
+    def got_message(self, msg: TaskMsg, latest_status: SubtaskStatus):
+        self.latest_status = latest_status
+        if msg.op == SubtaskOp.RESULT_DOWNLOADING:
+            self.download_in_progress = True
+        elif msg.op in [SubtaskOp.FINISHED, SubtaskOp.NOT_ACCEPTED]:
+            self.download_in_progress = False
+
+        if msg.op == SubtaskOp.ASSIGNED:
+            self.assigned = True
+        elif msg.op in [SubtaskOp.TIMEOUT, SubtaskOp.FINISHED,
+                        SubtaskOp.FAILED, SubtaskOp.NOT_ACCEPTED]:
+            self.assigned = False
 
 
 class TaskInfo:
@@ -28,14 +51,31 @@ class TaskInfo:
     processes those information to get statistical information. It is probably
     only useful for :py:class:`RequestorTaskStats` objects which fill instances
     of this class with information.
+
+    Counters are updated as messages arrive, so querying them does not
+    depend on the number of subtasks or messages.
     """
 
+    START_OPS = [TaskOp.CREATED, TaskOp.RESTORED]
+    FINISH_OPS = [TaskOp.FINISHED, TaskOp.NOT_ACCEPTED, TaskOp.ABORTED,
+                  TaskOp.TIMEOUT]
+    TASK_FAILURE_OPS = [TaskOp.NOT_ACCEPTED, TaskOp.TIMEOUT]
+    SUBTASK_FAILURE_OPS = [SubtaskOp.FAILED, SubtaskOp.NOT_ACCEPTED,
+                           SubtaskOp.TIMEOUT]
+
     def __init__(self):
         self.latest_status = TaskStatus.notStarted  # type: TaskStatus
         self._want_to_compute_count = 0
-        self.messages = []  # type: List[TaskMsg]
         self.subtasks = defaultdict(
             SubtaskInfo)  # type: DefaultDict[str, SubtaskInfo]
+        self._start_time = 0.0
+        self._finish_time = 0.0
+        self._had_failures = False
+        # number of messages of each subtask operation
+        self._op_counts = defaultdict(int)  # type: DefaultDict[Operation, int]
+        self._verified_count = 0
+        self._not_downloaded_count = 0
+        self._in_progress_count = 0
 
     def got_want_to_compute(self):
         """Makes note of a received work offer"""
@@ -43,14 +83,30 @@ class TaskInfo:
 
     def got_task_message(self, msg: TaskMsg, latest_status: TaskStatus):
         """Stores information from task level message"""
-        self.messages.append(msg)
         self.latest_status = latest_status
+        if msg.op in self.START_OPS:
+            self._start_time = msg.ts
+        elif msg.op in self.FINISH_OPS:
+            self._finish_time = msg.ts
+        if msg.op in self.TASK_FAILURE_OPS:
+            self._had_failures = True
 
     def got_subtask_message(self, subtask_id: str, msg: TaskMsg,
                             latest_status: SubtaskStatus):
         """Stores information from subtask level message"""
-        self.subtasks[subtask_id].latest_status = latest_status
-        self.subtasks[subtask_id].messages.append(msg)
+        st = self.subtasks[subtask_id]
+        self._verified_count -= st.is_verified()
+        self._not_downloaded_count -= st.download_in_progress
+        self._in_progress_count -= st.is_in_progress()
+
+        st.got_message(msg, latest_status)
+
+        self._verified_count += st.is_verified()
+        self._not_downloaded_count += st.download_in_progress
+        self._in_progress_count += st.is_in_progress()
+        self._op_counts[msg.op] += 1
+        if msg.op in self.SUBTASK_FAILURE_OPS:
+            self._had_failures = True
 
     def subtask_count(self) -> int:
         """Number of subtasks of this task"""
@@ -72,34 +128,19 @@ class TaskInfo:
         This is equal to the number of subtasks with the latest state
         ``SubtaskStatus.finished``.
         """
-        cnt = 0
-        for st in self.subtasks.values():
-            if st.latest_status == SubtaskStatus.finished:
-                cnt += 1
-        return cnt
-
-    def _subtasks_count_specific_ops(self, op: Operation):
-        cnt = 0
-        for st in self.subtasks.values():
-            for msg in st.messages:
-                if msg.op == op:
-                    cnt += 1
-        return cnt
+        return self._verified_count
 
     def not_accepted_results_count(self) -> int:
         """Number of times a subtask failed verification"""
-        return self._subtasks_count_specific_ops(
-            SubtaskOp.NOT_ACCEPTED)
+        return self._op_counts[SubtaskOp.NOT_ACCEPTED]
 
     def timeout_count(self) -> int:
         """Number of times a subtask has not beed finished in time"""
-        return self._subtasks_count_specific_ops(
-            SubtaskOp.TIMEOUT)
+        return self._op_counts[SubtaskOp.TIMEOUT]
 
     def failed_count(self) -> int:
         """Number of subtasks that failed on computing side"""
-        return self._subtasks_count_specific_ops(
-            SubtaskOp.FAILED)
+        return self._op_counts[SubtaskOp.FAILED]
 
     def not_downloaded_count(self) -> int:
         """Returns # of subtasks that were reported as computed but their
@@ -113,46 +154,25 @@ class TaskInfo:
         also include subtasks that are actively sending results at the moment
         of a call.
         """
-        cnt = 0
-        for st in self.subtasks.values():
-            download_in_progress = False
-            for msg in st.messages:
-                if msg.op == SubtaskOp.RESULT_DOWNLOADING:
-                    download_in_progress = True
-                elif msg.op in [SubtaskOp.FINISHED,
-                                SubtaskOp.NOT_ACCEPTED]:
-                    download_in_progress = False
-            if download_in_progress:
-                cnt += 1
-        return cnt
+        return self._not_downloaded_count
 
     def total_time(self) -> float:
         """Returns total time in seconds spent on the task
 
-        It is calculated as a wall time between ``TASK_CREATED`` or
-        ``TASK_RESTORED`` and one of ``TASK_FINISHED``, ``TASK_NOT_ACCEPTED``,
-        ``TASK_ABORTED`` and ``TASK_TIMEOUT`` messages. If the
-        task is in progress then current time is taken instead of the
-        latter. Note that the time spent paused is also included in
-        the total time.
+        It is calculated as a wall time between the latest ``TASK_CREATED``
+        or ``TASK_RESTORED`` and the latest of ``TASK_FINISHED``,
+        ``TASK_NOT_ACCEPTED``, ``TASK_ABORTED`` and ``TASK_TIMEOUT``
+        messages. If the task is in progress then current time is taken
+        instead of the latter. Note that the time spent paused is also
+        included in the total time.
         """
-        start_time = 0.0
-        finish_time = 0.0
-
-        if not self.is_completed():
+        if self.is_completed():
+            finish_time = self._finish_time
+        else:
             finish_time = time.time()
 
-        for msg in reversed(self.messages):
-            if (msg.op in [TaskOp.CREATED, TaskOp.RESTORED]
-                    and not start_time):
-                start_time = msg.ts
-            elif (msg.op in [TaskOp.FINISHED, TaskOp.NOT_ACCEPTED,
-                             TaskOp.ABORTED, TaskOp.TIMEOUT]
-                  and not finish_time):
-                finish_time = msg.ts
-
-        assert finish_time >= start_time
-        return finish_time - start_time
+        assert finish_time >= self._start_time
+        return finish_time - self._start_time
 
     def had_failures_or_timeouts(self) -> bool:
         """Were there any failures or timeouts during computation
@@ -160,17 +180,7 @@ class TaskInfo:
         Both failure to calculate (SUBTASK_FAILED) and failure to verify
         (SUBTASK_NOT_ACCEPTED) are considered failures in this method.
         """
-        for msg in self.messages:
-            if msg.op in [TaskOp.NOT_ACCEPTED,
-                          TaskOp.TIMEOUT]:
-                return True
-        for st in self.subtasks.values():
-            for msg in st.messages:
-                if msg.op in [SubtaskOp.FAILED,
-                              SubtaskOp.NOT_ACCEPTED,
-                              SubtaskOp.TIMEOUT]:
-                    return True
-        return False
+        return self._had_failures
 
     def is_completed(self) -> bool:
         """Has the task already been completed
@@ -201,24 +211,7 @@ class TaskInfo:
         """
         if self.is_completed():
             return 0
-
-        cnt = 0
-        for st in self.subtasks.values():
-            if st.latest_status in [SubtaskStatus.finished,
-                                    SubtaskStatus.failure]:
-                continue
-            in_progress = False
-            for msg in st.messages:
-                if msg.op == SubtaskOp.ASSIGNED:
-                    in_progress = True
-                elif msg.op in [SubtaskOp.TIMEOUT,
-                                SubtaskOp.FINISHED,
-                                SubtaskOp.FAILED,
-                                SubtaskOp.NOT_ACCEPTED]:
-                    in_progress = False
-            if in_progress:
-                cnt += 1
-        return cnt
+        return self._in_progress_count
 
 
 TaskStats = NamedTuple("TaskStats", [("finished", bool),
@@ -17,6 +17,7 @@ from golem.network.transport.tcpnetwork import (
 from golem.network.transport.tcpserver import (
     PendingConnectionsServer, PenConnStatus)
 from golem.ranking.helper.trust import Trust
+from golem.resource.resourcehandshake import ResourceHandshakeResults
 from golem.task.acl import get_acl
 from golem.task.benchmarkmanager import BenchmarkManager
 from golem.task.taskbase import TaskHeader
@@ -92,6 +93,7 @@ class TaskServer(
         self.response_list = {}
         self.acl = get_acl(Path(client.datadir))
         self.resource_handshakes = {}
+        self.resource_handshake_results = ResourceHandshakeResults()
 
         network = TCPNetwork(
             ProtocolFactory(SafeProtocol, self, SessionFactory(TaskSession)),
@@ -1,9 +1,9 @@
 import functools
 import logging
 import os
-import pickle
 import time
 
+import golem_messages
 from golem_messages import message
 from golem_messages.helpers import maximum_download_time
 
@@ -157,7 +157,7 @@ class TaskSession(BasicSafeSession, ResourceHandshakeSessionMixin,
             node=self.key_id,
             msg_date=time.time(),
             msg_cls=msg.__class__.__name__,
-            msg_data=pickle.dumps(msg),
+            msg_data=golem_messages.dump(msg, None, None),
             local_role=local_role,
             remote_role=remote_role,
         )
@@ -420,16 +420,21 @@ class TaskSession(BasicSafeSession, ResourceHandshakeSessionMixin,
         if self.task_server.should_accept_provider(self.key_id):
 
             if self._handshake_required(self.key_id):
-                logger.warning('Cannot yet assign task for %r: resource '
-                               'handshake is required', self.key_id)
+                logger.info('Cannot yet assign task for %r: resource '
+                            'handshake is required', self.key_id)
+                self._queue_until_handshake(
+                    self._react_to_want_to_compute_task, msg)
                 self._start_handshake(self.key_id)
                 return
 
             elif self._handshake_in_progress(self.key_id):
-                logger.warning('Cannot yet assign task for %r: resource '
-                               'handshake is in progress', self.key_id)
+                logger.info('Cannot yet assign task for %r: resource '
+                            'handshake is in progress', self.key_id)
+                self._queue_until_handshake(
+                    self._react_to_want_to_compute_task, msg)
                 return
 
+            self._count_exchange(self.key_id)
             ctd, wrong_task, wait = self.task_manager.get_next_subtask(
                 self.key_id, msg.node_name, msg.task_id, msg.perf_index,
                 msg.price, msg.max_resource_size, msg.max_memory_size,
@@ -14,6 +14,7 @@ from golem.core.common import get_golem_path, is_windows, is_osx
 from golem.core.simpleenv import get_local_datadir
 from golem.database import Database
 from golem.model import DB_MODELS, db, DB_FIELDS
+from golem.ranking.manager import database_manager
 
 
 class TempDirFixture(unittest.TestCase):
@@ -115,6 +116,8 @@ class DatabaseFixture(TempDirFixture):
         super(DatabaseFixture, self).setUp()
         self.database = Database(db, fields=DB_FIELDS, models=DB_MODELS,
                                  db_dir=self.tempdir)
+        # Unflushed trust deltas would leak between test databases
+        database_manager.ledger.clear()
 
     def tearDown(self):
         self.database.db.close()
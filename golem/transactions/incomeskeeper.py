@@ -8,7 +8,7 @@ from ethereum.utils import denoms
 from pydispatch import dispatcher
 
 from golem.core.variables import PAYMENT_DEADLINE
-from golem.model import Income
+from golem.model import db, Income
 from golem.utils import encode_hex, pubkeytoaddr
 
 logger = logging.getLogger("golem.transactions.incomeskeeper")
@@ -29,34 +29,48 @@ class IncomesKeeper:
         pass
 
     def received_batch_transfer(self, tx_hash, sender, amount, closure_time):
-        expected = Income.select().where(
+        conditions = (
+            Income.payer_address == sender,
             Income.accepted_ts > 0,
             Income.accepted_ts <= closure_time,
-            Income.transaction.is_null())
-        expected = \
-            [e for e in expected if pubkeytoaddr(e.sender_node) == sender]
-
-        expected_value = sum([e.value for e in expected])
-        if expected_value == 0:
-            # Probably already handled event
-            return
-
-        if expected_value != amount:
-            # Need to report this to Concent if expected is greater
-            # and probably move all these expected incomes to a different table
-            logger.warning(
-                'Batch transfer amount does not match, expected %r, got %r',
-                expected_value / denoms.ether,
-                amount / denoms.ether)
-
-        amount_left = amount
+            Income.transaction.is_null(),
+        )
 
-        for e in expected:
-            value = min(amount_left, e.value)
-            amount_left -= value
-            e.transaction = tx_hash[2:]
-            e.value = value  # TODO don't change the value, wait for Concent
-            e.save()
+        with db.atomic():
+            expected = list(
+                Income.select(Income.sender_node, Income.subtask, Income.value)
+                .where(*conditions)
+                .order_by(Income.accepted_ts, Income.subtask)
+                .tuples())
+
+            expected_value = sum([value for _, _, value in expected])
+            if expected_value == 0:
+                # Probably already handled event
+                return
+
+            if expected_value != amount:
+                # Need to report this to Concent if expected is greater
+                # and probably move all these expected incomes to a different
+                # table
+                logger.warning(
+                    'Batch transfer amount does not match, expected %r, '
+                    'got %r',
+                    expected_value / denoms.ether,
+                    amount / denoms.ether)
+
+            Income.update(transaction=tx_hash[2:]).where(*conditions) \
+                .execute()
+
+            # Incomes not fully covered by the transfer get what is left
+            # TODO don't change the value, wait for Concent
+            amount_left = amount
+            for sender_node, subtask, value in expected:
+                paid = min(amount_left, value)
+                amount_left -= paid
+                if paid != value:
+                    Income.update(value=paid).where(
+                        Income.sender_node == sender_node,
+                        Income.subtask == subtask).execute()
 
         dispatcher.send(
             signal='golem.monitor',
@@ -74,6 +88,7 @@ class IncomesKeeper:
         )
         return Income.create(
             sender_node=sender_node_id,
+            payer_address=pubkeytoaddr(sender_node_id),
             subtask=subtask_id,
             value=value
         )
@@ -116,15 +131,19 @@ class IncomesKeeper:
         accepted_ts_deadline = int(time.time()) - PAYMENT_DEADLINE
         created_deadline = datetime.now() - timedelta(seconds=PAYMENT_DEADLINE)
 
-        incomes = list(Income.select().where(
+        conditions = (
             Income.overdue == False,   # noqa pylint: disable=singleton-comparison
             Income.transaction.is_null(True),
             (Income.accepted_ts < accepted_ts_deadline) | (
                 Income.accepted_ts.is_null(True) &
                 (Income.created_date < created_deadline)
             )
-        ))
+        )
+
+        with db.atomic():
+            incomes = list(Income.select().where(*conditions))
+            if incomes:
+                Income.update(overdue=True).where(*conditions).execute()
         for income in incomes:
             income.overdue = True
-            income.save()
         return incomes
@@ -587,6 +587,30 @@ class TestBlenderTask(TempDirFixture, LogTestCase):
         preview = BlenderTaskTypeInfo.get_preview(None, single=True)
         assert preview is None
 
+    def test_update_preview_throttled(self):
+        bt = self.build_bt(300, 200, 10)
+        canvas = bt.preview_updater.canvas
+        assert canvas is bt._get_preview_canvas(bt.preview_file_path)
+        canvas.flush_interval = 60
+        _, preview_y = canvas.size
+
+        for i in range(1, 11):
+            chunk = self.temp_file_name('chunk{}.png'.format(i))
+            Image.new("RGB", (300, 20), (0, 0, 255)).save(chunk)
+            bt._update_preview(chunk, i)
+            bt._update_task_preview()
+
+        # Only the first chunk has been written to disk so far
+        with Image.open(bt.preview_file_path) as img:
+            assert img.getpixel((0, 0)) == (0, 0, 255)
+            assert img.getpixel((0, preview_y - 1)) == (0, 0, 0)
+
+        preview = BlenderTaskTypeInfo.get_preview(bt, single=True)
+        assert preview == bt.preview_task_file_path
+        for path in (bt.preview_file_path, bt.preview_task_file_path):
+            with Image.open(path) as img:
+                assert img.getpixel((0, preview_y - 1)) == (0, 0, 255)
+
 
 class TestPreviewUpdater(TempDirFixture, LogTestCase):
     def test_update_preview(self):
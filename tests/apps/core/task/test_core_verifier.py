@@ -1,8 +1,12 @@
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from golem.diag.service import DiagnosticsOutputFormat
 from golem.testutils import TempDirFixture
 from golem.tools.assertlogs import LogTestCase
 from golem.verification.verifier import SubtaskVerificationState
 
-from apps.core.task.verifier import CoreVerifier
+from apps.core.task.verifier import CoreVerifier, VerificationQueue
 
 
 class TestCoreVerifierr(TempDirFixture, LogTestCase):
@@ -42,3 +46,134 @@ class TestCoreVerifierr(TempDirFixture, LogTestCase):
 
         cv._check_files(dict(), ["not a file"], [], [])
         assert cv.state == SubtaskVerificationState.WRONG_ANSWER
+
+
+class TestVerificationQueue(TestCase):
+
+    class Verifier:
+        """ Completes verification only when told to """
+        started = []
+
+        def __init__(self, callback):
+            self.callback = callback
+
+        def start_verification(self, subtask_info):
+            self.started.append((subtask_info['subtask_id'], self.callback))
+
+    def setUp(self):
+        self.Verifier.started = []
+
+    def _submit(self, queue, subtask_id, task_id, priority=(), cb=None):
+        queue.submit(self.Verifier, subtask_id, cb or Mock(),
+                     task_id=task_id, priority=priority,
+                     subtask_info={'subtask_id': subtask_id})
+
+    def _started(self):
+        return [subtask_id for subtask_id, _ in self.Verifier.started]
+
+    def _finish(self, subtask_id):
+        for started_id, callback in self.Verifier.started:
+            if started_id == subtask_id:
+                callback(subtask_id=subtask_id)
+
+    def test_concurrency(self):
+        queue = VerificationQueue(concurrency=2)
+        for i in range(3):
+            self._submit(queue, 's{}'.format(i), 'task')
+        assert self._started() == ['s0', 's1']
+        assert not queue.can_run
+
+        self._finish('s0')
+        assert self._started() == ['s0', 's1', 's2']
+
+    def test_default_concurrency(self):
+        assert VerificationQueue()._concurrency >= 1
+
+    def test_round_robin(self):
+        queue = VerificationQueue(concurrency=1)
+        self._submit(queue, 'a0', 'task_a')
+        for i in range(1, 4):
+            self._submit(queue, 'a{}'.format(i), 'task_a')
+        self._submit(queue, 'b0', 'task_b')
+        self._submit(queue, 'c0', 'task_c')
+
+        for subtask_id in ['a0', 'a1', 'b0', 'c0', 'a2', 'a3']:
+            assert self._started()[-1] == subtask_id
+            self._finish(subtask_id)
+        assert len(self._started()) == 6
+
+    def test_priority(self):
+        queue = VerificationQueue(concurrency=1)
+        self._submit(queue, 'x', 'task_x')
+        self._submit(queue, 'late', 'task_late', priority=(20, 1))
+        self._submit(queue, 'almost_done', 'task_a', priority=(10, 1))
+        self._submit(queue, 'early', 'task_b', priority=(10, 0))
+
+        for subtask_id in ['x', 'early', 'almost_done', 'late']:
+            assert self._started()[-1] == subtask_id
+            self._finish(subtask_id)
+
+    def test_callback(self):
+        queue = VerificationQueue(concurrency=1)
+        cb = Mock()
+        self._submit(queue, 's0', 'task', cb=cb)
+        self._finish('s0')
+        cb.assert_called_once_with(subtask_id='s0')
+
+    def test_start_failure(self):
+        queue = VerificationQueue(concurrency=1)
+        failing = Mock(side_effect=Exception('error'))
+        self._submit(queue, 's0', 'task')
+        queue.submit(failing, 'failing', Mock(), task_id='task')
+        self._submit(queue, 's1', 'task')
+
+        self._finish('s0')
+        assert self._started() == ['s0', 's1']
+        assert queue.get_stats('task')['finished'] == 2
+
+    @patch('apps.core.task.verifier.time.time')
+    def test_stats(self, time_mock):
+        queue = VerificationQueue(concurrency=1)
+        time_mock.return_value = 100.0
+        self._submit(queue, 's0', 'task')
+        self._submit(queue, 's1', 'task')
+        assert queue.get_stats('task') == {
+            'queued': 1,
+            'running': 1,
+            'finished': 0,
+            'mean_wait': 0.0,
+            'mean_latency': 0.0,
+            'max_latency': 0.0,
+        }
+
+        time_mock.return_value = 104.0
+        self._finish('s0')
+        stats = queue.get_stats('task')
+        assert stats['queued'] == 0
+        assert stats['running'] == 1
+        assert stats['finished'] == 1
+        assert stats['mean_wait'] == 2.0
+        assert stats['mean_latency'] == 4.0
+        assert stats['max_latency'] == 4.0
+        assert queue.get_all_stats() == {'task': stats}
+        assert queue.get_diagnostics(DiagnosticsOutputFormat.data) == \
+            {'task': stats}
+        assert queue.get_stats('unknown')['finished'] == 0
+
+        # Stats are dropped once nothing is queued nor running
+        time_mock.return_value = 106.0
+        self._finish('s1')
+        assert queue.get_all_stats() == {}
+        assert queue.get_stats('task')['finished'] == 0
+
+    def test_set_concurrency(self):
+        queue = VerificationQueue(concurrency=1)
+        for i in range(3):
+            self._submit(queue, 's{}'.format(i), 'task')
+        assert self._started() == ['s0']
+
+        queue.set_concurrency(3)
+        assert self._started() == ['s0', 's1', 's2']
+
+        queue.set_concurrency(0)
+        assert queue._concurrency >= 1
@@ -1,2 +1,58 @@
-#DOIT
-pass
+from unittest import TestCase
+from unittest.mock import patch
+
+from apps.dummy.resources.code_dir import computing
+
+INPUT_DATA = "AAAA" * 100
+DIFFICULTY = 0xfff00000
+
+
+class TestFindPow(TestCase):
+    def _check(self, solution, result_size):
+        assert len('%x' % solution) == result_size
+        assert computing.check_pow(solution, INPUT_DATA, DIFFICULTY)
+
+    def test_single_process(self):
+        for result_size in (5, 16, 256):
+            solution = computing.find_pow(INPUT_DATA, DIFFICULTY,
+                                          result_size, processes=1)
+            self._check(solution, result_size)
+
+    def test_multiple_processes(self):
+        solution = computing.find_pow(INPUT_DATA, DIFFICULTY, 256,
+                                      processes=3)
+        self._check(solution, 256)
+
+    def test_zero_difficulty(self):
+        solution = computing.find_pow(INPUT_DATA, 0, 5, processes=1)
+        assert len('%x' % solution) == 5
+
+    def test_strided_search_matches_check_pow(self):
+        # Every candidate skipped by the search must fail check_pow
+        solution = computing._find_pow_strided(INPUT_DATA, DIFFICULTY, 5,
+                                               start=0, step=1)
+        first = 1 << (5 * 4 - 1)
+        assert solution >= first
+        for candidate in range(first, solution):
+            assert not computing.check_pow(candidate, INPUT_DATA, DIFFICULTY)
+        assert computing.check_pow(solution, INPUT_DATA, DIFFICULTY)
+
+    def test_stop_event(self):
+        class Stopped:
+            @staticmethod
+            def is_set():
+                return True
+
+        assert computing._find_pow_strided(INPUT_DATA, DIFFICULTY, 16,
+                                           start=0, step=1,
+                                           stop_event=Stopped()) is None
+
+    @patch('apps.dummy.resources.code_dir.computing._find_pow_strided')
+    def test_default_processes(self, find_pow_strided):
+        with patch('apps.dummy.resources.code_dir.computing._available_cpus',
+                   return_value=1):
+            computing.find_pow(INPUT_DATA, DIFFICULTY, 16)
+        assert find_pow_strided.call_count == 1
+
+    def test_available_cpus(self):
+        assert computing._available_cpus() >= 1
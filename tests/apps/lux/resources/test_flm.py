@@ -0,0 +1,154 @@
+import gzip
+import os
+import struct
+from threading import Thread
+
+import numpy
+
+from apps.lux.resources.flm import (Flm, FlmError, FlmHeader, FlmMerger,
+                                    PIXEL_CHANNELS, parse_flm,
+                                    radiance_per_sample, read_flm,
+                                    serialize_flm, write_flm)
+from golem.testutils import TempDirFixture, PEP8MixIn
+
+
+def make_flm(x_res=4, y_res=3, num_groups=2, buffer_types=(0, 1), seed=0,
+             version=1):
+    """ Film with random pixel values """
+    rand = numpy.random.RandomState(seed)
+    header = FlmHeader(version, x_res, y_res, num_groups, buffer_types,
+                       ((0, 5, 0, struct.pack('<f', 2.2)),
+                        (1, 7, 0, b'film')))
+    shape = (num_groups, len(buffer_types), y_res, x_res, PIXEL_CHANNELS)
+    samples = rand.randint(1, 1000, num_groups).astype(numpy.float64)
+    pixels = rand.random_sample(shape).astype(numpy.float32) * 100
+    return Flm(header, samples, pixels)
+
+
+class TestFlm(TempDirFixture, PEP8MixIn):
+    PEP8_FILES = ['apps/lux/resources/flm.py']
+
+    def test_serialize_parse(self):
+        flm = make_flm()
+        parsed = parse_flm(serialize_flm(flm))
+        assert parsed.header == flm.header
+        assert numpy.array_equal(parsed.samples, flm.samples)
+        assert numpy.array_equal(parsed.pixels, flm.pixels)
+        assert parsed.trailer == b''
+
+    def test_write_read(self):
+        flm = make_flm()
+        flm.trailer = b'trailer'
+        path = os.path.join(self.tempdir, 'film.flm')
+        write_flm(flm, path)
+        with open(path, 'rb') as f:
+            assert f.read(2) == b'\x1f\x8b'
+
+        read = read_flm(path)
+        assert read.header == flm.header
+        assert numpy.array_equal(read.pixels, flm.pixels)
+        assert read.trailer == b'trailer'
+
+        # Uncompressed films are read as well
+        with open(path, 'wb') as f:
+            f.write(serialize_flm(flm))
+        assert numpy.array_equal(read_flm(path).pixels, flm.pixels)
+
+    def test_read_errors(self):
+        path = os.path.join(self.tempdir, 'film.flm')
+        data = serialize_flm(make_flm())
+        for content in [b'', b'not a film' * 10, data[:-1], data[:30],
+                        gzip.compress(data)[:-10]]:
+            with open(path, 'wb') as f:
+                f.write(content)
+            with self.assertRaises(FlmError):
+                read_flm(path)
+
+    def test_merge(self):
+        films = [make_flm(seed=i) for i in range(5)]
+        merger = FlmMerger()
+        assert merger.empty
+        for flm in films:
+            merger.add(flm)
+        assert merger.count == 5
+
+        path = os.path.join(self.tempdir, 'merged.flm')
+        merger.write(path)
+        merged = read_flm(path)
+
+        # The same float32 sums luxmerger computes
+        pixels = films[0].pixels.copy()
+        for flm in films[1:]:
+            pixels += flm.pixels
+        assert merged.header == films[0].header
+        assert numpy.array_equal(merged.pixels, pixels)
+        assert numpy.array_equal(merged.samples,
+                                 sum(flm.samples for flm in films))
+        # Films are not modified
+        assert not numpy.array_equal(films[0].pixels, pixels)
+
+    def test_merge_incompatible(self):
+        merger = FlmMerger()
+        merger.check(make_flm(x_res=5))
+        merger.add(make_flm())
+        for flm in [make_flm(x_res=5), make_flm(y_res=2),
+                    make_flm(num_groups=1), make_flm(buffer_types=(0,)),
+                    make_flm(version=2)]:
+            with self.assertRaises(FlmError):
+                merger.check(flm)
+            with self.assertRaises(FlmError):
+                merger.add(flm)
+        assert merger.count == 1
+
+    def test_merge_invalid_values(self):
+        merger = FlmMerger()
+        flm = make_flm()
+        flm.pixels[0, 0, 0, 0, 0] = numpy.nan
+        with self.assertRaises(FlmError):
+            merger.add(flm)
+        flm = make_flm()
+        flm.samples[0] = -1
+        with self.assertRaises(FlmError):
+            merger.check(flm)
+        assert merger.empty
+
+    def test_radiance(self):
+        flm = make_flm()
+        flm.samples[1] = 0
+        radiance = radiance_per_sample(flm)
+        assert radiance[0] == \
+            flm.pixels[0, ..., 1].sum(dtype=numpy.float64) / flm.samples[0]
+        assert numpy.isnan(radiance[1])
+
+        merger = FlmMerger()
+        merger.add(make_flm())
+        merger.check(make_flm(), tolerance=0.01)
+        # Groups without samples are not compared
+        merger.check(flm, tolerance=0.01)
+        merger.add(make_flm())
+
+        brighter = make_flm()
+        brighter.pixels *= 1.1
+        merger.check(brighter, tolerance=0.2)
+        merger.check(brighter)
+        with self.assertRaises(FlmError):
+            merger.check(brighter, tolerance=0.05)
+
+    def test_write_empty(self):
+        with self.assertRaises(FlmError):
+            FlmMerger().write(os.path.join(self.tempdir, 'merged.flm'))
+
+    def test_merge_threads(self):
+        films = [make_flm(seed=i) for i in range(20)]
+        merger = FlmMerger()
+        threads = [Thread(target=merger.add, args=(flm,)) for flm in films]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert merger.count == 20
+
+        path = os.path.join(self.tempdir, 'merged.flm')
+        merger.write(path)
+        expected = sum(flm.pixels.astype(numpy.float64) for flm in films)
+        assert numpy.allclose(read_flm(path).pixels, expected, rtol=1e-5)
@@ -4,11 +4,13 @@ import pickle
 import unittest
 from unittest.mock import Mock, patch
 
+import numpy
 from PIL import Image
 from ethereum.utils import denoms
 from golem_messages.message import ComputeTaskDef
 
 from apps.core.task.coretask import AcceptClientVerdict, CoreTaskTypeInfo
+from apps.lux.resources.flm import read_flm, write_flm
 from apps.lux.task.luxrendertask import (
     logger,
     LuxRenderDefaults,
@@ -22,6 +24,7 @@ from golem.resource.dirmanager import DirManager
 from golem.task.taskstate import SubtaskStatus
 from golem.testutils import PEP8MixIn, TempDirFixture
 from golem.tools.assertlogs import LogTestCase
+from tests.apps.lux.resources.test_flm import make_flm
 
 
 class TestLuxRenderDefaults(unittest.TestCase):
@@ -193,6 +196,55 @@ class TestLuxRenderTask(TempDirFixture, LogTestCase, PEP8MixIn):
         assert luxtask.num_tasks_received == 1
         assert luxtask.collected_file_names[1] == flm_file
 
+    def test_accept_results_merges_films(self):
+        luxtask = self.get_test_lux_task(total_subtasks=3)
+        luxtask.output_file = os.path.join(self.path, "output")
+        films = [make_flm(seed=i) for i in range(3)]
+        for i, flm in enumerate(films, start=1):
+            flm_file = os.path.join(self.path, "result{}.flm".format(i))
+            write_flm(flm, flm_file)
+            subtask_id = "SUBTASK{}".format(i)
+            luxtask.subtasks_given[subtask_id] = {
+                "start_task": i,
+                "node_id": "NODE_1",
+                "status": SubtaskStatus.downloading
+            }
+            luxtask._accept_client("NODE_1")
+            with patch('apps.lux.task.luxrendertask.LocalComputer') \
+                    as local_computer:
+                luxtask.accept_results(subtask_id, [flm_file])
+
+        assert luxtask.get_film_merger().count == 3
+        merged_flm = luxtask.output_file + ".flm"
+        pixels = films[0].pixels + films[1].pixels + films[2].pixels
+        assert numpy.array_equal(read_flm(merged_flm).pixels, pixels)
+        # Only the final image is rendered in a container
+        assert local_computer.call_count == 1
+        assert local_computer.call_args[1]['additional_resources'] == \
+            [merged_flm]
+
+        # The running sum is rebuilt after the task is restored
+        restored = pickle.loads(pickle.dumps(luxtask))
+        assert restored.film_merger is None
+        assert restored.get_film_merger().count == 3
+
+    def test_generate_final_flm_fallback(self):
+        luxtask = self.get_test_lux_task(total_subtasks=2)
+        write_flm(make_flm(), os.path.join(self.path, "result1.flm"))
+        open(os.path.join(self.path, "result2.flm"), 'w').close()
+        luxtask.collected_file_names = {
+            1: os.path.join(self.path, "result1.flm"),
+            2: os.path.join(self.path, "result2.flm"),
+        }
+        luxtask.film_merger = None
+        with patch('apps.lux.task.luxrendertask.LocalComputer') \
+                as local_computer, \
+                self.assertLogs(logger, level="WARNING"):
+            luxtask._LuxTask__generate_final_flm()
+        # Films that cannot be read are merged with luxmerger
+        assert local_computer.call_args[1]['additional_resources'] == \
+            list(luxtask.collected_file_names.values())
+
     def test_pickling(self):
         """Test for issue #873
 
@@ -0,0 +1,119 @@
+import os
+import pickle
+from unittest.mock import patch
+
+from PIL import Image
+
+from apps.rendering.task.previewcompositor import (PreviewCanvas,
+                                                   PreviewCompositor)
+from golem.testutils import TempDirFixture, PEP8MixIn
+
+
+class TestPreviewCanvas(TempDirFixture, PEP8MixIn):
+    PEP8_FILES = ['apps/rendering/task/previewcompositor.py']
+
+    def setUp(self):
+        super().setUp()
+        self.preview_path = os.path.join(self.tempdir, 'preview.png')
+
+    def test_new_canvas(self):
+        canvas = PreviewCanvas(self.preview_path, (40, 30))
+        assert canvas.image.size == (40, 30)
+        assert canvas.dirty
+        assert canvas.flush()
+        assert not canvas.dirty
+        with Image.open(self.preview_path) as img:
+            assert img.size == (40, 30)
+
+    def test_flush_throttled(self):
+        canvas = PreviewCanvas(self.preview_path, (40, 30),
+                               flush_interval=60)
+        canvas.paste(Image.new("RGB", (40, 10), (255, 0, 0)), (0, 10))
+        assert canvas.flush()
+
+        with patch("PIL.Image.Image.save") as save:
+            for i in range(100):
+                canvas.paste(Image.new("RGB", (40, 10), (0, i, 0)))
+                assert not canvas.flush()
+            assert not save.called
+        assert canvas.dirty
+
+        with Image.open(self.preview_path) as img:
+            assert img.getpixel((0, 0)) == (0, 0, 0)
+            assert img.getpixel((0, 15)) == (255, 0, 0)
+
+        assert canvas.flush(force=True)
+        with Image.open(self.preview_path) as img:
+            assert img.getpixel((0, 0)) == (0, 99, 0)
+
+        # Nothing changed, nothing to write
+        assert not canvas.flush(force=True)
+
+    def test_load_existing(self):
+        Image.new("RGB", (40, 30), (0, 0, 255)).save(self.preview_path)
+        canvas = PreviewCanvas(self.preview_path, (40, 30))
+        assert canvas.image.getpixel((5, 5)) == (0, 0, 255)
+        assert not canvas.dirty
+
+        # A preview of a different size is not reused
+        canvas = PreviewCanvas(self.preview_path, (20, 30))
+        assert canvas.image.getpixel((5, 5)) == (0, 0, 0)
+        assert canvas.dirty
+
+    def test_add_replace_clear(self):
+        canvas = PreviewCanvas(self.preview_path, (40, 30))
+        canvas.add(Image.new("RGB", (40, 30), (10, 20, 30)))
+        canvas.add(Image.new("RGB", (40, 30), (10, 20, 30)))
+        assert canvas.image.getpixel((0, 0)) == (20, 40, 60)
+
+        canvas.replace(Image.new("RGBA", (40, 30), (1, 2, 3, 255)))
+        assert canvas.image.mode == "RGB"
+        assert canvas.image.getpixel((0, 0)) == (1, 2, 3)
+
+        canvas.clear()
+        assert canvas.image.getpixel((0, 0)) == (0, 0, 0)
+
+    def test_no_file_path(self):
+        canvas = PreviewCanvas(None, (40, 30))
+        canvas.paste(Image.new("RGB", (40, 10), (255, 0, 0)))
+        assert not canvas.flush(force=True)
+
+    def test_pickle(self):
+        canvas = PreviewCanvas(self.preview_path, (40, 30),
+                               flush_interval=60)
+        canvas.flush()
+        canvas.paste(Image.new("RGB", (40, 10), (255, 0, 0)))
+
+        restored = pickle.loads(pickle.dumps(canvas))
+        # Pending changes are written before the canvas is pickled
+        assert not canvas.dirty
+        assert restored.image.getpixel((0, 0)) == (255, 0, 0)
+
+
+class TestPreviewCompositor(TempDirFixture):
+    def test_canvas(self):
+        compositor = PreviewCompositor(flush_interval=60)
+        path = os.path.join(self.tempdir, 'preview.png')
+        canvas = compositor.canvas(path, (40, 30))
+        assert compositor.canvas(path, (10, 10)) is canvas
+        assert compositor.canvas(path + '1', (10, 10)) is not canvas
+
+    def test_flush(self):
+        compositor = PreviewCompositor(flush_interval=60)
+        paths = [os.path.join(self.tempdir, 'preview{}.png'.format(i))
+                 for i in range(3)]
+        for path in paths:
+            compositor.canvas(path, (40, 30)).clear()
+        compositor.flush()
+
+        for path in paths:
+            compositor.canvas(path, (40, 30)).paste(
+                Image.new("RGB", (40, 30), (0, 0, 255)))
+        compositor.flush()
+        with Image.open(paths[0]) as img:
+            assert img.getpixel((0, 0)) == (0, 0, 0)
+
+        compositor.flush(force=True)
+        for path in paths:
+            with Image.open(path) as img:
+                assert img.getpixel((0, 0)) == (0, 0, 255)
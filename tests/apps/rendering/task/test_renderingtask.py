@@ -333,7 +333,7 @@ class TestRenderingTask(TestDirFixture, LogTestCase):
 
     def test_update_task_preview_ioerror(self):
         e = IOError("test message")
-        with patch("PIL.Image.open", side_effect=e), \
+        with patch("PIL.Image.Image.save", side_effect=e), \
                 patch("apps.rendering.task.renderingtask.logger") as logger:
             self.task._update_task_preview()
             assert logger.error.called
@@ -98,6 +98,31 @@ class TestAESFileEncryptor(TestDirFixture):
 
         self.assertFalse(decrypted)
 
+    def test_open_decrypted(self):
+        secret = FileEncryptor.gen_secret(10, 20)
+        AESFileEncryptor.encrypt(self.test_file_path,
+                                 self.enc_file_path,
+                                 secret)
+        with open(self.test_file_path, 'rb') as f:
+            data = f.read()
+
+        with AESFileEncryptor.open_decrypted(self.enc_file_path,
+                                             secret) as src:
+            self.assertEqual(src.read(), data)
+            self.assertEqual(src.seek(0, os.SEEK_END), len(data))
+
+            for offset, size in [(0, 1), (15, 2), (16, 16), (1000, 3000),
+                                 (len(data) - 5, 10), (len(data) + 1, 1)]:
+                src.seek(offset)
+                self.assertEqual(src.read(size), data[offset:offset + size])
+
+    def test_open_decrypted_invalid(self):
+        with open(self.enc_file_path, 'wb') as f:
+            f.write(b'\0' * (AESFileEncryptor.block_size + 1))
+
+        with self.assertRaises(ValueError):
+            AESFileEncryptor.open_decrypted(self.enc_file_path, b'secret')
+
     def test_get_key_and_iv(self):
         """ Test helper methods: gen_salt and get_key_and_iv """
         salt = AESFileEncryptor.gen_salt(AESFileEncryptor.block_size)
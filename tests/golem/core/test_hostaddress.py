@@ -1,3 +1,4 @@
+import time
 import unittest
 from unittest.mock import patch
 
@@ -5,7 +6,8 @@ import netifaces
 
 from golem.core.hostaddress import get_host_address, ip_address_private, \
     ip_network_contains, ipv4_networks, \
-    ip_addresses, get_host_address_from_connection, get_external_address
+    ip_addresses, get_host_address_from_connection, get_external_address, \
+    cached_discovery, _network_state, NETWORK_STATE_INTERVAL
 
 
 def mock_ifaddresses(*args):
@@ -64,6 +66,58 @@ class TestIPAddresses(unittest.TestCase):
                 self.assertTrue(is_ip_address(address), "Incorrect IP address: {}".format(address))
 
 
+class TestCachedDiscovery(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = 0
+
+        @cached_discovery(ttl=60)
+        def discover(arg):
+            self.calls += 1
+            return arg, self.calls
+
+        self.discover = discover
+
+    @patch('golem.core.hostaddress._network_state', return_value='network')
+    def test_cached(self, _):
+        assert self.discover(1) == (1, 1)
+        assert self.discover(1) == (1, 1)
+        assert self.discover(2) == (2, 2)
+
+        self.discover.cache_clear()
+        assert self.discover(1) == (1, 3)
+
+    @patch('golem.core.hostaddress._network_state', return_value='network')
+    def test_ttl(self, _):
+        assert self.discover(1) == (1, 1)
+        with patch('time.time', return_value=time.time() + 61):
+            assert self.discover(1) == (1, 2)
+
+    @patch('golem.core.hostaddress._network_state')
+    def test_network_change(self, network_state):
+        network_state.return_value = ('10.0.0.10',), ()
+        assert self.discover(1) == (1, 1)
+        network_state.return_value = ('192.168.0.10',), ()
+        assert self.discover(1) == (1, 2)
+
+
+class TestNetworkState(unittest.TestCase):
+
+    @patch('netifaces.ifaddresses', side_effect=mock_ifaddresses)
+    @patch('netifaces.interfaces', return_value=['eth0'])
+    def test_rate_limited(self, interfaces, _):
+        now = time.time() + 1000
+        with patch('time.time', return_value=now):
+            state = _network_state()
+            assert _network_state() == state
+        assert interfaces.call_count == 1
+        assert state == (('127.0.0.1', '10.0.0.10', '8.8.8.8', 'invalid'), ())
+
+        with patch('time.time', return_value=now + NETWORK_STATE_INTERVAL):
+            assert _network_state() == state
+        assert interfaces.call_count == 2
+
+
 class TestHostAddress(unittest.TestCase):
     def testGetHostAddressFromConnection(self):
         """ Test getting host address by connecting """
@@ -82,12 +136,28 @@ class TestHostAddress(unittest.TestCase):
 
     @patch('golem.network.stun.pystun.get_ip_info')
     def test_get_external_address_argument(self, stun):
+        get_external_address.cache_clear()
         stun.return_value = ('2607:f0d0:1002:51::4', 1234, "Open Internet")
         address, port, nat = get_external_address(9876)
         assert stun.called_once_with(9876)
         address, port, nat = get_external_address()
         assert stun.called_once_with(0)
 
+    @patch('golem.network.stun.pystun.get_ip_info')
+    def test_get_external_address_cached(self, stun):
+        get_external_address.cache_clear()
+        stun.return_value = ("Full Cone", '1.2.3.4', 1234)
+        assert get_external_address(9876) == ('1.2.3.4', 1234, "Full Cone")
+        assert get_external_address(9876) == ('1.2.3.4', 1234, "Full Cone")
+        assert stun.call_count == 1
+
+        # Failed discovery is not cached
+        get_external_address.cache_clear()
+        stun.return_value = ("Blocked", None, None)
+        get_external_address(9876)
+        get_external_address(9876)
+        assert stun.call_count == 3
+
     def testGetHostAddress(self):
         self.assertGreater(len(get_host_address('127.0.0.1')), 0)
         self.assertTrue(is_ip_address(get_host_address(None, False)))
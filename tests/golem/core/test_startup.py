@@ -0,0 +1,88 @@
+from unittest import TestCase
+
+from twisted.internet.defer import Deferred, succeed
+
+from golem.core.startup import StartupError, StartupGraph
+from golem.testutils import PEP8MixIn
+
+
+class TestStartupGraph(TestCase, PEP8MixIn):
+    PEP8_FILES = ['golem/core/startup.py']
+
+    def setUp(self):
+        self.graph = StartupGraph()
+        self.calls = []
+
+    def _stage(self, name, result=None):
+        def stage(*args):
+            self.calls.append((name, args))
+            return result
+        return stage
+
+    def _run(self):
+        results = []
+        errors = []
+        self.graph.run().addCallbacks(results.append, errors.append)
+        return results, errors
+
+    def test_add(self):
+        self.graph.add('a', self._stage('a'))
+        with self.assertRaises(ValueError):
+            self.graph.add('a', self._stage('a'))
+        with self.assertRaises(ValueError):
+            self.graph.add('b', self._stage('b'), requires=['c'])
+
+    def test_dependencies(self):
+        keys = Deferred()
+        self.graph.add('rpc', self._stage('rpc', 'session'))
+        self.graph.add('keys', self._stage('keys', keys))
+        self.graph.add('docker', self._stage('docker', succeed('docker')))
+        self.graph.add('client', self._stage('client', 'client'),
+                       requires=['keys', 'rpc'])
+        self.graph.add('run', self._stage('run'), requires=['client'])
+
+        results, errors = self._run()
+        # Independent stages are started without waiting for keys
+        assert [name for name, _ in self.calls] == ['rpc', 'keys', 'docker']
+        assert not results
+
+        keys.callback('keys_auth')
+        assert self.calls[3:] == [('client', ('keys_auth', 'session')),
+                                  ('run', ('client',))]
+        assert not errors
+        assert results == [{'rpc': 'session', 'keys': 'keys_auth',
+                            'docker': 'docker', 'client': 'client',
+                            'run': None}]
+
+        timings = self.graph.get_timings()
+        assert [t['name'] for t in timings] == \
+            ['rpc', 'keys', 'docker', 'client', 'run']
+        for timing in timings:
+            assert timing['status'] == 'done'
+            assert timing['duration'] >= 0
+
+    def test_failure(self):
+        keys = Deferred()
+        self.graph.add('keys', self._stage('keys', keys))
+        self.graph.add('docker', self._stage('docker'))
+        self.graph.add('client', self._stage('client'), requires=['keys'])
+
+        results, errors = self._run()
+        keys.errback(RuntimeError("no keys"))
+
+        assert not results
+        assert len(errors) == 1
+        assert isinstance(errors[0].value, StartupError)
+        assert errors[0].value.stage == 'keys'
+        assert 'no keys' in str(errors[0].value)
+        # Dependent stages are not started
+        assert [name for name, _ in self.calls] == ['keys', 'docker']
+        assert [t['status'] for t in self.graph.get_timings()] == \
+            ['failed', 'done']
+
+    def test_run_once(self):
+        self.graph.add('a', self._stage('a'))
+        results, _ = self._run()
+        assert results == [{'a': None}]
+        with self.assertRaises(RuntimeError):
+            self.graph.run()
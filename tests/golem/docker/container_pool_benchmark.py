@@ -0,0 +1,59 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+import pytest
+
+from golem.docker.image import DockerImage
+from golem.docker.job import DockerJob
+from golem.docker.pool import ContainerPool
+from tests.golem.docker.fake_docker import FakeDockerClient
+
+
+def skip_benchmarks():
+    if os.environ.get('benchmarks', False):
+        return False
+    return True
+
+
+def run_job(root_dir, container_pool):
+    """ Run a job with a single resource file and a single output file """
+    dirs = [tempfile.mkdtemp(dir=root_dir) for _ in range(3)]
+    resources_dir, work_dir, output_dir = dirs
+    with open(os.path.join(resources_dir, 'scene.blend'), 'wb') as f:
+        f.write(b'0' * 4096)
+
+    image = DockerImage('golemfactory/blender', tag='1.4')
+    with DockerJob(image, 'print("render")', {'frame': 1},
+                   resources_dir, work_dir, output_dir,
+                   container_pool=container_pool) as job:
+        job.start()
+        job.wait()
+        job.dump_logs(os.path.join(output_dir, 'stdout.log'),
+                      os.path.join(output_dir, 'stderr.log'))
+
+    for path in dirs:
+        shutil.rmtree(path)
+
+
+@pytest.mark.skipif(skip_benchmarks(), reason="skip benchmarks by default")
+@pytest.mark.parametrize("pooled", [False, True])
+@pytest.mark.benchmark(min_rounds=20, warmup=False)
+def test_job_overhead(benchmark, tmpdir, pooled: bool):
+    # Latencies of a local Docker daemon with an image already pulled
+    client = FakeDockerClient(create_latency=0.15, start_latency=0.05,
+                              remove_latency=0.05)
+    root_dir = str(tmpdir)
+    container_pool = None
+
+    with mock.patch('golem.docker.job.local_client', return_value=client), \
+            mock.patch('golem.docker.pool.local_client',
+                       return_value=client), \
+            mock.patch('golem.docker.image.local_client',
+                       return_value=client):
+        if pooled:
+            container_pool = ContainerPool(os.path.join(root_dir, 'pool'))
+            container_pool.prestage([DockerImage('golemfactory/blender',
+                                                 tag='1.4')])
+        benchmark(run_job, root_dir, container_pool)
@@ -0,0 +1,140 @@
+import os
+import shutil
+import time
+import uuid
+
+import docker.errors
+
+# Changes the image entrypoint makes when it creates the task user
+ENTRYPOINT_CHANGES = [
+    {'Path': '/etc', 'Kind': 0},
+    {'Path': '/etc/passwd', 'Kind': 0},
+    {'Path': '/etc/group', 'Kind': 0},
+    {'Path': '/home', 'Kind': 0},
+    {'Path': '/home/task', 'Kind': 1},
+]
+
+
+def docker_timestamp(timestamp):
+    seconds = int(timestamp)
+    nanos = int((timestamp - seconds) * 10 ** 9)
+    return '{}.{:09d}Z'.format(
+        time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds)), nanos)
+
+
+class FakeDockerClient(object):
+    """ Stand-in for docker.Client keeping containers in memory. A started
+    container runs its job at once: the job copies the params file to the
+    output directory and prints the names of the resources.
+
+    Latencies emulate the time Docker takes to create, start and remove
+    a container.
+    """
+
+    def __init__(self, create_latency=0., start_latency=0.,
+                 remove_latency=0.):
+        self.create_latency = create_latency
+        self.start_latency = start_latency
+        self.remove_latency = remove_latency
+        self.containers_by_id = dict()
+        self.created = 0
+        self.removed = 0
+        # Extra filesystem changes made by the next job
+        self.job_changes = []
+
+    def create_host_config(self, binds, **kwargs):
+        return dict(binds=binds, **kwargs)
+
+    def create_container(self, image, volumes, host_config, command,
+                         working_dir, cpuset=None, environment=None,
+                         labels=None):
+        time.sleep(self.create_latency)
+        container_id = uuid.uuid4().hex
+        self.containers_by_id[container_id] = dict(
+            Id=container_id,
+            Image=image,
+            Labels=labels or {},
+            binds={bind['bind']: host_path
+                   for host_path, bind in host_config['binds'].items()},
+            status='created',
+            started_at=docker_timestamp(0),
+            exit_code=None,
+            changes=[],
+            log=[],
+        )
+        self.created += 1
+        return {'Id': container_id, 'Warnings': None}
+
+    def start(self, container_id):
+        time.sleep(self.start_latency)
+        container = self._get(container_id)
+        started_at = docker_timestamp(time.time())
+        container.update(status='running', started_at=started_at)
+
+        if not container['changes']:
+            container['changes'] = list(ENTRYPOINT_CHANGES)
+        container['changes'] += self.job_changes
+        self.job_changes = []
+
+        binds = container['binds']
+        script = os.path.join(binds['/golem/work'], 'job.py')
+        params = os.path.join(binds['/golem/work'], 'params.py')
+        if os.path.getsize(script) and os.path.exists(params):
+            shutil.copy(params, binds['/golem/output'])
+            for name in sorted(os.listdir(binds['/golem/resources'])):
+                container['log'].append((started_at, 'stdout',
+                                         name.encode() + b'\n'))
+        container['log'].append((started_at, 'stderr', b'done\n'))
+        container.update(status='exited', exit_code=0)
+
+    def inspect_container(self, container_id):
+        container = self._get(container_id)
+        return {'Id': container_id,
+                'State': {'Status': container['status'],
+                          'StartedAt': container['started_at'],
+                          'ExitCode': container['exit_code']}}
+
+    def wait(self, container_id, timeout=None):
+        return self._get(container_id)['exit_code']
+
+    def logs(self, container_id, stream=False, stdout=True, stderr=True,
+             timestamps=False):
+        lines = []
+        for timestamp, output, data in self._get(container_id)['log']:
+            if (output == 'stdout' and stdout) or \
+                    (output == 'stderr' and stderr):
+                if timestamps:
+                    data = timestamp.encode() + b' ' + data
+                lines.append(data)
+        return iter(lines)
+
+    def attach(self, container_id, stdout=True, stderr=True, stream=False,
+               logs=False):
+        return iter([])
+
+    def kill(self, container_id):
+        self._get(container_id)['status'] = 'exited'
+
+    def diff(self, container_id):
+        return list(self._get(container_id)['changes'])
+
+    def remove_container(self, container_id, force=False):
+        time.sleep(self.remove_latency)
+        self._get(container_id)
+        del self.containers_by_id[container_id]
+        self.removed += 1
+
+    def containers(self, all=False, filters=None):  # noqa pylint: disable=redefined-builtin
+        label, _, value = (filters or {}).get('label', '').partition('=')
+        return [{'Id': c['Id']} for c in self.containers_by_id.values()
+                if not label or c['Labels'].get(label) == value]
+
+    def inspect_image(self, name):
+        return {'Id': 'sha256:' + name, 'RepoTags': [name]}
+
+    def _get(self, container_id):
+        try:
+            return self.containers_by_id[container_id]
+        except KeyError:
+            raise docker.errors.NotFound(
+                "No such container: {}".format(container_id), None)
@@ -0,0 +1,165 @@
+import os
+from unittest import TestCase, mock
+
+from golem.docker.image import DockerImage
+from golem.docker.job import DockerJob
+from golem.docker.pool import (ContainerPool, MAX_USES, POOL_LABEL,
+                               filter_log, parse_timestamp)
+from golem.testutils import TempDirFixture, PEP8MixIn
+from tests.golem.docker.fake_docker import FakeDockerClient, docker_timestamp
+
+
+class ContainerPoolTestCase(TempDirFixture):
+
+    def setUp(self):
+        super().setUp()
+        self.client = FakeDockerClient()
+        self.patches = [
+            mock.patch('golem.docker.{}.local_client'.format(module),
+                       return_value=self.client)
+            for module in ('job', 'pool', 'image')
+        ]
+        for patch in self.patches:
+            patch.start()
+        self.pool = ContainerPool(os.path.join(self.tempdir, 'pool'))
+        self.image = DockerImage('golemfactory/base', tag='1.2')
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        super().tearDown()
+
+    def _dirs(self, name='job'):
+        dirs = [os.path.join(self.tempdir, name, d)
+                for d in ('resources', 'work', 'output')]
+        for path in dirs:
+            os.makedirs(path, exist_ok=True)
+        return dirs
+
+    def _run_job(self, name='job', params=None):
+        resources_dir, work_dir, output_dir = self._dirs(name)
+        with open(os.path.join(resources_dir, name + '.blend'), 'w'):
+            pass
+        stdout = os.path.join(self.tempdir, name + '.out')
+        with DockerJob(self.image, 'print("job")', params or {'name': name},
+                       resources_dir, work_dir, output_dir,
+                       container_pool=self.pool) as job:
+            job.start()
+            exit_code = job.wait()
+            job.dump_logs(stdout)
+            container = job.pooled_container
+        with open(stdout, 'rb') as f:
+            return container, exit_code, f.read(), output_dir
+
+
+class TestContainerPool(ContainerPoolTestCase, PEP8MixIn):
+    PEP8_FILES = ['golem/docker/pool.py']
+
+    def test_prepare(self):
+        self.pool.prepare(self.image, count=2)
+        assert self.client.created == 2
+        # Warm-up runs leave nothing behind in the slots
+        for container in self.pool._idle[self.pool.get_key(self.image, {})]:
+            assert container.baseline
+            assert not os.listdir(container.work_dir)
+
+        # Enough idle containers already
+        self.pool.prepare(self.image, count=2)
+        assert self.client.created == 2
+
+    def test_job_in_pooled_container(self):
+        self.pool.prepare(self.image)
+        container, exit_code, stdout, output_dir = self._run_job('first')
+        assert exit_code == 0
+        assert stdout == b'first.blend\n'
+        assert set(os.listdir(output_dir)) == {'params.py'}
+        # Job files are moved back to the work directory
+        assert set(os.listdir(os.path.join(self.tempdir, 'first', 'work'))) \
+            == {'job.py', 'params.py'}
+
+        # The same container runs the next job, without the previous logs
+        # and files
+        second, exit_code, stdout, output_dir = self._run_job('second')
+        assert second is container
+        assert exit_code == 0
+        assert stdout == b'second.blend\n'
+        with open(os.path.join(output_dir, 'params.py')) as f:
+            assert "'second'" in f.read()
+        assert not os.listdir(container.work_dir)
+        assert not os.listdir(container.resources_dir)
+        assert self.client.created == 1
+        assert self.client.removed == 0
+
+    def test_dirty_container_replaced(self):
+        self.pool.prepare(self.image)
+        self.client.job_changes = [{'Path': '/tmp/leftover', 'Kind': 1}]
+        with mock.patch.object(self.pool, '_replenish') as replenish:
+            container, *_ = self._run_job()
+        assert container.container_id not in self.client.containers_by_id
+        assert not os.path.exists(container.slot_dir)
+        replenish.assert_called_once_with(self.image, None)
+
+    def test_container_without_warm_up_not_recycled(self):
+        with mock.patch.object(self.pool, '_replenish'):
+            container, exit_code, *_ = self._run_job()
+        assert exit_code == 0
+        assert container.baseline is None
+        assert self.client.removed == 1
+
+    def test_max_uses(self):
+        self.pool.prepare(self.image)
+        container = self.pool.acquire(self.image)
+        container.uses = MAX_USES
+        with mock.patch.object(self.pool, '_replenish'):
+            self.pool.release(container)
+        assert self.client.removed == 1
+
+    def test_host_config(self):
+        self.pool.prepare(self.image, {'cpuset': '0'})
+        container = self.pool.acquire(self.image, {'cpuset': '0,1'})
+        assert container.baseline is None
+        assert self.client.created == 2
+
+    def test_prestage(self):
+        images = [self.image, DockerImage('golemfactory/blender', tag='1.4')]
+        self.pool.prestage(images, {'cpuset': '0'})
+        assert self.client.created == 2
+
+        # Containers with the previous config are removed
+        self.pool.prestage(images, {'cpuset': '0,1'})
+        assert self.client.created == 4
+        assert len(self.client.containers_by_id) == 2
+
+        self.pool.drain()
+        assert not self.client.containers_by_id
+        assert not os.listdir(self.pool.root_dir)
+
+    def test_remove_stale(self):
+        other = ContainerPool(os.path.join(self.tempdir, 'other'))
+        other.prepare(self.image)
+        self.pool.prepare(self.image)
+        stale = ContainerPool(self.pool.root_dir)
+        stale.prepare(self.image)
+        assert len(self.client.containers_by_id) == 3
+
+        self.pool.remove_stale()
+        labels = [c['Labels'][POOL_LABEL]
+                  for c in self.client.containers_by_id.values()]
+        assert sorted(labels) == sorted([self.pool.root_dir, other.root_dir])
+        assert len(os.listdir(self.pool.root_dir)) == 1
+
+
+class TestLogFilter(TestCase):
+
+    def test_parse_timestamp(self):
+        assert parse_timestamp('1970-01-01T00:01:00.5Z') == (60, 500000000)
+        assert parse_timestamp('1970-01-01T00:01:00Z') == (60, 0)
+        assert parse_timestamp('2018-01-18T12:30:00.000000001Z') \
+            > parse_timestamp('2018-01-18T12:30:00Z')
+
+    def test_filter_log(self):
+        since = parse_timestamp(docker_timestamp(100.25))
+        lines = [docker_timestamp(99.5).encode() + b' old\n',
+                 docker_timestamp(100.25).encode() + b' new\n',
+                 b'garbage\n']
+        assert list(filter_log(lines, since)) == [b'new\n', b'garbage\n']
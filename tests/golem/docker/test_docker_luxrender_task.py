@@ -1,13 +1,16 @@
 import json
 import logging
 import os
+from collections import OrderedDict
 from os import makedirs, path, remove
 import shutil
 from unittest import mock
 from unittest.mock import Mock
 
+import numpy
 import pytest
 
+from apps.lux.resources.flm import FlmMerger, read_flm
 from apps.lux.task.luxrendertask import LuxRenderTaskBuilder, LuxTask
 from golem.clientconfigdescriptor import ClientConfigDescriptor
 from golem.core.common import get_golem_path, timeout_to_deadline
@@ -198,14 +201,11 @@ class TestDockerLuxrenderTask(TempDirFixture, DockerTestCase):
         else:
             assert path.isfile(png)
 
-        ##
-        # self.assertFalse(path.isfile(task._LuxTask__get_test_flm()) )
-
-        test_file = task._LuxTask__get_test_flm()
+        test_file = path.join(task.tmp_dir, "test_result.flm")
         shutil.copy(flm, test_file)
 
         self.dirs_to_remove.append(path.dirname(test_file))
-        assert path.isfile(task._LuxTask__get_test_flm())
+        assert path.isfile(test_file)
 
         # copy to new location
         new_file_dir = path.join(path.dirname(test_file), subtask_id)
@@ -292,6 +292,64 @@ class TestDockerLuxrenderTask(TempDirFixture, DockerTestCase):
         self.assertFalse(task.verify_subtask(ctd['subtask_id']))
         self.assertEqual(task.num_tasks_received, 1)
 
+    def _render_film(self, task, dst_path):
+        ctd = task.query_extra_data(10000).ctd
+        computer = LocalComputer(
+            root_path=self.tempdir,
+            success_callback=Mock(),
+            error_callback=Mock(),
+            compute_task_def=ctd,
+            resources=task.task_resources
+        )
+        computer.run()
+        computer.tt.join()
+
+        dirname = os.path.dirname(computer.tt.result['data'][0])
+        flm = find_file_with_ext(dirname, [".flm"])
+        return self._change_file_location(flm, dst_path)
+
+    @pytest.mark.slow
+    def test_luxmerger_matches_flm_merger(self):
+        task = self._test_task()
+        task.output_format = "png"
+        task.res_y = 100
+        task.res_x = 100
+        task.haltspp = 5
+
+        films = [
+            self._render_film(task, path.join(self.tempdir, 'films',
+                                              '{}.flm'.format(i)))
+            for i in range(3)
+        ]
+
+        # Merge with luxmerger in a container
+        task.collected_file_names = OrderedDict(enumerate(films))
+        computer = LocalComputer(
+            root_path=self.tempdir,
+            success_callback=Mock(),
+            error_callback=Mock(),
+            compute_task_def=task.query_extra_data_for_final_flm(),
+            resources=[],
+            additional_resources=films
+        )
+        computer.run()
+        computer.tt.join()
+        luxmerger_flm = find_file_with_ext(
+            os.path.dirname(computer.tt.result['data'][0]), [".flm"])
+
+        # Merge in process
+        film_merger = FlmMerger()
+        for film in films:
+            film_merger.add(read_flm(film))
+        merged_flm = path.join(self.tempdir, 'merged.flm')
+        film_merger.write(merged_flm)
+
+        expected = read_flm(luxmerger_flm)
+        merged = read_flm(merged_flm)
+        assert merged.layout == expected.layout
+        assert numpy.allclose(merged.samples, expected.samples)
+        assert numpy.allclose(merged.pixels, expected.pixels, rtol=1e-5)
+
     def test_run_stats(self):
         results = []
         return
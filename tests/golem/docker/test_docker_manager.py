@@ -493,6 +493,24 @@ class TestDockerManager(unittest.TestCase):
 
         assert pulls[0] == 4
 
+    def test_prestage_containers(self):
+        dmm = MockDockerManager()
+        dmm.prestage_containers(in_background=False)
+
+        dmm.enable_container_pool('/tmp/pool')
+        pool = dmm.container_pool
+        dmm.enable_container_pool('/tmp/other')
+        assert dmm.container_pool is pool
+
+        with mock.patch.object(pool, 'prestage') as prestage:
+            dmm.prestage_containers(in_background=False)
+        images, host_config = prestage.call_args[0]
+        assert [image.name for image in images] == [
+            'golemfactory/base:1.2', 'golemfactory/blender:1.4',
+            'golemfactory/luxrender:1.2', 'golemfactory/image_metrics:1.1']
+        assert host_config == dmm.container_host_config
+        assert host_config is not dmm.container_host_config
+
     @mock.patch('os.chdir')
     def test_build_images(self, os_chdir):
 
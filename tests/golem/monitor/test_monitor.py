@@ -1,4 +1,10 @@
+import gzip
+import http.server
+import json
+import os
 from random import Random
+import socketserver
+import threading
 import time
 from unittest import mock, TestCase
 from urllib.parse import urljoin
@@ -12,6 +18,7 @@ from golem.core import variables
 from golem.clientconfigdescriptor import ClientConfigDescriptor
 from golem.monitor.model.nodemetadatamodel import NodeMetadataModel
 from golem.monitor.monitor import SystemMonitor, SenderThread
+from golem.monitor.transport.spill import DiskSpill
 from golem.monitorconfig import MONITOR_CONFIG
 from golem.task.taskrequestorstats import CurrentStats, FinishedTasksStats, \
     EMPTY_FINISHED_SUMMARY
@@ -22,6 +29,9 @@ random = Random(__name__)
 class TestSystemMonitor(TestCase, testutils.PEP8MixIn):
     PEP8_FILES = (
         "golem/monitor/monitor.py",
+        "golem/monitor/transport/httptransport.py",
+        "golem/monitor/transport/sender.py",
+        "golem/monitor/transport/spill.py",
     )
 
     def setUp(self):
@@ -183,7 +193,7 @@ class TestSenderThread(TestCase):
             proto_ver=None
         )
         sender.stop_request.isSet = mock.Mock(side_effect=[False, True])
-        with mock.patch('requests.post',
+        with mock.patch('requests.Session.post',
                         side_effect=requests.exceptions.RequestException(
                             "request failed")), \
                 self.assertLogs() as logs:
@@ -193,3 +203,210 @@ class TestSenderThread(TestCase):
         assert len(logs.output) == 1
         output_lines = logs.output[0].split('\n')
         assert len(output_lines) == 1
+
+
+class CollectorHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):  # noqa pylint: disable=invalid-name
+        server = self.server
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        with server.lock:
+            server.connections.add(self.client_address)
+            server.requests += 1
+            batch = self.headers['Content-Encoding'] == 'gzip'
+            failing = server.fail > 0
+            if failing:
+                server.fail -= 1
+                status = 500
+            elif batch and not server.accept_batches:
+                status = 400
+            elif batch:
+                server.batches.append(json.loads(gzip.decompress(body)))
+                status = 200
+            else:
+                server.documents.append(json.loads(body.decode('utf-8')))
+                status = 200
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *_):  # pylint: disable=arguments-differ
+        pass
+
+
+class StandInCollector(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """ Local HTTP server accepting monitor batches """
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), CollectorHandler)
+        self.lock = threading.Lock()
+        self.batches = []
+        self.documents = []
+        self.accept_batches = True
+        self.connections = set()
+        self.requests = 0
+        self.fail = 0
+
+    @property
+    def url(self):
+        return 'http://{}:{}/'.format(*self.server_address)
+
+    def events(self):
+        with self.lock:
+            return [event['n'] for batch in self.batches
+                    for event in batch['data']]
+
+    def single_events(self):
+        with self.lock:
+            return [document['data']['n'] for document in self.documents]
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError('Timed out')
+        time.sleep(0.01)
+
+
+def event(n):
+    return mock.Mock(dict_repr=mock.Mock(return_value={'n': n}))
+
+
+class TestSenderThreadBatches(testutils.TempDirFixture):
+    def setUp(self):
+        super().setUp()
+        self.collector = StandInCollector()
+        threading.Thread(target=self.collector.serve_forever,
+                         daemon=True).start()
+        self.sender = None
+
+    def tearDown(self):
+        if self.sender and self.sender.is_alive():
+            self.sender.join()
+        self.collector.shutdown()
+        self.collector.server_close()
+        super().tearDown()
+
+    def _sender(self, spill_dir=None, batch_proto_ver=2, **attributes):
+        self.sender = SenderThread(
+            node_info=event('ping'),
+            monitor_host=self.collector.url,
+            monitor_request_timeout=5,
+            monitor_sender_thread_timeout=60,
+            proto_ver=1,
+            spill_dir=spill_dir,
+            batch_proto_ver=batch_proto_ver,
+        )
+        self.sender.RETRY_DELAY = 0.01
+        for name, value in attributes.items():
+            setattr(self.sender, name, value)
+        return self.sender
+
+    def test_batch_max_events(self):
+        sender = self._sender(BATCH_MAX_EVENTS=3)
+        for n in range(7):
+            sender.send(event(n))
+        sender.start()
+
+        wait_for(lambda: len(self.collector.batches) == 2)
+        assert self.collector.batches[0]['proto_ver'] == 2
+        assert [len(b['data']) for b in self.collector.batches] == [3, 3]
+        # The rest is sent on shutdown
+        sender.join()
+        assert self.collector.events() == list(range(7))
+        # A single keep-alive connection is used
+        assert len(self.collector.connections) == 1
+
+    def test_batch_max_delay(self):
+        sender = self._sender(BATCH_MAX_DELAY=0.1)
+        sender.start()
+        sender.send(event(0))
+        sender.send(event(1))
+
+        wait_for(lambda: self.collector.events() == [0, 1])
+        assert len(self.collector.batches) == 1
+
+    def test_batch_max_bytes(self):
+        sender = self._sender(BATCH_MAX_BYTES=20)
+        sender.start()
+        for n in range(4):
+            sender.send(event(n))
+
+        # Each encoded event takes 7 bytes
+        wait_for(lambda: len(self.collector.batches) == 1)
+        assert self.collector.events() == [0, 1, 2]
+
+    def test_retry(self):
+        self.collector.fail = 2
+        sender = self._sender(BATCH_MAX_EVENTS=1)
+        sender.start()
+        sender.send(event(0))
+
+        wait_for(lambda: self.collector.events() == [0])
+        assert self.collector.requests == 3
+
+    def test_spill(self):
+        spill_dir = os.path.join(self.path, 'spill')
+        self.collector.fail = 2 * SenderThread.MAX_ATTEMPTS
+        sender = self._sender(spill_dir, BATCH_MAX_EVENTS=1)
+        sender.start()
+        sender.send(event(0))
+        sender.send(event(1))
+        wait_for(lambda: len(sender.spill) == 2)
+        assert self.collector.events() == []
+
+        # Spilled batches are resent after a successful delivery
+        sender.send(event(2))
+        wait_for(lambda: self.collector.events() == [2, 0, 1])
+        assert not os.listdir(spill_dir)
+
+    def test_without_batches(self):
+        sender = self._sender(batch_proto_ver=None, BATCH_MAX_EVENTS=2)
+        sender.start()
+        sender.send(event(0))
+        sender.send(event(1))
+
+        wait_for(lambda: self.collector.single_events() == [0, 1])
+        assert all(document['proto_ver'] == 1
+                   for document in self.collector.documents)
+        assert not self.collector.batches
+
+    def test_batches_rejected(self):
+        spill_dir = os.path.join(self.path, 'spill')
+        self.collector.accept_batches = False
+        sender = self._sender(spill_dir, BATCH_MAX_EVENTS=2)
+        sender.start()
+        sender.send(event(0))
+        sender.send(event(1))
+
+        # The rejected batch is not retried nor spilled, but sent singly
+        wait_for(lambda: self.collector.single_events() == [0, 1])
+        assert self.collector.requests == 3
+        assert not sender.send_batches
+        assert not sender.spill
+
+        sender.send(event(2))
+        sender.send(event(3))
+        wait_for(lambda: self.collector.single_events() == [0, 1, 2, 3])
+        assert self.collector.requests == 5
+
+    def test_spill_bounded(self):
+        spill_dir = os.path.join(self.path, 'spill')
+        spill = DiskSpill(spill_dir, max_size=10)
+        spill.put(b'12345')
+        spill.put(b'6789')
+        spill.put(b'abcd')
+        spill.put(b'too large to be stored')
+        assert len(spill) == 2
+        assert spill.size == 8
+
+        # Stored payloads survive a restart
+        spill = DiskSpill(spill_dir, max_size=10)
+        path, payload = spill.peek()
+        assert payload == b'6789'
+        spill.remove(path)
+        assert spill.peek()[1] == b'abcd'
+        assert len(os.listdir(spill_dir)) == 1
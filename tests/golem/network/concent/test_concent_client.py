@@ -1,6 +1,9 @@
 # pylint: disable=protected-access, no-self-use
 import datetime
+import http.server
 import logging
+import socketserver
+import threading
 import time
 from unittest import mock, TestCase
 import urllib
@@ -76,7 +79,8 @@ class TestSendToConcent(TestCase):
         post_mock.assert_called_once_with(
             api_send_url,
             data=mock.ANY,
-            headers=mock.ANY
+            headers=mock.ANY,
+            timeout=client.REQUEST_TIMEOUT,
         )
 
     def test_request_exception(self, post_mock):
@@ -199,7 +203,11 @@ class TestConcentClientService(testutils.TempDirFixture):
         self.concent_service.stop()
         self.concent_service.join(timeout=3)
 
-        loop_mock.assert_called_once_with()
+        assert not self.concent_service.is_alive()
+        assert len(self.concent_service._senders) == \
+            client.ConcentClientService.NUM_SENDERS
+        assert not any(s.is_alive() for s in self.concent_service._senders)
+        loop_mock.assert_called_with(block=True)
         receive_mock.assert_called_once_with()
 
     def test_submit(self, *_):
@@ -245,6 +253,7 @@ class TestConcentClientService(testutils.TempDirFixture):
             self.msg,
             self.concent_service.keys_auth._private_key,
             self.concent_service.keys_auth.public_key,
+            session=self.concent_service._session,
         )
 
         assert not self.concent_service._delayed
@@ -286,6 +295,7 @@ class TestConcentClientService(testutils.TempDirFixture):
             self.msg,
             self.concent_service.keys_auth._private_key,
             self.concent_service.keys_auth.public_key,
+            session=self.concent_service._session,
         )
         react_mock.assert_called_once_with(data)
 
@@ -298,6 +308,7 @@ class TestConcentClientService(testutils.TempDirFixture):
         self.concent_service.receive()
         receive_mock.assert_called_once_with(
             self.concent_service.keys_auth.public_key,
+            session=self.concent_service._session,
         )
         react_mock.assert_called_once_with(content)
 
@@ -317,7 +328,7 @@ class TestConcentClientService(testutils.TempDirFixture):
                                    *_):
         receive_mock.side_effect = exceptions.ConcentError
         self.concent_service.receive()
-        receive_mock.assert_called_once_with(mock.ANY)
+        receive_mock.assert_called_once_with(mock.ANY, session=mock.ANY)
         sleep_mock.assert_called_once_with()
         react_mock.assert_not_called()
 
@@ -337,7 +348,7 @@ class TestConcentClientService(testutils.TempDirFixture):
                                *_):
         receive_mock.side_effect = Exception
         self.concent_service.receive()
-        receive_mock.assert_called_once_with(mock.ANY)
+        receive_mock.assert_called_once_with(mock.ANY, session=mock.ANY)
         sleep_mock.assert_called_once_with()
         react_mock.assert_not_called()
 
@@ -399,3 +410,159 @@ class ConcentCallLaterTestCase(testutils.TempDirFixture):
             self.msg,
             datetime.timedelta(seconds=1)
         )
+
+
+class StandInConcentHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):  # noqa pylint: disable=invalid-name
+        server = self.server
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        with server.lock:
+            server.sent.append(body)
+            server.connections.add(self.client_address)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight,
+                                       server.in_flight)
+        server.release.wait(5)
+        with server.lock:
+            server.in_flight -= 1
+            server.done += 1
+        self._reply(b'')
+
+    def do_GET(self):  # noqa pylint: disable=invalid-name
+        self._reply(self.server.receive_content)
+
+    def _reply(self, content):
+        self.send_response(200)
+        self.send_header('Concent-Golem-Messages-Version',
+                         golem_messages.__version__)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *_):  # pylint: disable=arguments-differ
+        pass
+
+
+class StandInConcent(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """ Local HTTP server answering Concent API requests """
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StandInConcentHandler)
+        self.lock = threading.Lock()
+        self.sent = []
+        self.connections = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.done = 0
+        self.release = threading.Event()
+        self.release.set()
+        self.receive_content = b''
+
+    @property
+    def url(self):
+        return 'http://{}:{}/'.format(*self.server_address)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError('Timed out')
+        time.sleep(0.01)
+
+
+class TestConcentClientServiceStandIn(testutils.TempDirFixture):
+    def setUp(self):
+        super().setUp()
+        self.keys_auth = keysauth.KeysAuth(
+            datadir=self.path,
+            private_key_name='priv_key',
+            password='password',
+        )
+        self.server = StandInConcent()
+        threading.Thread(target=self.server.serve_forever, daemon=True) \
+            .start()
+
+        self.names = {}
+        patches = [
+            mock.patch('golem.core.variables.CONCENT_URL', self.server.url),
+            # Send message names instead of encrypted messages
+            mock.patch('golem_messages.dump',
+                       side_effect=lambda msg, *_: self.names[id(msg)]),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.service = None
+
+    def tearDown(self):
+        self.server.release.set()
+        if self.service and self.service.is_alive():
+            self.service.stop()
+            self.service.join(timeout=10)
+        self.server.shutdown()
+        self.server.server_close()
+        super().tearDown()
+
+    def _service(self, num_senders):
+        self.service = client.ConcentClientService(
+            keys_auth=self.keys_auth,
+            num_senders=num_senders,
+        )
+        self.service.react_to_concent_message = mock.Mock()
+        return self.service
+
+    def _enqueue(self, name, deadline_in=datetime.timedelta(hours=1)):
+        msg = message.ForceReportComputedTask()
+        self.names[id(msg)] = name
+        self.service._enqueue(client.ConcentRequest(
+            key=name.decode(),
+            msg=msg,
+            deadline_at=datetime.datetime.now() + deadline_in,
+        ))
+
+    def test_concurrent_senders(self):
+        self.server.release.clear()
+        self._service(num_senders=3).start()
+        for name in (b'a', b'b', b'c'):
+            self._enqueue(name)
+
+        wait_for(lambda: self.server.in_flight == 3)
+        self.server.release.set()
+        wait_for(lambda: self.server.done == 3)
+        assert sorted(self.server.sent) == [b'a', b'b', b'c']
+
+    def test_deadline_order(self):
+        self._service(num_senders=1)
+        self._enqueue(b'late', datetime.timedelta(hours=3))
+        self._enqueue(b'early', datetime.timedelta(hours=1))
+        self._enqueue(b'middle', datetime.timedelta(hours=2))
+        self._enqueue(b'expired', datetime.timedelta(hours=-1))
+        self.service.start()
+
+        wait_for(lambda: self.server.done == 3)
+        assert self.server.sent == [b'early', b'middle', b'late']
+        assert self.server.max_in_flight == 1
+
+    def test_keep_alive(self):
+        self._service(num_senders=1)
+        for _ in range(5):
+            self._enqueue(b'msg')
+            self.service._loop()
+
+        assert self.server.done == 5
+        assert len(self.server.connections) == 1
+
+    def test_receive_not_blocked_by_sends(self):
+        self.server.release.clear()
+        self.server.receive_content = b'received'
+        self._service(num_senders=1).start()
+        self._enqueue(b'msg')
+        wait_for(lambda: self.server.in_flight == 1)
+
+        react = self.service.react_to_concent_message
+        wait_for(lambda: mock.call(b'received') in react.call_args_list)
+        assert self.server.in_flight == 1
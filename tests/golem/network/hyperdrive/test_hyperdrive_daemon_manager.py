@@ -124,6 +124,18 @@ class TestHyperdriveDaemonManager(TempDirFixture):
         dm._wait(timeout=1)
         assert dm._critical_error.called
 
+    def test_wait_process_exited(self, *_):
+        dm = self.dm
+        dm.addresses = Mock(return_value=None)
+        dm._critical_error = Mock()
+        process = Mock()
+        process.poll.return_value = 1
+
+        with patch('time.sleep') as sleep:
+            dm._wait(process, timeout=10)
+        assert dm._critical_error.called
+        assert not sleep.called
+
     def test_version_error(self):
         err = requests.ConnectionError
 
@@ -0,0 +1,126 @@
+import socket
+import struct
+import threading
+import time
+from unittest import TestCase
+
+from golem.network.stun import pystun
+
+
+class StandInStunServer(threading.Thread):
+    """ Local UDP server answering STUN binding requests with a fixed
+    external address. A silent server never answers. """
+
+    def __init__(self, external_ip='1.2.3.4', silent=False, delay=0.):
+        super().__init__(daemon=True)
+        self.external_ip = external_ip
+        self.silent = silent
+        self.delay = delay
+        self.requests = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.settimeout(0.1)
+        self.address = self.sock.getsockname()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                data, addr = self.sock.recvfrom(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            self.requests += 1
+            if self.silent:
+                continue
+            time.sleep(self.delay)
+            self.sock.sendto(self._response(data[4:20], addr[1]), addr)
+
+    def _response(self, tranid, port):
+        address = struct.pack('!BBH', 0, 1, port) \
+            + socket.inet_aton(self.external_ip)
+        attributes = struct.pack('!HH', 0x0001, len(address)) + address
+        return struct.pack('!HH', 0x0101, len(attributes)) + tranid \
+            + attributes
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.sock.close()
+
+
+class TestParallelStunTest(TestCase):
+
+    def setUp(self):
+        self.servers = []
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+
+    def tearDown(self):
+        for server in self.servers:
+            server.stop()
+        self.sock.close()
+
+    def _start(self, **kwargs):
+        server = StandInStunServer(**kwargs)
+        server.start()
+        self.servers.append(server)
+        return server
+
+    def test_first_consistent_answers(self):
+        silent = self._start(silent=True)
+        slow = self._start(external_ip='5.6.7.8', delay=0.3)
+        first = self._start()
+        second = self._start()
+
+        started = time.time()
+        server, ret = pystun.parallel_stun_test(
+            self.sock, [s.address for s in self.servers], timeout=5.)
+
+        # Unreachable and slow servers do not delay the result
+        assert time.time() - started < 0.3
+        assert silent.requests
+        assert server in (first.address, second.address)
+        assert ret['Resp']
+        assert ret['ExternalIP'] == '1.2.3.4'
+        assert ret['ExternalPort'] == self.sock.getsockname()[1]
+        assert slow.requests
+
+    def test_disagreeing_answers(self):
+        self._start(external_ip='5.6.7.8')
+        self._start()
+        self._start()
+
+        _, ret = pystun.parallel_stun_test(
+            self.sock, [s.address for s in self.servers], timeout=5.)
+        assert ret['ExternalIP'] == '1.2.3.4'
+
+    def test_single_answer(self):
+        silent = self._start(silent=True)
+        server = self._start()
+
+        address, ret = pystun.parallel_stun_test(
+            self.sock, [silent.address, server.address], timeout=1.,
+            retry_interval=0.2)
+        assert address == server.address
+        assert ret['ExternalIP'] == '1.2.3.4'
+        # Requests are resent to servers that did not answer
+        assert silent.requests > 1
+
+    def test_blocked(self):
+        silent = self._start(silent=True)
+
+        started = time.time()
+        address, ret = pystun.parallel_stun_test(self.sock, [silent.address],
+                                                 timeout=0.5)
+        assert time.time() - started < 1.
+        assert address == (None, None)
+        assert not ret['Resp']
+        assert ret['ExternalIP'] is None
+
+    def test_stun_test(self):
+        server = self._start()
+        ret = pystun.stun_test(self.sock, *server.address, '0.0.0.0', 0)
+        assert ret['Resp']
+        assert ret['ExternalIP'] == '1.2.3.4'
@@ -5,12 +5,14 @@ import uuid
 import unittest.mock as mock
 from unittest.mock import Mock, patch
 
+import golem_messages
 from golem_messages import message
 from peewee import DataError, PeeweeException, IntegrityError
 
 from golem.model import NetworkMessage, Actor
 from golem.network.history import MessageHistoryService, record_history, \
-    IMessageHistoryProvider, requestor_history, provider_history
+    IMessageHistoryProvider, requestor_history, provider_history, \
+    MessageNotFound
 from golem.testutils import DatabaseFixture
 
 
@@ -137,6 +139,25 @@ class TestMessageHistoryService(DatabaseFixture):
         result = self.service.get_sync(task="task", subtask=msgs[0]['subtask'])
         assert len(result) == 1
 
+    def test_get_sync_as_message(self):
+        msg = message.TaskToCompute(
+            compute_task_def=message.ComputeTaskDef(task_id='task'))
+        msg.sig = mock_sign()
+        msg_dict = self._build_dict("task", None)
+        msg_dict.update(msg_cls='TaskToCompute',
+                        msg_data=golem_messages.dump(msg, None, None))
+        self.service.add_sync(msg_dict)
+
+        with self.assertRaises(MessageNotFound):
+            self.service.get_sync_as_message(task="task", msg_cls='Hello')
+
+        result = self.service.get_sync_as_message(
+            task="task", msg_cls='TaskToCompute')
+        assert isinstance(result, message.TaskToCompute)
+        assert result.compute_task_def['task_id'] == 'task'
+        assert result.sig == msg.sig
+        assert result.timestamp == msg.timestamp
+
     def test_build_clauses(self):
         clauses = self.service.build_clauses(task="task", subtask="subtask",
                                              unknown="unknown")
@@ -0,0 +1,114 @@
+import queue
+import threading
+import time
+from unittest import TestCase, mock
+
+from golem.network.transport.cryptopool import CryptoPool
+
+
+class CryptoPoolTestMixin(object):
+    """ Runs crypto pool callbacks on the test thread """
+
+    def setUp(self):
+        super().setUp()
+        self.calls = queue.Queue()
+        self.reactor = mock.Mock()
+        self.reactor.callFromThread = \
+            lambda fn, *args: self.calls.put((fn, args))
+        self.pool = CryptoPool(workers=2, reactor=self.reactor)
+
+    def tearDown(self):
+        self.pool.stop()
+        super().tearDown()
+
+    def run_callbacks(self, *channels):
+        while not all(channel.idle for channel in channels):
+            fn, args = self.calls.get(timeout=5)
+            fn(*args)
+
+
+class TestCryptoChannel(CryptoPoolTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.channel = self.pool.channel()
+        self.results = []
+
+    def _callback(self, result, error):
+        self.results.append((result, error))
+
+    def test_runs_inline(self):
+        assert self.channel.runs_inline(None)
+        assert self.channel.runs_inline(self.pool.INLINE_SIZE - 1)
+        assert not self.channel.runs_inline(self.pool.INLINE_SIZE)
+
+        # Nothing runs inline while operations are waiting
+        self.channel.submit(str, 1, self.pool.INLINE_SIZE, self._callback)
+        assert not self.channel.runs_inline(None)
+        self.run_callbacks(self.channel)
+        assert self.channel.runs_inline(None)
+
+        self.pool.workers = 0
+        assert self.channel.runs_inline(self.pool.INLINE_SIZE)
+
+    def test_order(self):
+        thread_names = set()
+
+        def operation(i):
+            thread_names.add(threading.current_thread().name)
+            time.sleep(0.001 * (i % 3))
+            return i * 2
+
+        for i in range(100):
+            self.channel.submit(operation, i, 10, self._callback)
+        assert self.channel.queued_bytes > 0
+        self.run_callbacks(self.channel)
+
+        assert self.results == [(i * 2, None) for i in range(100)]
+        assert self.channel.queued_bytes == 0
+        assert threading.current_thread().name not in thread_names
+
+    def test_channels_independent(self):
+        other = self.pool.channel()
+        event = threading.Event()
+        self.channel.submit(lambda _: event.wait(5), None, 10, self._callback)
+        other.submit(str, 1, 10, self._callback)
+
+        self.run_callbacks(other)
+        assert self.results == [('1', None)]
+        event.set()
+        self.run_callbacks(self.channel)
+        assert self.results == [('1', None), (True, None)]
+
+    def test_error(self):
+        self.channel.submit(int, 'x', 10, self._callback)
+        self.channel.submit(int, '1', 10, self._callback)
+        self.run_callbacks(self.channel)
+
+        assert isinstance(self.results[0][1], ValueError)
+        assert self.results[1] == (1, None)
+
+    def test_when_idle(self):
+        idle = mock.Mock()
+        self.channel.when_idle(idle)
+        idle.assert_called_once_with()
+
+        idle.reset_mock()
+        self.channel.submit(str, 1, 10, self._callback)
+        self.channel.when_idle(idle)
+        idle.assert_not_called()
+        self.run_callbacks(self.channel)
+        idle.assert_called_once_with()
+
+    def test_cancel(self):
+        idle = mock.Mock()
+        self.channel.submit(str, 1, 10, self._callback)
+        self.channel.when_idle(idle)
+        self.channel.cancel()
+        assert self.channel.idle
+        assert self.channel.queued_bytes == 0
+
+        fn, args = self.calls.get(timeout=5)
+        fn(*args)
+        assert not self.results
+        idle.assert_not_called()
@@ -0,0 +1,109 @@
+from unittest import TestCase, mock
+
+from golem.diag.service import DiagnosticsOutputFormat
+from golem.network.transport.flowcontrol import ReceiveScheduler
+
+
+class StandInProtocol(object):
+
+    def __init__(self, name, messages, size=1):
+        self.name = name
+        self.messages = messages
+        self.size = size
+        self.dispatched = []
+
+    def dispatch_received(self, max_messages, max_bytes):
+        count = 0
+        while self.messages and count < max_messages \
+                and count * self.size < max_bytes:
+            self.messages -= 1
+            count += 1
+            self.dispatched.append(self.name)
+        return count, count * self.size
+
+    def has_received(self):
+        return self.messages > 0
+
+    def get_receive_stats(self):
+        return dict(peer=self.name, queued_messages=self.messages)
+
+
+class TestReceiveScheduler(TestCase):
+
+    def setUp(self):
+        self.reactor = mock.Mock()
+        self.scheduler = ReceiveScheduler(reactor=self.reactor)
+
+    def test_dispatch_inline(self):
+        protocol = StandInProtocol('a', 2)
+        self.scheduler.schedule(protocol)
+        assert protocol.dispatched == ['a', 'a']
+        self.reactor.callLater.assert_not_called()
+
+    def test_round_robin(self):
+        self.scheduler.MESSAGES_PER_TURN = 2
+        self.scheduler.MESSAGES_PER_TICK = 6
+        dispatched = []
+        flooding = StandInProtocol('a', 10)
+        other = StandInProtocol('b', 3)
+        flooding.dispatched = other.dispatched = dispatched
+
+        # Messages received during a tick are dispatched in turns
+        self.scheduler._dispatching = True
+        self.scheduler.schedule(flooding)
+        self.scheduler.schedule(other)
+        self.scheduler._dispatching = False
+        self.scheduler._tick()
+
+        assert dispatched == ['a', 'a', 'b', 'b', 'a', 'a']
+        self.reactor.callLater.assert_called_once_with(0, self.scheduler._tick)
+
+        # The rest is dispatched in the next tick, without inline dispatching
+        self.scheduler.schedule(other)
+        assert len(dispatched) == 6
+        self.scheduler._tick()
+        assert dispatched[6:] == ['b'] + ['a'] * 6
+        assert self.reactor.callLater.call_count == 1
+
+    def test_byte_budget(self):
+        self.scheduler.BYTES_PER_TURN = 10
+        self.scheduler.BYTES_PER_TICK = 20
+        protocol = StandInProtocol('a', 5, size=10)
+        self.scheduler.schedule(protocol)
+        assert protocol.messages == 3
+        assert self.reactor.callLater.call_count == 1
+
+    def test_dispatch_error(self):
+        failing = StandInProtocol('a', 2)
+        failing.dispatch_received = mock.Mock(side_effect=ValueError)
+        failing.transport = mock.Mock()
+        other = StandInProtocol('b', 1)
+
+        self.scheduler._dispatching = True
+        self.scheduler.schedule(failing)
+        self.scheduler.schedule(other)
+        self.scheduler._dispatching = False
+        self.scheduler._tick()
+
+        failing.transport.loseConnection.assert_called_once_with()
+        assert other.dispatched == ['b']
+        assert not self.scheduler._ready
+        self.reactor.callLater.assert_not_called()
+
+    def test_discard(self):
+        self.scheduler._dispatching = True
+        protocol = StandInProtocol('a', 1)
+        self.scheduler.schedule(protocol)
+        self.scheduler.discard(protocol)
+        self.scheduler.discard(protocol)
+        self.scheduler._dispatching = False
+        self.scheduler._tick()
+        assert not protocol.dispatched
+
+    def test_diagnostics(self):
+        self.scheduler._dispatching = True
+        self.scheduler.schedule(StandInProtocol('a', 4))
+        self.scheduler.schedule(StandInProtocol('b', 1))
+        data = self.scheduler.get_diagnostics(DiagnosticsOutputFormat.data)
+        assert data == [dict(peer='a', queued_messages=4),
+                        dict(peer='b', queued_messages=1)]
@@ -360,9 +360,8 @@ class TestBasicProtocol(unittest.TestCase):
         self.assertNotEqual(msg.timestamp, p.session.msgs[0].timestamp)
         self.assertTrue(p.send_message(msg))
         self.assertEqual(len(p.transport.buff), 2)
-        db = p.db
-        db.append_bytes(p.transport.buff[1])
-        m = p._data_to_messages()[0]
+        p.dataReceived(p.transport.buff[1])
+        m = p.session.msgs[1]
         self.assertEqual(m.timestamp, msg.timestamp)
         p.connectionLost()
         self.assertNotIn('session', p.__dict__)
@@ -10,12 +10,14 @@ from golem_messages import exceptions as msg_exceptions
 from golem_messages import message
 
 from golem import testutils
-from golem.network.transport import tcpnetwork
+from golem.network.transport import flowcontrol, tcpnetwork
 from golem.network.transport.tcpnetwork import (SafeProtocol, SocketAddress,
                                                 MAX_MESSAGE_SIZE, TCPNetwork)
 from golem.tools.assertlogs import LogTestCase
 from tests.factories import messages as msg_factories
 from tests.factories import p2p as p2p_factories
+from tests.golem.network.transport.test_cryptopool import \
+    CryptoPoolTestMixin
 
 MagicMock = mock.MagicMock
 gm_version = semantic_version.Version(golem_messages.__version__)
@@ -23,6 +25,8 @@ gm_version = semantic_version.Version(golem_messages.__version__)
 
 class TestConformance(unittest.TestCase, testutils.PEP8MixIn):
     PEP8_FILES = [
+        'golem/network/transport/cryptopool.py',
+        'golem/network/transport/flowcontrol.py',
         'golem/network/transport/tcpnetwork.py',
         'golem/network/transport/tcpnetwork_helpers.py',
     ]
@@ -65,12 +69,99 @@ class TestBasicProtocol(LogTestCase):
         self.assertIsNone(self.protocol.dataReceived(data))
         self.assertEqual(load_mock.call_count, 0)
 
+    @mock.patch(
+        'golem.network.transport.tcpnetwork.BasicProtocol._load_message'
+    )
+    def test_receive_flow_control(self, load_mock):
+        self.protocol.opened = True
+        self.protocol.receive_scheduler = mock.Mock()
+        self.protocol.spam_protector = mock.Mock()
+        frame = struct.pack("!L", MAX_MESSAGE_SIZE) + bytes(MAX_MESSAGE_SIZE)
+
+        self.protocol.dataReceived(frame * 5)
+        self.protocol.receive_scheduler.schedule.assert_called_once_with(
+            self.protocol)
+        self.protocol.transport.pauseProducing.assert_called_once_with()
+        assert self.protocol.get_receive_stats()['queued_messages'] == 5
+        assert self.protocol.get_receive_stats()['paused']
+
+        assert self.protocol.dispatch_received(3, 10 * MAX_MESSAGE_SIZE) \
+            == (3, 3 * MAX_MESSAGE_SIZE)
+        assert self.protocol.session.interpret.call_count == 3
+        assert self.protocol.has_received()
+        self.protocol.transport.resumeProducing.assert_not_called()
+
+        # The byte budget ends the turn
+        assert self.protocol.dispatch_received(3, MAX_MESSAGE_SIZE) \
+            == (1, MAX_MESSAGE_SIZE)
+        assert self.protocol.dispatch_received(3, MAX_MESSAGE_SIZE) \
+            == (1, MAX_MESSAGE_SIZE)
+        assert not self.protocol.has_received()
+        self.protocol.transport.resumeProducing.assert_called_once_with()
+        assert load_mock.call_count == 5
+
+    @mock.patch(
+        'golem.network.transport.tcpnetwork.BasicProtocol._load_message'
+    )
+    def test_connection_lost_clears_received(self, _):
+        self.protocol.opened = True
+        self.protocol.receive_scheduler = mock.Mock()
+        self.protocol.spam_protector = mock.Mock()
+        self.protocol.dataReceived(struct.pack("!L", 3) + b"abc")
+        assert self.protocol.has_received()
+
+        self.protocol.connectionLost()
+        assert not self.protocol.has_received()
+        self.protocol.receive_scheduler.discard.assert_called_once_with(
+            self.protocol)
+
+    @mock.patch(
+        'golem.network.transport.tcpnetwork.BasicProtocol._load_message',
+        side_effect=lambda data: data,
+    )
+    def test_connection_lost_dispatches_received(self, _):
+        self.protocol.opened = True
+        self.protocol.receive_scheduler = mock.Mock()
+        self.protocol.spam_protector = mock.Mock()
+        session = self.protocol.session
+        self.protocol.dataReceived(struct.pack("!L", 1) + b"a" +
+                                   struct.pack("!L", 1) + b"b")
+        assert not session.interpret.called
+
+        self.protocol.connectionLost()
+        assert [name for name, _, _ in session.method_calls] == \
+            ['interpret', 'interpret', 'dropped']
+        assert session.interpret.call_args_list == [
+            mock.call(b"a"), mock.call(b"b")]
+        assert not self.protocol.has_received()
+
+    @mock.patch(
+        'golem.network.transport.tcpnetwork.BasicProtocol._load_message',
+        side_effect=lambda data: data,
+    )
+    def test_connection_lost_dispatch_error(self, _):
+        self.protocol.opened = True
+        self.protocol.receive_scheduler = mock.Mock()
+        self.protocol.spam_protector = mock.Mock()
+        session = self.protocol.session
+        session.interpret.side_effect = ValueError
+        self.protocol.dataReceived(struct.pack("!L", 1) + b"a" +
+                                   struct.pack("!L", 1) + b"b")
+
+        self.protocol.connectionLost()
+        session.interpret.assert_called_once_with(b"a")
+        session.dropped.assert_called_once_with()
+        assert not self.protocol.has_received()
+
     def hello(self, version=str(gm_version)):
         msg = msg_factories.Hello()
         msg._version = version
         serialized = golem_messages.dump(msg, None, None)
-        self.protocol.db.append_len_prefixed_bytes(serialized)
-        self.protocol._data_to_messages()
+        self.protocol.opened = True
+        self.protocol.receive_scheduler = mock.Mock()
+        self.protocol.dataReceived(
+            struct.pack("!L", len(serialized)) + serialized)
+        self.protocol.dispatch_received(1, MAX_MESSAGE_SIZE)
 
     @mock.patch('golem.network.transport.tcpnetwork.BasicProtocol.send_message')
     @mock.patch('golem.network.transport.tcpnetwork.BasicProtocol.close')
@@ -128,6 +219,122 @@ class SafeProtocolTestCase(unittest.TestCase):
             self.protocol.session.interpret.assert_called_once_with(msg)
 
 
+class TestSafeProtocolCrypto(CryptoPoolTestMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        with mock.patch('golem.network.transport.cryptopool.crypto_pool',
+                        self.pool):
+            self.protocol = SafeProtocol(MagicMock())
+        self.protocol.opened = True
+        self.protocol.session = MagicMock()
+        self.protocol.transport = MagicMock()
+        self.protocol.spam_protector = MagicMock()
+        self.protocol.receive_scheduler = flowcontrol.ReceiveScheduler(
+            reactor=self.reactor)
+
+    def _receive(self, *frames):
+        self.protocol.dataReceived(b''.join(
+            struct.pack("!L", len(frame)) + frame for frame in frames))
+
+    def _interpreted(self):
+        return [args[0] for args, _ in
+                self.protocol.session.interpret.call_args_list]
+
+    @mock.patch('golem_messages.load', side_effect=lambda data, *_: data[:1])
+    def test_open_in_order(self, _):
+        self._receive(b'1', bytes(self.pool.INLINE_SIZE), b'2')
+        # The small message waits for the big one
+        assert self._interpreted() == [b'1']
+        assert self.protocol.get_receive_stats()['queued_bytes'] \
+            == self.pool.INLINE_SIZE + 1
+
+        self.run_callbacks(self.protocol._opening)
+        assert self._interpreted() == [b'1', b'\x00', b'2']
+
+        self._receive(b'3')
+        assert self._interpreted()[-1] == b'3'
+
+    @mock.patch('golem_messages.load', side_effect=lambda data, *_: data[:1])
+    def test_connection_lost_while_opening(self, _):
+        session = self.protocol.session
+        self.protocol.receive_scheduler._dispatching = True
+        self._receive(bytes(self.pool.INLINE_SIZE), b'1')
+        self.protocol.connectionLost()
+        session.dropped.assert_not_called()
+
+        # Messages received before are delivered, then the session is dropped
+        self.run_callbacks(self.protocol._opening)
+        assert [name for name, _, _ in session.method_calls] == \
+            ['interpret', 'interpret', 'dropped']
+        assert session.interpret.call_args_list == [
+            mock.call(b'\x00'), mock.call(b'1')]
+        assert not self.protocol.has_received()
+
+    @mock.patch('golem_messages.dump', side_effect=lambda msg, *_: msg.data)
+    def test_seal_in_order(self, _):
+        class Small(object):
+            data = b's'
+            sig = None
+
+        class Big(object):
+            data = bytes(self.pool.INLINE_SIZE)
+            sig = None
+
+        self.pool.record_size(Big, len(Big.data))
+        assert self.protocol.send_message(Small())
+        assert self.protocol.send_message(Big())
+        assert self.protocol.send_message(Small())
+        self.protocol.close()
+
+        write = self.protocol.transport.write
+        write.assert_called_once_with(struct.pack("!L", 1) + b's')
+        self.protocol.transport.loseConnection.assert_not_called()
+
+        self.run_callbacks(self.protocol._sealing)
+        assert [args[0] for args, _ in write.call_args_list] == [
+            struct.pack("!L", 1) + b's',
+            struct.pack("!L", len(Big.data)) + Big.data,
+            struct.pack("!L", 1) + b's',
+        ]
+        self.protocol.transport.loseConnection.assert_called_once_with()
+
+    @mock.patch('golem_messages.dump')
+    def test_seal_signs_message(self, dump):
+        class Small(object):
+            data = b's'
+            sig = None
+
+        class Big(object):
+            data = bytes(self.pool.INLINE_SIZE)
+            sig = None
+
+        def sign(msg, private_key, public_key):
+            msg.sig = (private_key, public_key)
+            return msg.data
+
+        dump.side_effect = sign
+        self.protocol.session.my_private_key = 'private'
+        self.protocol.session.theirs_public_key = 'public'
+        self.pool.record_size(Big, len(Big.data))
+        small, big = Small(), Big()
+        assert self.protocol.send_message(small)
+        assert self.protocol.send_message(big)
+        assert small.sig == ('private', 'public')
+
+        # The worker seals a copy, with keys of the session the message
+        # was sent in
+        self.protocol.session = None
+        self.run_callbacks(self.protocol._sealing)
+        assert dump.call_count == 2
+        assert dump.call_args == mock.call(mock.ANY, 'private', 'public')
+        assert dump.call_args[0][0] is not big
+        # The signature is copied back to the sender's message
+        assert big.sig == ('private', 'public')
+        assert self.protocol.transport.write.call_args_list[-1] == \
+            mock.call(struct.pack("!L", len(Big.data)) + Big.data)
+
+
 class TestSocketAddress(unittest.TestCase):
 
     def test_zone_index(self):
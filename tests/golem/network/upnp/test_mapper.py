@@ -1,3 +1,4 @@
+import time
 from unittest import TestCase
 from unittest.mock import Mock
 
@@ -73,6 +74,17 @@ class TestPortMapperManagerDiscovery(TestCase):
         manager.discover()
         assert all(mapper.discover_calls == 1 for mapper in mappers)
 
+    def test_discover_parallel(self):
+        slow = MockPortMapper(available=True)
+        slow.discover = Mock(side_effect=lambda: time.sleep(2))
+        fast = MockPortMapper(available=True)
+
+        manager = PortMapperManager(mappers=[slow, fast])
+        started = time.time()
+        manager.discover()
+        assert time.time() - started < 1
+        assert manager._active_mapper is fast
+
 
 class TestPortMapperManagerCreateMapping(TestCase):
 
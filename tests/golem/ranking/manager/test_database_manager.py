@@ -1,3 +1,6 @@
+from unittest import mock
+
+from golem.model import LocalRank
 from golem.ranking.helper.trust import Trust
 from golem.ranking.manager import database_manager as dm
 from golem.testutils import DatabaseFixture
@@ -251,3 +254,33 @@ class TestDatabaseManager(DatabaseFixture):
         """Should throw exception for WRONG_COMPUTED increase."""
         with self.assertRaises(KeyError):
             Trust.WRONG_COMPUTED.increase('alpha', 0.3)
+
+    def test_ledger_flush(self):
+        dm.increase_positive_computed('alpha', 0.5)
+        dm.increase_negative_payment('beta', 1.0)
+        self.assertIsNone(
+            LocalRank.select().where(LocalRank.node_id == 'alpha').first())
+        self.assertEqual(len(dm.get_local_rank_for_all()), 2)
+
+        dm.flush_local_ranks()
+        dm.increase_positive_computed('alpha', 0.25)
+        row = LocalRank.select().where(LocalRank.node_id == 'alpha').first()
+        self.assertEqual(row.positive_computed, 0.5)
+        self.assertEqual(dm.get_local_rank('alpha').positive_computed, 0.75)
+
+        dm.flush_local_ranks()
+        row = LocalRank.select().where(LocalRank.node_id == 'alpha').first()
+        self.assertEqual(row.positive_computed, 0.75)
+        row = LocalRank.select().where(LocalRank.node_id == 'beta').first()
+        self.assertEqual(row.negative_payment, 1.0)
+        self.assertEqual(row.positive_computed, 0.0)
+
+    def test_ledger_flush_failure_keeps_deltas(self):
+        dm.increase_positive_computed('alpha', 0.5)
+        with mock.patch.object(dm.TrustLedger, '_write',
+                               side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                dm.flush_local_ranks()
+        self.assertEqual(dm.get_local_rank('alpha').positive_computed, 0.5)
+        dm.flush_local_ranks()
+        self.assertEqual(dm.get_local_rank('alpha').positive_computed, 0.5)
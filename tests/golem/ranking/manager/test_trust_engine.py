@@ -0,0 +1,74 @@
+from unittest import TestCase
+
+from golem.ranking.helper import min_max_utility as util
+from golem.ranking.manager.trust_engine import TrustEngine, INITIAL_CAPACITY
+
+
+class TestTrustEngine(TestCase):
+    def setUp(self):
+        self.engine = TrustEngine()
+        self.engine.load_local(['ABC', 'DEF'], [0.5, 0.0], [0.0, 0.2])
+
+    def test_load_local(self):
+        assert len(self.engine) == 2
+        assert self.engine.working_vec() == {
+            'ABC': [[0.5, 1.0], [0.0, 1.0]],
+            'DEF': [[0.0, 1.0], [0.2, 1.0]],
+        }
+        assert self.engine.prev_rank() == {
+            'ABC': [0.5, 0.0],
+            'DEF': [0.0, 0.2],
+        }
+
+    def test_gossip(self):
+        gossip = dict(self.engine.gossip(k=1))
+        assert gossip['ABC'] == [[0.25, 0.5], [0.0, 0.5]]
+        assert gossip['DEF'] == [[0.0, 0.5], [0.1, 0.5]]
+        assert isinstance(gossip['ABC'][0][0], float)
+
+    def test_add_gossip(self):
+        self.engine.clear_working()
+        assert self.engine.working_count() == 0
+        self.engine.add_gossip([
+            [['ABC', [[0.2, 0.5], [0.1, 0.5]]],
+             ['GHI', [[0.3, 0.5], [0.3, 0.5]]]],
+            [['ABC', [[0.2, 0.5], [0.1, 0.5]]],
+             ['wrong', [[0.1], [0.1, 0.5]]],
+             'wrong']
+        ])
+        working_vec = self.engine.working_vec()
+        assert set(working_vec) == {'ABC', 'GHI'}
+        assert working_vec['ABC'] == [[0.4, 1.0], [0.2, 1.0]]
+        assert working_vec['GHI'] == [[0.3, 0.5], [0.3, 0.5]]
+
+    def test_difference_and_prev_rank(self):
+        assert self.engine.difference() == 0.0
+        self.engine.clear_working()
+        self.engine.add_gossip([[['ABC', [[0.3, 0.5], [0.0, 0.5]]],
+                                 ['GHI', [[0.1, 0.5], [0.3, 0.5]]]]])
+        comp = util.vec_to_trust([0.3, 0.5])
+        expected = abs(comp - 0.5) + util.vec_to_trust([0.1, 0.5]) + \
+            util.vec_to_trust([0.3, 0.5])
+        self.assertAlmostEqual(self.engine.difference(), expected)
+
+        self.engine.commit_prev_rank()
+        prev_rank = self.engine.prev_rank()
+        self.assertAlmostEqual(prev_rank['ABC'][0], comp)
+        assert prev_rank['DEF'] == [0.0, 0.2]
+        assert len(prev_rank) == 3
+        assert self.engine.difference() == 0.0
+
+    def test_global_ranks(self):
+        self.engine.clear_working()
+        self.engine.add_gossip([[['ABC', [[3.0, 2.0], [-1.0, 2.0]]]]])
+        assert self.engine.global_ranks() == [('ABC', 1.0, 0.0, 2.0, 2.0)]
+
+    def test_grow(self):
+        node_ids = ['node{}'.format(i) for i in range(3 * INITIAL_CAPACITY)]
+        self.engine.load_local(node_ids, [0.1] * len(node_ids),
+                               [0.2] * len(node_ids))
+        self.engine.add_gossip([[[node_ids[-1], [[1.0, 1.0], [1.0, 1.0]]]]])
+        working_vec = self.engine.working_vec()
+        assert len(working_vec) == len(node_ids)
+        assert working_vec[node_ids[0]] == [[0.1, 1.0], [0.2, 1.0]]
+        assert working_vec[node_ids[-1]] == [[1.1, 2.0], [1.2, 2.0]]
@@ -5,7 +5,7 @@ import shutil
 import time
 import uuid
 
-from twisted.internet.defer import Deferred
+from twisted.internet.defer import Deferred, succeed
 
 from golem.core.deferred import sync_wait
 from golem.core.keysauth import KeysAuth
@@ -203,6 +203,39 @@ class TestResourceServer(testwithreactor.TestDirFixtureWithReactor):
 
         assert self.client.downloaded
 
+    def testCachedPackageNotDownloaded(self):
+        package_path, _ = self.resource_server.packager.create(
+            os.path.join(self.path, 'package.zip'), self.target_resources)
+        package_dir = os.path.dirname(package_path)
+        resource = ['package_hash', [os.path.basename(package_path)]]
+
+        def run(request, **_kwargs):
+            return succeed(request.method(*request.args, **request.kwargs))
+
+        rs = self.resource_server
+        rs.resource_manager.pull_resource = mock.Mock()
+        rs.resource_manager.storage.get_dir = mock.Mock(
+            return_value=package_dir)
+
+        with mock.patch('golem.resource.base.resourceserver.async_run', run):
+            rs._extract_task_resources(resource, self.task_id)
+        assert rs.extraction_cache.has_package('package_hash')
+        assert self.client.downloaded
+
+        new_task_id = str(uuid.uuid4())
+        new_task_dir = os.path.join(self.path, new_task_id)
+        rs.resource_manager.storage.get_dir.return_value = new_task_dir
+        self.client.downloaded = False
+        rs.download_resources([resource], new_task_id)
+
+        with mock.patch('golem.resource.base.resourceserver.async_run', run):
+            rs._download_resources(async_=False)
+
+        assert not rs.resource_manager.pull_resource.called
+        assert not rs.pending_resources
+        assert self.client.downloaded
+        assert sorted(os.listdir(new_task_dir)) == ['test_dir', 'test_file']
+
     def testVerifySig(self):
         test_str = "A test string to sign"
         sig = self.resource_server.sign(test_str)
@@ -0,0 +1,55 @@
+import os
+import threading
+
+import pytest
+
+from golem.resource.hyperdrive.resource import ResourceCache, Resource
+
+
+def skip_benchmarks():
+    if os.environ.get('benchmarks', False):
+        return False
+    return True
+
+
+def stress(cache: ResourceCache, tasks: int, resources: int, readers: int):
+    """ Add, read and remove resources of many tasks from concurrent
+    writer and reader threads """
+    task_ids = ['task-{}'.format(i) for i in range(tasks)]
+    done = threading.Event()
+
+    def write(task_id):
+        for i in range(resources):
+            cache.set_prefix(task_id, task_id)
+            cache.add_resource(Resource(
+                '{}-{}'.format(task_id, i), task_id=task_id,
+                path=os.path.join(task_id, str(i)), files=['file']))
+        for i in range(resources):
+            cache.get_by_hash('{}-{}'.format(task_id, i))
+            cache.get_by_path(os.path.join(task_id, str(i)))
+        cache.remove(task_id)
+
+    def read():
+        while not done.is_set():
+            for task_id in task_ids:
+                cache.get_resources(task_id)
+                cache.get_prefix(task_id)
+
+    writers = [threading.Thread(target=write, args=(task_id,))
+               for task_id in task_ids]
+    reader_threads = [threading.Thread(target=read) for _ in range(readers)]
+    for thread in reader_threads + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    done.set()
+    for thread in reader_threads:
+        thread.join()
+
+
+@pytest.mark.skipif(skip_benchmarks(), reason="skip benchmarks by default")
+@pytest.mark.parametrize("tasks", [1, 8, 16])
+@pytest.mark.benchmark(min_rounds=10, warmup=False)
+def test_concurrent_access(benchmark, tasks: int):
+    benchmark(lambda: stress(ResourceCache(), tasks, resources=200,
+                             readers=4))
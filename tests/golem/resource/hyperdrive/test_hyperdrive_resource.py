@@ -1,4 +1,5 @@
 import os
+import threading
 import uuid
 from pathlib import Path
 
@@ -111,6 +112,62 @@ class TestResourceCache(TempDirFixture):
         self.cache.clear()
         assert self._all_default_empty()
 
+    def test_same_hash_in_other_task(self):
+        resource = Resource(self.resource_hash, task_id=self.task_id,
+                            path=self.resource_path, files=['file'])
+        other = Resource(self.resource_hash, task_id=str(uuid.uuid4()),
+                         path=self.resource_path, files=['file'])
+        self.cache.add_resource(resource)
+        self.cache.add_resource(other)
+
+        # Index entries replaced by another task are kept
+        assert self.cache.remove(self.task_id) == [resource]
+        assert self.cache.get_by_hash(self.resource_hash) is other
+        assert self.cache.get_by_path(self.resource_path) is other
+        assert self.cache.has_resource(other)
+
+    def test_concurrent_access(self):
+        task_ids = [str(uuid.uuid4()) for _ in range(8)]
+        errors = []
+
+        def write(task_id):
+            try:
+                for i in range(200):
+                    self.cache.set_prefix(task_id, self.prefix)
+                    self.cache.add_resource(Resource(
+                        '{}-{}'.format(task_id, i), task_id=task_id,
+                        path=os.path.join(task_id, str(i)), files=['f']))
+                    if i % 50 == 49:
+                        self.cache.remove(task_id)
+            except Exception as exc:  # pylint: disable=broad-except
+                errors.append(exc)
+
+        def read():
+            try:
+                for _ in range(1000):
+                    for task_id in task_ids:
+                        for res in self.cache.get_resources(task_id):
+                            assert res.task_id == task_id
+                        self.cache.get_prefix(task_id)
+            except Exception as exc:  # pylint: disable=broad-except
+                errors.append(exc)
+
+        threads = [threading.Thread(target=write, args=(task_id,))
+                   for task_id in task_ids]
+        threads += [threading.Thread(target=read) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors
+        # Each task was removed after its last resource was added
+        for task_id in task_ids:
+            assert self.cache.get_resources(task_id) == []
+            assert self.cache.get_by_hash('{}-199'.format(task_id)) is None
+        assert not self.cache._hash_to_res
+        assert not self.cache._path_to_res
+
     def _add_all(self):
         resource = Resource(
             self.resource_hash,
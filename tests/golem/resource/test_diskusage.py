@@ -0,0 +1,107 @@
+import os
+import shutil
+from unittest.mock import patch
+
+from golem.resource.diskusage import DiskUsageTracker
+from golem.testutils import TempDirFixture
+
+
+class TestDiskUsageTracker(TempDirFixture):
+
+    def setUp(self):
+        super().setUp()
+        self.tracker = DiskUsageTracker()
+
+    def _write(self, *path, size):
+        path = os.path.join(self.tempdir, *path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b'a' * size)
+        return path
+
+    def test_initial_scan(self):
+        self._write('a', size=10)
+        self._write('sub', 'b', size=20)
+        assert self.tracker.size(self.tempdir) == 30
+
+    def test_size_does_not_walk_after_scan(self):
+        self.tracker.size(self.tempdir)
+        path = self._write('a', size=10)
+        self.tracker.path_added(path)
+
+        with patch('os.walk', side_effect=AssertionError):
+            assert self.tracker.size(self.tempdir) == 10
+
+    def test_add_and_remove(self):
+        self.tracker.size(self.tempdir)
+
+        path = self._write('a', size=10)
+        self.tracker.path_added(path)
+        path = self._write('a', size=15)
+        self.tracker.path_added(path)
+        assert self.tracker.size(self.tempdir) == 15
+
+        self._write('dir', 'b', size=5)
+        self._write('dir', 'sub', 'c', size=5)
+        self.tracker.path_added(os.path.join(self.tempdir, 'dir'))
+        assert self.tracker.size(self.tempdir) == 25
+
+        os.remove(path)
+        self.tracker.path_removed(path)
+        assert self.tracker.size(self.tempdir) == 10
+
+        shutil.rmtree(os.path.join(self.tempdir, 'dir'))
+        self.tracker.path_removed(os.path.join(self.tempdir, 'dir'))
+        assert self.tracker.size(self.tempdir) == 0
+
+    def test_untracked_paths_are_ignored(self):
+        self.tracker.size(os.path.join(self.tempdir, 'root'))
+        path = self._write('outside', size=10)
+        self.tracker.path_added(path)
+        assert self.tracker.size(os.path.join(self.tempdir, 'root')) == 0
+
+    def test_nested_roots(self):
+        self._write('a', size=10)
+        self._write('inner', 'b', size=20)
+        assert self.tracker.size(self.tempdir) == 30
+        assert self.tracker.size(os.path.join(self.tempdir, 'inner')) == 20
+        assert self.tracker.size(self.tempdir) == 30
+
+        path = self._write('inner', 'c', size=5)
+        self.tracker.path_added(path)
+        assert self.tracker.size(os.path.join(self.tempdir, 'inner')) == 25
+        assert self.tracker.size(self.tempdir) == 35
+
+    def test_scan_reconciles(self):
+        self.tracker.size(self.tempdir)
+        # Changes that were not reported
+        self._write('a', size=10)
+        assert self.tracker.size(self.tempdir) == 0
+
+        self.tracker.scan(self.tempdir)
+        assert self.tracker.size(self.tempdir) == 10
+
+        os.remove(os.path.join(self.tempdir, 'a'))
+        self.tracker.scan(self.tempdir)
+        assert self.tracker.size(self.tempdir) == 0
+
+    def test_removal_does_not_scan_other_files(self):
+        for i in range(10):
+            self._write('dir', str(i), size=1)
+        path = self._write('other', 'a', size=1)
+        assert self.tracker.size(self.tempdir) == 11
+
+        with patch('golem.resource.diskusage._is_within',
+                   side_effect=AssertionError):
+            self.tracker.path_removed(os.path.join(self.tempdir, 'missing'))
+            self.tracker.path_removed('/outside/of/roots')
+            os.remove(path)
+            self.tracker.path_removed(path)
+        assert self.tracker.size(self.tempdir) == 10
+
+        shutil.rmtree(os.path.join(self.tempdir, 'dir'))
+        self.tracker.path_removed(os.path.join(self.tempdir, 'dir'))
+        assert self.tracker.size(self.tempdir) == 0
+        # Index entries of directories without files are dropped
+        assert not self.tracker._dirs
+        assert not self.tracker._children
@@ -0,0 +1,114 @@
+import os
+
+from golem.resource.extractioncache import ExtractionCache
+from golem.task.result.resultpackage import ZipPackager
+from golem.testutils import TempDirFixture, PEP8MixIn
+
+
+class TestExtractionCache(TempDirFixture, PEP8MixIn):
+    PEP8_FILES = ['golem/resource/extractioncache.py']
+
+    def setUp(self):
+        super().setUp()
+        self.packager = ZipPackager()
+        self.cache_dir = os.path.join(self.tempdir, 'cache')
+        self.cache = ExtractionCache(self.cache_dir)
+
+    def _package(self, name, contents):
+        src_dir = os.path.join(self.tempdir, 'src', name)
+        files = []
+        for file_name, content in contents.items():
+            path = os.path.join(src_dir, file_name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(content)
+            files.append(path)
+        package_path, _ = self.packager.create(
+            os.path.join(self.tempdir, name + '.zip'), files)
+        return package_path
+
+    def _read_tree(self, root_dir):
+        tree = dict()
+        for root, _, file_names in os.walk(root_dir):
+            for name in file_names:
+                path = os.path.join(root, name)
+                with open(path, 'rb') as f:
+                    tree[os.path.relpath(path, root_dir)] = f.read()
+        return tree
+
+    def test_assemble(self):
+        contents = {'scene.blend': b'scene',
+                    os.path.join('tex', 'wood.png'): b'wood',
+                    os.path.join('tex', 'copy.png'): b'wood'}
+        package = self._package('scene', contents)
+        assert not self.cache.has_package('hash')
+        assert not self.cache.assemble('hash', self.tempdir)
+
+        self.cache.add('hash', [package], self.packager)
+        assert self.cache.has_package('hash')
+        # Identical files are stored once
+        assert self.cache.size == len(b'scene') + len(b'wood')
+
+        targets = [os.path.join(self.tempdir, 'task{}'.format(i))
+                   for i in range(2)]
+        for target in targets:
+            assert self.cache.assemble('hash', target)
+            assert self._read_tree(target) == contents
+
+        first, second = [os.stat(os.path.join(target, 'scene.blend'))
+                         for target in targets]
+        assert first.st_ino == second.st_ino
+
+    def test_assemble_replaces_existing_files(self):
+        package = self._package('scene', {'scene.blend': b'scene'})
+        self.cache.add('hash', [package], self.packager)
+
+        target = os.path.join(self.tempdir, 'task')
+        os.makedirs(target)
+        with open(os.path.join(target, 'scene.blend'), 'wb') as f:
+            f.write(b'stale')
+        assert self.cache.assemble('hash', target)
+        assert self._read_tree(target) == {'scene.blend': b'scene'}
+
+    def test_missing_file(self):
+        package = self._package('scene', {'scene.blend': b'scene'})
+        self.cache.add('hash', [package], self.packager)
+
+        files_dir = os.path.join(self.cache_dir, 'files')
+        for root, _, file_names in os.walk(files_dir):
+            for name in file_names:
+                os.remove(os.path.join(root, name))
+        assert not self.cache.has_package('hash')
+
+    def test_index_persisted(self):
+        package = self._package('scene', {'scene.blend': b'scene'})
+        self.cache.add('hash', [package], self.packager)
+
+        cache = ExtractionCache(self.cache_dir)
+        assert cache.has_package('hash')
+        assert cache.size == self.cache.size
+
+    def test_invalid_index(self):
+        os.makedirs(self.cache_dir)
+        with open(os.path.join(self.cache_dir, 'index.json'), 'w') as f:
+            f.write('{')
+        cache = ExtractionCache(self.cache_dir)
+        assert not cache.has_package('hash')
+
+    def test_eviction(self):
+        cache = ExtractionCache(self.cache_dir, max_size=25)
+        shared = b's' * 5
+        for i in range(3):
+            package = self._package('pkg{}'.format(i), {
+                'data': str(i).encode() * 10,
+                'shared': shared
+            })
+            cache.add('hash{}'.format(i), [package], self.packager)
+            cache.assemble('hash0', os.path.join(self.tempdir, 'task'))
+
+        # The least recently used package is evicted, files used by other
+        # packages are kept
+        assert cache.has_package('hash0')
+        assert not cache.has_package('hash1')
+        assert cache.has_package('hash2')
+        assert cache.size == 25
@@ -0,0 +1,140 @@
+import os
+import time
+from unittest import mock
+
+from golem.core.simplehash import SimpleHash
+from golem.resource.indexer import ResourceIndexer, RACY_INTERVAL
+from golem.resource.resource import TaskResourceHeader
+from golem.testutils import TempDirFixture, PEP8MixIn
+
+
+class TestResourceIndexer(TempDirFixture, PEP8MixIn):
+    PEP8_FILES = ['golem/resource/indexer.py']
+
+    def setUp(self):
+        super().setUp()
+        self.indexer = ResourceIndexer(max_workers=4)
+        self.files = [self._write('file{}'.format(i), str(i) * 1000)
+                      for i in range(10)]
+
+    def _write(self, name, content, age=10 * RACY_INTERVAL):
+        path = os.path.join(self.tempdir, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_hash_files(self):
+        hashes = self.indexer.hash_files(self.files)
+        assert hashes == {path: SimpleHash.hash_file_base64(path)
+                          for path in self.files}
+        assert self.indexer.hash_file(self.files[0]) == hashes[self.files[0]]
+
+    def test_cached(self):
+        self.indexer.hash_files(self.files)
+        with mock.patch.object(SimpleHash, 'hash_file_base64') as hash_file:
+            self.indexer.hash_files(self.files)
+        assert not hash_file.called
+
+        # A changed file is read again
+        self._write('file0', 'changed')
+        with mock.patch.object(SimpleHash, 'hash_file_base64',
+                               return_value=b'hash') as hash_file:
+            hashes = self.indexer.hash_files(self.files)
+        hash_file.assert_called_once_with(self.files[0])
+        assert hashes[self.files[0]] == b'hash'
+
+    def test_recently_modified_not_cached(self):
+        path = self._write('new', 'new', age=0)
+        self.indexer.hash_file(path)
+        with mock.patch.object(SimpleHash, 'hash_file_base64') as hash_file:
+            self.indexer.hash_file(path)
+        assert hash_file.called
+        assert not self.indexer._changed
+
+    def test_cache_file(self):
+        cache_file = os.path.join(self.tempdir, 'hashes.json')
+        self.indexer.set_cache_file(cache_file)
+        hashes = self.indexer.hash_files(self.files)
+        # Saved on demand only
+        assert not os.path.exists(cache_file)
+        self.indexer.save()
+        assert os.path.exists(cache_file)
+
+        indexer = ResourceIndexer()
+        indexer.set_cache_file(cache_file)
+        with mock.patch.object(SimpleHash, 'hash_file_base64') as hash_file:
+            assert indexer.hash_files(self.files) == hashes
+        assert not hash_file.called
+        # Nothing to save when all hashes were cached
+        assert not indexer._changed
+
+    def test_invalid_cache_file(self):
+        cache_file = os.path.join(self.tempdir, 'hashes.json')
+        with open(cache_file, 'w') as f:
+            f.write('{')
+        self.indexer.set_cache_file(cache_file)
+        assert self.indexer.hash_files(self.files)
+
+    def test_max_entries(self):
+        indexer = ResourceIndexer(max_entries=3)
+        indexer.hash_files(self.files)
+        with mock.patch.object(SimpleHash, 'hash_file_base64',
+                               return_value=b'hash') as hash_file:
+            indexer.hash_files(self.files[-3:])
+            assert not hash_file.called
+            indexer.hash_files(self.files[:1])
+            assert hash_file.called
+
+
+class TestIndexedHeaders(TempDirFixture):
+
+    def setUp(self):
+        super().setUp()
+        self.root = os.path.join(self.tempdir, 'resources')
+        self.files = []
+        for dir_name in ('', 'textures', os.path.join('textures', 'hd')):
+            os.makedirs(os.path.join(self.root, dir_name), exist_ok=True)
+            for i in range(5):
+                path = os.path.join(self.root, dir_name, 'file{}'.format(i))
+                with open(path, 'w') as f:
+                    f.write(dir_name * i)
+                self.files.append(path)
+
+    def _expected(self, dir_name, root, chosen=None):
+        header = TaskResourceHeader(dir_name)
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if os.path.isfile(path) and (not chosen or path in chosen):
+                header.files_data.append(
+                    (name, SimpleHash.hash_file_base64(path)))
+        header.sub_dir_headers = [
+            self._expected(name, os.path.join(root, name), chosen)
+            for name in os.listdir(root)
+            if os.path.isdir(os.path.join(root, name))]
+        return header
+
+    def test_build(self):
+        expected = self._expected('resources', self.root)
+        for _ in range(2):
+            header = TaskResourceHeader.build('resources', self.root)
+            assert header.to_string() == expected.to_string()
+
+    def _flatten(self, header, prefix=''):
+        files = [(os.path.join(prefix, name), file_hash)
+                 for name, file_hash in header.files_data]
+        for sub_header in header.sub_dir_headers:
+            files += self._flatten(sub_header,
+                                   os.path.join(prefix, sub_header.dir_name))
+        return sorted(files)
+
+    def test_build_from_chosen(self):
+        chosen = self.files[::2]
+        header = TaskResourceHeader.build_from_chosen('resources', self.root,
+                                                      chosen)
+        delta = TaskResourceHeader.build_header_delta_from_header(
+            TaskResourceHeader('resources'), self.root, chosen)
+        expected = self._expected('resources', self.root, chosen)
+        assert self._flatten(header) == self._flatten(expected)
+        assert delta == expected
@@ -1,4 +1,5 @@
 # pylint: disable=protected-access
+import datetime
 import os
 import types
 import uuid
@@ -14,12 +15,19 @@ from golem.network.hyperdrive.client import HyperdriveClientOptions, \
 from golem.resource.dirmanager import DirManager
 from golem.resource.hyperdrive.resource import ResourceStorage
 from golem.resource.hyperdrive.resourcesmanager import HyperdriveResourceManager
+from golem.model import ResourceHandshakeResult
 from golem.resource.resourcehandshake import ResourceHandshake, \
-    ResourceHandshakeSessionMixin
+    ResourceHandshakeResults, ResourceHandshakeSessionMixin
 from golem.task.acl import get_acl
 from golem.testutils import TempDirFixture, DatabaseFixture
 
 
+def sync_async_run(request, success=None, error=None):
+    result = request.method(*request.args, **request.kwargs)
+    if success:
+        success(result)
+
+
 class TestResourceHandshake(TempDirFixture):
 
     def setUp(self):
@@ -69,9 +77,55 @@ class TestResourceHandshake(TempDirFixture):
         assert handshake.finished()
 
 
+@patch('golem.resource.resourcehandshake.async_run', sync_async_run)
+class TestResourceHandshakeResults(DatabaseFixture):
+
+    def setUp(self):
+        super().setUp()
+        self.results = ResourceHandshakeResults()
+        self.key_id = str(uuid.uuid4())
+        self.expires = datetime.datetime.now() + datetime.timedelta(hours=1)
+
+    def test_save(self):
+        assert not self.results.get(self.key_id)
+        self.results.save(self.key_id, self.expires)
+        assert self.results.get(self.key_id).expires == self.expires
+
+        # Loaded after a restart
+        results = ResourceHandshakeResults()
+        assert results.get(self.key_id).expires == self.expires
+
+        results.remove(self.key_id)
+        assert not results.get(self.key_id)
+        assert not ResourceHandshakeResults().get(self.key_id)
+
+    def test_expired(self):
+        expired = str(uuid.uuid4())
+        self.results.save(expired, datetime.datetime.now())
+        assert not self.results.get(expired)
+
+        self.results.save(self.key_id, self.expires)
+        assert not ResourceHandshakeResult.select().where(
+            ResourceHandshakeResult.node == expired).exists()
+
+    def test_count_exchange(self):
+        assert not self.results.count_exchange(self.key_id)
+        self.results.save(self.key_id, self.expires)
+
+        with patch.object(ResourceHandshakeResult, 'select') as select:
+            assert self.results.count_exchange(self.key_id).exchanges == 1
+            assert self.results.count_exchange(self.key_id).exchanges == 2
+        assert not select.called
+
+        stored = ResourceHandshakeResult.get(
+            ResourceHandshakeResult.node == self.key_id)
+        assert stored.exchanges == 2
+
+
+@patch('golem.resource.resourcehandshake.async_run', sync_async_run)
 @patch('twisted.internet.reactor', create=True)
 @patch('twisted.internet.task', create=True)
-class TestResourceHandshakeSessionMixin(TempDirFixture):
+class TestResourceHandshakeSessionMixin(DatabaseFixture):
 
     def setUp(self):
         super().setUp()
@@ -384,6 +438,70 @@ class TestResourceHandshakeSessionMixin(TempDirFixture):
         session._finalize_handshake(session.key_id)
         assert session.send.called
 
+    def test_finalize_handshake_persisted(self, *_):
+        session = MockTaskSession(self.tempdir)
+        key_id = session.key_id
+        queued = Mock()
+        msg = message.WantToComputeTask(task_id='task')
+        session._queue_until_handshake(queued, msg)
+
+        handshake = ResourceHandshake()
+        handshake.local_result = True
+        handshake.remote_result = True
+        session._set_handshake(key_id, handshake)
+        session._finalize_handshake(key_id)
+
+        # Queued task requests are handled after the handshake
+        queued.assert_called_once_with(msg)
+        assert session._get_handshake_result(key_id)
+
+        # Not required after a restart, until the result expires
+        session._remove_handshake(key_id)
+        session.task_server.resource_handshake_results = \
+            ResourceHandshakeResults()
+        assert not session._handshake_required(key_id)
+
+        session._get_handshake_result(key_id).expires = \
+            datetime.datetime.now() - datetime.timedelta(seconds=1)
+        assert session._handshake_required(key_id)
+
+    def test_block_peer_removes_result(self, *_):
+        session = MockTaskSession(self.tempdir)
+        session._save_handshake_result(session.key_id)
+        session._block_peer(session.key_id)
+        assert not session._get_handshake_result(session.key_id)
+
+    def test_count_exchange(self, *_):
+        session = MockTaskSession(self.tempdir)
+        session._start_handshake = Mock()
+        key_id = session.key_id
+
+        # Peers without a persisted result are not refreshed
+        session._count_exchange(key_id)
+        assert not session._start_handshake.called
+
+        session._save_handshake_result(key_id)
+        for _ in range(session.HANDSHAKE_REFRESH_EXCHANGES):
+            session._count_exchange(key_id)
+        assert session._get_handshake_result(key_id).exchanges == \
+            session.HANDSHAKE_REFRESH_EXCHANGES
+        assert not session._start_handshake.called
+
+        session._get_handshake_result(key_id).expires = \
+            datetime.datetime.now() + datetime.timedelta(minutes=1)
+        session._count_exchange(key_id)
+        session._start_handshake.assert_called_once_with(key_id,
+                                                         refresh=True)
+
+    def test_refresh_not_in_progress(self, *_):
+        session = MockTaskSession(self.tempdir)
+        handshake = ResourceHandshake(refresh=True)
+        handshake.start(self.tempdir)
+        session._set_handshake(session.key_id, handshake)
+
+        assert not session._handshake_required(session.key_id)
+        assert not session._handshake_in_progress(session.key_id)
+
     def test_handshake_error(self, *_):
         session = MockTaskSession(self.tempdir)
         session._block_peer = Mock()
@@ -395,6 +513,23 @@ class TestResourceHandshakeSessionMixin(TempDirFixture):
         assert session.task_server.task_computer.session_closed.called
         assert not session.disconnect.called
 
+    def test_refresh_error(self, *_):
+        session = MockTaskSession(self.tempdir)
+        key_id = session.key_id
+        session._save_handshake_result(key_id)
+        handshake = ResourceHandshake(refresh=True)
+        handshake.start(self.tempdir)
+        session._set_handshake(key_id, handshake)
+
+        session._handshake_error(key_id, 'Test error')
+
+        # The result stays valid until it expires
+        assert not session._is_peer_blocked(key_id)
+        assert session._get_handshake_result(key_id)
+        assert not session._get_handshake(key_id)
+        assert not session.task_server.task_computer.session_closed.called
+        assert not session.dropped.called
+
     def test_handshake_timeout(self, *_):
         session = MockTaskSession(self.tempdir)
         session._block_peer = Mock()
@@ -628,6 +763,7 @@ class MockTaskSession(ResourceHandshakeSessionMixin):
             node=Mock(key=str(uuid.uuid4())),
             acl=get_acl(Path(data_dir)),
             resource_handshakes=dict(),
+            resource_handshake_results=ResourceHandshakeResults(),
             task_manager=Mock(
                 task_result_manager=Mock(
                     resource_manager=resource_manager
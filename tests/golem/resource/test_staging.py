@@ -0,0 +1,77 @@
+import os
+from unittest import mock
+
+from golem.resource.staging import is_staged, link_file, stage_resources
+from golem.testutils import TempDirFixture, PEP8MixIn
+
+
+class TestStaging(TempDirFixture, PEP8MixIn):
+    PEP8_FILES = ['golem/resource/staging.py']
+
+    def setUp(self):
+        super().setUp()
+        self.src_dir = os.path.join(self.tempdir, 'src')
+        self.target_dir = os.path.join(self.tempdir, 'test')
+        self.resources = [
+            self._write(os.path.join(self.src_dir, 'scene.blend'), 'scene'),
+            self._write(os.path.join(self.src_dir, 'tex', 'wood.png'), 'wood')
+        ]
+        self.additional = [
+            self._write(os.path.join(self.tempdir, 'extra', 'docker.py'), 'x')
+        ]
+
+    @staticmethod
+    def _write(path, content):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def _staged_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.target_dir)
+            for root, _, names in os.walk(self.target_dir) for name in names)
+
+    def test_stage_resources(self):
+        stage_resources(self.target_dir, self.resources, self.additional)
+        assert self._staged_files() == sorted([
+            'docker.py', 'scene.blend', os.path.join('tex', 'wood.png')])
+        for src, rel_path in [(self.resources[1], 'tex/wood.png'),
+                              (self.additional[0], 'docker.py')]:
+            dst = os.path.join(self.target_dir, rel_path)
+            assert os.path.samefile(src, dst)
+
+    def test_no_resources(self):
+        stage_resources(self.target_dir, [])
+        assert os.path.isdir(self.target_dir)
+        assert not self._staged_files()
+
+    def test_restage(self):
+        stage_resources(self.target_dir, self.resources, self.additional)
+        stale = self._write(os.path.join(self.target_dir, 'old', 'f'), 'old')
+
+        with mock.patch('golem.resource.staging.link_file') as link:
+            stage_resources(self.target_dir, self.resources, self.additional)
+        assert not link.called
+        assert not os.path.exists(stale)
+        assert not os.path.exists(os.path.dirname(stale))
+
+        # A replaced source file is staged again, files that are no longer
+        # resources are removed
+        os.remove(self.resources[0])
+        self._write(self.resources[0], 'new scene')
+        stage_resources(self.target_dir, self.resources)
+        assert self._staged_files() == sorted([
+            'scene.blend', os.path.join('tex', 'wood.png')])
+        with open(os.path.join(self.target_dir, 'scene.blend')) as f:
+            assert f.read() == 'new scene'
+
+    def test_copy_fallback(self):
+        dst = os.path.join(self.tempdir, 'copy.blend')
+        with mock.patch('os.link', side_effect=OSError):
+            link_file(self.resources[0], dst)
+        assert not os.path.samefile(self.resources[0], dst)
+        assert is_staged(self.resources[0], dst)
+
+        self._write(dst, 'modified')
+        assert not is_staged(self.resources[0], dst)
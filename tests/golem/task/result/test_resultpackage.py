@@ -98,6 +98,23 @@ class TestEncryptingPackager(PackageDirContentsFixture):
 
         self.assertTrue(len(files) == len(self.all_files))
 
+    def testExtractInPlace(self):
+        ep = EncryptingPackager(self.secret)
+        ep.create(self.out_path, self.disk_files, self.memory_files)
+        os.remove(ep.package_name(self.out_path))
+        output_dir = os.path.join(self.tempdir, 'extracted')
+
+        files, files_dir = ep.extract(self.out_path, output_dir=output_dir)
+
+        assert files_dir == output_dir
+        assert sorted(os.path.basename(f) for f in files) == \
+            sorted(self.all_files)
+        with open(os.path.join(output_dir, 'out_file')) as f:
+            assert f.read() == "File contents"
+        # The package is consumed, no decrypted archive is written
+        assert not os.path.exists(self.out_path)
+        assert not os.path.exists(ep.package_name(self.out_path))
+
 
 class TestEncryptingTaskResultPackager(PackageDirContentsFixture):
 
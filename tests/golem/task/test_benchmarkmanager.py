@@ -1,17 +1,41 @@
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 from apps.appsmanager import AppsManager
 
 from golem.model import Performance
-from golem.task.benchmarkmanager import BenchmarkManager
+from golem.task.benchmarkmanager import BenchmarkManager, \
+    hardware_fingerprint
 from golem.testutils import DatabaseFixture, PEP8MixIn
 
 
+def _task_server(num_cores=4, max_memory_size=1024 * 1024):
+    task_server = Mock()
+    task_server.config_desc.num_cores = num_cores
+    task_server.config_desc.max_memory_size = max_memory_size
+    task_server.get_environment_by_id.return_value.docker_images = []
+    return task_server
+
+
+def _benchmarks(*cpu_costs):
+    benchmarks = {}
+    for i, cpu_cost in enumerate(cpu_costs):
+        benchmark = Mock(cpu_cost=cpu_cost)
+        benchmarks['ENV{}'.format(i)] = (benchmark, Mock())
+    return benchmarks
+
+
 class TestBenchmarkManager(DatabaseFixture, PEP8MixIn):
     PEP8_FILES = ['golem/task/benchmarkmanager.py']
 
+    def setUp(self):
+        super().setUp()
+        cpu_model_patch = patch('golem.task.benchmarkmanager.cpu_model',
+                                return_value='CPU')
+        self.cpu_model = cpu_model_patch.start()
+        self.addCleanup(cpu_model_patch.stop)
+
     def test_benchmarks_needed(self):
-        b = BenchmarkManager("NODE1", Mock(), self.path, [])
+        b = BenchmarkManager("NODE1", _task_server(), self.path, [])
         # No Benchmark, no benchmark needed
         assert not b.benchmarks_needed()
 
@@ -21,6 +45,91 @@ class TestBenchmarkManager(DatabaseFixture, PEP8MixIn):
         assert b.benchmarks_needed()
 
         for b_id in b.benchmarks:
-            Performance.update_or_create(b_id, 100)
+            Performance.update_or_create(b_id, 100, b.fingerprint(b_id))
+
+        assert not b.benchmarks_needed()
 
+    def test_benchmarks_needed_fingerprint_changed(self):
+        task_server = _task_server(num_cores=4)
+        b = BenchmarkManager("NODE1", task_server, self.path, _benchmarks(1))
+        Performance.update_or_create('ENV0', 100, b.fingerprint('ENV0'))
         assert not b.benchmarks_needed()
+
+        task_server.config_desc.num_cores = 2
+        assert b.benchmarks_needed()
+
+        # Results stored without a fingerprint are not reused
+        Performance.update_or_create('ENV0', 100)
+        assert b.outdated_benchmarks() == {'ENV0'}
+
+    def test_fingerprint(self):
+        config_desc = Mock(num_cores=4, max_memory_size=1024)
+        image = Mock(get_local_id=Mock(return_value='sha256:abc'))
+        fingerprint = hardware_fingerprint(config_desc, [image])
+        assert fingerprint == hardware_fingerprint(config_desc, [image])
+
+        image.get_local_id.return_value = 'sha256:def'
+        assert fingerprint != hardware_fingerprint(config_desc, [image])
+
+        image.get_local_id.return_value = 'sha256:abc'
+        self.cpu_model.return_value = 'Other CPU'
+        assert fingerprint != hardware_fingerprint(config_desc, [image])
+
+    def test_run_all_benchmarks_reuses_results(self):
+        b = BenchmarkManager("NODE1", _task_server(), self.path,
+                             _benchmarks(1, 1))
+        Performance.update_or_create('ENV0', 100, b.fingerprint('ENV0'))
+        b.run_benchmark = Mock()
+
+        b.run_all_benchmarks()
+        assert b.run_benchmark.call_count == 1
+        assert b.run_benchmark.call_args[0][2] == 'ENV1'
+
+        b.run_benchmark.reset_mock()
+        b.run_all_benchmarks(force=True)
+        assert b.run_benchmark.call_count == 2
+
+    def test_run_all_benchmarks_cpu_budget(self):
+        b = BenchmarkManager("NODE1", _task_server(num_cores=4), self.path,
+                             _benchmarks(2, 2, 1, None))
+        b.run_benchmark = Mock()
+
+        b.run_all_benchmarks()
+        # Two benchmarks using 2 cores each fill the budget
+        assert b.run_benchmark.call_count == 2
+        started = [c[0][2] for c in b.run_benchmark.call_args_list]
+        assert started == ['ENV0', 'ENV1']
+
+        success = b.run_benchmark.call_args_list[0][0][3]
+        success(1.0)
+        assert b.run_benchmark.call_count == 3
+        # Callbacks are only effective once
+        success(1.0)
+        assert b.run_benchmark.call_count == 3
+
+        # A benchmark that uses all cores waits for the others to finish
+        b.run_benchmark.call_args_list[1][0][4](Exception('error'))
+        assert b.run_benchmark.call_count == 3
+        b.run_benchmark.call_args_list[2][0][3](1.0)
+        assert b.run_benchmark.call_count == 4
+        assert b.run_benchmark.call_args[0][2] == 'ENV3'
+
+    def test_run_benchmark_start_failure(self):
+        b = BenchmarkManager("NODE1", _task_server(num_cores=1), self.path,
+                             _benchmarks(1, 1))
+        b.run_benchmark = Mock(side_effect=[Exception('error'), None])
+        callback, errback = Mock(), Mock()
+
+        b.run_benchmark_for_env_id('ENV0', callback, errback)
+        assert errback.call_count == 1
+        assert not callback.called
+
+        # The budget was released, the next benchmark is started at once
+        b.run_benchmark_for_env_id('ENV1', callback, errback)
+        assert b.run_benchmark.call_count == 2
+
+    def test_run_benchmark_for_unknown_env(self):
+        b = BenchmarkManager("NODE1", _task_server(), self.path,
+                             _benchmarks(1))
+        with self.assertRaises(Exception):
+            b.run_benchmark_for_env_id('UNKNOWN', Mock(), Mock())
@@ -1,16 +1,22 @@
-from unittest import TestCase
-from golem.task.taskarchiver import TaskArchiver, Archive, ArchTask, TimeInterval
+import os
+import pickle
+from golem.appconfig import TASKARCHIVE_FILENAME
+from golem.model import ArchivedTask, ArchiveDay, ArchiveDayCount
+from golem.task.taskarchiver import TaskArchiver, Archive, ArchTask, \
+    TimeInterval
 from golem.environments.environment import SupportStatus, UnsupportReason
 from golem.task.taskbase import TaskHeader
 from golem.core.common import timeout_to_deadline, datetime_to_timestamp
+from golem.testutils import DatabaseFixture
 import time
 import pytz
 from datetime import datetime, timedelta
 from uuid import uuid4
 
 
-class TestTaskArchiver(TestCase):
+class TestTaskArchiver(DatabaseFixture):
     def setUp(self):
+        super().setUp()
         self.ssok = SupportStatus.ok()
         self.ssem = SupportStatus.err(
             {UnsupportReason.ENVIRONMENT_MISSING: "env1"})
@@ -184,3 +190,81 @@ class TestTaskArchiver(TestCase):
         ta.do_maintenance()
         rep = ta.get_unsupport_reasons(5)
         self.assertEqual(self.get_row(rep, UnsupportReason.MAX_PRICE), (2, 4))
+
+    def test_aggregates_updated_in_place(self):
+        ta = TaskArchiver()
+        past_deadline = timeout_to_deadline(-36000)
+        today = datetime.now(pytz.utc)
+        todayts = datetime_to_timestamp(today)
+        for max_price in (3, 5):
+            th = self.header(max_price, deadline=past_deadline,
+                             last_checking=todayts)
+            ta.add_task(th)
+            ta.add_support_status(th.task_id, self.ssmp)
+            ta.do_maintenance()
+
+        assert ArchivedTask.select().count() == 0
+        day = ArchiveDay.get()
+        assert (day.num_tasks, day.sum_max_price) == (2, 8)
+        counts = {(c.kind, c.value): c.count
+                  for c in ArchiveDayCount.select()}
+        assert counts == {
+            (ArchiveDayCount.REASON, UnsupportReason.MAX_PRICE.value): 2,
+            (ArchiveDayCount.MIN_VERSION, "4"): 2,
+        }
+        rep = ta.get_unsupport_reasons(1, today)
+        self.assertEqual(self.get_row(rep, UnsupportReason.MAX_PRICE), (2, 4))
+
+    def test_purge_old_days(self):
+        ta = TaskArchiver()
+        past_deadline = timeout_to_deadline(-36000)
+        old = datetime.now(pytz.utc) - timedelta(days=400)
+        th = self.header(3, deadline=past_deadline,
+                         last_checking=datetime_to_timestamp(old))
+        ta.add_task(th)
+        ta.add_support_status(th.task_id, self.ssmp)
+        ta.do_maintenance()
+        assert ArchiveDay.select().count() == 0
+        assert ArchiveDayCount.select().count() == 0
+
+    def test_migrate_pickled_archive(self):
+        today = datetime.now(pytz.utc)
+        back1 = today - timedelta(days=1)
+        archive = Archive()
+        tsk = ArchTask(self.header(7, last_checking=datetime_to_timestamp(
+            today)))
+        tsk.unsupport_reasons = [UnsupportReason.MAX_PRICE]
+        tsk.requesting_trust = 0.5
+        archive.tasks[tsk.uuid] = tsk
+        interval = TimeInterval(back1.replace(hour=0, minute=0, second=0,
+                                              microsecond=0))
+        interval.merge_task(ArchTask(self.header(5, min_version="2")))
+        interval.cnt_unsupport_reasons.update([UnsupportReason.APP_VERSION])
+        archive.intervals[interval.start_date] = interval
+
+        dump_file = os.path.join(self.tempdir, TASKARCHIVE_FILENAME)
+        with open(dump_file, 'wb') as f:
+            pickle.dump(archive, f)
+
+        ta = TaskArchiver(self.tempdir)
+        assert not os.path.exists(dump_file)
+        assert ArchivedTask.get().requesting_trust == 0.5
+
+        rep = ta.get_unsupport_reasons(2, today)
+        self.assertEqual(self.get_row(rep, UnsupportReason.MAX_PRICE), (1, 6))
+        self.assertEqual(self.get_row(rep, UnsupportReason.APP_VERSION),
+                         (1, "2"))
+        rep = ta.get_unsupport_reasons(1, today)
+        self.assertEqual(self.get_row(rep, UnsupportReason.MAX_PRICE), (1, 7))
+        self.assertEqual(self.get_row(rep, UnsupportReason.APP_VERSION),
+                         (0, "4"))
+
+    def test_migrate_broken_archive(self):
+        dump_file = os.path.join(self.tempdir, TASKARCHIVE_FILENAME)
+        with open(dump_file, 'wb') as f:
+            f.write(b'not a pickle')
+        ta = TaskArchiver(self.tempdir)
+        assert os.path.exists(dump_file)
+        rep = ta.get_unsupport_reasons(5)
+        for r in UnsupportReason:
+            self.assertEqual(self.get_row(rep, r), (0, None))
@@ -240,6 +240,34 @@ class TestTaskComputer(DatabaseFixture, LogTestCase):
         tc.counting_task = None
         tc.change_config(mock.Mock(), in_background=False)
 
+    def test_change_config_benchmarks(self):
+        benchmark_manager = self.task_server.benchmark_manager
+        benchmark_manager.benchmarks_needed.return_value = True
+        with mock.patch('golem.task.taskcomputer.DockerManager.install',
+                        return_value=mock.Mock(docker_machine=None)):
+            tc = TaskComputer("ABC", self.task_server,
+                              use_docker_manager=False)
+
+        # Results measured with the current fingerprint are reused on start
+        benchmark_manager.run_all_benchmarks.assert_called_once_with(
+            force=False)
+
+        # Benchmarks requested explicitly are always run
+        benchmark_manager.run_all_benchmarks.reset_mock()
+        tc.change_config(mock.Mock(), in_background=False,
+                         run_benchmarks=True)
+        benchmark_manager.run_all_benchmarks.assert_called_once_with(
+            force=True)
+
+        tc.use_docker_manager = True
+        tc.docker_manager.docker_machine = 'default'
+        tc.docker_manager.update_config = lambda x, y, z: y()
+        benchmark_manager.run_all_benchmarks.reset_mock()
+        tc.change_config(mock.Mock(), in_background=False,
+                         run_benchmarks=True)
+        benchmark_manager.run_all_benchmarks.assert_called_once_with(
+            force=True)
+
     def test_event_listeners(self):
         client = mock.Mock()
         task_server = self.task_server
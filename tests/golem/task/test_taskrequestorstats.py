@@ -1,4 +1,9 @@
+import itertools
+import random
+import time
+from collections import defaultdict
 from unittest import TestCase
+from unittest.mock import patch
 
 from pydispatch import dispatcher
 
@@ -751,3 +756,210 @@ class TestRequestorTaskStatsManager(TestCase):
             task_state=TaskState())
         self.assertEqual(rtsm.get_current_stats(), EMPTY_CURRENT_STATS)
         self.assertEqual(rtsm.get_finished_stats(), EMPTY_FINISHED_STATS)
+
+
+class LegacyTaskInfo(TaskInfo):
+    """TaskInfo counting by scanning stored messages, as it used to be.
+
+    Serves as a reference for the event-driven counters of TaskInfo.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+        self.subtask_messages = defaultdict(list)
+
+    def got_task_message(self, msg, latest_status):
+        super().got_task_message(msg, latest_status)
+        self.messages.append(msg)
+
+    def got_subtask_message(self, subtask_id, msg, latest_status):
+        super().got_subtask_message(subtask_id, msg, latest_status)
+        self.subtask_messages[subtask_id].append(msg)
+
+    def _all_subtask_messages(self):
+        for subtask_id in self.subtasks:
+            yield subtask_id, self.subtask_messages[subtask_id]
+
+    def verified_results_count(self):
+        return len([st for st in self.subtasks.values()
+                    if st.latest_status == SubtaskStatus.finished])
+
+    def _subtasks_count_specific_ops(self, op):
+        return len([msg for _, msgs in self._all_subtask_messages()
+                    for msg in msgs if msg.op == op])
+
+    def not_accepted_results_count(self):
+        return self._subtasks_count_specific_ops(SubtaskOp.NOT_ACCEPTED)
+
+    def timeout_count(self):
+        return self._subtasks_count_specific_ops(SubtaskOp.TIMEOUT)
+
+    def failed_count(self):
+        return self._subtasks_count_specific_ops(SubtaskOp.FAILED)
+
+    def not_downloaded_count(self):
+        cnt = 0
+        for _, msgs in self._all_subtask_messages():
+            download_in_progress = False
+            for msg in msgs:
+                if msg.op == SubtaskOp.RESULT_DOWNLOADING:
+                    download_in_progress = True
+                elif msg.op in [SubtaskOp.FINISHED, SubtaskOp.NOT_ACCEPTED]:
+                    download_in_progress = False
+            if download_in_progress:
+                cnt += 1
+        return cnt
+
+    def total_time(self):
+        start_time = 0.0
+        finish_time = 0.0
+
+        if not self.is_completed():
+            finish_time = time.time()
+
+        for msg in reversed(self.messages):
+            if (msg.op in [TaskOp.CREATED, TaskOp.RESTORED]
+                    and not start_time):
+                start_time = msg.ts
+            elif (msg.op in [TaskOp.FINISHED, TaskOp.NOT_ACCEPTED,
+                             TaskOp.ABORTED, TaskOp.TIMEOUT]
+                  and not finish_time):
+                finish_time = msg.ts
+
+        assert finish_time >= start_time
+        return finish_time - start_time
+
+    def had_failures_or_timeouts(self):
+        for msg in self.messages:
+            if msg.op in [TaskOp.NOT_ACCEPTED, TaskOp.TIMEOUT]:
+                return True
+        for _, msgs in self._all_subtask_messages():
+            for msg in msgs:
+                if msg.op in [SubtaskOp.FAILED, SubtaskOp.NOT_ACCEPTED,
+                              SubtaskOp.TIMEOUT]:
+                    return True
+        return False
+
+    def in_progress_subtasks_count(self):
+        if self.is_completed():
+            return 0
+
+        cnt = 0
+        for subtask_id, msgs in self._all_subtask_messages():
+            if self.subtasks[subtask_id].latest_status in [
+                    SubtaskStatus.finished, SubtaskStatus.failure]:
+                continue
+            in_progress = False
+            for msg in msgs:
+                if msg.op == SubtaskOp.ASSIGNED:
+                    in_progress = True
+                elif msg.op in [SubtaskOp.TIMEOUT, SubtaskOp.FINISHED,
+                                SubtaskOp.FAILED, SubtaskOp.NOT_ACCEPTED]:
+                    in_progress = False
+            if in_progress:
+                cnt += 1
+        return cnt
+
+
+class TestCountersEquivalence(TestCase):
+    """Replays message streams through the event-driven counters and
+    through the legacy message-scanning implementation"""
+
+    TASK_OPS = {
+        TaskOp.CREATED: TaskStatus.notStarted,
+        TaskOp.STARTED: TaskStatus.waiting,
+        TaskOp.RESTARTED: TaskStatus.waiting,
+        TaskOp.RESTORED: TaskStatus.computing,
+        TaskOp.FINISHED: TaskStatus.finished,
+        TaskOp.NOT_ACCEPTED: TaskStatus.finished,
+        TaskOp.TIMEOUT: TaskStatus.timeout,
+        TaskOp.ABORTED: TaskStatus.aborted,
+        TaskOp.WORK_OFFER_RECEIVED: None,
+    }
+    SUBTASK_OPS = {
+        SubtaskOp.ASSIGNED: SubtaskStatus.starting,
+        SubtaskOp.RESULT_DOWNLOADING: SubtaskStatus.downloading,
+        SubtaskOp.FINISHED: SubtaskStatus.finished,
+        SubtaskOp.NOT_ACCEPTED: SubtaskStatus.failure,
+        SubtaskOp.FAILED: SubtaskStatus.failure,
+        SubtaskOp.TIMEOUT: SubtaskStatus.failure,
+        SubtaskOp.RESTARTED: SubtaskStatus.restarted,
+    }
+
+    @classmethod
+    def _record_stream(cls, seed, length=400, tasks=3, subtasks=6):
+        """A random stream of (task_id, subtask_id, op, status) events"""
+        rand = random.Random(seed)
+        stream = []
+        for task in range(tasks):
+            stream.append(('task{}'.format(task), None, TaskOp.CREATED,
+                           TaskStatus.notStarted))
+        for _ in range(length):
+            task_id = 'task{}'.format(rand.randrange(tasks))
+            if rand.random() < 0.2:
+                op = rand.choice(list(cls.TASK_OPS))
+                stream.append((task_id, None, op, cls.TASK_OPS[op]))
+            else:
+                op = rand.choice(list(cls.SUBTASK_OPS))
+                subtask_id = '{}.st{}'.format(task_id,
+                                              rand.randrange(subtasks))
+                stream.append((task_id, subtask_id, op, cls.SUBTASK_OPS[op]))
+        return stream
+
+    @staticmethod
+    def _replay(stream, task_info_class):
+        """Feeds the stream to RequestorTaskStats and collects all
+        statistics after every message"""
+        clock = itertools.count(1)
+        states = defaultdict(TaskState)
+        snapshots = []
+        with patch('golem.task.taskrequestorstats.TaskInfo',
+                   task_info_class), \
+                patch('golem.task.taskrequestorstats.time.time',
+                      side_effect=lambda: float(next(clock))):
+            rs = RequestorTaskStats()
+            for task_id, subtask_id, op, status in stream:
+                state = states[task_id]
+                if subtask_id:
+                    subtask_state = state.subtask_states.setdefault(
+                        subtask_id, SubtaskState())
+                    subtask_state.subtask_status = status
+                elif status:
+                    state.status = status
+                rs.on_message(task_id, state, subtask_id, op)
+                snapshots.append((
+                    rs.get_current_stats(),
+                    rs.get_finished_stats(),
+                    {t: rs.get_task_stats(t) for t in rs.tasks},
+                    {t: rs.tasks[t].in_progress_subtasks_count()
+                     for t in rs.tasks}))
+        return snapshots
+
+    def test_random_streams(self):
+        for seed in range(20):
+            stream = self._record_stream(seed)
+            self.assertEqual(self._replay(stream, TaskInfo),
+                             self._replay(stream, LegacyTaskInfo),
+                             "seed {}".format(seed))
+
+    def test_task_info_streams(self):
+        rand = random.Random(0)
+        ops = list(self.SUBTASK_OPS.items())
+        new, legacy = TaskInfo(), LegacyTaskInfo()
+        for ti in (new, legacy):
+            ti.got_task_message(TaskMsg(ts=1.0, op=TaskOp.CREATED),
+                                TaskStatus.waiting)
+        for i in range(1000):
+            op, status = rand.choice(ops)
+            subtask_id = 'st{}'.format(rand.randrange(20))
+            for ti in (new, legacy):
+                ti.got_subtask_message(subtask_id,
+                                       TaskMsg(ts=2.0 + i, op=op), status)
+            for method in ['subtask_count', 'collected_results_count',
+                           'verified_results_count', 'timeout_count',
+                           'failed_count', 'not_downloaded_count',
+                           'had_failures_or_timeouts',
+                           'in_progress_subtasks_count']:
+                self.assertEqual(getattr(new, method)(),
+                                 getattr(legacy, method)(), method)
@@ -10,6 +10,7 @@ import uuid
 from unittest import TestCase
 from unittest.mock import patch, ANY, Mock, MagicMock
 
+import golem_messages
 from golem_messages import message
 
 from golem import model, testutils
@@ -138,6 +139,7 @@ class TestTaskSession(ConcentMessageMixin, LogTestCase,
         conn.server.task_manager.tasks_states[ctd['task_id']] = task_state
 
         ts2.task_manager.get_next_subtask.return_value = (ctd, False, False)
+        ts2._count_exchange = Mock()
         ts2.interpret(mt)
         ms = ts2.conn.send_message.call_args[0][0]
         self.assertIsInstance(ms, message.CannotAssignTask)
@@ -776,7 +778,7 @@ class ForceReportComputedTaskTestCase(testutils.DatabaseFixture,
             node=node_id,
             msg_date=datetime.datetime.now(),
             msg_cls='TaskToCompute',
-            msg_data=pickle.dumps(task_to_compute),
+            msg_data=golem_messages.dump(task_to_compute, None, None),
             local_role=model.Actor.Provider,
             remote_role=model.Actor.Requestor,
         )
@@ -19,8 +19,8 @@ from golem import testutils
 from golem.client import Client, ClientTaskComputerEventListener, \
     DoWorkService, MonitoringPublisherService, \
     NetworkConnectionPublisherService, \
-    ResourceCleanerService, TaskArchiverService, \
-    TaskCleanerService
+    ResourceCleanerService, ResourceIndexerService, TaskArchiverService, \
+    TaskCleanerService, TrustLedgerService
 from golem.clientconfigdescriptor import ClientConfigDescriptor
 from golem.core.common import timestamp_to_datetime, timeout_to_string
 from golem.core.deferred import sync_wait
@@ -682,6 +682,38 @@ class TestTaskArchiverService(TestWithReactor):
         assert task_archiver.do_maintenance.call_count == 1
 
 
+class TestTrustLedgerService(TestWithReactor):
+
+    @patch('golem.client.dm.flush_local_ranks')
+    def test_run(self, flush):
+        service = TrustLedgerService(interval_seconds=1)
+        service._run()
+        assert flush.call_count == 1
+
+    @patch('golem.client.dm.flush_local_ranks')
+    def test_stop_flushes(self, flush):
+        service = TrustLedgerService(interval_seconds=1000)
+        service.start(now=False)
+        service.stop()
+        assert flush.call_count == 1
+
+
+class TestResourceIndexerService(TestWithReactor):
+
+    @patch('golem.client.resource_indexer')
+    def test_run(self, indexer):
+        service = ResourceIndexerService(interval_seconds=1)
+        service._run()
+        assert indexer.save.call_count == 1
+
+    @patch('golem.client.resource_indexer')
+    def test_stop_saves(self, indexer):
+        service = ResourceIndexerService(interval_seconds=1000)
+        service.start(now=False)
+        service.stop()
+        assert indexer.save.call_count == 1
+
+
 class TestResourceCleanerService(TestWithReactor):
 
     def test_run(self):
@@ -1235,6 +1267,30 @@ class TestClientRPCMethods(TestWithDatabase, LogTestCase):
         StatusPublisher.publish(*status)
         assert self.client.get_golem_status() == status
 
+    def test_startup_timings(self, *_):
+        assert self.client.get_startup_timings() == []
+
+        self.client.startup_graph = Mock()
+        self.client.startup_graph.get_timings.return_value = [{'name': 'rpc'}]
+        assert self.client.get_startup_timings() == [{'name': 'rpc'}]
+
+    @patch('golem.client.PortMapperManager')
+    def test_discover_upnp_once(self, port_mapper_manager, *_):
+        self.client.discover_upnp()
+        self.client.start_upnp([40102])
+
+        port_mapper = port_mapper_manager.return_value
+        assert port_mapper_manager.call_count == 1
+        assert port_mapper.discover.call_count == 1
+        port_mapper.create_mapping.assert_called_once_with(40102)
+
+    def test_collect_network_info(self, collect_network_info, *_):
+        self.client.collect_network_info()
+        collect_network_info.assert_called_once_with(
+            self.client.config_desc.seed_host,
+            use_ipv6=self.client.config_desc.use_ipv6)
+        assert self.client._network_info_collected
+
     def test_port_status(self, *_):
         port = random.randint(1, 65535)
         self.assertIsNone(self.client.node.port_statuses.get(port))
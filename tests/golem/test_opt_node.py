@@ -1,7 +1,8 @@
 from unittest.mock import patch, Mock, ANY
 
 from click.testing import CliRunner
-from twisted.internet.defer import Deferred
+from twisted.internet.defer import Deferred, maybeDeferred
+from twisted.python.failure import Failure
 
 import golem.argsparser as argsparser
 from golem.appconfig import AppConfig
@@ -382,6 +383,10 @@ def done_deferred(*_):
     return deferred
 
 
+def call_deferred(fn, *args, **kwargs):
+    return maybeDeferred(fn, *args, **kwargs)
+
+
 def chain_function(_, fn, *args, **kwargs):
     result = fn(*args, **kwargs)
     deferred = Deferred()
@@ -391,12 +396,13 @@ def chain_function(_, fn, *args, **kwargs):
 
 @patch('golem.node.Node._start_keys_auth')
 @patch('golem.node.Node._start_docker')
+@patch('golem.node.Node._start_hyperdrive')
+@patch('golem.node.Node._load_apps')
 @patch('golem.node.async_run', mock_async_run)
 @patch('golem.node.chain_function', chain_function)
 @patch('golem.node.threads.deferToThread', done_deferred)
 @patch('golem.node.CrossbarRouter', Mock(_start_node=done_deferred))
 @patch('golem.node.Session', Mock(connect=done_deferred))
-@patch('golem.node.gatherResults')
 @patch('twisted.internet.reactor', create=True)
 class TestOptNode(TempDirFixture):
 
@@ -405,7 +411,8 @@ class TestOptNode(TempDirFixture):
             self.node.client.quit()
         super().tearDown()
 
-    def test_start_rpc_router(self, reactor, *_):
+    @patch('golem.node.Node._setup_client')
+    def test_start_rpc_router(self, _setup_client, reactor, *_):
         # given
         config_desc = ClientConfigDescriptor()
         config_desc.rpc_address = '127.0.0.1'
@@ -425,15 +432,14 @@ class TestOptNode(TempDirFixture):
         assert reactor.addSystemEventTrigger.call_args[0] == (
             'before', 'shutdown', self.node.rpc_router.stop)
 
-    def test_start_creates_client(self, reactor, mock_gather_results, *_):
+    @patch('golem.node.Node._run')
+    def test_start_creates_client(self, _run, reactor, *mocks):
         # given
         keys_auth = Mock()
+        start_keys_auth = mocks[-1]
+        start_keys_auth.return_value = keys_auth
         config_descriptor = ClientConfigDescriptor()
 
-        mock_gather_results.return_value = mock_gather_results
-        mock_gather_results.addCallbacks.side_effect = \
-            lambda callback, _: callback([keys_auth, None])
-
         # when
         self.node = Node(datadir=self.path,
                          config_desc=config_descriptor,
@@ -453,17 +459,7 @@ class TestOptNode(TempDirFixture):
 
     @patch('golem.node.Node._run')
     def test_start_creates_client_and_calls_run(
-            self, mock_run, reactor, mock_gather_results, mock_session, *_):
-
-        # given
-        mock_gather_results.return_value = mock_gather_results
-        mock_gather_results.addCallbacks.side_effect = \
-            lambda callback, _: callback([Mock(), None])
-
-        mock_session.return_value = mock_session
-        mock_session.connect.return_value = mock_session
-        mock_session.addCallbacks.side_effect = \
-            lambda callback, _: callback(None)
+            self, mock_run, reactor, load_apps, *_):
 
         # when
         self.node = Node(datadir=self.path,
@@ -477,42 +473,104 @@ class TestOptNode(TempDirFixture):
         assert self.node.client.rpc_publisher
         assert self.node.client.rpc_publisher.session == self.node.rpc_session
         assert self.node.rpc_session.connect.called  # pylint: disable=no-member
-        assert mock_run.called
+        mock_run.assert_called_once_with()
         assert reactor.addSystemEventTrigger.call_count == 2
 
     def test_start_starts_client(
-            self, reactor, mock_gather_results, mock_session, *_):
+            self, reactor, load_apps, start_hyperdrive, *_):
 
         # given
-        mock_gather_results.return_value = mock_gather_results
-        mock_gather_results.addCallbacks.side_effect = \
-            lambda callback, _: callback([Mock(), None])
-
-        mock_session.return_value = mock_session
-        mock_session.connect.return_value = mock_session
-        mock_session.addCallbacks.side_effect = \
-            lambda callback, _: callback(None)
-
         parsed_peer = argsparser.parse_peer(
             None,
             None,
             ['10.0.0.10:40104'],
         )
 
+        config_desc = ClientConfigDescriptor()
+        config_desc.use_upnp = 1
+
         # when
         self.node = Node(datadir=self.path,
-                         config_desc=ClientConfigDescriptor(),
+                         config_desc=config_desc,
                          peers=parsed_peer,
                          use_docker_manager=False)
 
         self.node._client_factory = Mock()
         self.node._setup_apps = Mock()
 
-        self.node.start()
+        with patch('golem.node.threads.deferToThread', call_deferred):
+            self.node.start()
 
         # then
-        assert self.node._setup_apps.called
+        self.node._setup_apps.assert_called_once_with(load_apps.return_value)
+        assert self.node.client.collect_network_info.call_count == 1
+        assert self.node.client.discover_upnp.call_count == 1
+        assert self.node.client.daemon_manager == \
+            start_hyperdrive.return_value
         assert self.node.client.sync.called
         assert self.node.client.start.call_count == 1
         self.node.client.connect.assert_called_with(parsed_peer[0])
         assert reactor.addSystemEventTrigger.call_count == 2
+
+        timings = self.node.client.startup_graph.get_timings()
+        assert [t['name'] for t in timings] == [
+            'rpc', 'keys', 'docker', 'hyperdrive', 'apps', 'client',
+            'network', 'upnp', 'environments', 'run']
+        assert all(t['status'] == 'done' for t in timings)
+
+    def test_start_without_upnp(self, *_):
+        # when
+        self.node = Node(datadir=self.path,
+                         config_desc=ClientConfigDescriptor(),
+                         use_docker_manager=False)
+        self.node._client_factory = Mock()
+        self.node._setup_apps = Mock()
+
+        with patch('golem.node.threads.deferToThread', call_deferred):
+            self.node.start()
+
+        # then
+        assert self.node.client.collect_network_info.call_count == 1
+        assert not self.node.client.discover_upnp.called
+        assert self.node.client.start.call_count == 1
+
+    def test_start_stage_failure(self, reactor, *mocks):
+        # given
+        start_keys_auth = mocks[-1]
+        start_keys_auth.side_effect = Exception("keys")
+
+        # when
+        self.node = Node(datadir=self.path,
+                         config_desc=ClientConfigDescriptor(),
+                         use_docker_manager=False)
+        self.node.start()
+
+        # then
+        assert not self.node.client
+        reactor.callFromThread.assert_called_once_with(reactor.stop)
+
+
+@patch('golem.node.threads.deferToThread', call_deferred)
+@patch('golem.node.HyperdriveDaemonManager')
+@patch('twisted.internet.reactor', create=True)
+class TestOptNodeHyperdrive(TempDirFixture):
+
+    def _create_node(self):
+        return Node(datadir=self.path,
+                    config_desc=ClientConfigDescriptor(),
+                    use_docker_manager=False)
+
+    def test_stopped_on_shutdown(self, reactor, daemon_manager_cls):
+        daemon_manager = daemon_manager_cls.return_value
+        deferred = self._create_node()._start_hyperdrive()
+
+        daemon_manager.start.assert_called_once_with()
+        reactor.addSystemEventTrigger.assert_called_once_with(
+            'before', 'shutdown', daemon_manager.stop)
+        assert deferred.result is daemon_manager
+
+    def test_stopped_on_startup_error(self, _reactor, daemon_manager_cls):
+        node = self._create_node()
+        node._start_hyperdrive()
+        node._startup_error(Failure(Exception('docker')))
+        daemon_manager_cls.return_value.stop.assert_called_once_with()
@@ -166,12 +166,69 @@ class TestIncomesKeeper(TestWithDatabase, PEP8MixIn):
         income2 = Income.get(sender_node=sender_node_id2, subtask=subtask_id2)
         assert transaction_id2[2:] == income2.transaction
 
+    def test_expect_payer_address(self):
+        sender_node_id = '0x' + 64 * 'a'
+        income = self.incomes_keeper.expect(
+            sender_node_id=sender_node_id,
+            subtask_id='sample_subtask_id',
+            value=1,
+        )
+        assert income.refresh().payer_address == pubkeytoaddr(sender_node_id)
+
+    def test_received_batch_transfer_amount_too_small(self):
+        sender_node_id = '0x' + 64 * 'a'
+        for subtask_id, value, accepted_ts in (('s1', 10, 2),
+                                               ('s2', 20, 1),
+                                               ('s3', 30, 3)):
+            self._test_expect_income(sender_node_id, subtask_id, value)
+            self.incomes_keeper.update_awaiting(subtask_id, accepted_ts)
+
+        transaction_id = '0x' + 64 * 'b'
+        self.incomes_keeper.received_batch_transfer(
+            transaction_id,
+            pubkeytoaddr(sender_node_id),
+            25,
+            3,
+        )
+        # Incomes are paid in the order of acceptance
+        incomes = {i.subtask: i for i in Income.select()}
+        assert incomes['s2'].value == 20
+        assert incomes['s1'].value == 5
+        assert incomes['s3'].value == 0
+        assert all(i.transaction == transaction_id[2:]
+                   for i in incomes.values())
+
+    def test_received_batch_transfer_other_payer(self):
+        sender_node_id = '0x' + 64 * 'a'
+        self._create_income(
+            sender_node=sender_node_id,
+            payer_address=pubkeytoaddr('0x' + 64 * 'b'),
+            accepted_ts=1)
+        self.incomes_keeper.received_batch_transfer(
+            '0x' + 64 * 'c',
+            pubkeytoaddr(sender_node_id),
+            10,
+            1,
+        )
+        assert Income.get().transaction is None
+
     @staticmethod
     def _create_income(**kwargs):
         income = model_factories.Income(**kwargs)
         income.save(force_insert=True)
         return income
 
+    @freeze_time()
+    def test_update_overdue_incomes_many(self):
+        created_date = datetime.now() - timedelta(seconds=2*PAYMENT_DEADLINE)
+        overdue = [self._create_income(created_date=created_date)
+                   for _ in range(5)]
+        self._create_income(created_date=datetime.now())
+        incomes = self.incomes_keeper.update_overdue_incomes()
+        self.assertCountEqual(incomes, overdue)
+        assert all(income.overdue for income in incomes)
+        assert Income.select().where(Income.overdue == True).count() == 5  # noqa pylint: disable=singleton-comparison
+
     def test_update_overdue_incomes_none(self):
         incomes = self.incomes_keeper.update_overdue_incomes()
         self.assertSequenceEqual(incomes, ())